@@ -34,6 +34,9 @@ cat > "$SCRIPT_DIR/.env" << 'EOF'
 UF_HARDWARE_CONNECTED=true
 UF_DISPLAY_FULLSCREEN=true
 UF_LOG_LEVEL=INFO
+# Buffered, rotating file log instead of per-line journal writes
+UF_LOG_DIR=logs
+UF_LOG_STDERR=false
 EOF
 
 # ── 4. Add user to GPIO group ───────────────────────────────────────────────
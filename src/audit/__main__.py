@@ -0,0 +1,141 @@
+"""
+Relay audit log CLI.
+
+    python -m src.audit export --channel "Pump 2" --from 2026-03-01 --to 2026-04-01
+    python -m src.audit stats
+    python -m src.audit bench --years 3
+"""
+
+import argparse
+import csv
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.audit.event_log import OP_NAMES, OP_ON, OP_OFF, OP_ALL_OFF, EventLog
+
+
+def _labels() -> dict[int, str]:
+    from src.config import VALVE_LABELS
+    return VALVE_LABELS
+
+
+def _parse_channel(value: str) -> int:
+    if value.isdigit():
+        return int(value)
+    for cid, label in _labels().items():
+        if label.lower() == value.lower():
+            return cid
+    raise argparse.ArgumentTypeError(f"unknown channel {value!r}")
+
+
+def _parse_time(value: str) -> int:
+    return int(datetime.fromisoformat(value).timestamp() * 1000)
+
+
+def _default_dir() -> Path:
+    from src.config import AUDIT_DIR
+    return AUDIT_DIR
+
+
+def cmd_export(args) -> None:
+    log = EventLog(args.dir, background=False)
+    start = args.start if args.start is not None else 0
+    end = args.end if args.end is not None else int(time.time() * 1000) + 1
+    channels = args.channel or None
+    labels = _labels()
+    rows = log.query(start, end, channels)
+
+    out = sys.stdout
+    if args.format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(["time", "channel", "label", "op"])
+        for ts, ch, op in rows:
+            writer.writerow([
+                datetime.fromtimestamp(ts / 1000).isoformat(timespec="milliseconds"),
+                ch, labels.get(ch, "ALL" if op == OP_ALL_OFF else ch), OP_NAMES[op],
+            ])
+    else:
+        for ts, ch, op in rows:
+            out.write(json.dumps({"t": ts, "c": ch, "op": OP_NAMES[op]}) + "\n")
+
+
+def cmd_stats(args) -> None:
+    log = EventLog(args.dir, background=False)
+    segs = log.segments()
+    print(f"segments: {len(segs)}  records: {log.count()}")
+    if segs:
+        print(f"first: {datetime.fromtimestamp(segs[0][0] / 1000)}")
+        print(f"last:  {datetime.fromtimestamp(segs[-1][0] / 1000)}")
+
+
+def cmd_bench(args) -> None:
+    """Write `years` of synthetic transitions, then time a month-long range query."""
+    root = Path(tempfile.mkdtemp(prefix="uf-audit-"))
+    rng = random.Random(1)
+    try:
+        log = EventLog(root, background=False)
+        t = _parse_time("2024-01-01")
+        end = t + int(args.years * 365 * 86_400_000)
+        step = 3_600_000 / args.rate
+        n = 0
+        t0 = time.perf_counter()
+        while t < end:
+            ch = rng.randint(1, 7)
+            log.append(ch, OP_ON if rng.random() < 0.5 else OP_OFF, int(t))
+            n += 1
+            if n % 4096 == 0:
+                log.flush()
+            t += rng.expovariate(1 / step)
+        log.flush()
+        write_s = time.perf_counter() - t0
+
+        q_start, q_end = _parse_time("2025-03-01"), _parse_time("2025-04-01")
+        t0 = time.perf_counter()
+        hits = sum(1 for _ in log.query(q_start, q_end, [7]))
+        query_s = time.perf_counter() - t0
+
+        size = sum(p.stat().st_size for p in root.iterdir())
+        print(f"wrote {n} events in {write_s:.2f}s  ({n / write_s:,.0f}/s, "
+              f"{size / n:.2f} B/event on disk)")
+        print(f"Pump 2, March 2025: {hits} transitions in {query_s * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.audit",
+                                     description="Relay audit log tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("export", help="export transitions in a time range")
+    p.add_argument("--dir", type=Path, default=None)
+    p.add_argument("--channel", type=_parse_channel, action="append",
+                   help="channel id or label, e.g. 7 or 'Pump 2' (repeatable)")
+    p.add_argument("--from", dest="start", type=_parse_time, help="ISO date/time")
+    p.add_argument("--to", dest="end", type=_parse_time, help="ISO date/time (exclusive)")
+    p.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("stats", help="summarize the log")
+    p.add_argument("--dir", type=Path, default=None)
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("bench", help="write/query throughput on synthetic data")
+    p.add_argument("--years", type=float, default=3.0)
+    p.add_argument("--rate", type=float, default=40.0, help="events per hour")
+    p.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "dir", False) is None:
+        args.dir = _default_dir()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+event_log.py — Append-only binary log of every relay transition.
+
+Each segment covers at most one UTC day and holds fixed 6-byte records:
+
+    events-<base_ms>.bin   header  b"UFEV" <u16 version> <u16 0> <u64 base_ms>
+                           records <u32 ms since base> <u8 channel> <u8 op>
+    events-<base_ms>.idx   sparse index, one <u32 ms since base> <u32 record no>
+                           entry every INDEX_EVERY records
+
+A time-range query picks segments by name, bisects the sparse index and
+seeks straight to the first candidate record instead of scanning.
+"""
+
+import bisect
+import logging
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger("UltraFiltration.Audit")
+
+OP_OFF = 0
+OP_ON = 1
+OP_ALL_OFF = 2
+OP_NAMES = {OP_OFF: "OFF", OP_ON: "ON", OP_ALL_OFF: "ALL_OFF"}
+
+MAGIC = b"UFEV"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHQ")
+_RECORD = struct.Struct("<IBB")
+_INDEX = struct.Struct("<II")
+INDEX_EVERY = 512
+_DAY_MS = 86_400_000
+
+
+class EventLog:
+    """
+    Writer and reader for the relay audit log.
+
+    append() only touches a RAM buffer; a background thread writes it out
+    every `flush_interval_s` (and when it exceeds `buffer_records`), so
+    callers on the control path never wait on the SD card.
+    """
+
+    def __init__(self, directory: Path, flush_interval_s: float = 30.0,
+                 buffer_records: int = 4096, max_segment_records: int = 4_000_000,
+                 background: bool = True):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.flush_interval_s = flush_interval_s
+        self.buffer_records = buffer_records
+        self.max_segment_records = max_segment_records
+
+        self._lock = threading.Lock()
+        self._pending: list[tuple[int, int, int]] = []
+        self._seg_base: int | None = None
+        self._seg_count = 0
+        self._last_ts = 0
+        self._open_last_segment()
+
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(
+                target=self._flush_loop, name="AuditFlush", daemon=True
+            )
+            self._thread.start()
+
+    # ── Writing ──────────────────────────────────────────────────────────
+
+    def append(self, channel: int, op: int, ts_ms: int | None = None) -> None:
+        if ts_ms is None:
+            ts_ms = int(time.time() * 1000)
+        with self._lock:
+            self._pending.append((ts_ms, channel, op))
+            full = len(self._pending) >= self.buffer_records
+        if full:
+            self._wake.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        batch = []
+        for rec in pending:
+            if self._needs_new_segment(rec[0], len(batch)):
+                if batch:
+                    self._write_records(batch)
+                    batch = []
+                self._start_segment(rec[0])
+            batch.append(rec)
+            self._last_ts = rec[0]
+        if batch:
+            self._write_records(batch)
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    # ── Reading ──────────────────────────────────────────────────────────
+
+    def segments(self) -> list[tuple[int, Path]]:
+        segs = []
+        for p in self.dir.glob("events-*.bin"):
+            try:
+                segs.append((int(p.stem[7:]), p))
+            except ValueError:
+                continue
+        return sorted(segs)
+
+    def query(self, start_ms: int, end_ms: int, channels=None):
+        """
+        Yield (ts_ms, channel, op) with start_ms <= ts_ms < end_ms, oldest
+        first. `channels` restricts the result; ALL_OFF records always match
+        because they switch every channel.
+        """
+        wanted = set(channels) if channels is not None else None
+        segs = self.segments()
+        bases = [b for b, _ in segs]
+        # A segment spans at most a day past its base
+        first = bisect.bisect_right(bases, start_ms - _DAY_MS)
+        for base, path in segs[first:]:
+            if base >= end_ms:
+                break
+            if base + _DAY_MS <= start_ms:
+                continue
+            yield from self._scan_segment(base, path, start_ms, end_ms, wanted)
+
+    def count(self) -> int:
+        return sum((p.stat().st_size - _HEADER.size) // _RECORD.size
+                   for _, p in self.segments())
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _scan_segment(self, base, path, start_ms, end_ms, wanted):
+        lo = max(0, start_ms - base)
+        hi = end_ms - base
+        records = (path.stat().st_size - _HEADER.size) // _RECORD.size
+        record_no = self._seek_index(path.with_suffix(".idx"), lo, records)
+        chunk_records = 8192
+        with open(path, "rb") as f:
+            f.seek(_HEADER.size + record_no * _RECORD.size)
+            while True:
+                chunk = f.read(chunk_records * _RECORD.size)
+                if not chunk:
+                    return
+                usable = len(chunk) - len(chunk) % _RECORD.size
+                for off, ch, op in _RECORD.iter_unpack(chunk[:usable]):
+                    if off < lo:
+                        continue
+                    if off >= hi:
+                        return
+                    if wanted is None or ch in wanted or op == OP_ALL_OFF:
+                        yield base + off, ch, op
+
+    @staticmethod
+    def _seek_index(idx_path: Path, offset_ms: int, records: int) -> int:
+        """
+        Record number of the last indexed record strictly before offset_ms.
+        Entries for records past the end of the data (`records`) are ignored.
+        """
+        try:
+            raw = idx_path.read_bytes()
+        except OSError:
+            return 0
+        entries = [e for e in _INDEX.iter_unpack(raw[:len(raw) - len(raw) % _INDEX.size])
+                   if e[1] < records]
+        keys = [e[0] for e in entries]
+        pos = bisect.bisect_left(keys, offset_ms) - 1
+        return entries[pos][1] if pos >= 0 else 0
+
+    def _open_last_segment(self) -> None:
+        segs = self.segments()
+        if not segs:
+            return
+        base, path = segs[-1]
+        size = path.stat().st_size
+        if size < _HEADER.size:
+            path.unlink()
+            return
+        # Drop a torn trailing record left by a power cut
+        torn = (size - _HEADER.size) % _RECORD.size
+        if torn:
+            with open(path, "r+b") as f:
+                f.truncate(size - torn)
+        self._seg_base = base
+        self._seg_count = (size - torn - _HEADER.size) // _RECORD.size
+        self._trim_index(path.with_suffix(".idx"), self._seg_count)
+        if self._seg_count:
+            with open(path, "rb") as f:
+                f.seek(_HEADER.size + (self._seg_count - 1) * _RECORD.size)
+                self._last_ts = base + _RECORD.unpack(f.read(_RECORD.size))[0]
+
+    @staticmethod
+    def _trim_index(idx_path: Path, records: int) -> None:
+        """Cut index entries for records that never reached the data file."""
+        try:
+            raw = idx_path.read_bytes()
+        except OSError:
+            return
+        keep = 0
+        for off in range(0, len(raw) - len(raw) % _INDEX.size, _INDEX.size):
+            if _INDEX.unpack_from(raw, off)[1] >= records:
+                break
+            keep = off + _INDEX.size
+        if keep < len(raw):
+            with open(idx_path, "r+b") as f:
+                f.truncate(keep)
+
+    def _needs_new_segment(self, ts_ms: int, batched: int) -> bool:
+        if self._seg_base is None:
+            return True
+        return (ts_ms < self._last_ts or                     # clock stepped back
+                ts_ms - self._seg_base >= _DAY_MS or
+                self._seg_count + batched >= self.max_segment_records)
+
+    def _start_segment(self, ts_ms: int) -> None:
+        base = ts_ms - ts_ms % _DAY_MS
+        path = self.dir / f"events-{base:013d}.bin"
+        if path.exists():
+            # Day already has a segment (size cap or clock step) — start at ts
+            base = ts_ms
+            path = self.dir / f"events-{base:013d}.bin"
+            while path.exists():
+                base += 1
+                path = self.dir / f"events-{base:013d}.bin"
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, 0, base))
+        self._seg_base = base
+        self._seg_count = 0
+
+    def _write_records(self, records) -> None:
+        base = self._seg_base
+        path = self.dir / f"events-{base:013d}.bin"
+        data = bytearray()
+        index = bytearray()
+        n = self._seg_count
+        for ts, ch, op in records:
+            if n % INDEX_EVERY == 0:
+                index += _INDEX.pack(ts - base, n)
+            data += _RECORD.pack(ts - base, ch, op)
+            n += 1
+        # Records reach the card before the index entries that point at them
+        with open(path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if index:
+            with open(path.with_suffix(".idx"), "ab") as f:
+                f.write(index)
+                f.flush()
+                os.fsync(f.fileno())
+        self._seg_count = n
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(timeout=self.flush_interval_s)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                logger.error("Audit log flush failed: %s", e)
+
+
+class AuditedGPIO:
+    """
+    Wraps a GPIO backend (GPIOController / MockGPIO) and records every
+    transition in an EventLog; repeated ON/OFF of a relay already in that
+    state is not a transition. Same interface as the wrapped backend.
+    """
+
+    def __init__(self, backend, event_log: EventLog):
+        self._backend = backend
+        self.event_log = event_log
+
+    def turn_on(self, channel_id: int) -> None:
+        was_on = self._backend.is_on(channel_id)
+        self._backend.turn_on(channel_id)
+        if not was_on and self._backend.is_on(channel_id):
+            self.event_log.append(channel_id, OP_ON)
+
+    def turn_off(self, channel_id: int) -> None:
+        was_on = self._backend.is_on(channel_id)
+        self._backend.turn_off(channel_id)
+        if was_on and not self._backend.is_on(channel_id):
+            self.event_log.append(channel_id, OP_OFF)
+
+    def is_on(self, channel_id: int) -> bool:
+        return self._backend.is_on(channel_id)
+
+    def toggle(self, channel_id: int) -> bool:
+        if self.is_on(channel_id):
+            self.turn_off(channel_id)
+            return False
+        self.turn_on(channel_id)
+        return True
+
+    def all_off(self) -> None:
+        self._backend.all_off()
+        self.event_log.append(0, OP_ALL_OFF)
+
+    def force_off(self) -> None:
+        self._backend.force_off()
+        self.event_log.append(0, OP_ALL_OFF)
+
+    def shutdown(self) -> None:
+        self._backend.shutdown()
+        self.event_log.append(0, OP_ALL_OFF)
+        self.event_log.close()
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
@@ -4,14 +4,18 @@ Loads .env and exposes all settings + GPIO pin mapping.
 """
 
 import os
+import socket
 import logging
 from pathlib import Path
-from dotenv import load_dotenv
+from dotenv import dotenv_values, load_dotenv
+
+from src.log_pipeline import setup_logging
 
 # ── Load .env from the project root ──────────────────────────────────────────
 _project_root = Path(__file__).resolve().parent.parent
 _env_path = _project_root / ".env"
 load_dotenv(_env_path)
+ENV_FILE = _env_path
 
 # ── Feature Flags ────────────────────────────────────────────────────────────
 IS_HARDWARE = os.getenv("UF_HARDWARE_CONNECTED", "true").lower() == "true"
@@ -20,10 +24,24 @@ SHOW_CURSOR = os.getenv("UF_SHOW_CURSOR", "true").lower() == "true"
 LOG_LEVEL = os.getenv("UF_LOG_LEVEL", "INFO").upper()
 
 # ── Logging ──────────────────────────────────────────────────────────────────
-logging.basicConfig(
+# Records are queued and written by a background thread. UF_LOG_DIR enables a
+# RAM-buffered, rotating, gzip-compressed file log; UF_LOG_STDERR=false keeps
+# the journal quiet (and off the SD card) on production units.
+LOG_DIR = os.getenv("UF_LOG_DIR", "")
+if LOG_DIR and not Path(LOG_DIR).is_absolute():
+    LOG_DIR = str(_project_root / LOG_DIR)
+LOG_TO_STDERR = os.getenv("UF_LOG_STDERR", "true").lower() == "true"
+LOG_MAX_BYTES = int(os.getenv("UF_LOG_MAX_BYTES", str(1024 * 1024)))
+LOG_BACKUPS = int(os.getenv("UF_LOG_BACKUPS", "7"))
+LOG_FLUSH_S = float(os.getenv("UF_LOG_FLUSH_S", "60"))
+
+setup_logging(
     level=getattr(logging, LOG_LEVEL, logging.INFO),
-    format="%(asctime)s  %(levelname)-8s  %(name)s  %(message)s",
-    datefmt="%H:%M:%S",
+    log_dir=LOG_DIR or None,
+    stderr=LOG_TO_STDERR,
+    max_bytes=LOG_MAX_BYTES,
+    backup_count=LOG_BACKUPS,
+    flush_interval_s=LOG_FLUSH_S,
 )
 logger = logging.getLogger("UltraFiltration")
 
@@ -56,6 +74,11 @@ VALVE_LABELS = {
 # Total number of GPIO channels we manage
 ALL_CHANNEL_IDS = list(PIN_MAP.keys())
 
+# Pumps are switched off before any valve, so a pump never runs against a
+# line that has just been closed (all_off, shutdown, emergency stop).
+PUMP_CHANNEL_IDS = [6, 7]
+OFF_ORDER = PUMP_CHANNEL_IDS + [cid for cid in ALL_CHANNEL_IDS if cid not in PUMP_CHANNEL_IDS]
+
 # ── Default Process Timings (milliseconds) ───────────────────────────────────
 DEFAULT_TIMINGS = {
     "fast_rinse":   60_000,
@@ -68,15 +91,184 @@ DEFAULT_TIMINGS = {
 PUMP_ENGAGE_DELAY = 5_000
 VALVE_CLOSE_DELAY = 5_000
 
+# Auto cycle: open the next process's valves during the previous one's
+# close delay when the two share no valve, so its pump starts sooner
+PIPELINED_TRANSITIONS = os.getenv("UF_PIPELINED", "false").lower() == "true"
+
+# ── Cycle Calendar ───────────────────────────────────────────────────────────
+# Scheduled starts, tariff pauses and maintenance windows (see
+# src/scheduler/cycle_calendar.py). No file, no scheduler.
+SCHEDULE_FILE = Path(os.getenv("UF_SCHEDULE_FILE", str(_project_root / "schedule.json")))
+
+# ── Control Daemon ───────────────────────────────────────────────────────────
+# With UF_CONTROL_DAEMON=true the relays and the cycle run in a separate
+# process (ultra-filt-daemon) and the UI is only a client of it, so a UI
+# crash or restart leaves the plant running. Commands go over the socket;
+# live state is read from the shared-memory block.
+CONTROL_DAEMON = os.getenv("UF_CONTROL_DAEMON", "false").lower() == "true"
+CONTROL_SOCKET = Path(os.getenv("UF_CONTROL_SOCKET", str(_project_root / "control.sock")))
+STATE_SHM_NAME = os.getenv("UF_STATE_SHM", "uf_state")
+# Without the daemon, the GUI serves the same socket itself (for ultra-filt ctl)
+CONTROL_SERVER = os.getenv("UF_CONTROL_SERVER", "true").lower() == "true"
+
+# ── Hardware Watchdog ────────────────────────────────────────────────────────
+# Fed only while the relay owner's loop keeps its heartbeat on time (see
+# src/safety/watchdog.py). Empty device: heartbeats are only counted.
+WATCHDOG_ENABLED = os.getenv("UF_WATCHDOG", "true").lower() == "true"
+WATCHDOG_DEVICE = os.getenv("UF_WATCHDOG_DEVICE", "")
+WATCHDOG_TIMEOUT_S = int(os.getenv("UF_WATCHDOG_TIMEOUT_S", "15"))
+WATCHDOG_INTERVAL_MS = int(os.getenv("UF_WATCHDOG_INTERVAL_MS", "1000"))
+WATCHDOG_TOLERANCE_MS = int(os.getenv("UF_WATCHDOG_TOLERANCE_MS", "250"))
+# Opt-in: a loop silent this long gets every relay forced OFF from the
+# watchdog thread and the running cycle aborted (stop_immediately) once the
+# loop is back. A long GUI stall would then end a back-wash half-way, so
+# 0 (default) leaves a wedged loop to the hardware reset alone.
+WATCHDOG_ESCALATE_S = float(os.getenv("UF_WATCHDOG_ESCALATE_S", "0"))
+
+# ── Idle Screen ──────────────────────────────────────────────────────────────
+# Blank the display (black overlay, plus DPMS power-down when xset exists)
+# and stop all display tickers after this much inactivity. 0 never blanks.
+IDLE_TIMEOUT_S = float(os.getenv("UF_IDLE_TIMEOUT_S", "300"))
+IDLE_DPMS = os.getenv("UF_IDLE_DPMS", "true").lower() == "true"
+
+# ── Touch Input ──────────────────────────────────────────────────────────────
+# Taps on one relay card closer together than UF_TAP_DEBOUNCE_MS count once.
+# Tap-to-screen latency above UF_TAP_TARGET_MS is counted and logged.
+TAP_DEBOUNCE_MS = int(os.getenv("UF_TAP_DEBOUNCE_MS", "250"))
+TAP_TARGET_MS = float(os.getenv("UF_TAP_TARGET_MS", "100"))
+
+# ── Controller Health ────────────────────────────────────────────────────────
+# SoC temperature, CPU, memory and throttle flags every UF_HEALTH_INTERVAL_S
+# (0 disables). At UF_HEALTH_HOT_C, or while the firmware throttles, the UI
+# drops to reduced graphics until the SoC is back under UF_HEALTH_COOL_C.
+HEALTH_INTERVAL_S = float(os.getenv("UF_HEALTH_INTERVAL_S", "5"))
+HEALTH_HOT_C = float(os.getenv("UF_HEALTH_HOT_C", "75"))
+HEALTH_COOL_C = float(os.getenv("UF_HEALTH_COOL_C", "70"))
+HEALTH_ROLLUP_S = float(os.getenv("UF_HEALTH_ROLLUP_S", "300"))    # telemetry rollups
+
+# ── Stall Detector ───────────────────────────────────────────────────────────
+# Instrumentation mode: sample the loop thread's stack whenever it services
+# its heartbeat more than UF_STALL_THRESHOLD_MS late (ultra-filt ctl stalls).
+STALL_DETECT = os.getenv("UF_STALL_DETECT", "false").lower() == "true"
+STALL_THRESHOLD_MS = int(os.getenv("UF_STALL_THRESHOLD_MS", "200"))
+
+# ── Sampling Profiler ────────────────────────────────────────────────────────
+# Started by `ultra-filt ctl profile`, or by holding the top-bar title for
+# three seconds (saved to UF_PROFILE_DIR as speedscope JSON).
+PROFILE_DIR = Path(os.getenv("UF_PROFILE_DIR", str(_project_root / "profiles")))
+PROFILE_RATE_HZ = float(os.getenv("UF_PROFILE_RATE_HZ", "100"))
+PROFILE_SECONDS = float(os.getenv("UF_PROFILE_SECONDS", "60"))
+
+# ── Span Tracing ─────────────────────────────────────────────────────────────
+# Chrome trace-event spans across scheduler, relays and UI (src/diagnostics/
+# tracing.py). Off costs one branch per span; `ultra-filt ctl spans` turns it
+# on for a capture when UF_TRACING is not set.
+TRACING = os.getenv("UF_TRACING", "false").lower() == "true"
+TRACE_BUFFER = int(os.getenv("UF_TRACE_BUFFER", "20000"))     # events per thread
+
+# ── Remote State Streaming ───────────────────────────────────────────────────
+# WebSocket server for read-only LAN viewers. Port 0 disables it.
+STATE_SERVER_HOST = os.getenv("UF_STATE_SERVER_HOST", "0.0.0.0")
+STATE_SERVER_PORT = int(os.getenv("UF_STATE_SERVER_PORT", "0"))
+
+# ── Telemetry Uplink ─────────────────────────────────────────────────────────
+# "host[:port]" of an MQTT broker, "mock" for the in-process stand-in,
+# or empty to disable telemetry entirely.
+UNIT_ID = os.getenv("UF_UNIT_ID", socket.gethostname())
+TELEMETRY_BROKER = os.getenv("UF_TELEMETRY_BROKER", "")
+TELEMETRY_DIR = Path(os.getenv("UF_TELEMETRY_DIR", str(_project_root / "telemetry_outbox")))
+TELEMETRY_FLUSH_S = float(os.getenv("UF_TELEMETRY_FLUSH_S", "300"))
+
+# ── Relay Audit Log ──────────────────────────────────────────────────────────
+# Opt-in: adds an SD-card write every UF_AUDIT_FLUSH_S while relays switch.
+AUDIT_ENABLED = os.getenv("UF_AUDIT", "false").lower() == "true"
+AUDIT_DIR = Path(os.getenv("UF_AUDIT_DIR", str(_project_root / "audit")))
+AUDIT_FLUSH_S = float(os.getenv("UF_AUDIT_FLUSH_S", "30"))
+
+# ── Interlocks ───────────────────────────────────────────────────────────────
+# Validate every relay transition against src/safety/rules.py (reject unsafe
+# ON, defer unsafe OFF). Only disable for bench testing of bare relays.
+INTERLOCK_ENABLED = os.getenv("UF_INTERLOCK", "true").lower() == "true"
+
 # ── GPIO Backend Selection ───────────────────────────────────────────────────
 def get_gpio():
     """Return the appropriate GPIO module based on configuration."""
     if IS_HARDWARE:
         from src.hardware.gpio_controller import GPIOController
-        return GPIOController()
+        gpio = GPIOController()
     else:
         from src.hardware.mock_gpio import MockGPIO
-        return MockGPIO()
+        gpio = MockGPIO()
+    if AUDIT_ENABLED:
+        from src.audit.event_log import AuditedGPIO, EventLog
+        gpio = AuditedGPIO(gpio, EventLog(AUDIT_DIR, flush_interval_s=AUDIT_FLUSH_S))
+    if INTERLOCK_ENABLED:
+        # Outermost, so the audit log only records transitions that happened
+        from src.safety.interlock import InterlockedGPIO
+        gpio = InterlockedGPIO(gpio)
+    return gpio
+
+
+def get_telemetry_transport():
+    """Return the broker transport for TELEMETRY_BROKER (None if disabled)."""
+    if not TELEMETRY_BROKER:
+        return None
+    if TELEMETRY_BROKER == "mock":
+        from src.telemetry.mock_broker import MockBroker
+        return MockBroker()
+    from src.telemetry.mqtt_transport import MqttTransport
+    host, _, port = TELEMETRY_BROKER.partition(":")
+    return MqttTransport(
+        host, int(port or 1883), client_id=f"uf-{UNIT_ID}",
+        username=os.getenv("UF_TELEMETRY_USER") or None,
+        password=os.getenv("UF_TELEMETRY_PASSWORD") or None,
+    )
+
+
+# ── Hot Reload ───────────────────────────────────────────────────────────────
+# .env keys that take effect without a restart (watched by src/config_watcher.py).
+# Any other key that changes is logged and picked up on the next start.
+RELOADABLE_ENV_KEYS = ("UF_LOG_LEVEL", "UF_SHOW_CURSOR", "UF_TELEMETRY_FLUSH_S")
+_env_snapshot = dotenv_values(_env_path)
+
+
+def reload_env() -> dict:
+    """
+    Re-read .env and apply the reloadable keys that changed.
+    Returns {key: new_value} for the keys that were applied.
+    """
+    global LOG_LEVEL, SHOW_CURSOR, TELEMETRY_FLUSH_S, _env_snapshot
+    fresh = dotenv_values(_env_path)
+    changed = sorted(k for k in fresh.keys() | _env_snapshot.keys()
+                     if fresh.get(k) != _env_snapshot.get(k))
+    _env_snapshot = fresh
+
+    applied = {}
+    for key in changed:
+        if key not in RELOADABLE_ENV_KEYS:
+            logger.warning("%s changed in .env — takes effect after a restart", key)
+            continue
+        value = fresh.get(key)
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+        applied[key] = value
+
+    if "UF_LOG_LEVEL" in applied:
+        LOG_LEVEL = os.getenv("UF_LOG_LEVEL", "INFO").upper()
+        logging.getLogger().setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    if "UF_SHOW_CURSOR" in applied:
+        SHOW_CURSOR = os.getenv("UF_SHOW_CURSOR", "true").lower() == "true"
+    if "UF_TELEMETRY_FLUSH_S" in applied:
+        try:
+            TELEMETRY_FLUSH_S = float(os.getenv("UF_TELEMETRY_FLUSH_S", "300"))
+        except ValueError:
+            logger.error("Ignoring invalid UF_TELEMETRY_FLUSH_S=%r", applied["UF_TELEMETRY_FLUSH_S"])
+            del applied["UF_TELEMETRY_FLUSH_S"]
+    if applied:
+        logger.info("Reloaded from .env: %s", ", ".join(applied))
+    return applied
 
 
 logger.info("Config loaded  |  hardware=%s  fullscreen=%s  log=%s",
@@ -0,0 +1,220 @@
+"""
+config_watcher.py — Hot reload of timings.json and .env.
+
+FileWatcher watches the project directory with inotify (via libc, no extra
+dependency) and hands the descriptor to Tk's event loop, so change handling
+runs on the Tk thread without a helper thread or a timer. Where inotify or
+Tk file handlers are unavailable it falls back to polling mtimes.
+
+ConfigReloader turns file changes into reloads:
+
+    timings.json ──► validate ──► ProcessManager.stage_timings()
+                                  (applied at the next process boundary)
+    .env         ──► config.reload_env() ──► on_env_change(applied keys)
+"""
+
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import struct
+import tkinter as tk
+from pathlib import Path
+
+logger = logging.getLogger("UltraFiltration.Reload")
+
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_EVENT = struct.Struct("iIII")    # wd, mask, cookie, len — then the name
+
+
+def _inotify_open(directory: Path) -> int | None:
+    """Return a non-blocking inotify fd watching `directory`, or None."""
+    if not hasattr(os, "O_CLOEXEC"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_DELETE
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        logger.warning("inotify_add_watch failed: %s", os.strerror(ctypes.get_errno()))
+        os.close(fd)
+        return None
+    return fd
+
+
+class FileWatcher:
+    """
+    Calls callback(name) on the Tk thread when one of `names` in `directory`
+    is written or replaced. Bursts (editor save = write + rename) are merged
+    into one call `settle_ms` after the last event.
+    """
+
+    def __init__(self, widget, directory: Path, names, callback,
+                 settle_ms: int = 250, poll_ms: int = 2000):
+        self.widget = widget
+        self.directory = Path(directory)
+        self.names = frozenset(names)
+        self.callback = callback
+        self.settle_ms = settle_ms
+        self.poll_ms = poll_ms
+
+        self._fd: int | None = None
+        self._poll_job = None
+        self._settle_job = None
+        self._changed: set[str] = set()
+        self._stamps = {n: self._stamp(n) for n in self.names}
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._fd is not None else "poll"
+
+    def start(self) -> None:
+        self._fd = _inotify_open(self.directory)
+        if self._fd is not None:
+            try:
+                self.widget.tk.createfilehandler(self._fd, tk.READABLE, self._on_readable)
+            except (AttributeError, tk.TclError):
+                os.close(self._fd)
+                self._fd = None
+        if self._fd is None:
+            self._poll_job = self.widget.after(self.poll_ms, self._poll)
+        logger.info("Watching %s for config changes (%s)", self.directory, self.mode)
+
+    def stop(self) -> None:
+        if self._fd is not None:
+            try:
+                self.widget.tk.deletefilehandler(self._fd)
+            except tk.TclError:
+                pass
+            os.close(self._fd)
+            self._fd = None
+        for job in (self._poll_job, self._settle_job):
+            if job:
+                self.widget.after_cancel(job)
+        self._poll_job = self._settle_job = None
+
+    # ── Event sources ────────────────────────────────────────────────────
+
+    def _on_readable(self, fd, _mask) -> None:
+        while True:
+            try:
+                buf = os.read(fd, 4096)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                logger.error("inotify read failed: %s", e)
+                break
+            if not buf:
+                break
+            offset = 0
+            while offset + _EVENT.size <= len(buf):
+                _, mask, _, length = _EVENT.unpack_from(buf, offset)
+                raw = buf[offset + _EVENT.size: offset + _EVENT.size + length]
+                offset += _EVENT.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    self._changed |= self.names    # lost events — recheck everything
+                    continue
+                name = os.fsdecode(raw.rstrip(b"\0"))
+                if name in self.names:
+                    self._changed.add(name)
+        self._settle()
+
+    def _poll(self) -> None:
+        for name in self.names:
+            stamp = self._stamp(name)
+            if stamp != self._stamps[name]:
+                self._stamps[name] = stamp
+                self._changed.add(name)
+        self._settle()
+        self._poll_job = self.widget.after(self.poll_ms, self._poll)
+
+    # ── Delivery ─────────────────────────────────────────────────────────
+
+    def _settle(self) -> None:
+        if not self._changed:
+            return
+        if self._settle_job:
+            self.widget.after_cancel(self._settle_job)
+        self._settle_job = self.widget.after(self.settle_ms, self._deliver)
+
+    def _deliver(self) -> None:
+        self._settle_job = None
+        changed, self._changed = self._changed, set()
+        for name in sorted(changed):
+            try:
+                self.callback(name)
+            except Exception as e:
+                logger.error("Reload of %s failed: %s", name, e)
+
+    def _stamp(self, name: str):
+        try:
+            st = (self.directory / name).stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+
+class ConfigReloader:
+    """
+    Applies watched changes to the ProcessManager and the config module.
+    With process_manager=None only .env is watched (a UI attached to the
+    control daemon, which reloads timings.json itself).
+    """
+
+    def __init__(self, widget, process_manager, env_path: Path, on_env_change=None):
+        self.pm = process_manager
+        self.on_env_change = on_env_change   # (applied: dict[str, str | None]) -> None
+        self.timings_path = process_manager.settings.path if process_manager else None
+        self.env_path = Path(env_path)
+        self.watchers = [
+            FileWatcher(widget, directory, names, self._on_change)
+            for directory, names in self._group_by_dir().items()
+        ]
+
+    def start(self) -> None:
+        for w in self.watchers:
+            w.start()
+
+    def stop(self) -> None:
+        for w in self.watchers:
+            w.stop()
+
+    def _group_by_dir(self) -> dict:
+        dirs: dict[Path, set] = {}
+        for path in (self.timings_path, self.env_path):
+            if path is None:
+                continue
+            dirs.setdefault(path.parent, set()).add(path.name)
+        return dirs
+
+    def _on_change(self, name: str) -> None:
+        if self.timings_path and name == self.timings_path.name:
+            self._reload_timings()
+        elif name == self.env_path.name:
+            from src.config import reload_env
+            applied = reload_env()
+            if applied and self.on_env_change:
+                self.on_env_change(applied)
+
+    def _reload_timings(self) -> None:
+        try:
+            with open(self.timings_path, "r") as f:
+                values = self.pm.settings.validate(json.load(f))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            # json.JSONDecodeError is a ValueError; keep running on the old values
+            logger.error("Ignoring edited timings.json: %s", e)
+            return
+        if values == (self.pm.staged_timings or self.pm.timings):
+            return    # our own save, or a no-op edit
+        logger.info("timings.json changed on disk — staging reload")
+        self.pm.stage_timings(values)
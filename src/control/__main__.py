@@ -0,0 +1,147 @@
+"""
+Control daemon entry point.
+
+    python -m src.control          (or: ultra-filt-daemon)
+
+Owns the GPIO backend, the ProcessManager and everything that follows the
+plant (state stream, telemetry, cycle calendar, timings hot reload). Start
+it before the UI and set UF_CONTROL_DAEMON=true for the UI to attach to it.
+SIGTERM / SIGINT switch every relay off and exit.
+"""
+
+import logging
+import signal
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.config import (
+    CONTROL_SOCKET, ENV_FILE, IS_HARDWARE, SCHEDULE_FILE, STATE_SERVER_HOST,
+    STATE_SERVER_PORT, STATE_SHM_NAME, TELEMETRY_DIR, TELEMETRY_FLUSH_S, UNIT_ID,
+    STALL_DETECT, STALL_THRESHOLD_MS, TRACE_BUFFER, TRACING, WATCHDOG_ENABLED,
+    HEALTH_INTERVAL_S, HEALTH_HOT_C, HEALTH_COOL_C, HEALTH_ROLLUP_S,
+    get_gpio, get_telemetry_transport, logger,
+)
+from src.config_watcher import ConfigReloader
+from src.control.daemon import ControlDaemon
+from src.control.loop import EventLoop
+from src.control.shared_state import StateBlock
+from src.processes.process_manager import ProcessManager
+
+
+def main():
+    logger.info("=" * 60)
+    logger.info("  UltraFiltration Control Daemon")
+    logger.info("  Hardware: %s  |  Socket: %s", IS_HARDWARE, CONTROL_SOCKET)
+    logger.info("=" * 60)
+
+    if TRACING:
+        from src.diagnostics import tracing
+        tracing.enable(TRACE_BUFFER)
+
+    # Before the GPIO is touched: a second daemon must leave the plant alone
+    owner = StateBlock.live_owner(STATE_SHM_NAME)
+    if owner is not None:
+        logger.error("Control daemon already running (pid %d) — exiting", owner)
+        sys.exit(1)
+
+    loop = EventLoop()
+    pm = ProcessManager(get_gpio(), loop)
+    try:
+        daemon = ControlDaemon(loop, pm, CONTROL_SOCKET, STATE_SHM_NAME)
+    except RuntimeError as e:
+        logger.error("%s — exiting", e)
+        sys.exit(1)
+    stoppers = []
+
+    stalls = None
+    if STALL_DETECT:
+        from src.diagnostics.stalls import StallDetector
+        stalls = StallDetector(loop, threshold_ms=STALL_THRESHOLD_MS)
+        stalls.start()
+        daemon.commands.stalls = stalls
+
+        def stop_stalls():
+            stalls.stop()
+            logger.info("Loop stalls:\n%s", stalls.report())
+        stoppers.append(stop_stalls)
+
+    if STATE_SERVER_PORT:
+        from src.remote.state_server import StateStreamServer
+        state_server = StateStreamServer(STATE_SERVER_HOST, STATE_SERVER_PORT)
+        state_server.start()
+        state_server.attach(pm)
+        stoppers.append(state_server.stop)
+
+    transport = get_telemetry_transport()
+    if transport is not None:
+        from src.telemetry.outbox import Outbox
+        from src.telemetry.uplink import TelemetryCollector, TelemetryUplink
+        outbox = Outbox(TELEMETRY_DIR, flush_interval_s=TELEMETRY_FLUSH_S)
+        telemetry = TelemetryUplink(outbox, transport, topic=f"uf/{UNIT_ID}/telemetry")
+        collector = TelemetryCollector(outbox, on_due=telemetry.wake)
+        collector.attach(pm)
+        if stalls:
+            stalls.on_stall = lambda site, ms: collector.record("stall", s=site, ms=round(ms))
+
+        if HEALTH_INTERVAL_S > 0:
+            # Controller health for the historian (the UI samples its own for display)
+            from src.diagnostics.health import HealthSampler
+            health = HealthSampler(
+                HEALTH_INTERVAL_S, HEALTH_HOT_C, HEALTH_COOL_C,
+                on_rollup=collector.record_rollups,
+                rollup_samples=max(1, round(HEALTH_ROLLUP_S / HEALTH_INTERVAL_S)),
+            )
+            health.start()
+            stoppers.append(health.stop)
+        telemetry.start()
+        stoppers.append(telemetry.stop)
+
+    def on_env_change(applied: dict):
+        import src.config as config
+        if "UF_TELEMETRY_FLUSH_S" in applied and transport is not None:
+            telemetry.outbox.flush_interval_s = config.TELEMETRY_FLUSH_S
+
+    reloader = ConfigReloader(loop, pm, ENV_FILE, on_env_change=on_env_change)
+    reloader.start()
+    stoppers.append(reloader.stop)
+
+    if SCHEDULE_FILE.exists():
+        from src.scheduler.cycle_calendar import CycleScheduler
+        scheduler = CycleScheduler(loop, pm, SCHEDULE_FILE, start_cycle=pm.start_auto_cycle)
+        scheduler.start()
+        stoppers.append(scheduler.stop)
+
+    if WATCHDOG_ENABLED:
+        from src.safety.watchdog import Watchdog
+        watchdog = Watchdog.from_config(loop, pm.gpio, loop.bridge,
+                                        on_recover=pm.stop_immediately)
+        watchdog.start()
+        stoppers.append(watchdog.stop)
+
+    loop.bridge.post_on_signal([signal.SIGTERM, signal.SIGINT], loop.stop)
+
+    try:
+        daemon.start()
+    except RuntimeError as e:
+        logger.error("%s — exiting", e)
+        for stop in reversed(stoppers):
+            stop()
+        daemon.block.close()
+        loop.close()
+        sys.exit(1)
+    try:
+        loop.run()
+    finally:
+        logging.getLogger("UltraFiltration.Control").info("Shutting down")
+        for stop in reversed(stoppers):
+            stop()
+        daemon.shutdown()
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+"""
+client.py — The UI's side of the control daemon.
+
+ControlClient keeps one socket to the daemon, read on the Tk thread through
+a file handler, and maps the shared-memory state block. On top of it sit
+stand-ins for the two objects the frames already talk to:
+
+    RemoteGPIO            app.gpio — a local ChannelState mirrored from the
+                          daemon's "valve" events, toggle / turn_off / all_off
+                          sent as commands
+    RemoteProcessManager  app.process_manager — a local EventBus fed with the
+                          daemon's events, live state read from shared memory
+
+Nothing on the Tk thread waits for the daemon: commands are sent without
+blocking and their replies run as callbacks when the socket turns readable.
+If the daemon goes away the client keeps retrying once a second; commands
+issued meanwhile are logged and dropped, and the relays stay as the daemon
+left them.
+"""
+
+import logging
+import socket
+import time
+from pathlib import Path
+
+from src.control.protocol import LineReader, ProtocolError, encode
+from src.control.shared_state import StateBlock
+from src.hardware.channel_state import ChannelState, channels_in
+from src.processes.event_bus import EventBus
+from src.processes.process_manager import ProcessManager
+from src.safety.interlock import REASON_OK, InterlockEngine
+
+logger = logging.getLogger("UltraFiltration.Control")
+
+READABLE = 2      # tkinter.READABLE
+
+
+class ControlError(RuntimeError):
+    pass
+
+
+class ControlClient:
+    """
+    Args:
+        widget: Tk widget whose loop reads the socket.
+        socket_path: The daemon's command socket.
+        bridge: TkBridge into that loop (default: the widget's own, if any).
+        timeout_s: Longest wait to connect or to send one command.
+        retry_ms: Reconnect interval while the daemon is unreachable.
+    """
+
+    def __init__(self, widget, socket_path: Path, bridge=None, timeout_s: float = 2.0,
+                 retry_ms: int = 1000):
+        self.widget = widget
+        self.socket_path = Path(socket_path)
+        self.bridge = bridge or getattr(widget, "bridge", None)
+        self.timeout_s = timeout_s
+        self.retry_ms = retry_ms
+        self.block: StateBlock | None = None
+        self.attached = False           # handshake done, events flowing
+        self._sock: socket.socket | None = None
+        self._reader = LineReader()
+        self._next_id = 0
+        self._callbacks: dict[int, object] = {}   # request id → on_reply(ok, value)
+        self._status: dict = {}
+        self._retry_job = None
+        self._closed = False
+        self.gpio = RemoteGPIO(self)
+        self.process_manager = RemoteProcessManager(self, self.gpio)
+        self.connect()
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def connect(self) -> bool:
+        """
+        Try to reach the daemon now; on failure keep retrying in the
+        background. The handshake completes later, setting `attached`.
+        """
+        self._retry_job = None
+        if self._closed or self._sock is not None:
+            return self.connected
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout_s)
+        try:
+            sock.connect(str(self.socket_path))
+        except OSError as e:
+            sock.close()
+            logger.warning("Control daemon unreachable (%s) — retrying", e)
+            self._retry_job = self.widget.after(self.retry_ms, self.connect)
+            return False
+        self._sock = sock
+        self._reader = LineReader()
+        self.widget.tk.createfilehandler(sock.fileno(), READABLE, self._on_readable)
+        self.request("hello", self._on_hello)
+        return True
+
+    def close(self) -> None:
+        """Detach from the daemon. The plant is left running."""
+        self._closed = True
+        if self._retry_job:
+            self.widget.after_cancel(self._retry_job)
+            self._retry_job = None
+        self._drop_socket()
+        if self.block:
+            self.block.close()
+            self.block = None
+
+    # ── Requests ─────────────────────────────────────────────────────────
+
+    def request(self, cmd: str, on_reply=None, **args) -> None:
+        """Send without waiting; on_reply(ok, result_or_error) runs on the Tk thread."""
+        if self._sock is None:
+            logger.error("Not connected — %s dropped", cmd)
+            if on_reply:
+                on_reply(False, "not connected")
+            return
+        req_id = self._send(cmd, args)
+        if req_id is not None:
+            self._callbacks[req_id] = on_reply or (lambda ok, value: None)
+
+    def state(self) -> dict:
+        """Live state from shared memory (last known status if unavailable)."""
+        snap = self.block.read() if self.block else None
+        return snap if snap is not None else self._status
+
+    @property
+    def daemon_alive(self) -> bool:
+        """The daemon's heartbeat in shared memory is recent."""
+        snap = self.block.read() if self.block else None
+        return snap is not None and time.time() - snap["heartbeat"] < 3.0
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _on_hello(self, ok: bool, hello) -> None:
+        if not ok:
+            if self._sock is not None:
+                self._lost(f"handshake failed: {hello}")
+            return
+        self._attach(hello["shm"])
+        self.process_manager._timings = hello["timings"]
+        self.request("subscribe", self._on_subscribed)
+
+    def _on_subscribed(self, ok: bool, status) -> None:
+        if not ok:
+            if self._sock is not None:
+                self._lost(f"handshake failed: {status}")
+            return
+        self._status = status
+        self.gpio.state.apply(status["mask"])
+        self.attached = True
+        logger.info("Attached to control daemon at %s", self.socket_path)
+
+    def _send(self, cmd: str, args: dict) -> int | None:
+        self._next_id += 1
+        try:
+            self._sock.sendall(encode({"id": self._next_id, "cmd": cmd, "args": args}))
+        except OSError as e:
+            self._lost(e)
+            return None
+        return self._next_id
+
+    def _on_readable(self, _fd, _mask) -> None:
+        self._receive()
+
+    def _receive(self) -> None:
+        try:
+            data = self._sock.recv(65536)
+        except OSError as e:
+            self._lost(e)
+            return
+        if not data:
+            self._lost("closed by daemon")
+            return
+        try:
+            messages = self._reader.feed(data)
+        except ProtocolError as e:
+            self._lost(e)
+            return
+        for msg in messages:
+            self._handle(msg)
+
+    def _handle(self, msg: dict) -> None:
+        if "event" in msg:
+            self.process_manager._on_remote_event(msg["event"], msg.get("data") or {})
+            return
+        on_reply = self._callbacks.pop(msg.get("id"), None)
+        if on_reply is None:
+            logger.warning("Reply to unknown request %r", msg.get("id"))
+            return
+        if not msg.get("ok"):
+            logger.error("Control command failed: %s", msg.get("error"))
+        try:
+            on_reply(bool(msg.get("ok")), msg.get("result") if msg.get("ok")
+                     else msg.get("error"))
+        except Exception as e:
+            logger.error("Control reply handler failed: %s", e)
+
+    def _attach(self, name: str) -> None:
+        if self.block:
+            self.block.close()
+            self.block = None
+        try:
+            self.block = StateBlock.attach(name)
+        except FileNotFoundError:
+            logger.warning("State block %s not found — using socket status only", name)
+
+    def _lost(self, why) -> None:
+        logger.error("Lost control daemon: %s", why)
+        self._drop_socket()
+        callbacks, self._callbacks = self._callbacks, {}
+        for on_reply in callbacks.values():
+            try:
+                on_reply(False, "connection lost")
+            except Exception as e:
+                logger.error("Control reply handler failed: %s", e)
+        if not self._closed and self._retry_job is None:
+            self._retry_job = self.widget.after(self.retry_ms, self.connect)
+
+    def _drop_socket(self) -> None:
+        self.attached = False
+        if self._sock is None:
+            return
+        try:
+            self.widget.tk.deletefilehandler(self._sock.fileno())
+        except Exception:
+            pass
+        self._sock.close()
+        self._sock = None
+
+
+class RemoteGPIO:
+    """app.gpio for a UI attached to the daemon."""
+
+    def __init__(self, client: ControlClient):
+        self._client = client
+        self.state = ChannelState()
+        self.engine = InterlockEngine()      # for describing refusal codes
+        self.last_reason = REASON_OK
+
+    @property
+    def mask(self) -> int:
+        return self.state.mask
+
+    @property
+    def deferred(self) -> int:
+        return self._client.state().get("deferred", 0)
+
+    def is_on(self, channel_id: int) -> bool:
+        return self.state.is_on(channel_id)
+
+    def toggle(self, channel_id: int, on_done=None) -> None:
+        """
+        Request the opposite state. The daemon's reply updates the mirror,
+        then on_done(on) runs with the state actually in effect.
+        """
+        def done(ok, result):
+            if not ok:
+                logger.error("Toggle of channel %d failed: %s", channel_id, result)
+                return
+            self.last_reason = result["reason"]
+            self.state.apply(result["mask"])
+            if on_done:
+                on_done(result["on"])
+        self._client.request("toggle", done, channel=channel_id)
+
+    def turn_off(self, channel_id: int) -> None:
+        self._client.request("turn_off", self._apply_mask, channel=channel_id)
+
+    def all_off(self) -> None:
+        self._client.request("all_off", self._apply_mask)
+
+    def shutdown(self) -> None:
+        """Exit button: stop any cycle and switch every relay off, in the daemon."""
+        self._client.request("estop")
+
+    def _apply_mask(self, ok: bool, result) -> None:
+        if ok:
+            self.state.apply(result["mask"])
+
+
+class RemoteProcessManager:
+    """
+    app.process_manager for a UI attached to the daemon.
+
+    timings.json (`settings`, `stage_timings`) and `cycle_report` stay with
+    the daemon, which owns the hot reload; `settings` is None here so
+    callers can tell.
+    """
+
+    PROCESS_CONFIG = ProcessManager.PROCESS_CONFIG
+    PROCESS_ORDER = ProcessManager.PROCESS_ORDER
+    EVENTS = ProcessManager.EVENTS
+
+    def __init__(self, client: ControlClient, gpio: RemoteGPIO):
+        self._client = client
+        self.gpio = gpio
+        self.widget = client.widget
+        self.events = EventBus(self.EVENTS)
+        self._timings: dict | None = None
+        self._ui_mask: int | None = None
+        gpio.state.subscribe(self._on_channels_changed)
+
+    settings = None
+
+    add_listener = ProcessManager.add_listener
+    remove_listener = ProcessManager.remove_listener
+
+    # ── State (shared memory) ────────────────────────────────────────────
+
+    def snapshot(self) -> dict:
+        snap = self._client.state()
+        return {"mask": snap.get("mask", 0), "proc": snap.get("proc"),
+                "phase": snap.get("phase", "idle"), "deadline": snap.get("deadline")}
+
+    def channel_mask(self) -> int:
+        return self.gpio.state.mask
+
+    @property
+    def current_process(self) -> str | None:
+        return self._client.state().get("proc")
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._client.state().get("running"))
+
+    @property
+    def auto_cycle(self) -> bool:
+        return bool(self._client.state().get("auto"))
+
+    @property
+    def phase(self) -> str:
+        return self._client.state().get("phase", "idle")
+
+    @property
+    def timings(self) -> dict:
+        if self._timings is None:       # not attached yet
+            from src.config import DEFAULT_TIMINGS
+            return dict(DEFAULT_TIMINGS)
+        return self._timings
+
+    @property
+    def staged_timings(self) -> dict | None:
+        return self._client._status.get("staged_timings")
+
+    def call_soon_threadsafe(self, func, *args) -> None:
+        """Run func(*args) on the UI loop; the one method other threads may call."""
+        if self._client.bridge is None:
+            raise RuntimeError("ControlClient has no thread bridge")
+        self._client.bridge.post(func, *args)
+
+    # ── Commands ─────────────────────────────────────────────────────────
+
+    def start_auto_cycle(self) -> None:
+        """Ask the daemon; a refusal arrives as a "start_refused" event."""
+        self._client.request("start_auto", self._on_start_reply("auto cycle"))
+
+    def start_single_process(self, name: str) -> None:
+        self._client.request("start_process", self._on_start_reply(name), name=name)
+
+    def stop_current_process(self, callback=None) -> None:
+        def done(ok, status):
+            self._on_status(ok, status)
+            # Also run if the daemon is lost: it switches everything off on
+            # the way down, so the frame may move on
+            if callback:
+                callback()
+        self._client.request("stop", done)
+
+    def stop_immediately(self) -> None:
+        self._client.request("estop", self._on_status)
+
+    def update_timings(self, new_timings: dict) -> None:
+        self._client.request("update_timings", self._on_timings, timings=new_timings)
+
+    def reset_timings(self) -> None:
+        self._client.request("reset_timings", self._on_timings)
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _on_timings(self, ok: bool, timings) -> None:
+        if ok:
+            self._timings = timings
+        else:
+            logger.error("Timings not saved: %s", timings)
+
+    def _on_start_reply(self, what: str):
+        def done(ok, status):
+            self._on_status(ok, status)
+            if not ok:
+                self.events.publish("start_refused", what=what, reason=status)
+        return done
+
+    def _on_status(self, ok: bool, status) -> None:
+        # The reply can overtake the "valve" events of the same step
+        if ok:
+            self._client._status = status
+            self.gpio.state.apply(status["mask"])
+        else:
+            logger.warning("Daemon refused: %s", status)
+
+    def _on_remote_event(self, event: str, data: dict) -> None:
+        if event == "valve":
+            # Fed into the local state; its subscribers re-emit it (below)
+            self.gpio.state.set(data["channel_id"], data["is_on"])
+            return
+        if event == "timings_changed":
+            # Fetch the new values first, so listeners read them
+            def fetched(ok, timings):
+                self._on_timings(ok, timings)
+                if ok:
+                    self.events.publish(event, **data)
+            self._client.request("timings", fetched)
+            return
+        if event in self.EVENTS:
+            self.events.publish(event, **data)
+
+    def _on_channels_changed(self, old: int, new: int, _version: int) -> None:
+        # Same "valve" / coalesced "valves" pair as ProcessManager
+        for cid in channels_in(old ^ new):
+            self.events.publish("valve", channel_id=cid, is_on=bool(new >> (cid - 1) & 1))
+        if self._ui_mask is None and self.events.wants("valves"):
+            self._ui_mask = old
+            self.widget.after_idle(self._flush_valve_changes)
+
+    def _flush_valve_changes(self) -> None:
+        old, self._ui_mask = self._ui_mask, None
+        new = self.channel_mask()
+        if old != new:
+            self.events.publish("valves", old_mask=old, new_mask=new)
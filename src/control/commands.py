@@ -0,0 +1,261 @@
+"""
+commands.py — The command set served on the control socket.
+
+Shared by the control daemon and by a standalone GUI (which serves the
+same socket on its Tk loop), so `ultra-filt ctl` works against either.
+Every command runs on the thread that owns the ProcessManager.
+
+Besides forwarding events to subscribed clients, the commands keep the
+last `trace_len` events with their wall-clock times for `trace` dumps.
+
+Captures (`profile`, `spans`) run to megabytes, far past one reply line
+(MAX_LINE) or a connection's outbox, so they are written to a file and the
+reply carries its path.
+"""
+
+import json
+import os
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+
+from src.config import ALL_CHANNEL_IDS
+from src.control.server import CommandServer
+
+# Events clients rebuild locally ("valves" is derived from "valve")
+FORWARDED_EVENTS = ("process_start", "pump_start", "process_end", "cycle_complete",
+                    "valve", "timings_changed")
+
+
+class PlantCommands:
+    """
+    Args:
+        process_manager: The plant the commands act on.
+        start_cycle: Starts the auto cycle (default: the manager's own; the
+                     GUI passes one that also shows the auto screen).
+        trace_len: Events kept for `trace`.
+    """
+
+    def __init__(self, process_manager, start_cycle=None, trace_len: int = 512):
+        self.pm = process_manager
+        self.gpio = process_manager.gpio
+        self._start_cycle = start_cycle or process_manager.start_auto_cycle
+        self.trace: deque = deque(maxlen=trace_len)   # (epoch_s, event, data)
+        self.server: CommandServer | None = None
+        self.stalls = None          # StallDetector on this loop, when enabled
+        self.profiler = None        # the run started by `profile`
+        self._capturing_spans = False
+        self._stop_replies: list = []   # (conn, req_id) waiting for the stop to finish
+        self._sub = None
+
+    def table(self) -> dict:
+        return {
+            "hello":          self._hello,
+            "status":         self._status,
+            "subscribe":      self._subscribe,
+            "start_auto":     self._start_auto,
+            "start_process":  self._start_process,
+            "stop":           self._stop,
+            "estop":          self._estop,
+            "toggle":         self._toggle,
+            "turn_off":       self._turn_off,
+            "all_off":        self._all_off,
+            "timings":        self._timings,
+            "update_timings": self._update_timings,
+            "reset_timings":  self._reset_timings,
+            "trace":          self._trace,
+            "stats":          self._stats,
+            "stalls":         self._stalls,
+            "profile":        self._profile,
+            "spans":          self._spans,
+        }
+
+    def attach(self, server: CommandServer) -> None:
+        """Start forwarding events to `server`'s subscribers (and tracing them)."""
+        self.server = server
+        self._sub = self.pm.events.subscribe(self._on_event, FORWARDED_EVENTS, name="control")
+
+    def detach(self) -> None:
+        if self._sub:
+            self._sub.cancel()
+            self._sub = None
+        self.server = None
+
+    def _on_event(self, event: str, data: dict) -> None:
+        self.trace.append((time.time(), event, data))
+        if self.server:
+            self.server.broadcast({"event": event, "data": data})
+
+    # ── Commands ─────────────────────────────────────────────────────────
+
+    def _hello(self, conn, req_id):
+        return {"status": self._status(conn, req_id), "timings": self.pm.timings}
+
+    def _status(self, conn, req_id):
+        pm = self.pm
+        return {
+            **pm.snapshot(),
+            "running": pm.is_running,
+            "auto": pm.auto_cycle,
+            "deferred": getattr(self.gpio, "deferred", 0),
+            "staged_timings": pm.staged_timings,
+        }
+
+    def _subscribe(self, conn, req_id):
+        conn.subscribed = True
+        return self._status(conn, req_id)
+
+    def _start_auto(self, conn, req_id):
+        self._check_idle()
+        self._start_cycle()
+        return self._status(conn, req_id)
+
+    def _start_process(self, conn, req_id, name: str):
+        if name not in self.pm.PROCESS_CONFIG:
+            raise ValueError(f"Unknown process: {name}")
+        self._check_idle()
+        self.pm.start_single_process(name)
+        return self._status(conn, req_id)
+
+    def _stop(self, conn, req_id):
+        # Replies once the valves are closed, so the caller can wait on it. A
+        # second stop reschedules the close and replaces the callback, so the
+        # callback answers every caller still waiting
+        self._stop_replies.append((conn, req_id))
+        self.pm.stop_current_process(callback=self._answer_stops)
+        return CommandServer.DEFERRED
+
+    def _estop(self, conn, req_id):
+        self.pm.stop_immediately()
+        self._answer_stops()            # the pending close was cancelled with the rest
+        return self._status(conn, req_id)
+
+    def _toggle(self, conn, req_id, channel: int):
+        on = self.gpio.toggle(self._channel(channel))
+        return {"on": on, "mask": self.gpio.state.mask,
+                "reason": getattr(self.gpio, "last_reason", 0)}
+
+    def _turn_off(self, conn, req_id, channel: int):
+        self.gpio.turn_off(self._channel(channel))
+        return {"mask": self.gpio.state.mask}
+
+    def _all_off(self, conn, req_id):
+        self.gpio.all_off()
+        return {"mask": self.gpio.state.mask}
+
+    def _timings(self, conn, req_id):
+        return self.pm.timings
+
+    def _update_timings(self, conn, req_id, timings: dict):
+        self.pm.update_timings(self.pm.settings.validate(timings, fill_defaults=False))
+        return self.pm.timings
+
+    def _reset_timings(self, conn, req_id):
+        self.pm.reset_timings()
+        return self.pm.timings
+
+    def _trace(self, conn, req_id, limit: int = 100):
+        items = list(self.trace)[-limit:] if limit > 0 else []
+        return [{"t": round(t, 3), "event": event, "data": data} for t, event, data in items]
+
+    def _stats(self, conn, req_id):
+        stats = {"subscribers": self.pm.events.stats()}
+        if self.stalls:
+            stats["loop"] = self.stalls.metrics()
+        return stats
+
+    def _stalls(self, conn, req_id, limit: int = 10):
+        if self.stalls is None:
+            raise ValueError("Stall detector is off (UF_STALL_DETECT=true)")
+        return {**self.stalls.metrics(), "sites": self.stalls.top(limit)}
+
+    def _profile(self, conn, req_id, seconds: float = 30, rate_hz: float = 100,
+                 format: str = "speedscope", path: str | None = None):
+        from src.diagnostics.profiler import SamplingProfiler
+        if format not in ("speedscope", "collapsed"):
+            raise ValueError(f"Unknown profile format: {format}")
+        if not 0 < seconds <= 600 or not 1 <= rate_hz <= 1000:
+            raise ValueError("seconds must be in (0, 600], rate_hz in [1, 1000]")
+        self._check_output(path)
+        if self.profiler and self.profiler.running:
+            raise ValueError("A profile is already being taken")
+        self.profiler = SamplingProfiler(rate_hz)
+        self.profiler.start()
+
+        def finish():
+            profiler = self.profiler
+            profiler.stop()
+            if format == "speedscope":
+                text = json.dumps(profiler.speedscope())
+            else:
+                text = profiler.collapsed()
+            suffix = ".json" if format == "speedscope" else ".folded"
+            self._reply_with_file(conn, req_id, path, "uf-profile-", suffix, text,
+                                  {**profiler.stats(), "format": format})
+        # Timed on the loop: the reply goes out from the thread that owns `conn`
+        self.pm.widget.after(int(seconds * 1000), finish)
+        return CommandServer.DEFERRED
+
+    def _spans(self, conn, req_id, seconds: float = 10, path: str | None = None):
+        from src.config import TRACE_BUFFER
+        from src.diagnostics import tracing
+        if not 0 <= seconds <= 600:
+            raise ValueError("seconds must be in [0, 600]")
+        self._check_output(path)
+        if self._capturing_spans:
+            raise ValueError("A span capture is already running")
+        was_on = tracing.enabled
+        if not was_on:
+            tracing.enable(TRACE_BUFFER)
+        self._capturing_spans = True
+
+        def finish():
+            self._capturing_spans = False
+            doc = tracing.chrome_trace()
+            if not was_on:
+                tracing.disable()
+            events = doc["traceEvents"]
+            stats = {"spans": sum(1 for ev in events if ev["ph"] == "B"), "events": len(events)}
+            self._reply_with_file(conn, req_id, path, "uf-spans-", ".json",
+                                  json.dumps(doc), stats)
+        self.pm.widget.after(int(seconds * 1000), finish)
+        return CommandServer.DEFERRED
+
+    # ── Helpers ──────────────────────────────────────────────────────────
+
+    def _check_idle(self) -> None:
+        if self.pm.current_process is not None:
+            raise ValueError(f"{self.pm.current_process} is {self.pm.phase}")
+
+    @staticmethod
+    def _check_output(path: str | None) -> None:
+        # Resolved by the client: this process's working directory is not its
+        if path is not None and not Path(path).is_absolute():
+            raise ValueError(f"Output path must be absolute: {path}")
+
+    @staticmethod
+    def _reply_with_file(conn, req_id, path: str | None, prefix: str, suffix: str,
+                         text: str, result: dict) -> None:
+        """Write a capture to `path` (default: a new temp file) and reply with where."""
+        try:
+            if path is None:
+                fd, path = tempfile.mkstemp(prefix=prefix, suffix=suffix)
+                os.close(fd)
+            Path(path).write_text(text)
+        except OSError as e:
+            conn.fail(req_id, f"Cannot write {path}: {e}")
+            return
+        conn.reply(req_id, {**result, "path": path, "bytes": len(text)})
+
+    def _answer_stops(self) -> None:
+        waiting, self._stop_replies = self._stop_replies, []
+        for conn, req_id in waiting:
+            if not conn.closed:
+                conn.reply(req_id, self._status(conn, req_id))
+
+    @staticmethod
+    def _channel(channel) -> int:
+        if isinstance(channel, bool) or channel not in ALL_CHANNEL_IDS:
+            raise ValueError(f"No such channel: {channel!r}")
+        return channel
@@ -0,0 +1,361 @@
+"""
+Command-line client for the control socket.
+
+    ultra-filt ctl status
+    ultra-filt ctl start                  # auto cycle
+    ultra-filt ctl start back_wash        # one process
+    ultra-filt ctl stop [--now]
+    ultra-filt ctl toggle "Valve 3"
+    ultra-filt ctl off 6 | off all
+    ultra-filt ctl timings [service=45m fast_rinse=90s] [--reset]
+    ultra-filt ctl trace [-n 50]
+    ultra-filt ctl stats
+    ultra-filt ctl stalls [-n 10]         # with UF_STALL_DETECT=true
+    ultra-filt ctl profile [--seconds 30] [-o out.speedscope.json | out.folded]
+    ultra-filt ctl spans [--seconds 10] -o cycle.trace.json
+    ultra-filt ctl watch
+
+Talks to whichever process serves UF_CONTROL_SOCKET: the control daemon, or
+the GUI when it runs the plant itself. --json prints raw replies for
+scripts. Exit status: 0 done, 1 refused by the controller, 2 unreachable.
+"""
+
+import argparse
+import json
+import socket
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.control.client import ControlError
+from src.control.protocol import LineReader, ProtocolError, encode
+from src.hardware.channel_state import channels_in
+
+
+def _labels() -> dict[int, str]:
+    from src.config import VALVE_LABELS
+    return VALVE_LABELS
+
+
+def _parse_channel(value: str) -> int:
+    if value.isdigit():
+        return int(value)
+    for cid, label in _labels().items():
+        if label.lower() == value.lower():
+            return cid
+    raise argparse.ArgumentTypeError(f"unknown channel {value!r}")
+
+
+def _parse_ms(value: str) -> int:
+    """'90s', '45m', '2h' or plain milliseconds."""
+    units = {"s": 1_000, "m": 60_000, "h": 3_600_000}
+    try:
+        if value[-1:] in units:
+            return int(float(value[:-1]) * units[value[-1]])
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad duration {value!r}") from None
+
+
+def _parse_assignment(value: str) -> tuple[str, int]:
+    name, sep, ms = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected NAME=DURATION, got {value!r}")
+    return name, _parse_ms(ms)
+
+
+def _default_socket() -> Path:
+    from src.config import CONTROL_SOCKET
+    return CONTROL_SOCKET
+
+
+class CtlConnection:
+    """Blocking request/response over the control socket."""
+
+    def __init__(self, path: Path, timeout_s: float):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout_s)
+        self.sock.connect(str(path))
+        self.reader = LineReader()
+        self.pending: list[dict] = []
+        self._next_id = 0
+
+    def call(self, cmd: str, **args):
+        self._next_id += 1
+        self.sock.sendall(encode({"id": self._next_id, "cmd": cmd, "args": args}))
+        while True:
+            msg = self.next_message()
+            if msg.get("id") == self._next_id:
+                if not msg.get("ok"):
+                    raise ControlError(msg.get("error", f"{cmd} failed"))
+                return msg.get("result")
+            if "event" in msg:
+                self.pending.append(msg)
+
+    def next_message(self) -> dict:
+        while not self.pending:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError("connection closed")
+            self.pending += self.reader.feed(data)
+        return self.pending.pop(0)
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+# ── Output ───────────────────────────────────────────────────────────────────
+
+def _relays(mask: int) -> str:
+    labels = _labels()
+    return ", ".join(labels.get(cid, str(cid)) for cid in channels_in(mask)) or "-"
+
+
+def _print_status(st: dict) -> None:
+    proc = st.get("proc")
+    if proc:
+        left = ""
+        if st.get("deadline"):
+            secs = max(0, int(st["deadline"] - time.time()))
+            left = f", {secs // 60}:{secs % 60:02d} left"
+        print(f"process   {proc} ({st['phase']}{left})")
+        print(f"mode      {'auto cycle' if st.get('auto') else 'single process'}")
+    else:
+        print("process   idle")
+    print(f"relays    {_relays(st.get('mask', 0))}")
+    print(f"deferred  {_relays(st.get('deferred', 0))}")
+    if st.get("staged_timings"):
+        print("timings   reload staged for the next process boundary")
+
+
+def _print_timings(timings: dict) -> None:
+    for name, ms in timings.items():
+        print(f"{name:<14}{ms / 1000:>10.0f} s")
+
+
+def _format_event(t: float, event: str, data: dict) -> str:
+    stamp = datetime.fromtimestamp(t).strftime("%H:%M:%S.%f")[:-3]
+    if event == "valve":
+        label = _labels().get(data["channel_id"], data["channel_id"])
+        return f"{stamp}  {label} {'ON' if data['is_on'] else 'OFF'}"
+    fields = " ".join(f"{k}={v}" for k, v in data.items())
+    return f"{stamp}  {event} {fields}".rstrip()
+
+
+# ── Commands ─────────────────────────────────────────────────────────────────
+
+def cmd_status(conn, args):
+    return conn.call("status"), _print_status
+
+
+def cmd_start(conn, args):
+    if args.process:
+        return conn.call("start_process", name=args.process), _print_status
+    return conn.call("start_auto"), _print_status
+
+
+def cmd_stop(conn, args):
+    # A graceful stop replies only once the valves have closed
+    return conn.call("estop" if args.now else "stop"), _print_status
+
+
+def cmd_toggle(conn, args):
+    from src.safety.interlock import InterlockEngine
+    result = conn.call("toggle", channel=args.channel)
+
+    def show(r):
+        label = _labels().get(args.channel, args.channel)
+        print(f"{label} {'ON' if r['on'] else 'OFF'}")
+        if r["reason"]:
+            print(f"refused: {InterlockEngine().describe(r['reason'])}")
+    return result, show
+
+
+def cmd_off(conn, args):
+    if args.channel == "all":
+        result = conn.call("all_off")
+    else:
+        result = conn.call("turn_off", channel=_parse_channel(args.channel))
+    return result, lambda r: print(f"relays    {_relays(r['mask'])}")
+
+
+def cmd_timings(conn, args):
+    if args.reset:
+        result = conn.call("reset_timings")
+    elif args.set:
+        result = conn.call("update_timings", timings=dict(args.set))
+    else:
+        result = conn.call("timings")
+    return result, _print_timings
+
+
+def cmd_trace(conn, args):
+    def show(items):
+        for item in items:
+            print(_format_event(item["t"], item["event"], item["data"]))
+    return conn.call("trace", limit=args.n), show
+
+
+def cmd_stats(conn, args):
+    def show(r):
+        for s in r["subscribers"]:
+            print(f"{s['name']:<28}{s['mode']:<8}{s['calls']:>8} calls"
+                  f"{s['avg_us']:>10.0f} µs avg{s['max_us']:>10.0f} µs max"
+                  f"{s['dropped']:>6} dropped")
+        loop = r.get("loop")
+        if loop:
+            print(f"loop: {loop['stalls']} stalls, worst {loop['max_stall_ms']} ms, "
+                  f"{loop['stall_ms_total']} ms in total")
+    return conn.call("stats"), show
+
+
+def cmd_stalls(conn, args):
+    def show(r):
+        print(f"{r['stalls']} stalls, {r['stall_ms_total']} ms in total, "
+              f"worst {r['max_stall_ms']} ms ({r['beats']} heartbeats)")
+        for site in r["sites"]:
+            print(f"\n{site['count']:>5} x {site['total_ms']:>7} ms "
+                  f"(max {site['max_ms']} ms)  {site['site']}")
+            for frame in site["stack"][-args.depth:]:
+                print(f"        {frame}")
+    return conn.call("stalls", limit=args.n), show
+
+
+def _output_path(args) -> str | None:
+    # The controller writes captures itself (too big for one reply line),
+    # from its own working directory
+    return str(args.output.resolve()) if args.output else None
+
+
+def cmd_profile(conn, args):
+    fmt = "speedscope" if args.output and args.output.suffix == ".json" else "collapsed"
+    # The reply comes once the run is over
+    conn.sock.settimeout(args.seconds + args.timeout)
+    result = conn.call("profile", seconds=args.seconds, rate_hz=args.rate, format=fmt,
+                       path=_output_path(args))
+
+    def show(r):
+        if args.output:
+            print(f"{r['samples']} samples, {r['stacks']} stacks, "
+                  f"{r['overhead_pct']}% overhead -> {args.output}")
+            return
+        stacks = Path(r["path"])
+        sys.stdout.write(stacks.read_text())
+        stacks.unlink(missing_ok=True)
+    return result, show
+
+
+def cmd_spans(conn, args):
+    conn.sock.settimeout(args.seconds + args.timeout)
+    result = conn.call("spans", seconds=args.seconds, path=_output_path(args))
+
+    def show(r):
+        print(f"{r['spans']} spans ({r['events']} events) -> {args.output}")
+        print("open in ui.perfetto.dev or chrome://tracing")
+    return result, show
+
+
+def cmd_watch(conn, args):
+    conn.sock.settimeout(None)
+    _print_status(conn.call("subscribe"))
+    try:
+        while True:
+            msg = conn.next_message()
+            if "event" not in msg:
+                continue
+            if args.json:
+                print(json.dumps(msg), flush=True)
+            else:
+                print(_format_event(time.time(), msg["event"], msg["data"]), flush=True)
+    except KeyboardInterrupt:
+        pass
+    return None, None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="ultra-filt ctl", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--socket", type=Path, default=None,
+                        help="control socket (default: UF_CONTROL_SOCKET)")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="seconds to wait for a reply (a graceful stop takes a few)")
+    parser.add_argument("--json", action="store_true", help="print raw JSON replies")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("status", help="current process, phase and relays").set_defaults(func=cmd_status)
+
+    p = sub.add_parser("start", help="start the auto cycle, or a single process")
+    p.add_argument("process", nargs="?", default=None)
+    p.set_defaults(func=cmd_start)
+
+    p = sub.add_parser("stop", help="stop gracefully (pump first, then valves)")
+    p.add_argument("--now", action="store_true", help="emergency stop: everything off at once")
+    p.set_defaults(func=cmd_stop)
+
+    p = sub.add_parser("toggle", help="toggle a relay (interlocks apply)")
+    p.add_argument("channel", type=_parse_channel)
+    p.set_defaults(func=cmd_toggle)
+
+    p = sub.add_parser("off", help='switch a relay off, or "all"')
+    p.add_argument("channel")
+    p.set_defaults(func=cmd_off)
+
+    p = sub.add_parser("timings", help="show or set process durations")
+    p.add_argument("set", nargs="*", type=_parse_assignment, metavar="NAME=DURATION")
+    p.add_argument("--reset", action="store_true", help="restore factory defaults")
+    p.set_defaults(func=cmd_timings)
+
+    p = sub.add_parser("trace", help="recent process and relay events")
+    p.add_argument("-n", type=int, default=50)
+    p.set_defaults(func=cmd_trace)
+
+    sub.add_parser("stats", help="event subscriber latency").set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("stalls", help="where the control loop stalled, worst first")
+    p.add_argument("-n", type=int, default=10, help="call sites to show")
+    p.add_argument("--depth", type=int, default=8, help="stack frames per site")
+    p.set_defaults(func=cmd_stalls)
+
+    p = sub.add_parser("profile", help="sample the controller's stacks for a while")
+    p.add_argument("--seconds", type=float, default=30.0)
+    p.add_argument("--rate", type=float, default=100.0, help="samples per second")
+    p.add_argument("-o", "--output", type=Path, default=None,
+                   help="*.json for speedscope, anything else for collapsed stacks "
+                        "(default: collapsed stacks on stdout)")
+    p.set_defaults(func=cmd_profile)
+
+    p = sub.add_parser("spans", help="capture scheduler/relay/UI spans as a Chrome trace")
+    p.add_argument("--seconds", type=float, default=10.0)
+    p.add_argument("-o", "--output", type=Path, required=True)
+    p.set_defaults(func=cmd_spans)
+
+    p = sub.add_parser("watch", help="print events as they happen (Ctrl-C to end)")
+    p.set_defaults(func=cmd_watch)
+
+    args = parser.parse_args(argv)
+    path = args.socket or _default_socket()
+    try:
+        conn = CtlConnection(path, args.timeout)
+    except OSError as e:
+        print(f"cannot reach {path}: {e}", file=sys.stderr)
+        return 2
+    try:
+        result, show = args.func(conn, args)
+    except ControlError as e:
+        print(f"refused: {e}", file=sys.stderr)
+        return 1
+    except (OSError, ConnectionError, ProtocolError) as e:
+        print(f"connection failed: {e}", file=sys.stderr)
+        return 2
+    finally:
+        conn.close()
+    if show is not None:
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            show(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+daemon.py — The control daemon: owns the relays and the ProcessManager.
+
+The plant no longer lives inside the Tk process. The daemon runs the
+ProcessManager on a display-less EventLoop, mirrors its state into a
+shared-memory StateBlock for readers, and takes commands from the UI (or
+any other client) over a Unix socket. The UI can crash, hang or restart
+while the relays keep following the cycle; only the daemon itself
+switches everything off when it is told to exit.
+"""
+
+import logging
+from pathlib import Path
+
+from src.control.commands import PlantCommands
+from src.control.server import CommandServer
+from src.control.shared_state import StateBlock, StatePublisher
+from src.processes.process_manager import ProcessManager
+
+logger = logging.getLogger("UltraFiltration.Control")
+
+
+class ControlDaemon:
+    """
+    Args:
+        loop: EventLoop (or any Tk-like widget) the ProcessManager runs on.
+        process_manager: The plant, built on `loop`.
+        socket_path: Unix socket for commands.
+        shm_name: Name of the shared-memory state block.
+    """
+
+    def __init__(self, loop, process_manager: ProcessManager, socket_path: Path,
+                 shm_name: str):
+        self.loop = loop
+        self.pm = process_manager
+        self.gpio = process_manager.gpio
+        self.block = StateBlock.create(shm_name)
+        self.publisher = StatePublisher(self.block, self.pm, loop)
+        self.commands = PlantCommands(process_manager)
+        table = self.commands.table()
+        table["hello"] = self._hello
+        self.server = CommandServer(loop, socket_path, table,
+                                    before_reply=self.publisher.publish)
+
+    def start(self) -> None:
+        # The socket probe first: it raises if another instance is serving
+        self.server.start()
+        self.publisher.start()
+        self.commands.attach(self.server)
+
+    def stop(self) -> None:
+        """Stop serving. The relays are left as they are; see shutdown()."""
+        self.server.stop()
+        self.commands.detach()
+        self.publisher.stop()
+        self.block.close()
+
+    def shutdown(self) -> None:
+        """Stop serving, then switch every relay off and release the GPIO."""
+        self.pm.stop_immediately()
+        self.stop()
+        self.pm.events.close()
+        self.pm.settings.flush()
+        self.gpio.shutdown()
+
+    def _hello(self, conn, req_id):
+        # Clients also learn where to map the live state from
+        return {**self.commands._hello(conn, req_id), "shm": self.block.name}
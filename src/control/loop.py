@@ -0,0 +1,123 @@
+"""
+loop.py — Single-threaded event loop for the control daemon.
+
+Offers the subset of Tk's API that ProcessManager, FileWatcher and
+CycleScheduler rely on (after / after_idle / after_cancel and
+tk.createfilehandler), so they run unchanged without a display. Timers sit
+in a heap; select() sleeps until the next one is due or a registered
+descriptor becomes ready. call_soon_threadsafe() is the only entry point for
+other threads (and signal handlers); it goes through the same TkBridge the
+GUI uses, which wakes select() with a pipe.
+"""
+
+import heapq
+import itertools
+import logging
+import select
+import time
+
+from src.tk_bridge import TkBridge
+
+logger = logging.getLogger("UltraFiltration.Loop")
+
+READABLE = 2      # same values as tkinter.READABLE / WRITABLE
+WRITABLE = 4
+
+
+class EventLoop:
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._heap: list = []                 # (due_s, seq, job_id, func, args)
+        self._live: set[str] = set()
+        self._seq = itertools.count(1)
+        self._handlers: dict[int, tuple] = {}  # fd → (callback, mask)
+        self._running = False
+        self.bridge = TkBridge(self)
+
+    # ── Tk-compatible API ────────────────────────────────────────────────
+
+    def after(self, delay_ms: int, func=None, *args) -> str:
+        n = next(self._seq)
+        job_id = f"after#{n}"
+        due = self._clock() + max(0, int(delay_ms)) / 1000
+        heapq.heappush(self._heap, (due, n, job_id, func, args))
+        self._live.add(job_id)
+        return job_id
+
+    def after_idle(self, func, *args) -> str:
+        return self.after(0, func, *args)
+
+    def after_cancel(self, job_id: str) -> None:
+        self._live.discard(job_id)
+
+    @property
+    def tk(self):
+        """Lets code written against widget.tk.createfilehandler run here."""
+        return self
+
+    def createfilehandler(self, fd, mask: int, callback) -> None:
+        fd = fd if isinstance(fd, int) else fd.fileno()
+        self._handlers[fd] = (callback, mask)
+
+    def deletefilehandler(self, fd) -> None:
+        fd = fd if isinstance(fd, int) else fd.fileno()
+        self._handlers.pop(fd, None)
+
+    # ── Cross-thread entry ───────────────────────────────────────────────
+
+    def call_soon_threadsafe(self, func, *args) -> None:
+        self.bridge.post(func, *args)
+
+    # ── Running ──────────────────────────────────────────────────────────
+
+    def run(self) -> None:
+        self._running = True
+        while self._running:
+            self._run_once()
+
+    def stop(self) -> None:
+        """Leave run() after the current iteration (callable from any thread)."""
+        self._running = False
+        self.call_soon_threadsafe(lambda: None)
+
+    def close(self) -> None:
+        self.bridge.close()
+
+    def _run_once(self) -> None:
+        timeout = None
+        while self._heap and self._heap[0][2] not in self._live:
+            heapq.heappop(self._heap)
+        if self._heap:
+            timeout = max(0.0, self._heap[0][0] - self._clock())
+        rlist = []
+        wlist = []
+        for fd, (_, mask) in self._handlers.items():
+            if mask & READABLE:
+                rlist.append(fd)
+            if mask & WRITABLE:
+                wlist.append(fd)
+        try:
+            readable, writable, _ = select.select(rlist, wlist, [], timeout)
+        except InterruptedError:
+            readable = writable = []
+        ready: dict[int, int] = {}
+        for fd in readable:
+            ready[fd] = READABLE
+        for fd in writable:
+            ready[fd] = ready.get(fd, 0) | WRITABLE
+        for fd, mask in ready.items():
+            if fd in self._handlers:        # an earlier callback may have removed it
+                self._call(self._handlers[fd][0], fd, mask)
+        now = self._clock()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, job_id, func, args = heapq.heappop(self._heap)
+            if job_id in self._live:
+                self._live.discard(job_id)
+                self._call(func, *args)
+
+    @staticmethod
+    def _call(func, *args) -> None:
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("Loop callback %r failed", func)
@@ -0,0 +1,61 @@
+"""
+protocol.py — Wire format between the control daemon and its clients.
+
+One JSON object per line over a Unix stream socket:
+
+    request   {"id": 7, "cmd": "toggle", "args": {"channel": 3}}
+    response  {"id": 7, "ok": true, "result": {...}}
+              {"id": 7, "ok": false, "error": "Unknown process: rinse"}
+    event     {"event": "process_start", "data": {"name": ..., "duration_ms": ...}}
+
+Responses carry the id of their request; events (sent only to connections
+that issued "subscribe") have none. A connection may have several requests
+in flight, and responses need not come back in request order.
+"""
+
+import json
+
+MAX_LINE = 64 * 1024
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def _default(obj):
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def encode(msg: dict) -> bytes:
+    return json.dumps(msg, separators=(",", ":"), default=_default).encode() + b"\n"
+
+
+class LineReader:
+    """Splits a byte stream into decoded messages."""
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> list[dict]:
+        self._buf += data
+        out = []
+        while True:
+            end = self._buf.find(b"\n")
+            if end < 0:
+                break
+            line = bytes(self._buf[:end])
+            del self._buf[:end + 1]
+            if not line.strip():
+                continue
+            try:
+                msg = json.loads(line)
+            except ValueError as e:
+                raise ProtocolError(f"Bad message: {e}") from None
+            if not isinstance(msg, dict):
+                raise ProtocolError("Message is not an object")
+            out.append(msg)
+        if len(self._buf) > MAX_LINE:
+            raise ProtocolError(f"Line longer than {MAX_LINE} bytes")
+        return out
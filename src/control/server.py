@@ -0,0 +1,212 @@
+"""
+server.py — Unix-socket command server driven by a Tk-style event loop.
+
+The listening socket and every connection are non-blocking and registered
+with widget.tk.createfilehandler(), so commands run on the loop's own
+thread (the daemon's EventLoop, or Tk's mainloop) the moment they arrive:
+no helper thread, no polling timer. Replies that do not fit the socket
+buffer wait in a per-connection outbox; a client that lets it grow past
+`max_outbox` is disconnected rather than allowed to stall the loop.
+"""
+
+import errno
+import logging
+import os
+import socket
+from pathlib import Path
+
+from src.control.protocol import LineReader, ProtocolError, encode
+
+logger = logging.getLogger("UltraFiltration.Control")
+
+READABLE = 2      # tkinter.READABLE / WRITABLE
+WRITABLE = 4
+
+
+class Connection:
+    """One client socket with its read framing and pending output."""
+
+    def __init__(self, server, sock: socket.socket):
+        self.server = server
+        self.sock = sock
+        self.fd = sock.fileno()
+        self.reader = LineReader()
+        self.outbox = bytearray()
+        self.subscribed = False
+        self.closed = False
+        self._mask = READABLE
+
+    def send(self, msg: dict) -> None:
+        if self.closed:
+            return
+        self.outbox += encode(msg)
+        self._flush()
+
+    def reply(self, req_id, result=None) -> None:
+        if self.server.before_reply:
+            self.server.before_reply()
+        self.send({"id": req_id, "ok": True, "result": result})
+
+    def fail(self, req_id, error: str) -> None:
+        self.send({"id": req_id, "ok": False, "error": error})
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.server.widget.tk.deletefilehandler(self.fd)
+        except Exception:
+            pass
+        self.sock.close()
+        self.server.connections.discard(self)
+
+    def _flush(self) -> None:
+        try:
+            while self.outbox:
+                n = self.sock.send(self.outbox)
+                del self.outbox[:n]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.close()
+            return
+        if len(self.outbox) > self.server.max_outbox:
+            logger.warning("Dropping control client: %d bytes unsent", len(self.outbox))
+            self.close()
+            return
+        mask = READABLE | (WRITABLE if self.outbox else 0)
+        if mask != self._mask:
+            self._mask = mask
+            self.server.widget.tk.createfilehandler(self.fd, mask, self._on_ready)
+
+    def _on_ready(self, _fd, mask: int) -> None:
+        if mask & WRITABLE:
+            self._flush()
+        if mask & READABLE and not self.closed:
+            self._read()
+
+    def _read(self) -> None:
+        try:
+            data = self.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.close()
+            return
+        try:
+            messages = self.reader.feed(data)
+        except ProtocolError as e:
+            self.fail(None, str(e))
+            self.close()
+            return
+        for msg in messages:
+            self.server.dispatch(self, msg)
+
+
+class CommandServer:
+    """
+    Serves `commands` on a Unix socket at `path`.
+
+    Each command is func(conn, req_id, **args). It either returns a
+    JSON-serialisable result (sent as the reply) or calls conn.reply() /
+    conn.fail() itself later and returns DEFERRED. Exceptions become an
+    error reply. `before_reply` runs before every successful reply is sent
+    (the daemon uses it to bring shared memory up to date first, so a
+    client never sees a reply ahead of the state it describes).
+    """
+
+    DEFERRED = object()
+
+    def __init__(self, widget, path: Path, commands: dict, max_outbox: int = 1 << 20,
+                 before_reply=None):
+        self.widget = widget
+        self.path = Path(path)
+        self.commands = commands
+        self.max_outbox = max_outbox
+        self.before_reply = before_reply
+        self.connections: set[Connection] = set()
+        self._sock: socket.socket | None = None
+
+    def start(self) -> None:
+        self._remove_stale_socket()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(str(self.path))
+        os.chmod(self.path, 0o660)
+        sock.listen(8)
+        sock.setblocking(False)
+        self._sock = sock
+        self.widget.tk.createfilehandler(sock.fileno(), READABLE, self._on_accept)
+        logger.info("Control socket listening on %s", self.path)
+
+    def stop(self) -> None:
+        for conn in list(self.connections):
+            conn.close()
+        if self._sock is not None:
+            self.widget.tk.deletefilehandler(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def broadcast(self, msg: dict) -> None:
+        """Send an event to every subscribed connection."""
+        for conn in list(self.connections):
+            if conn.subscribed:
+                conn.send(msg)
+
+    def dispatch(self, conn: Connection, msg: dict) -> None:
+        req_id = msg.get("id")
+        cmd = msg.get("cmd")
+        func = self.commands.get(cmd)
+        if func is None:
+            conn.fail(req_id, f"Unknown command: {cmd!r}")
+            return
+        args = msg.get("args") or {}
+        try:
+            result = func(conn, req_id, **args)
+        except (TypeError, ValueError, KeyError) as e:
+            conn.fail(req_id, f"{cmd}: {e}")
+            return
+        except Exception as e:
+            logger.exception("Control command %s failed", cmd)
+            conn.fail(req_id, f"{cmd}: {e}")
+            return
+        if result is not self.DEFERRED:
+            conn.reply(req_id, result)
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _on_accept(self, _fd, _mask) -> None:
+        while True:
+            try:
+                sock, _ = self._sock.accept()
+            except BlockingIOError:
+                return
+            except OSError as e:
+                logger.error("Control accept failed: %s", e)
+                return
+            sock.setblocking(False)
+            conn = Connection(self, sock)
+            self.connections.add(conn)
+            self.widget.tk.createfilehandler(conn.fd, READABLE, conn._on_ready)
+
+    def _remove_stale_socket(self) -> None:
+        if not self.path.exists():
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(self.path))
+        except OSError as e:
+            if e.errno in (errno.ECONNREFUSED, errno.ENOENT):
+                self.path.unlink(missing_ok=True)   # nobody behind it
+                return
+            raise
+        else:
+            raise RuntimeError(f"Another instance is serving {self.path}")
+        finally:
+            probe.close()
@@ -0,0 +1,219 @@
+"""
+shared_state.py — Live plant state in a shared-memory block, guarded by a seqlock.
+
+The control daemon is the only writer. Any number of UI or tool processes
+attach read-only and unpack fields straight from the mapped buffer, with
+no copy, no socket round trip and no lock a crashed reader could leave held.
+
+Layout (little-endian, 40 bytes):
+
+    seq u32 | crc u32 | pid u32 | version u32 | mask u8 | deferred u8 |
+    proc i8 | phase u8 | flags u8 | pad[3] | deadline f64 | heartbeat f64
+
+The writer makes `seq` odd, writes the payload and its crc32, then makes
+`seq` even again. A reader takes `seq`, unpacks, and retries if `seq` was
+odd or has moved since. The crc catches a payload torn by store reordering
+on weakly ordered CPUs, which plain Python cannot fence against.
+"""
+
+import math
+import os
+import struct
+import time
+import zlib
+from multiprocessing import shared_memory
+
+from src.processes.process_manager import ProcessManager
+
+_SEQ = struct.Struct("<II")                   # seq, crc32(payload)
+_PAYLOAD = struct.Struct("<IIBBbBBxxxdd")
+SIZE = _SEQ.size + _PAYLOAD.size
+
+PHASES = ("idle", "opening", "running", "closing", "stopping")
+_PROCS = tuple(ProcessManager.PROCESS_ORDER)
+
+FLAG_RUNNING = 0x01
+FLAG_AUTO = 0x02
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name, track=False)     # Python 3.13+
+    except TypeError:
+        pass
+    # Before 3.13 a process that merely attaches registers the block with its
+    # resource tracker, which unlinks it when that process exits — i.e. a
+    # restarting UI would delete the daemon's state. Attach unregistered.
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+class StateBlock:
+    """One mapped state block. Use create() in the daemon, attach() elsewhere."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._buf = shm.buf
+        self.owner = owner
+        self.name = shm.name
+
+    @classmethod
+    def create(cls, name: str) -> "StateBlock":
+        """Raises RuntimeError if a live daemon still owns a block of that name."""
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=SIZE)
+        except FileExistsError:
+            owner = cls.live_owner(name)
+            if owner is not None:
+                raise RuntimeError(f"State block {name!r} is owned by running pid {owner}")
+            # Left behind by a daemon that did not exit cleanly
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name, create=True, size=SIZE)
+        block = cls(shm, owner=True)
+        block.write(0, 0, 0, None, "idle", False, False, None)
+        return block
+
+    @classmethod
+    def live_owner(cls, name: str) -> int | None:
+        """Pid of the running process that wrote block `name`, if there is one."""
+        try:
+            block = cls.attach(name)
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            fields = block.read_raw()
+        finally:
+            block.close()
+        pid = fields[0] if fields else 0
+        if pid <= 0 or pid == os.getpid():
+            return None
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return None
+        except PermissionError:
+            pass                    # alive, under another user
+        return pid
+
+    @classmethod
+    def attach(cls, name: str) -> "StateBlock":
+        """Raises FileNotFoundError if no daemon has created the block."""
+        return cls(_attach(name), owner=False)
+
+    # ── Writer ───────────────────────────────────────────────────────────
+
+    def write(self, version: int, mask: int, deferred: int, proc: str | None,
+              phase: str, running: bool, auto: bool, deadline: float | None) -> None:
+        buf = self._buf
+        seq = _SEQ.unpack_from(buf, 0)[0]
+        struct.pack_into("<I", buf, 0, (seq + 1) & 0xFFFFFFFF)       # odd: writing
+        flags = (FLAG_RUNNING if running else 0) | (FLAG_AUTO if auto else 0)
+        _PAYLOAD.pack_into(
+            buf, _SEQ.size, os.getpid(), version & 0xFFFFFFFF, mask, deferred,
+            _PROCS.index(proc) if proc else -1, PHASES.index(phase), flags,
+            math.nan if deadline is None else deadline, time.time(),
+        )
+        crc = zlib.crc32(buf[_SEQ.size:SIZE])
+        _SEQ.pack_into(buf, 0, (seq + 2) & 0xFFFFFFFF, crc)         # even: stable
+
+    # ── Reader ───────────────────────────────────────────────────────────
+
+    def read_raw(self, spins: int = 1000) -> tuple | None:
+        """
+        The payload tuple (pid, version, mask, deferred, proc_idx, phase_idx,
+        flags, deadline, heartbeat), or None if no consistent copy could be
+        taken in `spins` attempts (a writer died mid-update).
+        """
+        buf = self._buf
+        for _ in range(spins):
+            seq, crc = _SEQ.unpack_from(buf, 0)
+            if seq & 1:
+                continue
+            fields = _PAYLOAD.unpack_from(buf, _SEQ.size)
+            if _SEQ.unpack_from(buf, 0)[0] != seq:
+                continue
+            if zlib.crc32(buf[_SEQ.size:SIZE]) != crc:
+                continue
+            return fields
+        return None
+
+    def read(self) -> dict | None:
+        fields = self.read_raw()
+        if fields is None:
+            return None
+        pid, version, mask, deferred, proc, phase, flags, deadline, heartbeat = fields
+        return {
+            "pid": pid, "version": version, "mask": mask, "deferred": deferred,
+            "proc": _PROCS[proc] if proc >= 0 else None, "phase": PHASES[phase],
+            "running": bool(flags & FLAG_RUNNING), "auto": bool(flags & FLAG_AUTO),
+            "deadline": None if math.isnan(deadline) else deadline,
+            "heartbeat": heartbeat,
+        }
+
+    def close(self) -> None:
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class StatePublisher:
+    """
+    Keeps a StateBlock in step with a ProcessManager: rewritten on every
+    relay change and process event, plus a heartbeat every `heartbeat_s`.
+    """
+
+    def __init__(self, block: StateBlock, pm: ProcessManager, widget,
+                 heartbeat_s: float = 1.0):
+        self.block = block
+        self.pm = pm
+        self.widget = widget
+        self.heartbeat_ms = int(heartbeat_s * 1000)
+        self._sub = None
+        self._job = None
+
+    def start(self) -> None:
+        self.pm.gpio.state.subscribe(self._on_channels)
+        self._sub = self.pm.events.subscribe(
+            lambda event, data: self.publish(),
+            ["process_start", "pump_start", "process_end", "cycle_complete"],
+            priority=20, name="shm",
+        )
+        self.publish()
+        self._job = self.widget.after(self.heartbeat_ms, self._beat)
+
+    def stop(self) -> None:
+        self.pm.gpio.state.unsubscribe(self._on_channels)
+        if self._sub:
+            self._sub.cancel()
+            self._sub = None
+        if self._job:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    def publish(self) -> None:
+        pm = self.pm
+        self.block.write(
+            pm.gpio.state.version, pm.channel_mask(), getattr(pm.gpio, "deferred", 0),
+            pm.current_process, pm.phase, pm.is_running, pm.auto_cycle,
+            pm.snapshot()["deadline"],
+        )
+
+    def _on_channels(self, _old: int, _new: int, _version: int) -> None:
+        self.publish()
+
+    def _beat(self) -> None:
+        # A full publish, so anything that changed without a relay switch or
+        # an event is at most one heartbeat late
+        self.publish()
+        self._job = self.widget.after(self.heartbeat_ms, self._beat)
@@ -0,0 +1,192 @@
+"""
+health.py — SoC temperature, CPU load, memory and throttling, sampled cheaply.
+
+HealthSampler reads a handful of small kernel files every `interval_s` on a
+thread of its own (lowest scheduling priority, so it never competes with
+the control loop):
+
+    /sys/class/thermal/thermal_zone0/temp                    millidegrees C
+    /proc/stat                                               CPU jiffies
+    /proc/meminfo                                            MemTotal/MemAvailable
+    /sys/devices/platform/soc/soc:firmware/get_throttled     firmware flags (Pi)
+
+Missing files read as None, so the sampler runs on any Linux box.
+
+Thermal pressure starts when the SoC reaches `hot_c` or the firmware
+reports it is capping or throttling the ARM clock right now, and ends below
+`cool_c` with no throttling (hysteresis, so the UI does not flip-flop).
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger("UltraFiltration.Health")
+
+# get_throttled bits: current state in the low half, "has happened" in the high half
+UNDER_VOLTAGE = 1 << 0
+FREQ_CAPPED = 1 << 1
+THROTTLED = 1 << 2
+SOFT_TEMP_LIMIT = 1 << 3
+_THROTTLING_NOW = FREQ_CAPPED | THROTTLED | SOFT_TEMP_LIMIT
+
+_FLAG_NAMES = {UNDER_VOLTAGE: "under-voltage", FREQ_CAPPED: "freq capped",
+               THROTTLED: "throttled", SOFT_TEMP_LIMIT: "soft temp limit"}
+
+
+def describe_throttled(flags: int | None) -> str:
+    if not flags:
+        return "no"
+    now = [name for bit, name in _FLAG_NAMES.items() if flags & bit]
+    past = [name for bit, name in _FLAG_NAMES.items() if flags & (bit << 16)]
+    if now:
+        return ", ".join(now)
+    return "earlier: " + ", ".join(past)
+
+
+class HealthSampler:
+    """
+    Args:
+        interval_s: Seconds between samples.
+        hot_c / cool_c: Thermal pressure on / off thresholds.
+        on_sample: Called (sampler thread) with each sample dict.
+        on_pressure: Called (sampler thread) with True / False on changes.
+        on_rollup: Called (sampler thread) every `rollup_samples` samples
+                   with {metric: [values]} for the historian.
+        root: Filesystem root to read from (tests point it at a fake tree).
+    """
+
+    def __init__(self, interval_s: float = 5.0, hot_c: float = 75.0, cool_c: float = 70.0,
+                 on_sample=None, on_pressure=None, on_rollup=None,
+                 rollup_samples: int = 60, root: Path = Path("/")):
+        self.interval_s = interval_s
+        self.hot_c = hot_c
+        self.cool_c = cool_c
+        self.on_sample = on_sample
+        self.on_pressure = on_pressure
+        self.on_rollup = on_rollup
+        self.rollup_samples = rollup_samples
+        root = Path(root)
+        self._temp_path = root / "sys/class/thermal/thermal_zone0/temp"
+        self._stat_path = root / "proc/stat"
+        self._meminfo_path = root / "proc/meminfo"
+        self._throttled_path = root / "sys/devices/platform/soc/soc:firmware/get_throttled"
+        self._last_cpu: tuple[int, int] | None = None
+        self.pressure = False
+        self.latest: dict | None = None
+        self._window: dict[str, list] = {"soc_temp_c": [], "cpu_pct": [], "mem_pct": []}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(2)
+            self._thread = None
+
+    def sample(self) -> dict:
+        """Take one sample now and run the callbacks. Also used by the thread."""
+        s = {
+            "t": time.time(),
+            "soc_temp_c": self._read_temp(),
+            "cpu_pct": self._read_cpu(),
+            "mem_pct": self._read_mem(),
+            "throttled": self._read_throttled(),
+        }
+        self.latest = s
+        if self.on_sample:
+            self.on_sample(s)
+        self._update_pressure(s)
+        self._roll(s)
+        return s
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        try:
+            # Linux niceness is per thread: only this sampler is demoted
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            try:
+                self.sample()
+            except Exception:
+                logger.exception("Health sample failed")
+            if self._stop.wait(self.interval_s):
+                break
+
+    def _update_pressure(self, s: dict) -> None:
+        temp = s["soc_temp_c"]
+        throttling = bool((s["throttled"] or 0) & _THROTTLING_NOW)
+        if self.pressure:
+            pressure = throttling or (temp is not None and temp > self.cool_c)
+        else:
+            pressure = throttling or (temp is not None and temp >= self.hot_c)
+        if pressure != self.pressure:
+            self.pressure = pressure
+            logger.warning("Thermal pressure %s (SoC %s °C, throttled: %s)",
+                           "ON" if pressure else "off", temp,
+                           describe_throttled(s["throttled"]))
+            if self.on_pressure:
+                self.on_pressure(pressure)
+
+    def _roll(self, s: dict) -> None:
+        window = self._window
+        for key, values in window.items():
+            if s[key] is not None:
+                values.append(s[key])
+        if len(window["cpu_pct"]) >= self.rollup_samples or \
+                len(window["soc_temp_c"]) >= self.rollup_samples:
+            self._window = {key: [] for key in window}
+            if self.on_rollup:
+                self.on_rollup(window)
+
+    def _read_temp(self) -> float | None:
+        try:
+            return int(self._temp_path.read_text()) / 1000
+        except (OSError, ValueError):
+            return None
+
+    def _read_cpu(self) -> float | None:
+        """Busy share of all CPUs since the previous sample (None on the first)."""
+        try:
+            with open(self._stat_path, "rb") as f:
+                fields = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)     # idle + iowait
+        total = sum(fields[:8])                                        # guest is in user
+        last, self._last_cpu = self._last_cpu, (total, idle)
+        if last is None or total == last[0]:
+            return None
+        return round(100 * (1 - (idle - last[1]) / (total - last[0])), 1)
+
+    def _read_mem(self) -> float | None:
+        total = avail = None
+        try:
+            with open(self._meminfo_path, "rb") as f:
+                for line in f:
+                    if line.startswith(b"MemTotal:"):
+                        total = int(line.split()[1])
+                    elif line.startswith(b"MemAvailable:"):
+                        avail = int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            return None
+        if not total or avail is None:
+            return None
+        return round(100 * (1 - avail / total), 1)
+
+    def _read_throttled(self) -> int | None:
+        try:
+            return int(self._throttled_path.read_text().strip(), 16)
+        except (OSError, ValueError):
+            return None
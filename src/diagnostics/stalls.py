@@ -0,0 +1,205 @@
+"""
+stalls.py — Find out what the Tk thread was doing when the screen froze.
+
+The loop stamps a heartbeat every `interval_ms`. A sidecar thread checks
+how late the next one is; once it is more than `threshold_ms` overdue the
+loop is stalled, and the sidecar snapshots the loop thread's Python stack
+(sys._current_frames()) every `sample_ms` until the heartbeat lands. The
+loop then closes the stall with its exact lateness and files it under the
+call site seen most often in its samples:
+
+    SvgViewerCanvas._render
+    CustomDialog.__init__ > Misc.update_idletasks
+
+A site is the innermost frame of our own code, followed by the library
+call it was blocked in, if any. Stalls are aggregated per site (count,
+total, worst, last stack) for report() and metrics().
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+logger = logging.getLogger("UltraFiltration.Stalls")
+
+_PROJECT_DIR = str(Path(__file__).resolve().parent.parent.parent)
+
+UNSAMPLED = "(unsampled)"
+MAX_SAMPLES = 200           # per stall; a hung loop must not grow without bound
+
+
+def _qualname(code) -> str:
+    return getattr(code, "co_qualname", code.co_name)
+
+
+def _is_ours(filename: str) -> bool:
+    return filename.startswith(_PROJECT_DIR) and "-packages" not in filename
+
+
+def call_site(frame) -> tuple[str, list[str]]:
+    """(site, stack) for a frame; stack is outermost-first 'qualname (file:line)'."""
+    stack = []
+    site = None
+    blocked_in = None
+    f = frame
+    while f is not None:
+        code = f.f_code
+        stack.append(f"{_qualname(code)} ({Path(code.co_filename).name}:{f.f_lineno})")
+        if site is None:
+            if _is_ours(code.co_filename):
+                site = _qualname(code)
+            elif blocked_in is None:
+                blocked_in = _qualname(code)
+        f = f.f_back
+    stack.reverse()
+    if site is None:
+        site = blocked_in or "?"
+    elif blocked_in and blocked_in != site:
+        site = f"{site} > {blocked_in}"
+    return site, stack
+
+
+class SiteStats:
+    __slots__ = ("count", "total_s", "max_s", "last_stack")
+
+    def __init__(self):
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.last_stack: list[str] = []
+
+
+class StallDetector:
+    """
+    Args:
+        widget: Loop to watch (Tk root or EventLoop); start() on its thread.
+        interval_ms: Heartbeat period.
+        threshold_ms: Lateness from which the loop counts as stalled.
+        sample_ms: Stack sampling period while a stall lasts.
+        on_stall: Called on the loop thread as on_stall(site, ms) per stall.
+    """
+
+    def __init__(self, widget, interval_ms: int = 100, threshold_ms: int = 200,
+                 sample_ms: int = 50, on_stall=None, clock=time.perf_counter):
+        self.widget = widget
+        self.interval_s = interval_ms / 1000
+        self.threshold_s = threshold_ms / 1000
+        self.sample_s = sample_ms / 1000
+        self.on_stall = on_stall
+        self.clock = clock
+        self.sites: dict[str, SiteStats] = {}
+        self._thread_id = None
+        self._due = 0.0
+        self._job = None
+        self._samples: list[tuple[str, list[str]]] = []     # current stall
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sidecar: threading.Thread | None = None
+        # Counters
+        self.beats = 0
+        self.stalls = 0
+        self.stall_s = 0.0
+        self.max_stall_s = 0.0
+        self.samples = 0
+
+    def start(self) -> None:
+        self._thread_id = threading.get_ident()
+        self._due = self.clock() + self.interval_s
+        self._job = self.widget.after(int(self.interval_s * 1000), self._beat)
+        self._stop.clear()
+        self._sidecar = threading.Thread(target=self._watch, name="stall-detector", daemon=True)
+        self._sidecar.start()
+        logger.info("Stall detector on (threshold %d ms)", self.threshold_s * 1000)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sidecar:
+            self._sidecar.join(1)
+            self._sidecar = None
+        if self._job:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    def metrics(self) -> dict:
+        return {
+            "beats": self.beats, "stalls": self.stalls,
+            "stall_ms_total": round(self.stall_s * 1000),
+            "max_stall_ms": round(self.max_stall_s * 1000),
+            "samples": self.samples,
+        }
+
+    def top(self, limit: int = 10) -> list[dict]:
+        """Sites by total stalled time, worst first."""
+        ranked = sorted(self.sites.items(), key=lambda kv: kv[1].total_s, reverse=True)
+        return [
+            {"site": site, "count": s.count, "total_ms": round(s.total_s * 1000),
+             "max_ms": round(s.max_s * 1000), "stack": s.last_stack}
+            for site, s in ranked[:limit]
+        ]
+
+    def report(self, limit: int = 10) -> str:
+        m = self.metrics()
+        lines = [f"{m['stalls']} stalls, {m['stall_ms_total']} ms in total, "
+                 f"worst {m['max_stall_ms']} ms ({m['beats']} heartbeats)"]
+        for item in self.top(limit):
+            lines.append(f"\n{item['count']:>5} x  {item['total_ms']:>7} ms  "
+                         f"(max {item['max_ms']} ms)  {item['site']}")
+            lines += [f"        {frame}" for frame in item["stack"][-8:]]
+        return "\n".join(lines)
+
+    # ── Loop side ────────────────────────────────────────────────────────
+
+    def _beat(self) -> None:
+        now = self.clock()
+        late = now - self._due
+        self.beats += 1
+        self._due = now + self.interval_s
+        self._job = self.widget.after(int(self.interval_s * 1000), self._beat)
+        if late > self.threshold_s:
+            with self._lock:
+                samples, self._samples = self._samples, []
+            self._record(late, samples)
+        elif self._samples:
+            with self._lock:
+                self._samples = []
+
+    def _record(self, late: float, samples: list) -> None:
+        if samples:
+            site = Counter(s for s, _ in samples).most_common(1)[0][0]
+            stack = next(st for s, st in samples if s == site)
+        else:
+            site, stack = UNSAMPLED, []
+        stats = self.sites.get(site)
+        if stats is None:
+            stats = self.sites[site] = SiteStats()
+        stats.count += 1
+        stats.total_s += late
+        stats.last_stack = stack
+        if late > stats.max_s:
+            stats.max_s = late
+        self.stalls += 1
+        self.stall_s += late
+        if late > self.max_stall_s:
+            self.max_stall_s = late
+        logger.warning("Loop stalled %.0f ms in %s", late * 1000, site)
+        if self.on_stall:
+            self.on_stall(site, late * 1000)
+
+    # ── Sidecar thread ───────────────────────────────────────────────────
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.sample_s):
+            if self.clock() - self._due <= self.threshold_s:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            sample = call_site(frame)
+            del frame
+            with self._lock:
+                if len(self._samples) < MAX_SAMPLES:
+                    self._samples.append(sample)
+            self.samples += 1
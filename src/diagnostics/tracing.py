@@ -0,0 +1,110 @@
+"""
+tracing.py — Span tracing in Chrome trace-event format.
+
+Call sites guard every record with the module flag, so a disabled tracer
+costs one branch:
+
+    from src.diagnostics import tracing
+
+    if tracing.enabled:
+        tracing.begin("pm.start_pump", "scheduler", proc=name)
+    ...
+    if tracing.enabled:
+        tracing.end()
+
+Flows tie work on one side of a hand-off to the other (a relay write to
+the redraw it causes): flow_start() inside the producing span, flow_end()
+inside the consuming one, with the same id.
+
+Each thread records into its own ring buffer (`capacity` events, oldest
+dropped first), so recording takes no lock. chrome_trace() merges them
+into JSON that chrome://tracing, Perfetto and speedscope open directly:
+
+    ultra-filt ctl spans --seconds 10 -o cycle.trace.json
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+enabled = False
+
+_local = threading.local()
+_buffers: list[tuple[int, str, deque]] = []    # (thread id, thread name, events)
+_lock = threading.Lock()                       # guards _buffers only
+_generation = 0
+_capacity = 20_000
+
+
+def enable(capacity: int = 20_000) -> None:
+    """Start recording into fresh buffers of `capacity` events per thread."""
+    global enabled, _generation, _capacity
+    with _lock:
+        _generation += 1
+        _capacity = capacity
+        _buffers.clear()
+    enabled = True
+
+
+def disable() -> None:
+    global enabled
+    enabled = False
+
+
+def begin(name: str, cat: str = "app", **args) -> None:
+    _buffer().append(("B", time.perf_counter_ns(), name, cat, args, None))
+
+
+def end() -> None:
+    _buffer().append(("E", time.perf_counter_ns(), None, None, None, None))
+
+
+def instant(name: str, cat: str = "app", **args) -> None:
+    _buffer().append(("i", time.perf_counter_ns(), name, cat, args, None))
+
+
+def flow_start(name: str, flow_id: int, cat: str = "flow") -> None:
+    _buffer().append(("s", time.perf_counter_ns(), name, cat, None, flow_id))
+
+
+def flow_end(name: str, flow_id: int, cat: str = "flow") -> None:
+    _buffer().append(("f", time.perf_counter_ns(), name, cat, None, flow_id))
+
+
+def chrome_trace() -> dict:
+    """Everything still in the buffers, as a Chrome trace-event document."""
+    pid = os.getpid()
+    with _lock:
+        buffers = [(tid, name, list(events)) for tid, name, events in _buffers]
+    out = []
+    for tid, thread_name, events in buffers:
+        out.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+                    "args": {"name": thread_name}})
+        for ph, ns, name, cat, args, flow_id in events:
+            ev = {"ph": ph, "ts": ns / 1000, "pid": pid, "tid": tid}
+            if name is not None:
+                ev["name"] = name
+                ev["cat"] = cat
+            if args:
+                ev["args"] = args
+            if flow_id is not None:
+                ev["id"] = flow_id
+                if ph == "f":
+                    ev["bp"] = "e"          # bind to the enclosing slice
+            elif ph == "i":
+                ev["s"] = "t"
+            out.append(ev)
+    return {"traceEvents": out, "displayTimeUnit": "ms"}
+
+
+def _buffer() -> deque:
+    buf = getattr(_local, "events", None)
+    if buf is None or _local.generation != _generation:
+        buf = deque(maxlen=_capacity)
+        _local.events = buf
+        _local.generation = _generation
+        thread = threading.current_thread()
+        with _lock:
+            _buffers.append((thread.ident, thread.name, buf))
+    return buf
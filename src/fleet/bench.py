@@ -0,0 +1,63 @@
+"""
+bench.py — End-to-end fleet benchmark: simulate, ingest, query.
+Run: python -m src.fleet.bench --units 1000 --hours 24
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from src.fleet.loadgen import generate
+from src.fleet.query import FleetFrame, FleetQuery
+from src.fleet.store import ColumnStore
+
+
+def _timed(label: str, func):
+    t0 = time.perf_counter()
+    result = func()
+    print(f"  {label:<24} {time.perf_counter() - t0:8.3f} s")
+    return result
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--units", type=int, default=1000)
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--root", type=Path, default=None,
+                        help="store directory (default: temporary, removed afterwards)")
+    args = parser.parse_args(argv)
+
+    root = args.root or Path(tempfile.mkdtemp(prefix="uf-fleet-"))
+    start_epoch = time.mktime((2026, 3, 1, 0, 0, 0, 0, 0, -1))
+    store = ColumnStore(root)
+    print(f"Fleet benchmark — {args.units} units × {args.hours:g} h  ({root})")
+
+    try:
+        batches = _timed("simulate", lambda: list(generate(args.units, args.hours, start_epoch)))
+        wire = sum(len(p) for _, p in batches)
+
+        def ingest():
+            for unit_id, payload in batches:
+                store.ingest(unit_id, payload)
+            store.flush()
+
+        _timed("ingest + flush", ingest)
+        frame = _timed("load columns", lambda: FleetFrame.load(store))
+        q = FleetQuery(frame)
+        _timed("cycle counts", q.cycle_counts)
+        _timed("pump hours", q.pump_hours)
+        _timed("late-transition rates", q.late_transition_rates)
+        summary = q.fleet_summary()
+
+        print(f"  batches={len(batches)}  wire={wire / 1e6:.1f} MB  "
+              f"rows={store.rows_ingested}  ({wire / max(1, store.rows_ingested):.1f} B/row)")
+        print(f"  summary: {summary}")
+    finally:
+        if args.root is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
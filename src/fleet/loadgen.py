@@ -0,0 +1,78 @@
+"""
+loadgen.py — Synthetic fleet built from simulated controllers.
+
+Each unit is a real ProcessManager driving a MockGPIO on a VirtualScheduler,
+with a TelemetryCollector feeding the same batch encoding the uplink uses.
+A day of auto cycling for one unit runs in well under a second.
+"""
+
+import logging
+import random
+
+from src.hardware.mock_gpio import MockGPIO
+from src.processes.process_manager import ProcessManager
+from src.sim.virtual_scheduler import VirtualScheduler
+from src.telemetry.outbox import encode_batch
+from src.telemetry.uplink import TelemetryCollector
+
+
+class _BatchSink:
+    """Outbox stand-in that cuts encoded batches in memory instead of on disk."""
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self.batches: list[bytes] = []
+        self._records: list[dict] = []
+        self._seq = 0
+
+    def append(self, record: dict) -> bool:
+        self._records.append(record)
+        if len(self._records) >= self.batch_size:
+            self.cut()
+        return False
+
+    def cut(self) -> None:
+        if self._records:
+            self._seq += 1
+            self.batches.append(encode_batch(self._seq, self._records))
+            self._records = []
+
+
+class SimulatedUnit:
+    """One controller running the auto cycle in virtual time."""
+
+    def __init__(self, unit_id: str, start_epoch: float, seed: int = 0,
+                 late_prob: float = 0.02, late_max_ms: int = 3000,
+                 batch_size: int = 500):
+        rng = random.Random(seed)
+
+        def jitter() -> int:
+            # Occasionally fire late, as a busy Tk loop would
+            return rng.randint(1, late_max_ms) if rng.random() < late_prob else 0
+
+        self.unit_id = unit_id
+        self._start_ms = int(start_epoch * 1000)
+        self.scheduler = VirtualScheduler(self._start_ms, jitter=jitter)
+        self.gpio = MockGPIO()
+        self.pm = ProcessManager(self.gpio, self.scheduler)
+        self.sink = _BatchSink(batch_size)
+        TelemetryCollector(
+            self.sink, clock=lambda: self.scheduler.now_ms / 1000
+        ).attach(self.pm)
+
+    def run(self, hours: float) -> list[bytes]:
+        """Run the auto cycle for `hours` of virtual time; return encoded batches."""
+        self.pm.start_auto_cycle()
+        self.scheduler.run_until(self._start_ms + int(hours * 3_600_000))
+        self.sink.cut()
+        return self.sink.batches
+
+
+def generate(units: int, hours: float, start_epoch: float, seed: int = 1):
+    """Yield (unit_id, payload) for every batch a simulated fleet would upload."""
+    # Thousands of MockGPIO/ProcessManager instances log every relay flip
+    logging.getLogger("UltraFiltration").setLevel(logging.WARNING)
+    for i in range(units):
+        unit = SimulatedUnit(f"uf-{i + 1:04d}", start_epoch, seed=seed + i)
+        for payload in unit.run(hours):
+            yield unit.unit_id, payload
@@ -0,0 +1,163 @@
+"""
+query.py — Vectorized fleet-wide aggregations over the ColumnStore.
+Requires numpy (pip install ".[fleet]"); the controllers themselves never
+import this module.
+"""
+
+import numpy as np
+
+from src.fleet.store import COLUMNS, EVENT_CODES, PROCESS_CODES, ColumnStore
+
+_VALVE = EVENT_CODES["valve"]
+_PROCESS_START = EVENT_CODES["process_start"]
+_PUMP_START = EVENT_CODES["pump_start"]
+_PROCESS_END = EVENT_CODES["process_end"]
+_PUMP_CHANNELS = (6, 7)
+
+
+class FleetFrame:
+    """All selected partitions concatenated into flat column arrays, sorted by (unit, t)."""
+
+    def __init__(self, units: list[str], columns: dict[str, np.ndarray]):
+        self.units = units
+        self.cols = columns
+
+    @classmethod
+    def load(cls, store: ColumnStore, units=None, day_from=None, day_to=None):
+        unit_ids: list[str] = []
+        unit_index: dict[str, int] = {}
+        pieces = {name: [] for name in COLUMNS}
+        pieces["u"] = []
+        for unit_id, day, pdir in store.partitions(units, day_from, day_to):
+            if unit_id not in unit_index:
+                unit_index[unit_id] = len(unit_ids)
+                unit_ids.append(unit_id)
+            # Only committed rows: a crash can leave columns longer than that
+            n = store.committed_rows(unit_id, day)
+            for name, (_, dtype, _, _) in COLUMNS.items():
+                pieces[name].append(np.fromfile(pdir / f"{name}.col", dtype=dtype, count=n))
+            pieces["u"].append(np.full(n, unit_index[unit_id], dtype=np.int32))
+
+        if not unit_ids:
+            cols = {name: np.empty(0, dtype=spec[1]) for name, spec in COLUMNS.items()}
+            cols["u"] = np.empty(0, dtype=np.int32)
+            return cls([], cols)
+
+        cols = {name: np.concatenate(parts) for name, parts in pieces.items()}
+        # Partitions load in (unit, day) order; a stable sort on t within unit
+        # only matters when a batch straddled midnight out of order.
+        order = np.lexsort((cols["t"], cols["u"]))
+        if not np.all(order[1:] > order[:-1]):
+            cols = {name: col[order] for name, col in cols.items()}
+        return cls(unit_ids, cols)
+
+    def __len__(self) -> int:
+        return len(self.cols["t"])
+
+
+class FleetQuery:
+    """Fleet-wide questions answered with whole-array numpy operations."""
+
+    def __init__(self, frame: FleetFrame):
+        self.frame = frame
+        self._n_units = len(frame.units)
+
+    def cycle_counts(self) -> dict[str, dict[str, int]]:
+        """Completed runs per process per unit ("cycles" = forward-wash completions)."""
+        c = self.frame.cols
+        sel = (c["e"] == _PROCESS_END) & (c["p"] >= 0)
+        n_proc = len(PROCESS_CODES)
+        flat = np.bincount(
+            c["u"][sel] * n_proc + c["p"][sel],
+            minlength=self._n_units * n_proc,
+        ).reshape(self._n_units, n_proc)
+        names = list(PROCESS_CODES)
+        fw = PROCESS_CODES["forward_wash"]
+        return {
+            unit: dict(zip(names, map(int, flat[i])), cycles=int(flat[i, fw]))
+            for i, unit in enumerate(self.frame.units)
+        }
+
+    def pump_hours(self) -> dict[str, dict[int, float]]:
+        """Total ON time per pump channel per unit, in hours."""
+        c = self.frame.cols
+        out = {unit: {} for unit in self.frame.units}
+        for ch in _PUMP_CHANNELS:
+            idx = np.flatnonzero((c["e"] == _VALVE) & (c["c"] == ch))
+            if len(idx) == 0:
+                for unit in out:
+                    out[unit][ch] = 0.0
+                continue
+            u, t, on = c["u"][idx], c["t"][idx], c["on"][idx]
+            # Previous relay state within the same unit (OFF at each unit's start)
+            prev = np.empty_like(on)
+            prev[0] = 0
+            prev[1:] = on[:-1]
+            prev[1:][u[1:] != u[:-1]] = 0
+            rising = np.flatnonzero((on == 1) & (prev != 1))
+            falling = np.flatnonzero((on == 0) & (prev == 1))
+            hours = np.zeros(self._n_units)
+            if len(rising) and len(falling):
+                j = np.searchsorted(falling, rising)
+                ok = j < len(falling)
+                r, f = rising[ok], falling[j[ok]]
+                same = u[r] == u[f]
+                r, f = r[same], f[same]
+                hours = np.bincount(u[r], weights=t[f] - t[r],
+                                    minlength=self._n_units) / 3600.0
+            for i, unit in enumerate(self.frame.units):
+                out[unit][ch] = float(hours[i])
+        return out
+
+    def late_transition_rates(self, engage_delay_ms: int = 5000,
+                              tolerance_ms: int = 500) -> dict[str, dict]:
+        """
+        Fraction of scheduled transitions that fired more than `tolerance_ms`
+        late: valves-open → pump-on (expected engage_delay_ms) and
+        pump-on → process end (expected the pump_start countdown).
+        """
+        c = self.frame.cols
+        e, u, t, ms = c["e"], c["u"], c["t"], c["ms"]
+        late = np.zeros(self._n_units, dtype=np.int64)
+        total = np.zeros(self._n_units, dtype=np.int64)
+
+        def pair(prev_code, next_code, expected_ms):
+            prev_idx = np.flatnonzero(e == prev_code)
+            next_idx = np.flatnonzero(e == next_code)
+            if not len(prev_idx) or not len(next_idx):
+                return
+            k = np.searchsorted(prev_idx, next_idx) - 1
+            ok = k >= 0
+            nxt, prv = next_idx[ok], prev_idx[k[ok]]
+            same = u[nxt] == u[prv]
+            nxt, prv = nxt[same], prv[same]
+            expected = expected_ms(prv)
+            delay_ms = (t[nxt] - t[prv]) * 1000.0
+            is_late = delay_ms - expected > tolerance_ms
+            np.add.at(total, u[nxt], 1)
+            np.add.at(late, u[nxt][is_late], 1)
+
+        pair(_PROCESS_START, _PUMP_START, lambda prv: engage_delay_ms)
+        pair(_PUMP_START, _PROCESS_END, lambda prv: ms[prv])
+
+        rate = np.divide(late, total, out=np.zeros(self._n_units), where=total > 0)
+        return {
+            unit: {"late": int(late[i]), "total": int(total[i]), "rate": float(rate[i])}
+            for i, unit in enumerate(self.frame.units)
+        }
+
+    def fleet_summary(self) -> dict:
+        """Fleet totals for the three headline metrics."""
+        cycles = self.cycle_counts()
+        pumps = self.pump_hours()
+        late = self.late_transition_rates()
+        n_late = sum(v["late"] for v in late.values())
+        n_total = sum(v["total"] for v in late.values())
+        return {
+            "units": self._n_units,
+            "rows": len(self.frame),
+            "cycles": sum(v["cycles"] for v in cycles.values()),
+            "pump_hours": {ch: round(sum(v[ch] for v in pumps.values()), 2)
+                           for ch in _PUMP_CHANNELS},
+            "late_rate": n_late / n_total if n_total else 0.0,
+        }
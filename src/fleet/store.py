@@ -0,0 +1,196 @@
+"""
+store.py — Columnar telemetry storage, partitioned by unit and day.
+
+Every partition is a directory of fixed-width column files that can be
+memory-mapped straight into numpy arrays:
+
+    <root>/unit=<id>/day=YYYY-MM-DD/t.col   float64  event time (epoch s)
+                                    e.col   uint8    event code (EVENT_CODES)
+                                    c.col   int8     channel id (-1 = n/a)
+                                    on.col  int8     1/0 relay state (-1 = n/a)
+                                    p.col   int8     process code (-1 = n/a)
+                                    ms.col  int64    duration/countdown ms (0 = n/a)
+    <root>/unit=<id>/_seq                    commit manifest (JSON): last ingested
+                                             batch sequence + rows per day
+
+Column files are appended first and fsynced, then the manifest is replaced
+atomically. A crash in between leaves a tail no manifest counts: readers
+ignore it and the next flush cuts it off, and the batches that wrote it are
+not yet below the watermark, so their replay is ingested exactly once.
+"""
+
+import json
+import logging
+import os
+import time
+from array import array
+from pathlib import Path
+
+from src.processes.process_manager import ProcessManager
+from src.processes.settings_store import atomic_write
+from src.telemetry.outbox import decode_batch
+
+logger = logging.getLogger("UltraFiltration.Fleet")
+
+EVENT_CODES = {
+    "valve": 0,
+    "process_start": 1,
+    "pump_start": 2,
+    "process_end": 3,
+    "cycle_complete": 4,
+    "rollup": 5,
+}
+PROCESS_CODES = {name: i for i, name in enumerate(ProcessManager.PROCESS_ORDER)}
+
+# column name → (array typecode, numpy dtype, missing value, record key)
+COLUMNS = {
+    "t":  ("d", "<f8", 0.0, "t"),
+    "e":  ("B", "u1", 0, "e"),
+    "c":  ("b", "i1", -1, "c"),
+    "on": ("b", "i1", -1, "on"),
+    "p":  ("b", "i1", -1, "p"),
+    "ms": ("q", "<i8", 0, "ms"),
+}
+
+
+class _Partition:
+    """In-memory column buffers for one (unit, day) awaiting flush."""
+
+    __slots__ = ("cols",)
+
+    def __init__(self):
+        self.cols = {name: array(spec[0]) for name, spec in COLUMNS.items()}
+
+
+class ColumnStore:
+    """Ingests telemetry batches and appends them to per-partition column files."""
+
+    def __init__(self, root: Path, flush_rows: int = 200_000):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.flush_rows = flush_rows
+        self._buffers: dict[tuple[str, str], _Partition] = {}
+        self._buffered_rows = 0
+        self._manifests: dict[str, dict] = {}      # unit → {"seq": n, "rows": {day: n}}
+        self._dirty: set[str] = set()
+        self.rows_ingested = 0
+        self.batches_skipped = 0
+
+    # ── Ingest ───────────────────────────────────────────────────────────
+
+    def ingest(self, unit_id: str, payload: bytes) -> int:
+        """
+        Decode one uplink batch from `unit_id` and buffer its rows.
+        Batches at or below the unit's watermark (replays after a lost
+        PUBACK) are skipped. Returns the number of rows accepted.
+        """
+        seq, records = decode_batch(payload)
+        manifest = self._manifest(unit_id)
+        if seq <= manifest["seq"]:
+            self.batches_skipped += 1
+            return 0
+        manifest["seq"] = seq
+        self._dirty.add(unit_id)
+        return self.ingest_records(unit_id, records)
+
+    def ingest_records(self, unit_id: str, records: list[dict]) -> int:
+        rows = 0
+        part, part_day = None, None
+        for rec in records:
+            code = EVENT_CODES.get(rec.get("e"))
+            if code is None:
+                continue
+            t = rec["t"]
+            day = time.strftime("%Y-%m-%d", time.gmtime(t))
+            if day != part_day:
+                key = (unit_id, day)
+                part = self._buffers.get(key)
+                if part is None:
+                    part = self._buffers[key] = _Partition()
+                part_day = day
+            cols = part.cols
+            cols["t"].append(t)
+            cols["e"].append(code)
+            cols["c"].append(rec.get("c", -1))
+            cols["on"].append(rec.get("on", -1))
+            cols["p"].append(PROCESS_CODES.get(rec.get("p"), -1))
+            cols["ms"].append(rec.get("ms", 0))
+            rows += 1
+        self.rows_ingested += rows
+        self._buffered_rows += rows
+        if self._buffered_rows >= self.flush_rows:
+            self.flush()
+        return rows
+
+    def flush(self) -> None:
+        """Append all buffered rows to disk, then commit them in the unit manifests."""
+        for (unit_id, day), part in self._buffers.items():
+            pdir = self.partition_dir(unit_id, day)
+            pdir.mkdir(parents=True, exist_ok=True)
+            rows = self.committed_rows(unit_id, day)
+            for name, col in part.cols.items():
+                with open(pdir / f"{name}.col", "ab") as f:
+                    f.truncate(rows * col.itemsize)     # drop an uncommitted tail
+                    col.tofile(f)
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._manifest(unit_id)["rows"][day] = rows + len(part.cols["t"])
+            self._dirty.add(unit_id)
+        for unit_id in self._dirty:
+            atomic_write(self.root / f"unit={unit_id}" / "_seq",
+                         json.dumps(self._manifests[unit_id], separators=(",", ":")))
+        self._dirty.clear()
+        self._buffers.clear()
+        self._buffered_rows = 0
+
+    def committed_rows(self, unit_id: str, day: str) -> int:
+        """Rows of a partition covered by the manifest (readers stop there)."""
+        rows = self._manifest(unit_id)["rows"].get(day)
+        if rows is None:
+            # Written before manifests counted rows: the shortest column is safe
+            pdir = self.partition_dir(unit_id, day)
+            sizes = []
+            for name, spec in COLUMNS.items():
+                try:
+                    sizes.append((pdir / f"{name}.col").stat().st_size // array(spec[0]).itemsize)
+                except OSError:
+                    sizes.append(0)
+            rows = min(sizes)
+        return rows
+
+    # ── Layout ───────────────────────────────────────────────────────────
+
+    def partition_dir(self, unit_id: str, day: str) -> Path:
+        return self.root / f"unit={unit_id}" / f"day={day}"
+
+    def partitions(self, units=None, day_from: str | None = None,
+                   day_to: str | None = None):
+        """Yield (unit_id, day, path) for partitions matching the filters."""
+        wanted = set(units) if units is not None else None
+        for udir in sorted(self.root.glob("unit=*")):
+            unit_id = udir.name[5:]
+            if wanted is not None and unit_id not in wanted:
+                continue
+            for ddir in sorted(udir.glob("day=*")):
+                day = ddir.name[4:]
+                if day_from and day < day_from:
+                    continue
+                if day_to and day > day_to:
+                    continue
+                yield unit_id, day, ddir
+
+    def _manifest(self, unit_id: str) -> dict:
+        manifest = self._manifests.get(unit_id)
+        if manifest is None:
+            try:
+                text = (self.root / f"unit={unit_id}" / "_seq").read_text()
+            except OSError:
+                text = "0"
+            try:
+                manifest = json.loads(text)
+                if isinstance(manifest, int):           # older stores: bare sequence
+                    manifest = {"seq": manifest, "rows": {}}
+            except ValueError:
+                manifest = {"seq": 0, "rows": {}}
+            self._manifests[unit_id] = manifest
+        return manifest
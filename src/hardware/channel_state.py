@@ -0,0 +1,61 @@
+"""
+channel_state.py — The one authoritative record of relay states.
+
+All seven channels live in a single int: bit (channel_id - 1) is set while
+that channel is ON. Every change bumps `version` and is published to
+subscribers as (old_mask, new_mask, version), so observers see exactly
+which channels moved instead of polling each one.
+"""
+
+import logging
+
+logger = logging.getLogger("UltraFiltration.ChannelState")
+
+
+def channels_in(mask: int) -> list[int]:
+    """Channel ids whose bit is set in `mask`, lowest first."""
+    out = []
+    cid = 1
+    while mask:
+        if mask & 1:
+            out.append(cid)
+        mask >>= 1
+        cid += 1
+    return out
+
+
+class ChannelState:
+    """Bitmask of active channels with a version counter and diff subscribers."""
+
+    def __init__(self, mask: int = 0):
+        self.mask = mask
+        self.version = 0
+        self._subscribers: list = []
+
+    def is_on(self, channel_id: int) -> bool:
+        return bool(self.mask >> (channel_id - 1) & 1)
+
+    def set(self, channel_id: int, on: bool) -> None:
+        b = 1 << (channel_id - 1)
+        self.apply(self.mask | b if on else self.mask & ~b)
+
+    def apply(self, new_mask: int) -> None:
+        """Replace the whole mask; subscribers are told only if it changed."""
+        old = self.mask
+        if new_mask == old:
+            return
+        self.mask = new_mask
+        self.version += 1
+        for func in self._subscribers:
+            try:
+                func(old, new_mask, self.version)
+            except Exception as e:
+                logger.error("Subscriber %r failed: %s", func, e)
+
+    def subscribe(self, func) -> None:
+        """Call func(old_mask, new_mask, version) after every change."""
+        self._subscribers.append(func)
+
+    def unsubscribe(self, func) -> None:
+        if func in self._subscribers:
+            self._subscribers.remove(func)
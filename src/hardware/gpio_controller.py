@@ -4,7 +4,9 @@ gpio_controller.py — Real RPi.GPIO wrapper for production on Raspberry Pi.
 
 import logging
 import RPi.GPIO as GPIO
-from src.config import PIN_MAP
+from src.config import OFF_ORDER, PIN_MAP
+from src.diagnostics import tracing
+from src.hardware.channel_state import ChannelState
 
 logger = logging.getLogger("UltraFiltration.GPIO")
 
@@ -18,26 +20,37 @@ class GPIOController:
         # Initialize all mapped pins as OUTPUT, HIGH (relays OFF)
         for pin in PIN_MAP.values():
             GPIO.setup(pin, GPIO.OUT, initial=GPIO.HIGH)
+        # Commanded relay states, shared with ProcessManager and the UI
+        self.state = ChannelState()
         logger.info("GPIOController initialized  |  pins=%s", list(PIN_MAP.values()))
 
     # ── Single-channel operations ────────────────────────────────────────
 
     def turn_on(self, channel_id: int) -> None:
         """Activate a valve/pump (relay LOW = ON)."""
+        if tracing.enabled:
+            tracing.begin("gpio.on", "gpio", channel=channel_id)
         pin = PIN_MAP[channel_id]
         GPIO.output(pin, GPIO.LOW)
+        self.state.set(channel_id, True)
         logger.debug("ON   channel=%d  pin=%d", channel_id, pin)
+        if tracing.enabled:
+            tracing.end()
 
     def turn_off(self, channel_id: int) -> None:
         """Deactivate a valve/pump (relay HIGH = OFF)."""
+        if tracing.enabled:
+            tracing.begin("gpio.off", "gpio", channel=channel_id)
         pin = PIN_MAP[channel_id]
         GPIO.output(pin, GPIO.HIGH)
+        self.state.set(channel_id, False)
         logger.debug("OFF  channel=%d  pin=%d", channel_id, pin)
+        if tracing.enabled:
+            tracing.end()
 
     def is_on(self, channel_id: int) -> bool:
-        """Check if a channel is currently active (LOW = on)."""
-        pin = PIN_MAP[channel_id]
-        return GPIO.input(pin) == GPIO.LOW
+        """Check if a channel is currently active (from the shared state mask)."""
+        return self.state.is_on(channel_id)
 
     def toggle(self, channel_id: int) -> bool:
         """Toggle a channel. Returns the new state (True = ON)."""
@@ -52,10 +65,20 @@ class GPIOController:
 
     def all_off(self) -> None:
         """Turn off all channels (safe state)."""
-        for cid in PIN_MAP:
+        for cid in OFF_ORDER:
             self.turn_off(cid)
         logger.info("ALL channels OFF")
 
+    def force_off(self) -> None:
+        """
+        Drive every relay pin to OFF without touching the shared state or
+        notifying anyone. Safe from any thread: the watchdog's last resort
+        when the thread that owns the relays is stuck.
+        """
+        for cid in OFF_ORDER:
+            GPIO.output(PIN_MAP[cid], GPIO.HIGH)
+        logger.critical("FORCED all channels OFF")
+
     def shutdown(self) -> None:
         """Turn everything off. Called on app exit."""
         self.all_off()
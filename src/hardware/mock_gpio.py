@@ -4,7 +4,9 @@ Logs all calls so you can verify logic on Windows/Mac/Linux.
 """
 
 import logging
-from src.config import PIN_MAP
+from src.config import OFF_ORDER
+from src.diagnostics import tracing
+from src.hardware.channel_state import ChannelState
 
 logger = logging.getLogger("UltraFiltration.MockGPIO")
 
@@ -13,22 +15,30 @@ class MockGPIO:
     """Drop-in replacement for GPIOController that only logs."""
 
     def __init__(self):
-        # Track simulated pin states: True = ON, False = OFF
-        self._states: dict[int, bool] = {cid: False for cid in PIN_MAP}
+        # Simulated relay states (bit per channel, set = ON)
+        self.state = ChannelState()
         logger.info("MockGPIO initialized  (simulation mode — no real hardware)")
 
     def turn_on(self, channel_id: int) -> None:
-        self._states[channel_id] = True
+        if tracing.enabled:
+            tracing.begin("gpio.on", "gpio", channel=channel_id)
+        self.state.set(channel_id, True)
         logger.info("🟢  MOCK ON   channel=%d  (%s)", channel_id,
                      self._label(channel_id))
+        if tracing.enabled:
+            tracing.end()
 
     def turn_off(self, channel_id: int) -> None:
-        self._states[channel_id] = False
+        if tracing.enabled:
+            tracing.begin("gpio.off", "gpio", channel=channel_id)
+        self.state.set(channel_id, False)
         logger.info("🔴  MOCK OFF  channel=%d  (%s)", channel_id,
                      self._label(channel_id))
+        if tracing.enabled:
+            tracing.end()
 
     def is_on(self, channel_id: int) -> bool:
-        return self._states.get(channel_id, False)
+        return self.state.is_on(channel_id)
 
     def toggle(self, channel_id: int) -> bool:
         if self.is_on(channel_id):
@@ -39,10 +49,14 @@ class MockGPIO:
             return True
 
     def all_off(self) -> None:
-        for cid in PIN_MAP:
+        for cid in OFF_ORDER:
             self.turn_off(cid)
         logger.info("MOCK — ALL channels OFF")
 
+    def force_off(self) -> None:
+        # Real pins would go OFF here; the state is left for the owner to fix
+        logger.critical("MOCK — FORCED all channels OFF")
+
     def shutdown(self) -> None:
         self.all_off()
         logger.info("MOCK — shutdown complete")
@@ -0,0 +1,282 @@
+"""
+log_pipeline.py — Asynchronous, SD-card friendly logging.
+
+Callers (the Tk thread included) only enqueue LogRecords; a single listener
+thread does all formatting and I/O:
+
+    logger ──► QueueHandler ──► SimpleQueue ──► LogListener thread
+                                                  ├─ RateLimitFilter
+                                                  ├─ stderr (optional, human readable)
+                                                  └─ BufferedRotatingFileHandler
+                                                       RAM buffer → bulk append,
+                                                       size/time rotation → .gz
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import time
+from pathlib import Path
+
+_ROOT_NAME = "UltraFiltration"
+_LEVEL_CHARS = {"DEBUG": "D", "INFO": "I", "WARNING": "W", "ERROR": "E", "CRITICAL": "C"}
+
+
+# ── Formatting ───────────────────────────────────────────────────────────────
+class CompactFormatter(logging.Formatter):
+    """
+    One short JSON object per line, e.g.
+    {"t":1760000000.123,"l":"I","n":"Process","m":"STARTING: service"}
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        name = record.name
+        if name.startswith(_ROOT_NAME + "."):
+            name = name[len(_ROOT_NAME) + 1:]
+        out = {
+            "t": round(record.created, 3),
+            "l": _LEVEL_CHARS.get(record.levelname, record.levelname),
+            "n": name,
+            "m": record.getMessage(),
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            out["r"] = suppressed
+        if record.exc_info:
+            out["x"] = self.formatException(record.exc_info)
+        return json.dumps(out, ensure_ascii=False, separators=(",", ":"))
+
+
+class _ConsoleFormatter(logging.Formatter):
+    """The original stderr layout, plus a suppression note when relevant."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f"  (+{suppressed} repeats suppressed)"
+        return text
+
+
+# ── Rate limiting ────────────────────────────────────────────────────────────
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `burst` identical messages through per `window_s`.
+    The next message that passes carries the number dropped in between
+    as `record.suppressed`.
+    """
+
+    def __init__(self, window_s: float = 10.0, burst: int = 5, max_keys: int = 1024):
+        super().__init__()
+        self.window_s = window_s
+        self.burst = burst
+        self.max_keys = max_keys
+        self._seen: dict[tuple, list] = {}   # key → [window_start, count, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, record.getMessage())
+        now = record.created
+        entry = self._seen.get(key)
+        if entry is None or now - entry[0] >= self.window_s:
+            suppressed = entry[2] if entry else 0
+            if len(self._seen) >= self.max_keys:
+                self._seen.clear()
+            self._seen[key] = [now, 1, 0]
+            record.suppressed = suppressed
+            return True
+        entry[1] += 1
+        if entry[1] <= self.burst:
+            record.suppressed = 0
+            return True
+        entry[2] += 1
+        return False
+
+
+# ── File output ──────────────────────────────────────────────────────────────
+class BufferedRotatingFileHandler(logging.Handler):
+    """
+    Keeps formatted lines in RAM and appends them to disk in bulk: when the
+    buffer exceeds `buffer_bytes`, when `flush_interval_s` has elapsed, or
+    immediately for records at `flush_level` and above. The active file is
+    rotated by size or age into gzip-compressed backups.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 1024 * 1024,
+                 rotate_interval_s: float = 86400.0, backup_count: int = 7,
+                 buffer_bytes: int = 64 * 1024, flush_interval_s: float = 60.0,
+                 flush_level: int = logging.ERROR):
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.rotate_interval_s = rotate_interval_s
+        self.backup_count = backup_count
+        self.buffer_bytes = buffer_bytes
+        self.flush_interval_s = flush_interval_s
+        self.flush_level = flush_level
+
+        self._buffer = bytearray()
+        self._last_flush = time.monotonic()
+        try:
+            st = self.path.stat()
+            self._size, self._opened = st.st_size, st.st_mtime
+        except OSError:
+            self._size, self._opened = 0, time.time()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._buffer += (self.format(record) + "\n").encode("utf-8")
+        except Exception:
+            self.handleError(record)
+            return
+        if (record.levelno >= self.flush_level or
+                len(self._buffer) >= self.buffer_bytes):
+            self.flush()
+
+    def flush_if_due(self) -> None:
+        if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            self._last_flush = time.monotonic()
+            if not self._buffer:
+                return
+            if self._should_rotate(len(self._buffer)):
+                self._rotate()
+            with open(self.path, "ab") as f:
+                f.write(self._buffer)
+            self._size += len(self._buffer)
+            self._buffer.clear()
+        except OSError:
+            self._buffer.clear()   # never let a full/failed card grow RAM forever
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+    def _should_rotate(self, incoming: int) -> bool:
+        if not self._size:
+            return False
+        return (self._size + incoming > self.max_bytes or
+                time.time() - self._opened >= self.rotate_interval_s)
+
+    def _rotate(self) -> None:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        # Within one second: <stamp>.gz, <stamp>-1.gz, ... never reusing a
+        # pruned name, so the newest backup always sorts last
+        taken = [self._backup_order(p)[1]
+                 for p in self.path.parent.glob(f"{self.path.name}.{stamp}*.gz")]
+        n = max(taken) + 1 if taken else 0
+        target = self.path.with_name(f"{self.path.name}.{stamp}{f'-{n}' if n else ''}.gz")
+        with open(self.path, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(self.path)
+        self._size, self._opened = 0, time.time()
+        backups = sorted(self.path.parent.glob(f"{self.path.name}.*.gz"), key=self._backup_order)
+        for old in backups[:-self.backup_count] if self.backup_count else backups:
+            old.unlink()
+
+    def _backup_order(self, backup: Path) -> tuple[str, int]:
+        # "<YYYYmmdd-HHMMSS>[-n].gz"; "<stamp>.gz" comes before "<stamp>-1.gz"
+        # although "-" sorts before "."
+        day, _, rest = backup.name[len(self.path.name) + 1:-3].partition("-")
+        clock, _, n = rest.partition("-")
+        return day + clock, int(n or 0)
+
+
+# ── Queue plumbing ───────────────────────────────────────────────────────────
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that skips formatting — the listener lives in-process."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class LogListener(logging.handlers.QueueListener):
+    """QueueListener that also gives buffered handlers a periodic flush tick."""
+
+    def __init__(self, q, *handlers, rate_limit: RateLimitFilter | None = None,
+                 tick_s: float = 1.0):
+        super().__init__(q, *handlers, respect_handler_level=True)
+        self.rate_limit = rate_limit
+        self.tick_s = tick_s
+
+    def handle(self, record: logging.LogRecord) -> None:
+        # Applied once here rather than per handler, so counts stay exact
+        if self.rate_limit is None or self.rate_limit.filter(record):
+            super().handle(record)
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=self.tick_s)
+            except queue.Empty:
+                for h in self.handlers:
+                    if isinstance(h, BufferedRotatingFileHandler):
+                        h.flush_if_due()
+
+    def stop(self) -> None:
+        super().stop()
+        for h in self.handlers:
+            h.close()
+
+
+_listener: LogListener | None = None
+
+
+def setup_logging(level: int = logging.INFO, log_dir: str | Path | None = None,
+                  stderr: bool = True, max_bytes: int = 1024 * 1024,
+                  backup_count: int = 7, flush_interval_s: float = 60.0,
+                  rate_window_s: float = 10.0, rate_burst: int = 5) -> LogListener:
+    """Route all logging through the queue/listener pipeline. Idempotent."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    rate_limit = RateLimitFilter(rate_window_s, rate_burst)
+    handlers = []
+    if stderr:
+        console = logging.StreamHandler(sys.stderr)
+        console.setFormatter(_ConsoleFormatter(
+            "%(asctime)s  %(levelname)-8s  %(name)s  %(message)s", datefmt="%H:%M:%S"
+        ))
+        handlers.append(console)
+    if log_dir:
+        file_handler = BufferedRotatingFileHandler(
+            Path(log_dir) / "ultrafiltration.log", max_bytes=max_bytes,
+            backup_count=backup_count, flush_interval_s=flush_interval_s,
+        )
+        file_handler.setFormatter(CompactFormatter())
+        handlers.append(file_handler)
+
+    q = queue.SimpleQueue()
+    enqueue = _EnqueueHandler(q)
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(enqueue)
+    root.setLevel(level)
+
+    _listener = LogListener(q, *handlers, rate_limit=rate_limit)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Drain the queue and flush buffered lines to disk."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,6 +1,7 @@
 """
 main.py — Entry point for the UltraFiltration control system.
 Run: python -m src.main  (from the project root)
+     python -m src.main ctl status   (control a running instance)
 """
 
 import sys
@@ -13,10 +14,15 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from src.config import logger, IS_HARDWARE, IS_FULLSCREEN
-from src.ui.app import App
 
 
 def main():
+    # `ultra-filt ctl ...` talks to a running instance instead of starting one
+    if sys.argv[1:2] == ["ctl"]:
+        from src.control.ctl import main as ctl_main
+        sys.exit(ctl_main(sys.argv[2:]))
+
+    from src.ui.app import App
     logger.info("=" * 60)
     logger.info("  UltraFiltration Control System")
     logger.info("  Hardware: %s  |  Fullscreen: %s", IS_HARDWARE, IS_FULLSCREEN)
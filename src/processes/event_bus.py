@@ -0,0 +1,269 @@
+"""
+event_bus.py — Typed publish/subscribe for ProcessManager events.
+
+Every event type is declared up front with its field names, and publish()
+refuses anything else, so a subscriber can rely on the payload shape.
+
+Subscribers are either
+
+    SYNC    called inline on the publishing (Tk) thread, in priority order.
+            Meant for RAM-only work: UI updates, outbox appends.
+    QUEUED  handed the event through a bounded queue and called on their own
+            worker thread. Meant for anything that may block: disk writers,
+            network clients. A full queue drops its oldest event.
+
+Payload dicts are shared between subscribers and must not be modified.
+Each subscription keeps its own latency figures (calls, total and worst
+handler time, worst queue wait, drops, errors).
+
+hold() lets the publisher finish its relay work before anyone is told:
+events published inside it are buffered and dispatched, in order, when the
+outermost hold exits.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from src.diagnostics import tracing
+
+logger = logging.getLogger("UltraFiltration.EventBus")
+
+SYNC = "sync"
+QUEUED = "queued"
+
+
+class Subscription:
+    """One handler on the bus plus its latency accounting."""
+
+    def __init__(self, bus, handler, types, mode: str, priority: int, name: str):
+        self.bus = bus
+        self.handler = handler          # (event: str, data: dict) -> None
+        self.types = types              # frozenset of event types, None = all
+        self.mode = mode
+        self.priority = priority
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.dropped = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.max_wait_s = 0.0           # QUEUED: publish → handler start
+        self._worker: _Worker | None = None
+
+    def cancel(self) -> None:
+        self.bus.unsubscribe(self)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name, "mode": self.mode, "priority": self.priority,
+            "calls": self.calls, "errors": self.errors, "dropped": self.dropped,
+            "avg_us": self.total_s / self.calls * 1e6 if self.calls else 0.0,
+            "max_us": self.max_s * 1e6, "max_wait_us": self.max_wait_s * 1e6,
+            "backlog": len(self._worker.queue) if self._worker else 0,
+        }
+
+    def _call(self, event: str, data: dict) -> float:
+        if tracing.enabled:
+            tracing.begin(self.name, "event", event=event)
+        t0 = time.perf_counter()
+        try:
+            self.handler(event, data)
+        except Exception as e:
+            self.errors += 1
+            logger.error("Subscriber %s failed on %s: %s", self.name, event, e)
+        dt = time.perf_counter() - t0
+        if tracing.enabled:
+            tracing.end()
+        self.calls += 1
+        self.total_s += dt
+        if dt > self.max_s:
+            self.max_s = dt
+        return dt
+
+
+class _Worker:
+    """Bounded queue drained by a daemon thread for one QUEUED subscription."""
+
+    def __init__(self, sub: Subscription, maxlen: int):
+        self.sub = sub
+        self.queue: deque = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"EventBus:{sub.name}", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, event: str, data: dict) -> None:
+        with self._cond:
+            if len(self.queue) == self.queue.maxlen:
+                self.sub.dropped += 1
+            self.queue.append((time.perf_counter(), event, data))
+            self._cond.notify()
+
+    def drain(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.queue or self._busy:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def stop(self, timeout: float) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        sub = self.sub
+        while True:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+                while not self.queue and not self._stopping:
+                    self._cond.wait()
+                if not self.queue:
+                    return
+                queued_at, event, data = self.queue.popleft()
+                self._busy = True
+            wait = time.perf_counter() - queued_at
+            if wait > sub.max_wait_s:
+                sub.max_wait_s = wait
+            sub._call(event, data)
+
+
+class EventBus:
+    """
+    Args:
+        types: Event type → field names its payload must carry.
+        slow_ms: A SYNC handler taking longer than this is logged, since it
+                 holds up the publishing thread.
+    """
+
+    def __init__(self, types: dict, slow_ms: float = 5.0):
+        self._types = {event: frozenset(fields) for event, fields in types.items()}
+        self.slow_s = slow_ms / 1000
+        self._subs: list[Subscription] = []
+        # Per event type, the subscriptions that receive it in dispatch
+        # order; rebuilt on (un)subscribe so publish() only reads a tuple
+        self._routes: dict[str, tuple] = {event: () for event in self._types}
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._hold_depth = 0
+        self._held: list[tuple[str, dict]] = []
+
+    @property
+    def types(self) -> list[str]:
+        return list(self._types)
+
+    def subscribe(self, handler, types=None, *, mode: str = SYNC, priority: int = 0,
+                  name: str | None = None, maxlen: int = 1024) -> Subscription:
+        """
+        Call handler(event, data) for each event in `types` (default: all).
+        Higher `priority` is dispatched first; ties keep subscription order.
+        """
+        if mode not in (SYNC, QUEUED):
+            raise ValueError(f"Unknown subscriber mode: {mode!r}")
+        if types is not None:
+            types = frozenset([types] if isinstance(types, str) else types)
+            unknown = types - self._types.keys()
+            if unknown:
+                raise ValueError(f"Unknown event type(s): {', '.join(sorted(unknown))}")
+        if name is None:
+            name = getattr(handler, "__qualname__", type(handler).__name__)
+        sub = Subscription(self, handler, types, mode, priority, name)
+        if mode == QUEUED:
+            sub._worker = _Worker(sub, maxlen)
+        with self._lock:
+            self._seq += 1
+            sub._seq = self._seq
+            self._subs.append(sub)
+            self._reroute()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub not in self._subs:
+                return
+            self._subs.remove(sub)
+            self._reroute()
+        if sub._worker:
+            sub._worker.stop(timeout=1.0)
+
+    def wants(self, event: str) -> bool:
+        """True if anyone is subscribed to `event` (lets callers skip work)."""
+        return bool(self._routes.get(event))
+
+    def publish(self, event: str, **data) -> None:
+        fields = self._types.get(event)
+        if fields is None:
+            raise ValueError(f"Unknown event type: {event!r}")
+        if data.keys() != fields:
+            raise ValueError(f"{event} expects fields {sorted(fields)}, got {sorted(data)}")
+        if self._hold_depth:
+            self._held.append((event, data))
+        else:
+            self._dispatch(event, data)
+
+    @contextmanager
+    def hold(self):
+        """Buffer events until the outermost hold exits, then dispatch them."""
+        self._hold_depth += 1
+        try:
+            yield
+        finally:
+            self._hold_depth -= 1
+            if not self._hold_depth and self._held:
+                held, self._held = self._held, []
+                for event, data in held:
+                    self._dispatch(event, data)
+
+    def subscriptions(self) -> list[Subscription]:
+        return list(self._subs)
+
+    def stats(self) -> list[dict]:
+        return [sub.stats() for sub in self._subs]
+
+    def drain(self, timeout: float = 5.0) -> bool:
+        """Wait until every QUEUED subscriber has caught up."""
+        deadline = time.monotonic() + timeout
+        for sub in list(self._subs):
+            if sub._worker and not sub._worker.drain(max(0.0, deadline - time.monotonic())):
+                return False
+        return True
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Let queued subscribers finish what they have, then stop their threads."""
+        self.drain(timeout)
+        with self._lock:
+            subs, self._subs = self._subs, []
+            self._reroute()
+        for sub in subs:
+            if sub._worker:
+                sub._worker.stop(timeout)
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _dispatch(self, event: str, data: dict) -> None:
+        for sub in self._routes[event]:
+            if sub._worker:
+                sub._worker.put(event, data)
+                continue
+            dt = sub._call(event, data)
+            if dt > self.slow_s:
+                logger.warning("Slow subscriber %s on %s: %.1f ms",
+                               sub.name, event, dt * 1000)
+
+    def _reroute(self) -> None:
+        order = sorted(self._subs, key=lambda s: (-s.priority, s._seq))
+        self._routes = {
+            event: tuple(s for s in order if s.types is None or event in s.types)
+            for event in self._types
+        }
@@ -1,42 +1,23 @@
 """
 process_manager.py — Encapsulates the filtration cycle logic.
-Independent of UI — communicates via callbacks.
+Independent of UI — communicates through an EventBus.
 """
 
-import json
 import logging
+import time
 from pathlib import Path
 
+from src.diagnostics import tracing
+from src.hardware.channel_state import channels_in
+from src.processes.event_bus import EventBus
+from src.processes.settings_store import SettingsStore
+
 logger = logging.getLogger("UltraFiltration.Process")
 
-# ── Timing persistence (JSON instead of pickle) ─────────────────────────────
+# ── Timing persistence ───────────────────────────────────────────────────────
 _TIMINGS_FILE = Path(__file__).resolve().parent.parent.parent / "timings.json"
 
 
-def load_timings() -> dict:
-    """Load saved timings or return defaults."""
-    from src.config import DEFAULT_TIMINGS
-    if _TIMINGS_FILE.exists():
-        try:
-            with open(_TIMINGS_FILE, "r") as f:
-                saved = json.load(f)
-            logger.info("Loaded timings from %s", _TIMINGS_FILE)
-            return {**DEFAULT_TIMINGS, **saved}
-        except Exception as e:
-            logger.warning("Failed to load timings: %s — using defaults", e)
-    return dict(DEFAULT_TIMINGS)
-
-
-def save_timings(timings: dict) -> None:
-    """Persist timings to JSON."""
-    try:
-        with open(_TIMINGS_FILE, "w") as f:
-            json.dump(timings, f, indent=2)
-        logger.info("Saved timings to %s", _TIMINGS_FILE)
-    except Exception as e:
-        logger.error("Failed to save timings: %s", e)
-
-
 class ProcessManager:
     """
     Manages the filtration cycle sequence.
@@ -54,25 +35,120 @@ class ProcessManager:
 
     PROCESS_ORDER = ["fast_rinse", "service", "back_wash", "forward_wash"]
 
-    def __init__(self, gpio, scheduler_widget):
+    # Event types published on self.events, with their payload fields.
+    # "valve" fires on every relay transition; "valves" is the same changes
+    # merged into one (old_mask, new_mask) update per Tk idle cycle for
+    # redraws. "start_refused" answers a start that did not happen ("auto
+    # cycle" or a process name), so a screen that prepared for it can undo.
+    EVENTS = {
+        "process_start":   ("name", "duration_ms"),
+        "pump_start":      ("name", "countdown_ms"),
+        "process_end":     ("name",),
+        "cycle_complete":  (),
+        "valve":           ("channel_id", "is_on"),
+        "valves":          ("old_mask", "new_mask"),
+        "timings_changed": ("changed",),
+        "start_refused":   ("what", "reason"),
+    }
+
+    def __init__(self, gpio, scheduler_widget, settings: SettingsStore | None = None,
+                 pipelined: bool | None = None, bridge=None):
         """
         Args:
             gpio: GPIOController or MockGPIO instance.
             scheduler_widget: Any Tkinter widget to call .after() on.
+            settings: Timings store (defaults to timings.json in the project root).
+            pipelined: Open the next process's valves during the previous
+                       one's close delay where they don't overlap
+                       (default: UF_PIPELINED).
+            bridge: TkBridge onto the scheduler thread, for
+                    call_soon_threadsafe() (default: the widget's own, if any).
         """
+        from src.config import (DEFAULT_TIMINGS, PIPELINED_TRANSITIONS,
+                                PUMP_ENGAGE_DELAY, VALVE_CLOSE_DELAY)
         self.gpio = gpio
         self.widget = scheduler_widget
-        self.timings = load_timings()
-        self._pending_jobs: list = []
+        self.bridge = bridge or getattr(scheduler_widget, "bridge", None)
+        if settings is None:
+            settings = SettingsStore(_TIMINGS_FILE, DEFAULT_TIMINGS, self.PROCESS_CONFIG)
+        self.settings = settings
+        self.pump_delay_ms = PUMP_ENGAGE_DELAY
+        self.close_delay_ms = VALVE_CLOSE_DELAY
+        self.pipelined = PIPELINED_TRANSITIONS if pipelined is None else pipelined
+        # Valves each process can hand to its auto-cycle successor early
+        self._handoffs = {name: self._handoff_valves(name, self._next_process(name))
+                          for name in self.PROCESS_CONFIG}
+        self._pending_jobs: set = set()
         self._current_process: str | None = None
         self._running = False
-
-        # Callbacks the UI can register
-        self.on_process_start = None   # (process_name: str, duration_ms: int) -> None
-        self.on_pump_start = None      # (process_name: str, countdown_ms: int) -> None
-        self.on_process_end = None     # (process_name: str) -> None
-        self.on_valve_change = None    # (channel_id: int, is_on: bool) -> None
-        self.on_cycle_complete = None  # () -> None
+        self._auto = False             # the running sequence is the auto cycle
+        # Phase of the current process and the wall-clock time (epoch seconds)
+        # at which that phase is expected to end — used by remote viewers
+        self._phase = "idle"           # idle, opening, running, closing, stopping
+        self._deadline: float | None = None
+        self.events = EventBus(self.EVENTS)
+        # Compiled step plans per process, and externally edited timings
+        # waiting for the next process boundary (see stage_timings)
+        self._plans: dict[tuple, tuple] = {}
+        # Mask before the first change of a batch not yet sent to the UI
+        self._ui_mask: int | None = None
+        self._ui_version = 0            # first state version in that batch
+        self._staged_timings: dict | None = None
+
+        # Valve notifications follow the shared channel state, so they fire
+        # once per real change — whoever switched the relay (this class,
+        # ManualFrame, a deferred interlock release)
+        self.gpio.state.subscribe(self._on_channels_changed)
+
+        if self.pipelined:
+            logger.info("Pipelined transitions: +%.1f service min/day at current timings",
+                        self.cycle_report()["gain_min_per_day"])
+
+    # ── Listeners ────────────────────────────────────────────────────────
+
+    def add_listener(self, func):
+        """
+        Shorthand for a synchronous subscriber called as func(event: str,
+        data: dict) for every event except the "valves" redraw batches.
+        See self.events for queued subscribers, priorities and filters.
+        """
+        return self.events.subscribe(func, [e for e in self.EVENTS if e != "valves"])
+
+    def remove_listener(self, func) -> None:
+        for sub in self.events.subscriptions():
+            if sub.handler == func:
+                sub.cancel()
+
+    def snapshot(self) -> dict:
+        """Compact view of the live state: channel bitmask, process, phase, deadline."""
+        return {
+            "mask": self.channel_mask(),
+            "proc": self._current_process,
+            "phase": self._phase,
+            "deadline": self._deadline,
+        }
+
+    def channel_mask(self) -> int:
+        """Bitmask of active channels — bit (channel_id - 1) is set when ON."""
+        return self.gpio.state.mask
+
+    def cycle_report(self) -> dict:
+        """
+        Length of the repeating auto-cycle loop (service → ... → service)
+        and the service minutes per day it yields, sequential vs pipelined,
+        at the current timings.
+        """
+        seq, pipe = self._loop_ms(False), self._loop_ms(True)
+        service_ms = self.timings["service"]
+        seq_min = 86_400_000 / seq * service_ms / 60_000
+        pipe_min = 86_400_000 / pipe * service_ms / 60_000
+        return {
+            "sequential_loop_s": seq / 1000,
+            "pipelined_loop_s": pipe / 1000,
+            "sequential_service_min_per_day": seq_min,
+            "pipelined_service_min_per_day": pipe_min,
+            "gain_min_per_day": pipe_min - seq_min,
+        }
 
     # ── Public API ───────────────────────────────────────────────────────
 
@@ -84,18 +160,49 @@ class ProcessManager:
     def is_running(self) -> bool:
         return self._running
 
-    def start_auto_cycle(self) -> None:
-        """Start the full auto cycle from fast_rinse."""
+    @property
+    def auto_cycle(self) -> bool:
+        """An auto cycle is in progress (not a single process, not stopping)."""
+        return self._running and self._auto
+
+    @property
+    def phase(self) -> str:
+        """idle, opening, running, closing or stopping."""
+        return self._phase
+
+    @property
+    def timings(self) -> dict:
+        """Current process durations (ms), served from memory."""
+        return self.settings.data
+
+    @property
+    def staged_timings(self) -> dict | None:
+        """Timings waiting for the next process boundary, if any."""
+        return self._staged_timings
+
+    def start_auto_cycle(self) -> bool:
+        """Start the full auto cycle from fast_rinse; False if refused."""
+        if self._refuse_start("auto cycle"):
+            return False
         self._running = True
-        self._run_process("fast_rinse", auto_next=True)
+        self._auto = True
+        with self.events.hold():
+            self._run_process("fast_rinse", auto_next=True)
+        return True
 
-    def start_single_process(self, name: str) -> None:
-        """Start a single process (manual step control)."""
+    def start_single_process(self, name: str) -> bool:
+        """Start a single process (manual step control); False if refused."""
         if name not in self.PROCESS_CONFIG:
             logger.error("Unknown process: %s", name)
-            return
+            self._emit("start_refused", what=name, reason=f"Unknown process: {name}")
+            return False
+        if self._refuse_start(name):
+            return False
         self._running = True
-        self._run_process(name, auto_next=False)
+        self._auto = False
+        with self.events.hold():
+            self._run_process(name, auto_next=False)
+        return True
 
     def stop_current_process(self, callback=None) -> None:
         """Gracefully stop the current process with pump-off delay."""
@@ -104,10 +211,12 @@ class ProcessManager:
 
         if self._current_process:
             cfg = self.PROCESS_CONFIG[self._current_process]
+            self._set_phase("stopping", self.close_delay_ms)
             # Turn off pump first
             self._gpio_off(cfg["pump"])
-            # After delay, turn off valves
-            self._schedule(5000, lambda: self._close_all_and_notify(callback))
+            # After delay, turn off valves (including any opened for the next step)
+            self._schedule(self.close_delay_ms, lambda: self._close_all_and_notify(callback),
+                           "close_all")
         else:
             if callback:
                 callback()
@@ -116,82 +225,204 @@ class ProcessManager:
         """Emergency stop — cancel everything instantly."""
         self._cancel_all_jobs()
         self._running = False
-        self.gpio.all_off()
-        for cid in range(1, 8):
-            self._notify_valve(cid, False)
-        self._current_process = None
+        with self.events.hold():
+            self.gpio.all_off()
+            self._current_process = None
+            self._set_phase("idle")
+
+    def call_soon_threadsafe(self, func, *args) -> None:
+        """
+        Run func(*args) on the scheduler thread, inside an event hold. The
+        only method other threads (sensors, watchdogs, network handlers)
+        may call; everything else here belongs to the scheduler thread.
+        """
+        if self.bridge is None:
+            raise RuntimeError("ProcessManager has no thread bridge")
+        self.bridge.post(self._run_held, func, args)
 
     def update_timings(self, new_timings: dict) -> None:
-        """Update and persist timings."""
-        self.timings.update(new_timings)
-        save_timings(self.timings)
+        """Update timings; persisted atomically in the background."""
+        old = dict(self.timings)
+        self.settings.update(new_timings)
+        self._invalidate_plans(old)
 
     def reset_timings(self) -> None:
         """Reset to factory defaults."""
-        from src.config import DEFAULT_TIMINGS
-        self.timings = dict(DEFAULT_TIMINGS)
-        save_timings(self.timings)
+        old = dict(self.timings)
+        self.settings.reset()
+        self._invalidate_plans(old)
+
+    def stage_timings(self, values: dict) -> None:
+        """
+        Adopt timings edited outside the UI (e.g. timings.json changed on
+        disk). A running step keeps its schedule; the new values take effect
+        at the next process boundary, or right away when idle.
+        """
+        self._staged_timings = dict(values)
+        if self._current_process is None:
+            self._apply_staged_timings()
 
     # ── Internal logic ───────────────────────────────────────────────────
 
-    def _run_process(self, name: str, auto_next: bool) -> None:
-        """Execute a single named process."""
+    def _run_process(self, name: str, auto_next: bool, lead_ms: int | None = None) -> None:
+        """
+        Execute a single named process. `lead_ms` is set when the previous
+        process already opened this one's valves that long ago.
+        """
+        if self._staged_timings is not None:
+            self._apply_staged_timings()
         self._current_process = name
-        cfg = self.PROCESS_CONFIG[name]
-        t = self.timings[name]
+        handoff = self._handoffs[name] if auto_next and self.pipelined else ()
+        t, countdown_ms, steps, handoff_lead_ms = self._plan(name, lead_ms, handoff)
 
         logger.info("STARTING: %s  (duration=%dms)", name, t)
-        if self.on_process_start:
-            self.on_process_start(name, t)
+        self._set_phase("opening", self.pump_delay_ms if lead_ms is None
+                        else max(0, self.pump_delay_ms - lead_ms))
+        self._emit("process_start", name=name, duration_ms=t)
 
-        # 1. Open valves
-        for v in cfg["valves"]:
-            self._gpio_on(v)
+        def _pump_on(pump):
+            self._set_phase("running", countdown_ms)
+            self._gpio_on(pump)
+            self._emit("pump_start", name=name, countdown_ms=countdown_ms)
 
-        # 2. After PUMP_ENGAGE_DELAY, start pump
-        pump_delay = 5000
-        # Countdown duration = process time + valve close delay
-        countdown_ms = t + 5000
-        if "extra_valve" in cfg:
-            countdown_ms = t + 10000
+        def _pump_off(pump):
+            self._set_phase("closing", countdown_ms - t)
+            self._gpio_off(pump)
+
+        def finish(_):
+            logger.info("FINISHED: %s", name)
+            self._emit("process_end", name=name)
+            if auto_next and self._running:
+                next_name = self._next_process(name)
+                self._run_process(next_name, auto_next=True,
+                                  lead_ms=handoff_lead_ms if handoff else None)
+            else:
+                self._current_process = None
+                self._running = False
+                self._set_phase("idle")
+                self._emit("cycle_complete")
+
+        actions = {
+            "on": self._gpio_on, "off": self._gpio_off,
+            "pump_on": _pump_on, "pump_off": _pump_off, "finish": finish,
+        }
+        for at_ms, action, channel in steps:
+            if at_ms == 0:
+                actions[action](channel)
+            else:
+                self._schedule(at_ms, lambda f=actions[action], c=channel: f(c), action)
 
-        def _pump_on():
-            self._gpio_on(cfg["pump"])
-            if self.on_pump_start:
-                self.on_pump_start(name, countdown_ms)
+    def _plan(self, name: str, lead_ms: int | None = None, handoff: tuple = ()) -> tuple:
+        key = (name, lead_ms, handoff)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = self._compile(name, lead_ms, handoff)
+        return plan
 
-        self._schedule(pump_delay, _pump_on)
+    def _compile(self, name: str, lead_ms: int | None = None, handoff: tuple = ()) -> tuple:
+        """
+        Flatten a process into (duration_ms, countdown_ms, steps, handoff_lead_ms),
+        each step being (offset_ms, action, channel) in scheduling order.
+        Plans are cached and only recompiled when that process's timing changes.
+
+        Pipelined mode: `lead_ms` means the valves were opened that long ago
+        by the previous process, so the pump waits only for the rest of
+        PUMP_ENGAGE_DELAY. `handoff` valves (the next process's) open as soon
+        as this pump stops; handoff_lead_ms is how long before "finish" that is.
+        """
+        cfg = self.PROCESS_CONFIG[name]
+        t = self.timings[name]
+        close_delay = self.close_delay_ms
 
-        # 3. After process duration, stop pump
-        self._schedule(pump_delay + t, lambda: self._gpio_off(cfg["pump"]))
+        # 1. Open valves; 2. after PUMP_ENGAGE_DELAY, start pump
+        if lead_ms is None:
+            pump_at = self.pump_delay_ms
+            steps = [(0, "on", v) for v in cfg["valves"]]
+        else:
+            pump_at = max(0, self.pump_delay_ms - lead_ms)
+            steps = []
+        steps.append((pump_at, "pump_on", cfg["pump"]))
+
+        # 3. After process duration, stop pump (and pre-open the next step)
+        pump_off = pump_at + t
+        steps.append((pump_off, "pump_off", cfg["pump"]))
+        steps += [(pump_off, "on", v) for v in handoff]
 
         # 4. After close delay, close valves
-        close_time = pump_delay + t + 5000
-        for v in cfg["valves"]:
-            self._schedule(close_time, lambda vid=v: self._gpio_off(vid))
+        close_time = pump_off + close_delay
+        steps += [(close_time, "off", v) for v in cfg["valves"]]
+
+        # Countdown duration = process time + valve close delay
+        countdown_ms = t + close_delay
 
         # Handle forward_wash extra valve (Valve 5 opens at the end)
         if "extra_valve" in cfg:
             ev = cfg["extra_valve"]
-            self._schedule(pump_delay + t + 5000, lambda: self._gpio_on(ev))
-            self._schedule(pump_delay + t + 10000, lambda: self._gpio_off(ev))
-            close_time = pump_delay + t + 10000
+            steps.append((close_time, "on", ev))
+            steps.append((close_time + close_delay, "off", ev))
+            close_time += close_delay
+            countdown_ms = t + 2 * close_delay
 
         # 5. Notify end and optionally start next
-        def finish():
-            logger.info("FINISHED: %s", name)
-            if self.on_process_end:
-                self.on_process_end(name)
-            if auto_next and self._running:
-                next_name = self._next_process(name)
-                self._run_process(next_name, auto_next=True)
-            else:
-                self._current_process = None
-                self._running = False
-                if self.on_cycle_complete:
-                    self.on_cycle_complete()
+        steps.append((close_time, "finish", None))
+        return t, countdown_ms, steps, close_time - pump_off
 
-        self._schedule(close_time, finish)
+    def _handoff_valves(self, name: str, nxt: str) -> tuple:
+        """
+        Valves of `nxt` that may open while `name` is closing: all of them,
+        provided none is a channel `name` still switches after its pump
+        stops. A partial overlap would not let the next pump start any
+        earlier, so it hands off nothing.
+        """
+        cfg, nxt_valves = self.PROCESS_CONFIG[name], self.PROCESS_CONFIG[nxt]["valves"]
+        tail = set(cfg["valves"]) | {cfg.get("extra_valve")}
+        if tail.isdisjoint(nxt_valves):
+            return tuple(nxt_valves)
+        return ()
+
+    def _loop_ms(self, pipelined: bool) -> int:
+        """One lap of the repeating part of the auto cycle, starting at service."""
+        lead, total = None, 0
+        for lap in range(2):       # second lap: service entered from forward_wash
+            name = "service"
+            while True:
+                handoff = self._handoffs[name] if pipelined else ()
+                _, _, steps, handoff_lead = self._plan(name, lead, handoff)
+                if lap:
+                    total += steps[-1][0]
+                lead = handoff_lead if handoff else None
+                name = self._next_process(name)
+                if name == "service":
+                    break
+        return total
+
+    def _apply_staged_timings(self) -> None:
+        values, self._staged_timings = self._staged_timings, None
+        old = dict(self.timings)
+        self.settings.replace(values)
+        changed = self._invalidate_plans(old)
+        if not changed:
+            return
+        logger.info("Timings reloaded: %s", ", ".join(sorted(changed)))
+        self._emit("timings_changed", changed=sorted(changed))
+
+    def _invalidate_plans(self, old: dict) -> set[str]:
+        """Drop compiled plans whose timing differs from `old`; return their names."""
+        changed = {name for name in self.PROCESS_CONFIG
+                   if old.get(name) != self.timings.get(name)}
+        for key in [k for k in self._plans if k[0] in changed]:
+            del self._plans[key]
+        return changed
+
+    def _refuse_start(self, what: str) -> bool:
+        # A process (or its stop sequence) still owns the relays; starting
+        # another would interleave two schedules on the same channels
+        if self._current_process is None:
+            return False
+        reason = f"{self._current_process} is {self._phase}"
+        logger.warning("Refusing to start %s while %s", what, reason)
+        self._emit("start_refused", what=what, reason=reason)
+        return True
 
     def _next_process(self, current: str) -> str:
         """Get the next process in the cycle (wraps around)."""
@@ -203,33 +434,92 @@ class ProcessManager:
 
     def _gpio_on(self, channel_id: int) -> None:
         self.gpio.turn_on(channel_id)
-        self._notify_valve(channel_id, True)
 
     def _gpio_off(self, channel_id: int) -> None:
         self.gpio.turn_off(channel_id)
-        self._notify_valve(channel_id, False)
 
-    def _notify_valve(self, channel_id: int, is_on: bool) -> None:
-        if self.on_valve_change:
-            self.on_valve_change(channel_id, is_on)
+    def _on_channels_changed(self, old: int, new: int, version: int) -> None:
+        # "valve" carries every transition as it happens (telemetry needs the
+        # exact times); "valves" merges them into one update per idle cycle
+        for cid in channels_in(old ^ new):
+            self._emit("valve", channel_id=cid, is_on=bool(new >> (cid - 1) & 1))
+        if self.events.wants("valves"):
+            if tracing.enabled:
+                tracing.flow_start("relay", version, "gpio")
+            if self._ui_mask is None:
+                self._ui_mask = old
+                self._ui_version = version
+                self.widget.after_idle(self._flush_valve_changes)
+
+    def _flush_valve_changes(self) -> None:
+        traced = tracing.enabled
+        if traced:
+            tracing.begin("pm.flush_valves", "scheduler")
+            for version in range(self._ui_version, self.gpio.state.version + 1):
+                tracing.flow_end("relay", version, "gpio")
+        try:
+            old, self._ui_mask = self._ui_mask, None
+            new = self.channel_mask()
+            if old != new:
+                self._emit("valves", old_mask=old, new_mask=new)
+        finally:
+            # Closed even if a step raises, or later spans on this thread
+            # would nest inside it
+            if traced:
+                tracing.end()
+
+    def _set_phase(self, phase: str, duration_ms: int | None = None) -> None:
+        self._phase = phase
+        self._deadline = time.time() + duration_ms / 1000 if duration_ms else None
+        if phase == "idle" and self._staged_timings is not None:
+            self._apply_staged_timings()   # nothing running — a safe boundary
+
+    def _emit(self, event: str, **data) -> None:
+        self.events.publish(event, **data)
 
     def _close_all_and_notify(self, callback=None) -> None:
         """Close all valves and notify."""
         self.gpio.all_off()
-        for cid in range(1, 8):
-            self._notify_valve(cid, False)
         old = self._current_process
         self._current_process = None
-        if self.on_process_end and old:
-            self.on_process_end(old)
+        self._set_phase("idle")
+        if old:
+            self._emit("process_end", name=old)
         if callback:
             callback()
 
     # ── Scheduling helpers ───────────────────────────────────────────────
 
-    def _schedule(self, delay_ms: int, func) -> None:
-        job_id = self.widget.after(delay_ms, func)
-        self._pending_jobs.append(job_id)
+    def _schedule(self, delay_ms: int, func, name: str = "job") -> None:
+        # Fired jobs drop out of the set, so cancelling stays O(pending)
+        # rather than growing with every step of a long-running cycle
+        def run():
+            self._pending_jobs.discard(job_id)
+            traced = tracing.enabled
+            if traced:
+                tracing.begin(f"pm.{name}", "scheduler", proc=self._current_process)
+            try:
+                # Subscribers hear about this step only after all of its relay
+                # switching is done, so none of them can delay a transition
+                with self.events.hold():
+                    func()
+            finally:
+                if traced:
+                    tracing.end()
+
+        job_id = self.widget.after(delay_ms, run)
+        self._pending_jobs.add(job_id)
+
+    def _run_held(self, func, args) -> None:
+        traced = tracing.enabled
+        if traced:
+            tracing.begin(f"pm.call_soon:{getattr(func, '__qualname__', func)}", "scheduler")
+        try:
+            with self.events.hold():
+                func(*args)
+        finally:
+            if traced:
+                tracing.end()
 
     def _cancel_all_jobs(self) -> None:
         for job_id in self._pending_jobs:
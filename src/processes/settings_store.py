@@ -0,0 +1,173 @@
+"""
+settings_store.py — Crash-safe, versioned store for process timings.
+
+Reads are served from memory. Writes are debounced onto a background
+thread and land atomically (temp file → fsync → rename → fsync dir), so a
+power cut leaves either the old or the new file, never a truncated one.
+Every saved version is also kept in a bounded history directory, which is
+where load() falls back to if the main file is damaged.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger("UltraFiltration.Settings")
+
+_VERSION_KEY = "_version"
+_MAX_DURATION_MS = 999 * 3_600_000   # the edit screen allows 3-digit hours
+
+
+class SettingsStore:
+    """In-memory timings with debounced, atomic, versioned persistence."""
+
+    def __init__(self, path: Path, defaults: dict, valid_keys,
+                 history_limit: int = 10, debounce_s: float = 1.0):
+        self.path = Path(path)
+        self.history_dir = self.path.with_name(self.path.stem + ".history")
+        self.defaults = dict(defaults)
+        self.valid_keys = frozenset(valid_keys)
+        self.history_limit = history_limit
+        self.debounce_s = debounce_s
+
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._dirty = False
+        self.version = 0
+        self._data = self.load()
+
+    # ── Reads (memory only) ──────────────────────────────────────────────
+
+    @property
+    def data(self) -> dict:
+        """Current values. Treat as read-only — use update() to change them."""
+        return self._data
+
+    def get(self, key: str) -> int:
+        return self._data[key]
+
+    # ── Writes ───────────────────────────────────────────────────────────
+
+    def update(self, changes: dict) -> None:
+        """Apply validated changes now; persist them after the debounce delay."""
+        clean = self.validate(changes, fill_defaults=False)
+        with self._lock:
+            self._data = {**self._data, **clean}
+            self._schedule_write()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._data = dict(self.defaults)
+            self._schedule_write()
+
+    def replace(self, values: dict) -> None:
+        """Adopt values already on disk (e.g. edited externally) without re-writing."""
+        with self._lock:
+            self._data = self.validate(values)
+
+    def flush(self) -> None:
+        """Write pending changes immediately (call on shutdown)."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+        self._write_if_dirty()
+
+    # ── Validation / loading ─────────────────────────────────────────────
+
+    def validate(self, values: dict, fill_defaults: bool = True) -> dict:
+        """
+        Keep only known process keys with sane integer durations.
+        Raises ValueError if `values` is not a mapping or a value is invalid.
+        """
+        if not isinstance(values, dict):
+            raise ValueError(f"expected an object, got {type(values).__name__}")
+        clean = dict(self.defaults) if fill_defaults else {}
+        for key, value in values.items():
+            if key == _VERSION_KEY:
+                continue
+            if key not in self.valid_keys:
+                logger.warning("Ignoring unknown timing %r", key)
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{key}: expected milliseconds, got {value!r}")
+            value = int(value)
+            if not 0 <= value <= _MAX_DURATION_MS:
+                raise ValueError(f"{key}: {value} ms out of range")
+            clean[key] = value
+        return clean
+
+    def load(self) -> dict:
+        """Main file, else newest valid history version, else defaults."""
+        candidates = [self.path] + sorted(self.history_dir.glob("v*.json"), reverse=True)
+        for path in candidates:
+            if not path.exists():
+                continue
+            try:
+                with open(path, "r") as f:
+                    raw = json.load(f)
+                data = self.validate(raw)
+            except (OSError, ValueError) as e:
+                logger.error("Rejected settings file %s: %s", path, e)
+                continue
+            self.version = int(raw.get(_VERSION_KEY, 0))
+            if path != self.path:
+                logger.warning("Recovered timings from history %s", path.name)
+            else:
+                logger.info("Loaded timings from %s", path)
+            return data
+        return dict(self.defaults)
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _schedule_write(self) -> None:
+        # caller holds self._lock
+        self._dirty = True
+        if self._timer:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.debounce_s, self._write_if_dirty)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _write_if_dirty(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._timer = None
+            self.version += 1
+            payload = {**self._data, _VERSION_KEY: self.version}
+        try:
+            text = json.dumps(payload, indent=2)
+            atomic_write(self.path, text)
+            self._record_history(text)
+            logger.info("Saved timings v%d to %s", payload[_VERSION_KEY], self.path)
+        except OSError as e:
+            logger.error("Failed to save timings: %s", e)
+
+    def _record_history(self, text: str) -> None:
+        self.history_dir.mkdir(exist_ok=True)
+        name = f"v{self.version:06d}-{int(time.time())}.json"
+        atomic_write(self.history_dir / name, text, sync_dir=False)
+        versions = sorted(self.history_dir.glob("v*.json"))
+        for old in versions[:-self.history_limit]:
+            old.unlink()
+
+
+def atomic_write(path: Path, text: str, sync_dir: bool = True) -> None:
+    """Replace `path` with `text` so a crash leaves either the old or the new file."""
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if sync_dir and hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
@@ -0,0 +1,303 @@
+"""
+state_server.py — Read-only WebSocket stream of the live plant state.
+Runs an asyncio loop on a background thread next to the ProcessManager and
+pushes only what changed (channel bitmask, process, phase, deadline) to every
+connected viewer. The Tk thread never waits on the network: it only hands a
+snapshot to the loop, and slow clients get their deltas merged, not queued.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import struct
+import threading
+import time
+
+logger = logging.getLogger("UltraFiltration.StateServer")
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC11B85"
+_MAX_HEADER_BYTES = 8192
+_DRAIN_TIMEOUT_S = 5.0   # a client that can't accept data for this long is dropped
+
+
+def _encode_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    """Build a single unmasked server → client WebSocket frame."""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + payload
+
+
+def _encode_delta(delta: dict) -> bytes:
+    return _encode_frame(json.dumps(delta, separators=(",", ":")).encode())
+
+
+class _Client:
+    """Per-connection outbox: at most one merged delta waiting to be sent."""
+
+    __slots__ = ("writer", "peer", "pending", "frame", "wakeup", "closed")
+
+    def __init__(self, writer, peer):
+        self.writer = writer
+        self.peer = peer
+        self.pending: dict = {}
+        self.frame: bytes | None = None   # pre-encoded frame if pending is a shared delta
+        self.wakeup = asyncio.Event()
+        self.closed = False
+
+    def offer(self, delta: dict, frame: bytes) -> None:
+        if not self.pending:
+            # Up to date — reuse the frame encoded once for every client
+            self.pending = delta
+            self.frame = frame
+        else:
+            # Still sending the previous update — fold this one into it
+            self.pending = {**self.pending, **delta}
+            self.frame = None
+        self.wakeup.set()
+
+
+class StateStreamServer:
+    """
+    WebSocket server that streams ProcessManager state deltas.
+
+    Every message is a compact JSON object holding a sequence number plus the
+    fields that changed since the client's previous message. A newly
+    connected client first receives the full state. A plain HTTP GET (no
+    upgrade) returns the current full state as JSON, handy for curl.
+    """
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 8765):
+        self.host = host
+        self.port = port
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._server = None
+        self._clients: set[_Client] = set()
+        self._handlers: dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self._state: dict = {"seq": 0}
+        self._ready = threading.Event()
+
+    # ── Lifecycle ────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Start the asyncio loop on a daemon thread."""
+        if self._thread:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="StateStreamServer", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait(timeout=5)
+
+    def stop(self) -> None:
+        if not self._loop or self._loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(
+                self._shutdown(), self._loop
+            ).result(timeout=5)
+        except Exception as e:
+            logger.warning("State server shutdown incomplete: %s", e)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+        logger.info("State server stopped")
+
+    def attach(self, process_manager) -> None:
+        """Publish a fresh snapshot on every ProcessManager event."""
+        process_manager.add_listener(
+            lambda event, data: self.publish(process_manager.snapshot())
+        )
+        self.publish(process_manager.snapshot())
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    # ── Producer side (any thread) ───────────────────────────────────────
+
+    def publish(self, snapshot: dict) -> None:
+        """Hand a state snapshot to the loop. Never blocks the caller."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        stamped = dict(snapshot, t=round(time.time(), 3))
+        try:
+            loop.call_soon_threadsafe(self._apply, stamped)
+        except RuntimeError:
+            pass  # loop shutting down
+
+    # ── Loop side ────────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port)
+            )
+        except OSError as e:
+            logger.error("State server failed to bind %s:%d: %s",
+                         self.host, self.port, e)
+            self._ready.set()
+            self._loop.close()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]    # port 0 picks a free one
+        logger.info("State server listening on ws://%s:%d", self.host, self.port)
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _shutdown(self) -> None:
+        self._server.close()
+        # Closing the connections ends every handler through EOF; cancelling
+        # is only the fallback for one that does not finish in time
+        for writer in self._handlers.values():
+            writer.close()
+        tasks = list(self._handlers)
+        if tasks:
+            _, late = await asyncio.wait(tasks, timeout=1.0)
+            for task in late:
+                task.cancel()
+            await asyncio.gather(*late, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def _apply(self, snapshot: dict) -> None:
+        """Diff against the last known state and fan the delta out."""
+        delta = {k: v for k, v in snapshot.items()
+                 if k != "t" and self._state.get(k) != v}
+        if not delta:
+            return
+        self._state.update(delta)
+        self._state["seq"] += 1
+        delta["seq"] = self._state["seq"]
+        delta["t"] = snapshot.get("t")
+        if not self._clients:
+            return
+        frame = _encode_delta(delta)
+        for client in self._clients:
+            client.offer(delta, frame)
+
+    async def _handle(self, reader, writer) -> None:
+        task = asyncio.current_task()
+        self._handlers[task] = writer
+        try:
+            await self._serve(reader, writer)
+        finally:
+            self._handlers.pop(task, None)
+
+    async def _serve(self, reader, writer) -> None:
+        peer = writer.get_extra_info("peername")
+        try:
+            headers = await self._read_request(reader)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            writer.close()
+            return
+
+        key = headers.get("sec-websocket-key")
+        if headers.get("upgrade", "").lower() != "websocket" or not key:
+            await self._send_plain_state(writer)
+            return
+
+        accept = base64.b64encode(hashlib.sha1(key.encode() + _WS_GUID).digest())
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+        )
+
+        client = _Client(writer, peer)
+        self._clients.add(client)
+        client.offer(dict(self._state), _encode_delta(self._state))
+        logger.info("Viewer connected  %s  (clients=%d)", peer, len(self._clients))
+
+        sender = asyncio.ensure_future(self._send_loop(client))
+        try:
+            await self._read_loop(reader, client)
+        finally:
+            self._clients.discard(client)
+            # Ended by flag, not cancel(): wait_for() can swallow a
+            # cancellation that races with drain() completing
+            client.closed = True
+            client.wakeup.set()
+            writer.close()
+            await asyncio.gather(sender, return_exceptions=True)
+            logger.info("Viewer disconnected  %s  (clients=%d)",
+                        peer, len(self._clients))
+
+    async def _read_request(self, reader) -> dict:
+        raw = await reader.readuntil(b"\r\n\r\n")
+        if len(raw) > _MAX_HEADER_BYTES:
+            raise ValueError("header too large")
+        headers = {}
+        for line in raw.decode("latin-1").split("\r\n")[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        return headers
+
+    async def _send_plain_state(self, writer) -> None:
+        body = json.dumps(self._state, separators=(",", ":")).encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            b"Content-Length: " + str(len(body)).encode() +
+            b"\r\nConnection: close\r\n\r\n" + body
+        )
+        try:
+            await asyncio.wait_for(writer.drain(), _DRAIN_TIMEOUT_S)
+        finally:
+            writer.close()
+
+    async def _send_loop(self, client: _Client) -> None:
+        writer = client.writer
+        try:
+            while True:
+                await client.wakeup.wait()
+                client.wakeup.clear()
+                if client.closed:
+                    return
+                frame = client.frame or _encode_delta(client.pending)
+                client.pending = {}
+                client.frame = None
+                writer.write(frame)
+                await asyncio.wait_for(writer.drain(), _DRAIN_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            logger.warning("Viewer %s too slow — dropping", client.peer)
+            writer.close()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    async def _read_loop(self, reader, client: _Client) -> None:
+        """Consume client frames: answer pings, stop on close or EOF."""
+        while True:
+            try:
+                b1, b2 = await reader.readexactly(2)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+            opcode = b1 & 0x0F
+            length = b2 & 0x7F
+            if length == 126:
+                (length,) = struct.unpack("!H", await reader.readexactly(2))
+            elif length == 127:
+                (length,) = struct.unpack("!Q", await reader.readexactly(8))
+            if length > 1 << 16:
+                return  # viewers have nothing large to say
+            mask = await reader.readexactly(4) if b2 & 0x80 else b""
+            payload = await reader.readexactly(length)
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            if opcode == 0x8:
+                client.writer.write(_encode_frame(payload[:2], opcode=0x8))
+                return
+            if opcode == 0x9:
+                client.writer.write(_encode_frame(payload, opcode=0xA))
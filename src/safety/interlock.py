@@ -0,0 +1,156 @@
+"""
+interlock.py — Interlock rules enforced at the GPIO boundary.
+
+InterlockEngine compiles the declarative rules into a table with one reason
+code per relay mask (2^7 entries for the 7 channels), so checking a
+requested transition is a single lookup on the mask it would produce.
+
+InterlockedGPIO sits between every caller (ProcessManager, ManualFrame)
+and the backend:
+
+    turn_on  that would break a rule  → rejected   (relay untouched)
+    turn_off that would break a rule  → deferred   (applied as soon as it is
+                                                    safe, e.g. once the pump
+                                                    depending on it is off)
+"""
+
+import logging
+
+from src.safety.rules import DEFAULT_RULES, bit
+
+logger = logging.getLogger("UltraFiltration.Interlock")
+
+REASON_OK = 0
+
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+DEFERRED = "deferred"
+
+
+class InterlockEngine:
+    """Rules compiled into a mask → reason-code table."""
+
+    def __init__(self, rules=None, channels: int = 7):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.channels = channels
+        # Reason code = 1 + index of the first rule the mask violates
+        table = bytearray(1 << channels)
+        for mask in range(1 << channels):
+            for i, rule in enumerate(self.rules):
+                if rule.violated(mask):
+                    table[mask] = i + 1
+                    break
+        self.table = bytes(table)
+
+    def check(self, mask: int, channel_id: int, on: bool) -> int:
+        """Reason code for switching `channel_id` from state `mask` (0 = allowed)."""
+        b = bit(channel_id)
+        return self.table[mask | b if on else mask & ~b]
+
+    def reason(self, code: int) -> str:
+        return "ok" if code == REASON_OK else self.rules[code - 1].name
+
+    def describe(self, code: int) -> str:
+        return "" if code == REASON_OK else self.rules[code - 1].description
+
+
+class InterlockedGPIO:
+    """
+    Wraps a GPIO backend and validates every transition against an
+    InterlockEngine. Same interface as the wrapped backend, plus request().
+    """
+
+    def __init__(self, backend, engine: InterlockEngine | None = None):
+        self._backend = backend
+        self.engine = engine or InterlockEngine()
+        self.state = backend.state      # the backend's ChannelState
+        self._deferred = 0              # channels waiting to be switched off
+        self.last_reason = REASON_OK    # reason code of the latest refusal
+        self.on_refused = None          # (channel_id, on, outcome, reason_code) -> None
+
+    def request(self, channel_id: int, on: bool) -> str:
+        """Try a transition; returns ACCEPTED, REJECTED or DEFERRED."""
+        b = 1 << (channel_id - 1)
+        mask = self.state.mask
+        if on:
+            self._deferred &= ~b
+            new = mask | b
+        else:
+            new = mask & ~b
+        code = self.engine.table[new]
+        # Switching off never makes an already unsafe state worse
+        if code and not on and self.engine.table[mask]:
+            code = REASON_OK
+        if code:
+            return self._refuse(channel_id, on, code)
+        if on:
+            self._backend.turn_on(channel_id)
+        else:
+            self._backend.turn_off(channel_id)
+        if self._deferred:
+            self._retry_deferred()
+        return ACCEPTED
+
+    @property
+    def mask(self) -> int:
+        return self.state.mask
+
+    @property
+    def deferred(self) -> int:
+        """Mask of channels with an OFF request waiting to become safe."""
+        return self._deferred
+
+    # ── GPIO interface ───────────────────────────────────────────────────
+
+    def turn_on(self, channel_id: int) -> None:
+        self.request(channel_id, True)
+
+    def turn_off(self, channel_id: int) -> None:
+        self.request(channel_id, False)
+
+    def is_on(self, channel_id: int) -> bool:
+        return self.state.is_on(channel_id)
+
+    def toggle(self, channel_id: int) -> bool:
+        """Request the opposite state; returns the state actually in effect."""
+        self.request(channel_id, not self.is_on(channel_id))
+        return self.is_on(channel_id)
+
+    def all_off(self) -> None:
+        # The backend switches pumps before valves, which every rule allows
+        self._deferred = 0
+        self._backend.all_off()
+
+    def shutdown(self) -> None:
+        self._deferred = 0
+        self._backend.shutdown()
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _refuse(self, channel_id: int, on: bool, code: int) -> str:
+        self.last_reason = code
+        if on:
+            outcome = REJECTED
+        else:
+            outcome = DEFERRED
+            self._deferred |= bit(channel_id)
+        logger.warning("%s %s channel %d: %s", outcome.upper(),
+                       "ON" if on else "OFF", channel_id, self.engine.describe(code))
+        if self.on_refused:
+            self.on_refused(channel_id, on, outcome, code)
+        return outcome
+
+    def _retry_deferred(self) -> None:
+        progress = True
+        while progress and self._deferred:
+            progress = False
+            for cid in range(1, self.engine.channels + 1):
+                b = bit(cid)
+                if self._deferred & b and not self.engine.check(self.state.mask, cid, False):
+                    self._deferred &= ~b
+                    self._backend.turn_off(cid)
+                    progress = True
+                    logger.info("Deferred OFF applied: channel %d", cid)
@@ -0,0 +1,284 @@
+"""
+model_checker.py — Exhaustive interlock check of ProcessManager under every
+interleaving of user actions and timer callbacks, in virtual time.
+
+At each event boundary the user may start the auto cycle or a single
+process, stop gracefully, emergency-stop, toggle a relay by hand (as
+ManualFrame does), or let the next timer fire. The real ProcessManager and
+MockGPIO run on a VirtualScheduler; every relay transition is checked
+against the interlock rules, and no process may start while another one
+still owns the relays.
+
+Search is breadth first over fingerprinted states, so each state is
+expanded once and every counterexample is a shortest one. A fingerprint is
+the relay mask, any deferred interlock requests, the ProcessManager phase
+and the pending timers (due time relative to now, plus what they will
+run). Two action sequences that reach the same fingerprint have the same
+future, so only one is explored; the number of interleavings that
+represents is counted over the state graph.
+"""
+
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from src.config import ALL_CHANNEL_IDS, VALVE_LABELS
+from src.hardware.mock_gpio import MockGPIO
+from src.processes.process_manager import ProcessManager
+from src.processes.settings_store import SettingsStore
+from src.safety.rules import DEFAULT_RULES, bit, violations
+from src.sim.virtual_scheduler import VirtualScheduler
+
+_CHECK_TIMINGS = {name: 1_000 for name in ProcessManager.PROCESS_CONFIG}
+
+
+def describe_mask(mask: int) -> str:
+    on = [VALVE_LABELS[cid] for cid in ALL_CHANNEL_IDS if mask & bit(cid)]
+    return ", ".join(on) or "all off"
+
+
+class Counterexample:
+    def __init__(self, rule: str, trace: list, mask: int):
+        self.rule = rule
+        self.trace = trace      # [(t_ms, action), ...] leading to the violation
+        self.mask = mask        # relay mask right after the offending transition
+
+    def __str__(self) -> str:
+        steps = "\n".join(f"    {t:>8} ms  {action}" for t, action in self.trace)
+        return f"{self.rule}  [{describe_mask(self.mask)}]\n{steps}"
+
+
+class CheckResult:
+    def __init__(self):
+        self.states = 0
+        self.transitions = 0
+        self.interleavings = 0
+        self.depth = 0
+        self.closed = False     # every reachable state was explored
+        self.elapsed_s = 0.0
+        self.counterexamples: list[Counterexample] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.counterexamples
+
+
+class _CheckedGPIO(MockGPIO):
+    """The relay bank itself: tracks the mask and checks rules on every flip."""
+
+    def __init__(self, world):
+        super().__init__()
+        self.world = world
+
+    @property
+    def mask(self) -> int:
+        return self.state.mask
+
+    def turn_on(self, channel_id: int) -> None:
+        super().turn_on(channel_id)
+        self.world.check(self.state.mask)
+
+    def turn_off(self, channel_id: int) -> None:
+        super().turn_off(channel_id)
+        self.world.check(self.state.mask)
+
+
+class _World:
+    """One fresh controller: relays, scheduler and ProcessManager."""
+
+    def __init__(self, settings, rules, wrap_gpio=None, pipelined=False):
+        self.rules = rules
+        self.violation: tuple[str, int] | None = None
+        self.active: str | None = None
+        self.clock = VirtualScheduler()
+        self.relays = _CheckedGPIO(self)
+        self.gpio = wrap_gpio(self.relays) if wrap_gpio else self.relays
+        self.pm = ProcessManager(self.gpio, self.clock, settings=settings,
+                                 pipelined=pipelined)
+        self.pm.add_listener(self._on_event)
+
+    def check(self, mask: int) -> None:
+        if self.violation is None:
+            broken = violations(mask, self.rules)
+            if broken:
+                self.violation = (broken[0].name, mask)
+
+    def _on_event(self, event: str, data: dict) -> None:
+        if event == "process_start":
+            if self.active is not None and self.violation is None:
+                self.violation = ("process_overlap", self.relays.mask)
+            self.active = data["name"]
+        elif event == "process_end":
+            self.active = None
+
+    def apply(self, action: str) -> bool:
+        """Perform one action; False if it is not possible in this state."""
+        kind, _, arg = action.partition(":")
+        if kind == "tick":
+            return self.clock.step()
+        if kind == "auto":
+            self.pm.start_auto_cycle()
+        elif kind == "start":
+            self.pm.start_single_process(arg)
+        elif kind == "stop":
+            self.pm.stop_current_process()
+        elif kind == "estop":
+            self.pm.stop_immediately()
+            self.active = None
+        elif kind == "toggle":
+            self.gpio.toggle(int(arg))
+        return True
+
+    def fingerprint(self) -> tuple:
+        now = self.clock.now_ms
+        timers = tuple((due - now, _callable_key(func))
+                       for due, func, _ in self.clock.timers())
+        pm = self.pm
+        return (self.relays.mask, getattr(self.gpio, "deferred", 0),
+                pm.current_process, pm.is_running, pm.phase, self.active, timers)
+
+
+def _callable_key(func, depth: int = 0):
+    """
+    What a pending callback will do: its qualified name plus the plain
+    values it closes over (process name, channel, auto_next ...).
+    Objects such as the ProcessManager itself are the same in every world
+    and collapse to their type; scheduler job ids are per-run counters.
+    """
+    func = getattr(func, "__func__", func)     # bound method → function
+    code = getattr(func, "__code__", None)
+    if code is None or depth > 4:
+        return getattr(func, "__qualname__", type(func).__name__)
+    parts = [func.__qualname__]
+    for name, cell in zip(code.co_freevars, func.__closure__ or ()):
+        if name != "job_id":
+            parts.append((name, _value_key(cell.cell_contents, depth)))
+    for value in func.__defaults__ or ():
+        parts.append(_value_key(value, depth))
+    return tuple(parts)
+
+
+def _value_key(value, depth: int):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (tuple, list)):
+        return tuple(_value_key(v, depth) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _value_key(v, depth)) for k, v in value.items()))
+    if callable(value):
+        return _callable_key(value, depth + 1)
+    return type(value).__name__
+
+
+class ModelChecker:
+    """
+    Args:
+        depth: Maximum number of actions (timer firings included) per trace.
+        manual: Include hand toggles of every relay, as ManualFrame allows.
+        rules: Interlock rules to assert (default: rules.DEFAULT_RULES).
+        wrap_gpio: Optional callable(relays) -> gpio placed between the
+                   ProcessManager/manual toggles and the relays.
+        pipelined: Run the ProcessManager with pipelined transitions.
+    """
+
+    def __init__(self, depth: int = 40, manual: bool = True, rules=None,
+                 wrap_gpio=None, timings: dict | None = None, pipelined: bool = False):
+        self.depth = depth
+        self.pipelined = pipelined
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.wrap_gpio = wrap_gpio
+        self.timings = {**_CHECK_TIMINGS, **(timings or {})}
+        self.actions = ["tick", "auto",
+                        *(f"start:{name}" for name in ProcessManager.PROCESS_CONFIG),
+                        "stop", "estop"]
+        if manual:
+            self.actions += [f"toggle:{cid}" for cid in ALL_CHANNEL_IDS]
+
+    def run(self, max_counterexamples: int = 10) -> CheckResult:
+        # Thousands of short-lived worlds: keep relay logging out of the way
+        log = logging.getLogger("UltraFiltration")
+        level = log.level
+        log.setLevel(logging.ERROR)
+        root = Path(tempfile.mkdtemp(prefix="uf-check-"))
+        try:
+            from src.config import DEFAULT_TIMINGS
+            settings = SettingsStore(root / "timings.json", DEFAULT_TIMINGS,
+                                     ProcessManager.PROCESS_CONFIG, debounce_s=3600)
+            settings.replace(self.timings)
+            return self._search(settings, max_counterexamples)
+        finally:
+            log.setLevel(level)
+            shutil.rmtree(root, ignore_errors=True)
+
+    # ── Search ───────────────────────────────────────────────────────────
+
+    def _search(self, settings, max_counterexamples: int) -> CheckResult:
+        result = CheckResult()
+        t0 = time.perf_counter()
+        start = _World(settings, self.rules, self.wrap_gpio, self.pipelined)
+        root = start.fingerprint()
+        paths = {root: ()}
+        edges: dict[tuple, list] = {}
+        seen_rules = set()
+        frontier = [root]
+
+        for level in range(self.depth):
+            next_frontier = []
+            for fp in frontier:
+                path = paths[fp]
+                out = []
+                for action in self.actions:
+                    world, trace = self._replay(settings, path)
+                    t_ms = world.clock.now_ms
+                    if not world.apply(action):
+                        continue
+                    result.transitions += 1
+                    if world.violation is not None:
+                        out.append(None)
+                        rule, mask = world.violation
+                        if rule not in seen_rules and len(seen_rules) < max_counterexamples:
+                            seen_rules.add(rule)
+                            result.counterexamples.append(
+                                Counterexample(rule, trace + [(t_ms, action)], mask))
+                        continue
+                    child = world.fingerprint()
+                    out.append(child)
+                    if child not in paths:
+                        paths[child] = path + (action,)
+                        next_frontier.append(child)
+                edges[fp] = out
+            result.depth = level + 1
+            frontier = next_frontier
+            if not frontier:
+                result.closed = True
+                break
+
+        result.states = len(paths)
+        result.interleavings = self._count_paths(root, edges)
+        result.elapsed_s = time.perf_counter() - t0
+        return result
+
+    def _replay(self, settings, path) -> tuple:
+        world = _World(settings, self.rules, self.wrap_gpio, self.pipelined)
+        trace = []
+        for action in path:
+            trace.append((world.clock.now_ms, action))
+            world.apply(action)
+        return world, trace
+
+    def _count_paths(self, root, edges) -> int:
+        """Action sequences of exactly `depth` steps (or ending in a violation)."""
+        memo: dict[tuple, int] = {}
+
+        def count(fp, remaining: int) -> int:
+            if remaining == 0 or fp not in edges:
+                return 1
+            key = (fp, remaining)
+            if key not in memo:
+                memo[key] = sum(1 if child is None else count(child, remaining - 1)
+                                for child in edges[fp]) or 1
+            return memo[key]
+
+        return count(root, self.depth)
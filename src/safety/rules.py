@@ -0,0 +1,66 @@
+"""
+rules.py — Declarative interlock rules over the relay bitmask.
+
+A rule is violated when all of its `when` channels are ON and either none of
+its `need_any` channels is ON or one of its `forbid` channels is ON. Bit
+(channel_id - 1) of a mask is the state of that channel, as in
+ProcessManager.channel_mask().
+"""
+
+
+def bit(channel_id: int) -> int:
+    return 1 << (channel_id - 1)
+
+
+def mask_of(channel_ids) -> int:
+    mask = 0
+    for cid in channel_ids:
+        mask |= bit(cid)
+    return mask
+
+
+class Rule:
+    """One interlock: a trigger mask plus what must / must not accompany it."""
+
+    def __init__(self, name: str, description: str, when, need_any=(), forbid=()):
+        self.name = name
+        self.description = description
+        self.when = mask_of(when)
+        self.need_any = mask_of(need_any)
+        self.forbid = mask_of(forbid)
+
+    @classmethod
+    def requires(cls, name: str, channel_id: int, any_of, description: str = ""):
+        """`channel_id` may only be ON while at least one of `any_of` is ON."""
+        return cls(name, description, when=[channel_id], need_any=any_of)
+
+    @classmethod
+    def exclusive(cls, name: str, a: int, b: int, description: str = ""):
+        """`a` and `b` are never ON together."""
+        return cls(name, description, when=[a], forbid=[b])
+
+    def violated(self, mask: int) -> bool:
+        if mask & self.when != self.when:
+            return False
+        if self.need_any and not mask & self.need_any:
+            return True
+        return bool(mask & self.forbid)
+
+    def __repr__(self) -> str:
+        return f"Rule({self.name!r})"
+
+
+# Pump 1 feeds through Valve 1 (service, forward wash) or Valve 2 (fast
+# rinse); Pump 2 only runs the back wash through Valve 3.
+DEFAULT_RULES = [
+    Rule.requires("pump1_open_line", 6, any_of=[1, 2],
+                  description="Pump 1 only while Valve 1 or Valve 2 is open"),
+    Rule.requires("pump2_open_line", 7, any_of=[3],
+                  description="Pump 2 only while Valve 3 is open"),
+    Rule.exclusive("pumps_exclusive", 6, 7,
+                   description="Pump 1 and Pump 2 never run together"),
+]
+
+
+def violations(mask: int, rules=DEFAULT_RULES) -> list[Rule]:
+    return [r for r in rules if r.violated(mask)]
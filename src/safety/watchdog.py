@@ -0,0 +1,213 @@
+"""
+watchdog.py — Feed the hardware watchdog only while the scheduler keeps time.
+
+Petting /dev/watchdog from a thread of its own proves nothing about the Tk
+loop: the thread keeps running while the loop is wedged with a pump relay
+held ON. So the loop proves itself first. Every `interval_ms` it services a
+heartbeat deadline (one after() and a clock read); a heartbeat that lands
+within `tolerance_ms` of its deadline marks the loop alive. The sidecar
+thread pets the device once per interval, and only while the last on-time
+heartbeat is no older than one interval plus tolerance.
+
+If no heartbeat lands on time for `escalate_s` (opt-in; 0 never), the
+thread stops waiting for the loop: it drives every relay OFF itself
+(gpio.force_off(), which bypasses the shared state) and posts `on_recover`
+to the loop so the plant's bookkeeping is put right if it ever comes back.
+Should the process die or stay wedged, the unfed device resets the board.
+
+Any writable file stands in for the device (tests, benches); with the
+softdog module loaded, /dev/watchdog behaves like the real thing:
+
+    sudo modprobe softdog soft_margin=10
+    UF_WATCHDOG_DEVICE=/dev/watchdog python main.py
+"""
+
+import fcntl
+import logging
+import os
+import struct
+import threading
+import time
+
+logger = logging.getLogger("UltraFiltration.Watchdog")
+
+WDIOC_SETTIMEOUT = 0xC0045706       # _IOWR('W', 6, int)
+_MAGIC_CLOSE = b"V"
+
+
+class WatchdogDevice:
+    """
+    /dev/watchdog, or any file standing in for it.
+
+    Args:
+        path: Device (or fake) to write to.
+        timeout_s: Hardware timeout to request; left as is when the file
+                   is not a watchdog device.
+    """
+
+    def __init__(self, path, timeout_s: int | None = None):
+        self.path = str(path)
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_CLOEXEC)
+        self.pets = 0
+        if timeout_s:
+            try:
+                fcntl.ioctl(self.fd, WDIOC_SETTIMEOUT, struct.pack("i", int(timeout_s)))
+            except OSError:
+                logger.info("%s is not a watchdog device; timeout left as is", self.path)
+
+    def pet(self) -> None:
+        os.write(self.fd, b"\0")
+        self.pets += 1
+
+    def close(self, disarm: bool = True) -> None:
+        """Close; `disarm` writes the magic character so a clean exit does not reset."""
+        if self.fd is None:
+            return
+        try:
+            if disarm:
+                os.write(self.fd, _MAGIC_CLOSE)
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+
+class Watchdog:
+    """
+    Args:
+        widget: Loop to prove alive (Tk root or EventLoop).
+        device: WatchdogDevice to feed, or None for escalation only.
+        gpio: Relay backend with force_off().
+        bridge: TkBridge used to post `on_recover` back to the loop.
+        on_recover: Runs on the loop once it is back after an escalation.
+        interval_ms: Heartbeat and petting period.
+        tolerance_ms: Lateness a heartbeat may have and still count.
+        escalate_s: Without an on-time heartbeat this long, force all OFF;
+                    0 never escalates.
+        clock: Monotonic time source.
+    """
+
+    def __init__(self, widget, device: WatchdogDevice | None, gpio, bridge=None,
+                 on_recover=None, interval_ms: int = 1_000, tolerance_ms: int = 250,
+                 escalate_s: float = 0.0, clock=time.monotonic):
+        self.widget = widget
+        self.device = device
+        self.gpio = gpio
+        self.bridge = bridge
+        self.on_recover = on_recover
+        self.interval_s = interval_ms / 1000
+        self.tolerance_s = tolerance_ms / 1000
+        self.escalate_s = escalate_s
+        self.clock = clock
+        self._job = None
+        self._due = 0.0
+        self._alive_at = 0.0            # last on-time heartbeat (loop thread writes)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.escalated = False
+        # Counters
+        self.beats = 0
+        self.late_beats = 0
+        self.max_late_s = 0.0
+        self.escalations = 0
+        self.missed_pets = 0
+
+    @classmethod
+    def from_config(cls, widget, gpio, bridge=None, on_recover=None):
+        """Build from UF_WATCHDOG_*; a device that will not open is left unfed."""
+        from src.config import (
+            WATCHDOG_DEVICE, WATCHDOG_ESCALATE_S, WATCHDOG_INTERVAL_MS,
+            WATCHDOG_TIMEOUT_S, WATCHDOG_TOLERANCE_MS,
+        )
+        device = None
+        if WATCHDOG_DEVICE:
+            try:
+                device = WatchdogDevice(WATCHDOG_DEVICE, WATCHDOG_TIMEOUT_S)
+            except OSError as e:
+                logger.error("Watchdog device %s unavailable: %s", WATCHDOG_DEVICE, e)
+        return cls(widget, device, gpio, bridge, on_recover,
+                   interval_ms=WATCHDOG_INTERVAL_MS, tolerance_ms=WATCHDOG_TOLERANCE_MS,
+                   escalate_s=WATCHDOG_ESCALATE_S)
+
+    def start(self) -> None:
+        now = self.clock()
+        self._alive_at = now
+        self._due = now + self.interval_s
+        self._job = self.widget.after(int(self.interval_s * 1000), self._beat)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._monitor, name="watchdog", daemon=True)
+        self._thread.start()
+        logger.info("Watchdog %s every %.1f s (tolerance %d ms, %s)",
+                    f"feeding {self.device.path}" if self.device else "watching",
+                    self.interval_s, self.tolerance_s * 1000,
+                    f"all-off after {self.escalate_s:.1f} s" if self.escalate_s
+                    else "no forced all-off")
+
+    def stop(self, disarm: bool = True) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.interval_s + 1)
+            self._thread = None
+        if self._job:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        if self.device:
+            self.device.close(disarm)
+
+    def stats(self) -> dict:
+        return {
+            "device": self.device.path if self.device else None,
+            "pets": self.device.pets if self.device else 0,
+            "missed_pets": self.missed_pets,
+            "beats": self.beats, "late_beats": self.late_beats,
+            "max_late_ms": self.max_late_s * 1000,
+            "escalations": self.escalations, "escalated": self.escalated,
+        }
+
+    # ── Loop side ────────────────────────────────────────────────────────
+
+    def _beat(self) -> None:
+        now = self.clock()
+        late = now - self._due
+        self.beats += 1
+        if late <= self.tolerance_s:
+            self._alive_at = now
+        else:
+            self.late_beats += 1
+            logger.warning("Heartbeat %.0f ms late", late * 1000)
+        if late > self.max_late_s:
+            self.max_late_s = late
+        self._due = now + self.interval_s
+        self._job = self.widget.after(int(self.interval_s * 1000), self._beat)
+
+    def _recover(self) -> None:
+        logger.warning("Loop is back after a forced all-off")
+        self.escalated = False
+        if self.on_recover:
+            self.on_recover()
+
+    # ── Sidecar thread ───────────────────────────────────────────────────
+
+    def _monitor(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            age = self.clock() - self._alive_at
+            if age <= self.interval_s + self.tolerance_s:
+                if self.device:
+                    try:
+                        self.device.pet()
+                    except OSError as e:
+                        logger.error("Watchdog pet failed: %s", e)
+                continue
+            self.missed_pets += 1
+            if self.escalate_s and age > self.escalate_s and not self.escalated:
+                self._escalate(age)
+
+    def _escalate(self, age: float) -> None:
+        self.escalated = True
+        self.escalations += 1
+        logger.critical("Scheduler silent for %.1f s — forcing all relays OFF", age)
+        try:
+            self.gpio.force_off()
+        except Exception:
+            logger.exception("Forced all-off failed")
+        if self.bridge:
+            self.bridge.post(self._recover)
@@ -0,0 +1,406 @@
+"""
+cycle_calendar.py — Time-of-day / tariff-aware scheduling of filtration cycles.
+
+schedule.json lists weekly (or one-off) entries in local time:
+
+    {"entries": [
+      {"kind": "start",   "days": "daily",    "at": "22:00"},
+      {"kind": "process", "days": ["mon", "thu"], "at": "06:00", "process": "back_wash"},
+      {"kind": "pause",   "days": "weekdays", "at": "17:00", "until": "21:00"},
+      {"kind": "maintenance", "on": "2026-11-02", "at": "08:00", "until": "12:00"}
+    ]}
+
+    start        start the auto cycle
+    process      run one process; an auto cycle in progress is stopped
+                 gracefully first and resumed once the process is done
+    pause        peak tariff: stop the auto cycle for the window and resume
+                 it afterwards (starts and processes due inside the window
+                 wait for its end)
+    maintenance  stop everything for the window; scheduled starts inside it
+                 are skipped
+
+`days` is "daily", "weekdays", "weekends" or a list of mon..sun; `on` is a
+single date instead. A window whose `until` is not after `at` runs past
+midnight.
+
+Every next occurrence sits in a TimerWheel (1 s ticks) and one Tk after()
+is armed for the earliest of them, capped at max_sleep_s so that wall-clock
+jumps (NTP at boot) are noticed. Whether a stopped cycle still has to be
+resumed is kept in <schedule>.state.json, so it survives a restart.
+"""
+
+import json
+import logging
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from src.processes.settings_store import atomic_write
+from src.scheduler.timer_wheel import TimerWheel
+
+logger = logging.getLogger("UltraFiltration.Scheduler")
+
+KINDS = ("start", "process", "pause", "maintenance")
+WINDOW_KINDS = ("pause", "maintenance")
+_DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_DAY_SETS = {
+    "daily": tuple(range(7)),
+    "weekdays": tuple(range(5)),
+    "weekends": (5, 6),
+}
+
+
+# ── Entries ──────────────────────────────────────────────────────────────────
+
+class Entry:
+    """One validated schedule line."""
+
+    def __init__(self, kind: str, at, until=None, days=None, on=None, process=None):
+        self.kind = kind
+        self.at = at              # datetime.time
+        self.until = until        # datetime.time (windows only)
+        self.days = days          # tuple of weekday numbers, or None with `on`
+        self.on = on              # datetime.date for one-off entries
+        self.process = process
+
+    @classmethod
+    def parse(cls, raw: dict, processes) -> "Entry":
+        if not isinstance(raw, dict):
+            raise ValueError(f"expected an object, got {type(raw).__name__}")
+        kind = raw.get("kind")
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}, got {kind!r}")
+        at = _parse_time(raw.get("at"), "at")
+        until = None
+        if kind in WINDOW_KINDS:
+            until = _parse_time(raw.get("until"), "until")
+        process = None
+        if kind == "process":
+            process = raw.get("process")
+            if process not in processes:
+                raise ValueError(f"unknown process {process!r}")
+        if "on" in raw:
+            try:
+                on = date.fromisoformat(raw["on"])
+            except (TypeError, ValueError):
+                raise ValueError(f"on: expected YYYY-MM-DD, got {raw['on']!r}") from None
+            return cls(kind, at, until, on=on, process=process)
+        return cls(kind, at, until, days=_parse_days(raw.get("days", "daily")),
+                   process=process)
+
+    @property
+    def length_s(self) -> int:
+        """Window length in seconds (0 for point entries)."""
+        if self.until is None:
+            return 0
+        a = self.at.hour * 3600 + self.at.minute * 60
+        u = self.until.hour * 3600 + self.until.minute * 60
+        return (u - a) % 86_400 or 86_400
+
+    def next_start(self, after: float) -> float | None:
+        """Epoch seconds of the first start at or after `after` (None: no more)."""
+        day = datetime.fromtimestamp(after).date()
+        if self.on is not None:
+            candidates = [self.on] if self.on >= day - timedelta(days=1) else []
+        else:
+            candidates = [day + timedelta(days=i) for i in range(-1, 8)]
+        for d in candidates:
+            if self.days is not None and d.weekday() not in self.days:
+                continue
+            ts = datetime.combine(d, self.at).timestamp()
+            if ts >= after:
+                return ts
+        return None
+
+    def window_at(self, now: float) -> tuple | None:
+        """(start, end) of the window containing or following `now`."""
+        start = self.next_start(now - self.length_s + 1)
+        return None if start is None else (start, start + self.length_s)
+
+    def describe(self) -> str:
+        when = self.on.isoformat() if self.on else _describe_days(self.days)
+        span = self.at.strftime("%H:%M")
+        if self.until is not None:
+            span += "–" + self.until.strftime("%H:%M")
+        what = f"{self.kind} {self.process}" if self.process else self.kind
+        return f"{what} {when} {span}"
+
+
+def _parse_time(value, field: str):
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except (TypeError, ValueError):
+        raise ValueError(f"{field}: expected HH:MM, got {value!r}") from None
+
+
+def _parse_days(value) -> tuple:
+    if isinstance(value, str):
+        if value not in _DAY_SETS:
+            raise ValueError(f"days: expected {', '.join(_DAY_SETS)} or a list, got {value!r}")
+        return _DAY_SETS[value]
+    if not isinstance(value, list) or not value:
+        raise ValueError(f"days: expected a non-empty list, got {value!r}")
+    try:
+        return tuple(sorted({_DAY_NAMES.index(str(d).lower()[:3]) for d in value}))
+    except ValueError:
+        raise ValueError(f"days: unknown day in {value!r}") from None
+
+
+def _describe_days(days: tuple) -> str:
+    for name, members in _DAY_SETS.items():
+        if days == members:
+            return name
+    return ",".join(_DAY_NAMES[d] for d in days)
+
+
+# ── Scheduler ────────────────────────────────────────────────────────────────
+
+class CycleScheduler:
+    """
+    Drives a ProcessManager from the calendar in `path`.
+
+    Args:
+        widget: Tk widget (or VirtualScheduler) whose after() wakes us up.
+        process_manager: The ProcessManager to start / stop.
+        path: schedule.json; a missing or invalid file means no entries.
+        start_cycle: Starts the auto cycle (default: the manager's own;
+                     the App passes one that also shows the auto screen).
+        clock: Wall clock in epoch seconds.
+        max_sleep_s: Longest single after(), to notice clock jumps.
+    """
+
+    def __init__(self, widget, process_manager, path: Path, start_cycle=None,
+                 clock=time.time, max_sleep_s: int = 900):
+        self.widget = widget
+        self.pm = process_manager
+        self.path = Path(path)
+        self.state_path = self.path.with_name(self.path.stem + ".state.json")
+        self._start_cycle = start_cycle or process_manager.start_auto_cycle
+        self._clock = clock
+        self.max_sleep_s = max_sleep_s
+
+        self.entries: list[Entry] = []
+        self._wheel = TimerWheel(int(clock()))
+        self._job = None
+        self._blocking: dict[int, float] = {}   # entry index → end of its active window
+        self._resume = False                    # auto cycle to restart when unblocked
+        self._resume_after_process = False      # ... once a scheduled process ends
+        self._deferred_process: str | None = None
+        self._sub = None
+
+    # ── Lifecycle ────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        self.entries = self.load()
+        self._resume = self._load_state()
+        self._sub = self.pm.events.subscribe(self._on_cycle_complete, "cycle_complete",
+                                             name="scheduler")
+        self._rebuild()
+        logger.info("Scheduler started with %d entries", len(self.entries))
+
+    def stop(self) -> None:
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        if self._sub:
+            self._sub.cancel()
+            self._sub = None
+
+    def load(self) -> list[Entry]:
+        """Entries from schedule.json; bad lines are logged and left out."""
+        try:
+            with open(self.path) as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            logger.error("Rejected schedule %s: %s", self.path, e)
+            return []
+        entries = []
+        for i, item in enumerate(raw.get("entries", []) if isinstance(raw, dict) else []):
+            try:
+                entries.append(Entry.parse(item, self.pm.PROCESS_CONFIG))
+            except ValueError as e:
+                logger.error("Schedule entry %d ignored: %s", i, e)
+        return entries
+
+    def reload(self) -> None:
+        """Re-read schedule.json and re-arm every entry."""
+        self.entries = self.load()
+        self._rebuild()
+
+    def upcoming(self, limit: int = 10) -> list[tuple[float, str]]:
+        """Next `limit` (epoch seconds, description) edges, soonest first."""
+        now = self._clock()
+        out = []
+        for entry in self.entries:
+            start = entry.next_start(now)
+            if start is not None:
+                out.append((start, entry.describe()))
+        return sorted(out)[:limit]
+
+    @property
+    def blocked(self) -> bool:
+        """Inside a pause or maintenance window."""
+        return bool(self._blocking)
+
+    # ── Arming ───────────────────────────────────────────────────────────
+
+    def _rebuild(self) -> None:
+        """Fresh wheel from the current time; windows we are inside take effect now."""
+        now = int(self._clock())
+        self._wheel = TimerWheel(now)
+        self._blocking.clear()
+        for i, entry in enumerate(self.entries):
+            if entry.until is None:
+                self._arm_point(i, now)
+                continue
+            window = entry.window_at(now)
+            if window is None:
+                continue
+            start, end = window
+            if start <= now:
+                self._enter_window(i, end)
+            else:
+                self._wheel.add(int(start), (i, "start", end))
+        if self._resume and not self._blocking:
+            logger.info("Resuming auto cycle interrupted before restart")
+            self._resume_cycle()
+        self._arm()
+
+    def _arm_point(self, i: int, after: float) -> None:
+        start = self.entries[i].next_start(after)
+        if start is not None:
+            self._wheel.add(int(start), (i, "start", None))
+
+    def _arm(self) -> None:
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        nxt = self._wheel.next_expiry()
+        if nxt is None:
+            return
+        delay_s = min(max(0, nxt - self._clock()), self.max_sleep_s)
+        self._job = self.widget.after(int(delay_s * 1000), self._wake)
+
+    def _wake(self) -> None:
+        self._job = None
+        now = int(self._clock())
+        if abs(now - self._wheel.now) > 2 * self.max_sleep_s:
+            # The wall clock jumped: re-plan from the new time rather than
+            # replaying every occurrence the jump skipped over
+            logger.warning("Clock jumped %+d s — rebuilding schedule", now - self._wheel.now)
+            self._rebuild()
+            return
+        for i, edge, end in self._wheel.advance(now):
+            if i < len(self.entries):
+                self._fire(i, edge, end, now)
+        self._arm()
+
+    # ── Actions ──────────────────────────────────────────────────────────
+
+    def _fire(self, i: int, edge: str, end, now: int) -> None:
+        entry = self.entries[i]
+        if entry.until is not None:
+            if edge == "start":
+                self._enter_window(i, end)
+            else:
+                self._leave_window(i, now)
+            return
+        self._arm_point(i, now + 1)
+        if self._maintenance():
+            logger.info("Scheduled %s skipped (maintenance)", entry.describe())
+            return
+        if self._blocking:
+            logger.info("Scheduled %s deferred to the end of the pause", entry.describe())
+            if entry.kind == "start":
+                self._set_resume(True)
+            else:
+                self._deferred_process = entry.process
+            return
+        if entry.kind == "start":
+            if self.pm.current_process is None:
+                logger.info("Scheduled start of the auto cycle")
+                self._start_cycle()
+        elif entry.kind == "process":
+            self._run_process(entry.process)
+
+    def _run_process(self, name: str) -> None:
+        pm = self.pm
+        if pm.current_process is None:
+            logger.info("Scheduled %s", name)
+            pm.start_single_process(name)
+        elif pm.auto_cycle and not self._resume_after_process:
+            logger.info("Scheduled %s: pausing the auto cycle for it", name)
+            self._resume_after_process = True
+            pm.stop_current_process(callback=lambda: pm.start_single_process(name))
+        else:
+            logger.warning("Scheduled %s skipped: %s is running by hand", name,
+                           pm.current_process)
+
+    def _enter_window(self, i: int, end: float) -> None:
+        entry = self.entries[i]
+        self._blocking[i] = end
+        self._wheel.add(int(end), (i, "end", None))
+        logger.info("Entering %s until %s", entry.describe(),
+                    datetime.fromtimestamp(end).strftime("%a %H:%M"))
+        if self.pm.current_process is None:
+            return
+        if entry.kind == "pause" and (self.pm.auto_cycle or self._resume_after_process):
+            self._set_resume(True)
+        self._resume_after_process = False
+        self.pm.stop_current_process()
+
+    def _leave_window(self, i: int, now: int) -> None:
+        entry = self.entries[i]
+        self._blocking.pop(i, None)
+        logger.info("Leaving %s", entry.describe())
+        window = entry.window_at(now + 1)
+        if window is not None:
+            self._wheel.add(int(window[0]), (i, "start", window[1]))
+        if entry.kind == "maintenance":
+            self._set_resume(False)
+            self._deferred_process = None
+        if self._blocking:
+            return
+        if self._deferred_process:
+            name, self._deferred_process = self._deferred_process, None
+            if self._resume:
+                self._set_resume(False)
+                self._resume_after_process = True
+            self._run_process(name)
+        elif self._resume:
+            self._resume_cycle()
+
+    def _resume_cycle(self) -> None:
+        self._set_resume(False)
+        if self.pm.current_process is None:
+            self._start_cycle()
+
+    def _on_cycle_complete(self, event: str, data: dict) -> None:
+        # A scheduled process that interrupted the auto cycle has finished
+        if self._resume_after_process:
+            self._resume_after_process = False
+            if not self._blocking:
+                self.widget.after_idle(self._resume_cycle)
+
+    def _maintenance(self) -> bool:
+        return any(self.entries[j].kind == "maintenance" for j in self._blocking)
+
+    # ── State persistence ────────────────────────────────────────────────
+
+    def _set_resume(self, resume: bool) -> None:
+        if resume == self._resume:
+            return
+        self._resume = resume
+        try:
+            atomic_write(self.state_path, json.dumps({"resume": resume}))
+        except OSError as e:
+            logger.error("Failed to save scheduler state: %s", e)
+
+    def _load_state(self) -> bool:
+        try:
+            with open(self.state_path) as f:
+                return bool(json.load(f).get("resume", False))
+        except (OSError, ValueError, AttributeError):
+            return False
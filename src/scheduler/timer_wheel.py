@@ -0,0 +1,144 @@
+"""
+timer_wheel.py — Hierarchical timer wheel over integer ticks.
+
+Four levels of 64 slots each cover 64, 4 096, 262 144 and 16 777 216 ticks
+(with 1 s ticks: a minute, an hour, three days and half a year). A timer is
+filed at the lowest level whose window still reaches its expiry, and is
+cascaded one level down when its slot comes up. Adding and cancelling are
+O(1); finding the next expiry reads one occupancy bitmap per level, so it
+costs the same whether the wheel holds ten timers or ten thousand.
+
+The wheel never ticks on its own: the owner asks next_expiry(), sleeps
+until then and calls advance(), so nothing polls once per tick.
+"""
+
+_BITS = 6
+_SLOTS = 1 << _BITS
+_MASK = _SLOTS - 1
+_LEVELS = 4
+_SPAN_BITS = _BITS * _LEVELS
+_OVERFLOW = -1
+
+
+class Timer:
+    """Handle returned by TimerWheel.add()."""
+
+    __slots__ = ("expiry", "payload", "_seq", "_pos")
+
+    def __init__(self, expiry: int, payload, seq: int):
+        self.expiry = expiry
+        self.payload = payload
+        self._seq = seq
+        self._pos: tuple | None = None    # (level, slot) while filed
+
+    @property
+    def active(self) -> bool:
+        return self._pos is not None
+
+
+class TimerWheel:
+    def __init__(self, now: int = 0):
+        self.now = now
+        self._wheel = [[set() for _ in range(_SLOTS)] for _ in range(_LEVELS)]
+        self._occupied = [0] * _LEVELS      # bit s set ⇔ slot s non-empty
+        self._overflow: set = set()         # beyond the top level's reach
+        self._count = 0
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, expiry: int, payload) -> Timer:
+        """File `payload` to fire at tick `expiry` (past ticks fire on the next advance)."""
+        self._seq += 1
+        timer = Timer(max(int(expiry), self.now), payload, self._seq)
+        self._place(timer)
+        self._count += 1
+        return timer
+
+    def cancel(self, timer: Timer) -> None:
+        if timer._pos is None:
+            return
+        level, s = timer._pos
+        timer._pos = None
+        self._count -= 1
+        if level == _OVERFLOW:
+            self._overflow.discard(timer)
+            return
+        slot = self._wheel[level][s]
+        slot.discard(timer)
+        if not slot:
+            self._occupied[level] &= ~(1 << s)
+
+    def next_expiry(self) -> int | None:
+        """Earliest tick at which advance() has work to do, or None if empty."""
+        if not self._count:
+            return None
+        best = None
+        for level in range(_LEVELS):
+            bits = self._occupied[level]
+            if not bits:
+                continue
+            shift = level * _BITS
+            base = self.now >> shift
+            idx = base & _MASK
+            # Rotate so the current slot is bit 0, then take the lowest set bit
+            rot = ((bits >> idx) | (bits << (_SLOTS - idx))) & ((1 << _SLOTS) - 1)
+            offset = (rot & -rot).bit_length() - 1
+            # Level 0 slots are exact ticks; higher slots are cascaded at their start
+            at = max((base + offset) << shift, self.now)
+            if best is None or at < best:
+                best = at
+        if self._overflow:
+            at = ((self.now >> _SPAN_BITS) + 1) << _SPAN_BITS
+            if best is None or at < best:
+                best = at
+        return best
+
+    def advance(self, now: int) -> list:
+        """Move the wheel to tick `now`; return the payloads that fell due, in expiry order."""
+        fired: list[Timer] = []
+        while True:
+            at = self.next_expiry()
+            if at is None or at > now:
+                break
+            self.now = at
+            self._expire_current(fired)
+        self.now = max(self.now, now)
+        fired.sort(key=lambda t: (t.expiry, t._seq))
+        return [t.payload for t in fired]
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _place(self, timer: Timer) -> None:
+        for level in range(_LEVELS):
+            shift = level * _BITS
+            if (timer.expiry >> shift) - (self.now >> shift) < _SLOTS:
+                s = (timer.expiry >> shift) & _MASK
+                self._wheel[level][s].add(timer)
+                self._occupied[level] |= 1 << s
+                timer._pos = (level, s)
+                return
+        self._overflow.add(timer)
+        timer._pos = (_OVERFLOW, 0)
+
+    def _expire_current(self, fired: list) -> None:
+        """Fire or cascade every slot that has come up at self.now."""
+        if self._overflow and not self.now & ((1 << _SPAN_BITS) - 1):
+            pending, self._overflow = self._overflow, set()
+            for timer in pending:
+                self._place(timer)
+        for level in range(_LEVELS - 1, -1, -1):
+            s = (self.now >> (level * _BITS)) & _MASK
+            slot = self._wheel[level][s]
+            if not slot:
+                continue
+            self._wheel[level][s] = set()
+            self._occupied[level] &= ~(1 << s)
+            for timer in slot:
+                if timer.expiry <= self.now:
+                    timer._pos = None
+                    self._count -= 1
+                    fired.append(timer)
+                else:
+                    self._place(timer)      # lands on a lower level
@@ -0,0 +1,183 @@
+"""
+bench.py — ProcessManager scheduling benchmarks on the virtual scheduler.
+Run: python -m src.sim.bench --cycles 2000
+"""
+
+import argparse
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from src.hardware.mock_gpio import MockGPIO
+from src.processes.process_manager import ProcessManager
+from src.processes.settings_store import SettingsStore
+from src.sim.virtual_scheduler import VirtualScheduler
+
+_CYCLE_MS = 4 * 25_000   # one loop of four 10 s processes, give or take
+
+
+def _manager(root: Path, duration_ms: int | None = 10_000, pipelined: bool = False):
+    """Fresh manager; every process lasts `duration_ms` (None: factory timings)."""
+    from src.config import DEFAULT_TIMINGS
+    store = SettingsStore(root / "timings.json", DEFAULT_TIMINGS,
+                          ProcessManager.PROCESS_CONFIG, debounce_s=3600)
+    if duration_ms is None:
+        store.replace(DEFAULT_TIMINGS)
+    else:
+        store.replace({name: duration_ms for name in ProcessManager.PROCESS_CONFIG})
+    clock = VirtualScheduler()
+    pm = ProcessManager(MockGPIO(), clock, settings=store, pipelined=pipelined)
+    return pm, clock
+
+
+def bench_scheduler(jobs: int) -> dict:
+    """Raw VirtualScheduler: schedule `jobs` timers, then fire them all."""
+    clock = VirtualScheduler()
+    noop = lambda: None
+    t0 = time.perf_counter()
+    for i in range(jobs):
+        clock.after(i % 1000, noop)
+    scheduled = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    clock.run_all(limit=jobs)
+    fired = time.perf_counter() - t0
+    return {"schedule_per_s": jobs / scheduled, "fire_per_s": jobs / fired}
+
+
+def bench_cycles(root: Path, cycles: int) -> dict:
+    """Auto cycles end to end: ProcessManager callbacks per second."""
+    pm, clock = _manager(root)
+    pm.start_auto_cycle()
+    t0 = time.perf_counter()
+    ran = clock.run_until(cycles * _CYCLE_MS)
+    elapsed = time.perf_counter() - t0
+    pm.stop_immediately()
+    return {"callbacks": ran, "callbacks_per_s": ran / elapsed,
+            "virtual_h_per_s": clock.now_ms / 3_600_000 / elapsed}
+
+
+def bench_cancel(root: Path, warm_cycles: int, repeats: int = 200) -> dict:
+    """
+    Cost of stop_immediately() after `warm_cycles` of auto cycling. With
+    fired jobs pruned it should not depend on how long the cycle has run.
+    """
+    pm, clock = _manager(root)
+    pm.start_auto_cycle()
+    clock.run_until(warm_cycles * _CYCLE_MS)
+    t0 = time.perf_counter()
+    pm.stop_immediately()
+    first = time.perf_counter() - t0
+
+    total = 0.0
+    for _ in range(repeats):
+        pm.start_single_process("forward_wash")
+        t0 = time.perf_counter()
+        pm.stop_immediately()
+        total += time.perf_counter() - t0
+    return {"warm_cycles": warm_cycles, "first_stop_us": first * 1e6,
+            "stop_immediately_us": total / repeats * 1e6, "pending_after": clock.pending}
+
+
+def bench_pipeline(root: Path, hours: int = 24) -> dict:
+    """
+    Service minutes per day, sequential vs pipelined transitions: `hours`
+    of virtual auto cycling at factory timings, counting the time the pump
+    runs during service.
+    """
+    out = {}
+    for mode in ("sequential", "pipelined"):
+        pm, clock = _manager(root, None, pipelined=mode == "pipelined")
+        pump = ProcessManager.PROCESS_CONFIG["service"]["pump"]
+        run = {"since": None, "ms": 0}
+
+        def on_valve(event, data, pm=pm, clock=clock, run=run):
+            if data["channel_id"] != pump or pm.current_process != "service":
+                return
+            if data["is_on"]:
+                run["since"] = clock.now_ms
+            elif run["since"] is not None:
+                run["ms"] += clock.now_ms - run["since"]
+                run["since"] = None
+
+        pm.events.subscribe(on_valve, "valve")
+        pm.start_auto_cycle()
+        clock.run_until(hours * 3_600_000)
+        if run["since"] is not None:
+            run["ms"] += clock.now_ms - run["since"]
+        pm.stop_immediately()
+        out[f"{mode}_service_min_per_day"] = run["ms"] / 60_000 * 24 / hours
+    out["gain_min_per_day"] = (out["pipelined_service_min_per_day"]
+                               - out["sequential_service_min_per_day"])
+    out["predicted_gain_min_per_day"] = pm.cycle_report()["gain_min_per_day"]
+    return out
+
+
+def bench_interlock(transitions: int) -> dict:
+    """Per-transition cost of InterlockedGPIO over a bare MockGPIO."""
+    from src.safety.interlock import InterlockedGPIO
+
+    def flips(gpio):
+        t0 = time.perf_counter()
+        for _ in range(transitions // 4):
+            gpio.turn_on(1)
+            gpio.turn_on(6)
+            gpio.turn_off(6)
+            gpio.turn_off(1)
+        return (time.perf_counter() - t0) / transitions * 1e9
+
+    bare = flips(MockGPIO())
+    guarded = flips(InterlockedGPIO(MockGPIO()))
+    check = InterlockedGPIO(MockGPIO()).engine.check
+    t0 = time.perf_counter()
+    for _ in range(transitions):
+        check(0b0000001, 6, True)
+    lookup = (time.perf_counter() - t0) / transitions * 1e9
+    return {"bare_ns": bare, "interlocked_ns": guarded, "check_ns": lookup}
+
+
+def run(cycles: int = 2000, jobs: int = 200_000) -> dict:
+    logging.getLogger("UltraFiltration").setLevel(logging.WARNING)
+    root = Path(tempfile.mkdtemp(prefix="uf-sim-"))
+    try:
+        return {
+            "scheduler": bench_scheduler(jobs),
+            "cycles": bench_cycles(root, cycles),
+            "cancel_cold": bench_cancel(root, 1),
+            "cancel_warm": bench_cancel(root, cycles),
+            "interlock": bench_interlock(jobs),
+            "pipeline": bench_pipeline(root),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    results = run(args.cycles, args.jobs)
+    s, c = results["scheduler"], results["cycles"]
+    print(f"  scheduler   {s['schedule_per_s']:>12,.0f} after()/s  "
+          f"{s['fire_per_s']:>12,.0f} fired/s")
+    print(f"  auto cycle  {c['callbacks_per_s']:>12,.0f} callbacks/s  "
+          f"({c['virtual_h_per_s']:,.0f} virtual h/s)")
+    for key in ("cancel_cold", "cancel_warm"):
+        r = results[key]
+        print(f"  cancel      {r['first_stop_us']:>12.1f} µs first stop_immediately "
+              f"after {r['warm_cycles']} cycles, {r['stop_immediately_us']:.1f} µs repeated")
+    i = results["interlock"]
+    print(f"  interlock   {i['check_ns']:>12.0f} ns/check  "
+          f"transition {i['bare_ns']:.0f} ns bare → {i['interlocked_ns']:.0f} ns interlocked")
+    p = results["pipeline"]
+    print(f"  pipelined   {p['gain_min_per_day']:>+12.1f} service min/day  "
+          f"({p['sequential_service_min_per_day']:.1f} → "
+          f"{p['pipelined_service_min_per_day']:.1f}, "
+          f"predicted {p['predicted_gain_min_per_day']:+.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+virtual_scheduler.py — Stand-in for a Tk widget's .after() scheduling,
+driven by a virtual millisecond clock instead of the real event loop.
+Lets ProcessManager run headless and faster than real time (simulation,
+load generation, tests).
+"""
+
+import heapq
+import itertools
+
+
+class VirtualScheduler:
+    """
+    Implements the subset of the Tk widget API ProcessManager uses:
+    after(ms, func, *args), after_idle(func, *args) and after_cancel(id).
+
+    Callbacks due at the same time run in the order they were scheduled,
+    exactly like Tk timers.
+    """
+
+    def __init__(self, start_ms: int = 0, jitter=None):
+        """
+        Args:
+            start_ms: Initial clock value in milliseconds.
+            jitter: Optional callable () -> int returning extra delay (ms)
+                    added to each timer, to simulate a busy event loop.
+        """
+        self.now_ms = start_ms
+        self._jitter = jitter
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._cancelled: set[str] = set()
+        self._live: set[str] = set()
+
+    # ── Tk-compatible API ────────────────────────────────────────────────
+
+    def after(self, delay_ms: int, func=None, *args) -> str:
+        delay = max(0, int(delay_ms))
+        if self._jitter:
+            delay += self._jitter()
+        n = next(self._seq)
+        job_id = f"after#{n}"
+        heapq.heappush(self._heap, (self.now_ms + delay, n, job_id, func, args))
+        self._live.add(job_id)
+        return job_id
+
+    def after_idle(self, func, *args) -> str:
+        return self.after(0, func, *args)
+
+    def after_cancel(self, job_id: str) -> None:
+        if job_id in self._live:
+            self._live.discard(job_id)
+            self._cancelled.add(job_id)
+
+    # ── Clock control ────────────────────────────────────────────────────
+
+    @property
+    def pending(self) -> int:
+        return len(self._live)
+
+    def timers(self) -> list:
+        """Live timers in firing order, as (due_ms, func, args)."""
+        live = [e for e in self._heap if e[2] in self._live]
+        return [(due, func, args) for due, _, _, func, args in sorted(live, key=lambda e: e[:2])]
+
+    def next_due(self) -> int | None:
+        """Virtual time of the next live timer (None if nothing is scheduled)."""
+        self._discard_cancelled()
+        return self._heap[0][0] if self._heap else None
+
+    def step(self) -> bool:
+        """Run the next due callback, advancing the clock to it."""
+        self._discard_cancelled()
+        if not self._heap:
+            return False
+        due, _, job_id, func, args = heapq.heappop(self._heap)
+        self._live.discard(job_id)
+        self.now_ms = max(self.now_ms, due)
+        if func is not None:
+            func(*args)
+        return True
+
+    def advance(self, ms: int) -> int:
+        """Run every callback due within the next `ms`; returns how many ran."""
+        return self.run_until(self.now_ms + ms)
+
+    def run_until(self, t_ms: int) -> int:
+        ran = 0
+        while True:
+            due = self.next_due()
+            if due is None or due > t_ms:
+                break
+            self.step()
+            ran += 1
+        self.now_ms = max(self.now_ms, t_ms)
+        return ran
+
+    def run_all(self, limit: int = 1_000_000) -> int:
+        """Run until nothing is scheduled (bounded, since cycles loop forever)."""
+        ran = 0
+        while ran < limit and self.step():
+            ran += 1
+        return ran
+
+    def _discard_cancelled(self) -> None:
+        heap = self._heap
+        while heap and heap[0][2] in self._cancelled:
+            self._cancelled.discard(heapq.heappop(heap)[2])
@@ -0,0 +1,43 @@
+"""
+mock_broker.py — In-process broker stand-in for developing the uplink
+without a network. Mirrors the MqttTransport interface the same way
+MockGPIO mirrors GPIOController.
+"""
+
+import logging
+
+logger = logging.getLogger("UltraFiltration.MockBroker")
+
+
+class MockBroker:
+    """Drop-in replacement for MqttTransport that keeps messages in memory."""
+
+    def __init__(self):
+        self.online = True           # set False to simulate a dead link
+        self.drop_after = None       # acks to give before the link drops mid-replay
+        self.received: list[tuple[str, bytes]] = []
+        self.bytes_received = 0
+        self.connects = 0
+
+    def connect(self) -> None:
+        if not self.online:
+            raise ConnectionError("MOCK — link down")
+        self.connects += 1
+
+    def send_batches(self, topic: str, batches):
+        for position, payload in batches:
+            if self.drop_after is not None:
+                if self.drop_after <= 0:
+                    self.online, self.drop_after = False, None
+                else:
+                    self.drop_after -= 1
+            if not self.online:
+                raise ConnectionError("MOCK — link dropped mid-replay")
+            self.received.append((topic, payload))
+            self.bytes_received += len(payload)
+            yield position
+        logger.debug("MOCK — %d batches held (%d bytes)",
+                     len(self.received), self.bytes_received)
+
+    def close(self) -> None:
+        pass
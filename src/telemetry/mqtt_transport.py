@@ -0,0 +1,135 @@
+"""
+mqtt_transport.py — Minimal MQTT 3.1.1 publisher (QoS 1) for the uplink.
+Only what store-and-forward needs: CONNECT, pipelined PUBLISH/PUBACK and
+DISCONNECT. No subscriptions, no QoS 2, no extra dependencies.
+"""
+
+import logging
+import socket
+import struct
+from collections import deque
+
+logger = logging.getLogger("UltraFiltration.MQTT")
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte, n = n % 128, n // 128
+        out.append(byte | (0x80 if n else 0))
+        if not n:
+            return bytes(out)
+
+
+def _string(s: str) -> bytes:
+    raw = s.encode()
+    return struct.pack("!H", len(raw)) + raw
+
+
+class MqttTransport:
+    """
+    Publishes batches to an MQTT broker with QoS 1.
+
+    Up to `window` PUBLISH packets are kept in flight, so replaying a
+    backlog over a high-latency cellular link is not one round trip per
+    batch. send_batches() yields each position as its PUBACK arrives.
+    """
+
+    def __init__(self, host: str, port: int = 1883, client_id: str = "uf",
+                 username: str | None = None, password: str | None = None,
+                 keepalive_s: int = 60, timeout_s: float = 15.0, window: int = 16):
+        self.host = host
+        self.port = port
+        self.client_id = client_id
+        self.username = username
+        self.password = password
+        self.keepalive_s = keepalive_s
+        self.timeout_s = timeout_s
+        self.window = window
+        self._sock: socket.socket | None = None
+        self._packet_id = 0
+
+    def connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), self.timeout_s)
+        self._sock.settimeout(self.timeout_s)
+        flags = 0x02  # clean session
+        payload = _string(self.client_id)
+        if self.username:
+            flags |= 0x80
+            payload += _string(self.username)
+            if self.password:
+                flags |= 0x40
+                payload += _string(self.password)
+        variable = _string("MQTT") + struct.pack("!BBH", 4, flags, self.keepalive_s)
+        self._send_packet(0x10, variable + payload)
+
+        ptype, body = self._read_packet()
+        if ptype != 0x20 or len(body) < 2 or body[1] != 0:
+            rc = body[1] if len(body) > 1 else -1
+            self.close()
+            raise ConnectionError(f"MQTT CONNACK refused (rc={rc})")
+        logger.debug("MQTT connected to %s:%d", self.host, self.port)
+
+    def send_batches(self, topic: str, batches):
+        """Publish (position, payload) pairs; yield positions once acknowledged."""
+        in_flight: deque = deque()
+        topic_raw = _string(topic)
+        for position, payload in batches:
+            pid = self._next_id()
+            self._send_packet(0x32, topic_raw + struct.pack("!H", pid) + payload)
+            in_flight.append((pid, position))
+            if len(in_flight) >= self.window:
+                yield self._await_ack(in_flight)
+        while in_flight:
+            yield self._await_ack(in_flight)
+
+    def close(self) -> None:
+        if not self._sock:
+            return
+        try:
+            self._send_packet(0xE0, b"")
+        except OSError:
+            pass
+        self._sock.close()
+        self._sock = None
+
+    # ── Wire helpers ─────────────────────────────────────────────────────
+
+    def _next_id(self) -> int:
+        self._packet_id = self._packet_id % 0xFFFF + 1
+        return self._packet_id
+
+    def _await_ack(self, in_flight: deque):
+        while True:
+            ptype, body = self._read_packet()
+            if ptype != 0x40:
+                continue
+            (pid,) = struct.unpack("!H", body[:2])
+            # Brokers acknowledge QoS 1 in order; tolerate strays anyway
+            while in_flight:
+                head_pid, position = in_flight.popleft()
+                if head_pid == pid:
+                    return position
+
+    def _send_packet(self, header: int, body: bytes) -> None:
+        self._sock.sendall(bytes([header]) + _varint(len(body)) + body)
+
+    def _read_packet(self) -> tuple[int, bytes]:
+        header = self._recv_exact(1)[0]
+        length, shift = 0, 0
+        while True:
+            byte = self._recv_exact(1)[0]
+            length |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                break
+            shift += 7
+        return header & 0xF0, self._recv_exact(length)
+
+    def _recv_exact(self, n: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = self._sock.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("MQTT connection closed by broker")
+            buf += chunk
+        return bytes(buf)
@@ -0,0 +1,238 @@
+"""
+outbox.py — Durable on-disk store-and-forward queue for telemetry batches.
+
+Records are buffered in RAM and written to the SD card as one compressed
+batch at a time (one append + one fsync per batch). Batches stay compressed
+on disk, so replaying a backlog after an outage streams the stored bytes
+to the broker without re-encoding anything.
+
+On-disk layout (one directory):
+    seg-<first_seq>.bin   appended frames:  <u32 length><u32 crc32><payload>
+    cursor                "<segment name> <offset>" of the first unsent frame
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+
+logger = logging.getLogger("UltraFiltration.Outbox")
+
+# ── Batch encoding ───────────────────────────────────────────────────────────
+# payload = <u8 version><u64 batch seq> + zlib(JSON lines)
+# A preset dictionary of the keys/values we always send lets zlib compress
+# even small batches well; decoders must use the same dictionary.
+BATCH_VERSION = 1
+_BATCH_HEADER = struct.Struct("<BQ")
+_FRAME_HEADER = struct.Struct("<II")
+_ZDICT = (
+    b'{"t":1700000000.000,"e":"valve","c":1,"on":0}\n'
+    b'{"t":1700000000.000,"e":"valve","c":6,"on":1}\n'
+    b'{"t":1700000000.000,"e":"process_start","p":"fast_rinse","ms":60000}\n'
+    b'{"t":1700000000.000,"e":"pump_start","p":"service","ms":3605000}\n'
+    b'{"t":1700000000.000,"e":"process_end","p":"back_wash"}\n'
+    b'{"t":1700000000.000,"e":"process_end","p":"forward_wash"}\n'
+    b'{"t":1700000000.000,"e":"cycle_complete"}\n'
+    b'{"t":1700000000.000,"e":"rollup","k":"","min":0,"max":0,"avg":0,"n":0}\n'
+)
+
+
+def encode_batch(seq: int, records: list[dict]) -> bytes:
+    """Serialize and compress a list of records into a batch payload."""
+    body = "".join(
+        json.dumps(r, separators=(",", ":")) + "\n" for r in records
+    ).encode()
+    comp = zlib.compressobj(9, zlib.DEFLATED, 15, 9, zlib.Z_DEFAULT_STRATEGY, _ZDICT)
+    return _BATCH_HEADER.pack(BATCH_VERSION, seq) + comp.compress(body) + comp.flush()
+
+
+def decode_batch(payload: bytes) -> tuple[int, list[dict]]:
+    """Inverse of encode_batch. Returns (batch seq, records)."""
+    version, seq = _BATCH_HEADER.unpack_from(payload)
+    if version != BATCH_VERSION:
+        raise ValueError(f"unsupported batch version {version}")
+    decomp = zlib.decompressobj(15, _ZDICT)
+    body = decomp.decompress(payload[_BATCH_HEADER.size:]) + decomp.flush()
+    return seq, [json.loads(line) for line in body.splitlines() if line]
+
+
+# ── Outbox ───────────────────────────────────────────────────────────────────
+class Outbox:
+    """
+    Append-only, crash-safe batch queue.
+
+    append() only touches RAM. A batch hits the disk when maybe_flush() finds
+    `batch_size` records buffered or `flush_interval_s` elapsed since the
+    first buffered record, or on an explicit flush().
+    """
+
+    def __init__(self, directory: Path, batch_size: int = 500,
+                 flush_interval_s: float = 300.0,
+                 segment_bytes: int = 256 * 1024,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()       # the RAM buffer only; never held over I/O
+        self._io_lock = threading.Lock()    # serialises segment, cursor and quota writers
+        self._buffer: list[dict] = []
+        self._buffer_since = 0.0
+        self._next_seq = 1
+        self._segment: Path | None = None
+        self._cursor = self._load_cursor()
+        self._recover()
+
+    # ── Producer side ────────────────────────────────────────────────────
+
+    def append(self, record: dict) -> bool:
+        """
+        Buffer a record in RAM. Never touches the disk; returns True when a
+        flush is due so the caller can wake whichever thread does the I/O.
+        """
+        with self._lock:
+            if not self._buffer:
+                self._buffer_since = time.monotonic()
+            self._buffer.append(record)
+            return self._due()
+
+    def maybe_flush(self) -> None:
+        """Flush if the buffer is full or its oldest record is too old."""
+        with self._lock:
+            due = self._due()
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the RAM buffer to disk as one compressed batch."""
+        with self._io_lock:
+            # Swap the buffer out and release it: append() must never wait
+            # behind compression or an SD-card fsync
+            with self._lock:
+                if not self._buffer:
+                    return
+                records, self._buffer = self._buffer, []
+            seq = self._next_seq
+            self._next_seq += 1
+            payload = encode_batch(seq, records)
+            frame = _FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+            if (self._segment is None or
+                    self._segment.stat().st_size + len(frame) > self.segment_bytes):
+                self._segment = self.dir / f"seg-{seq:012d}.bin"
+            with open(self._segment, "ab") as f:
+                f.write(frame)
+                f.flush()
+                os.fsync(f.fileno())
+            self._enforce_quota()
+        logger.debug("Outbox batch %d written  (%d records, %d bytes)",
+                     seq, len(records), len(payload))
+
+    # ── Consumer side ────────────────────────────────────────────────────
+
+    def pending(self):
+        """
+        Yield (position, payload) for every unsent batch, oldest first.
+        Pass the position of the last delivered batch to commit().
+        """
+        seg_name, offset = self._cursor
+        for seg in self._segments():
+            if seg_name and seg.name < seg_name:
+                continue
+            start = offset if seg.name == seg_name else 0
+            with open(seg, "rb") as f:
+                f.seek(start)
+                while True:
+                    header = f.read(_FRAME_HEADER.size)
+                    if len(header) < _FRAME_HEADER.size:
+                        break
+                    length, crc = _FRAME_HEADER.unpack(header)
+                    payload = f.read(length)
+                    if len(payload) < length or zlib.crc32(payload) != crc:
+                        logger.warning("Outbox: torn frame in %s — skipping rest", seg.name)
+                        break
+                    yield (seg.name, f.tell()), payload
+
+    def commit(self, position: tuple[str, int]) -> None:
+        """Mark everything up to `position` delivered and drop spent segments."""
+        with self._io_lock:
+            self._cursor = position
+            tmp = self.dir / "cursor.tmp"
+            with open(tmp, "w") as f:
+                f.write(f"{position[0]} {position[1]}")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.dir / "cursor")
+            for seg in self._segments():
+                if seg.name >= position[0]:
+                    break
+                seg.unlink()
+            if self._segment and not self._segment.exists():
+                self._segment = None
+
+    def has_pending(self) -> bool:
+        for _ in self.pending():
+            return True
+        return False
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _due(self) -> bool:
+        return bool(self._buffer) and (
+            len(self._buffer) >= self.batch_size or
+            time.monotonic() - self._buffer_since >= self.flush_interval_s
+        )
+
+    def _segments(self) -> list[Path]:
+        return sorted(self.dir.glob("seg-*.bin"))
+
+    def _load_cursor(self) -> tuple[str, int]:
+        try:
+            name, offset = (self.dir / "cursor").read_text().split()
+            return name, int(offset)
+        except (OSError, ValueError):
+            return "", 0
+
+    def _recover(self) -> None:
+        """Resume numbering after the last good batch; cut off a torn tail."""
+        segments = self._segments()
+        if not segments:
+            return
+        self._segment = segments[-1]
+        last_seq, good = int(self._segment.stem[4:]) - 1, 0
+        with open(self._segment, "rb") as f:
+            while True:
+                header = f.read(_FRAME_HEADER.size)
+                if len(header) < _FRAME_HEADER.size:
+                    break
+                length, crc = _FRAME_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                last_seq = _BATCH_HEADER.unpack_from(payload)[1]
+                good = f.tell()
+        if good < self._segment.stat().st_size:
+            logger.warning("Outbox: truncating torn tail of %s", self._segment.name)
+            os.truncate(self._segment, good)
+        self._next_seq = last_seq + 1
+
+    def _enforce_quota(self) -> None:
+        """Drop the oldest segments if a long outage outgrows the quota."""
+        segments = self._segments()
+        total = sum(s.stat().st_size for s in segments)
+        while total > self.max_bytes and len(segments) > 1:
+            oldest = segments.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink()
+            logger.warning("Outbox over quota — dropped %s", oldest.name)
@@ -0,0 +1,157 @@
+"""
+uplink.py — Telemetry collection and store-and-forward publishing.
+
+TelemetryCollector turns ProcessManager events into compact records and
+buffers them in the Outbox (RAM only — safe to call from the Tk thread).
+TelemetryUplink is a background thread that writes full batches to disk
+and drains the outbox to the broker whenever the link is up, backing off
+exponentially while it is down.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from src.telemetry.outbox import Outbox
+
+logger = logging.getLogger("UltraFiltration.Telemetry")
+
+
+class TelemetryCollector:
+    """Subscribes to ProcessManager events and records them in an Outbox."""
+
+    def __init__(self, outbox: Outbox, on_due=None, clock=time.time):
+        """
+        Args:
+            outbox: Destination outbox.
+            on_due: Called (from the producing thread) when the outbox has
+                    a full batch waiting to be written, e.g. uplink.wake.
+            clock: Source of record timestamps (epoch seconds).
+        """
+        self.outbox = outbox
+        self._on_due = on_due
+        self._clock = clock
+
+    def attach(self, process_manager) -> None:
+        process_manager.add_listener(self._on_event)
+
+    def record(self, event: str, **fields) -> None:
+        rec = {"t": round(self._clock(), 3), "e": event}
+        rec.update(fields)
+        if self.outbox.append(rec) and self._on_due:
+            self._on_due()
+
+    def record_rollup(self, key: str, values) -> None:
+        """Summarize a window of sensor samples into one min/max/avg record."""
+        values = list(values)
+        if not values:
+            return
+        self.record("rollup", k=key, min=min(values), max=max(values),
+                    avg=round(sum(values) / len(values), 3), n=len(values))
+
+    def record_rollups(self, window: dict) -> None:
+        """One rollup per key of {key: [values]} (e.g. a HealthSampler window)."""
+        for key, values in window.items():
+            self.record_rollup(key, values)
+
+    def _on_event(self, event: str, data: dict) -> None:
+        if event == "valve":
+            self.record("valve", c=data["channel_id"], on=int(data["is_on"]))
+        elif event == "process_start":
+            self.record(event, p=data["name"], ms=data["duration_ms"])
+        elif event == "pump_start":
+            self.record(event, p=data["name"], ms=data["countdown_ms"])
+        elif event == "process_end":
+            self.record(event, p=data["name"])
+        elif event == "cycle_complete":
+            self.record(event)
+
+
+class TelemetryUplink:
+    """Background sender that drains the outbox whenever the broker is reachable."""
+
+    def __init__(self, outbox: Outbox, transport, topic: str,
+                 check_interval_s: float = 30.0,
+                 min_backoff_s: float = 5.0, max_backoff_s: float = 600.0):
+        self.outbox = outbox
+        self.transport = transport
+        self.topic = topic
+        self.check_interval_s = check_interval_s
+        self.min_backoff_s = min_backoff_s
+        self.max_backoff_s = max_backoff_s
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._backoff = 0.0
+        self.batches_sent = 0
+        self.bytes_sent = 0
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="TelemetryUplink", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and write any buffered records to disk."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.outbox.flush()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def drain_once(self) -> int:
+        """
+        Flush due records and publish every pending batch. Returns the number
+        of batches delivered; raises OSError if the link fails.
+        """
+        self.outbox.maybe_flush()
+        if not self.outbox.has_pending():
+            return 0
+        sent = 0
+        last = None
+        self.transport.connect()
+        try:
+            for position in self.transport.send_batches(self.topic, self._tracked()):
+                last = position
+                sent += 1
+        finally:
+            self.transport.close()
+            if last is not None:
+                self.outbox.commit(last)
+        self.batches_sent += sent
+        return sent
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _tracked(self):
+        for position, payload in self.outbox.pending():
+            self.bytes_sent += len(payload)
+            yield position, payload
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self._backoff or self.check_interval_s)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                sent = self.drain_once()
+                if sent:
+                    logger.info("Telemetry uplink: %d batches delivered", sent)
+                self._backoff = 0.0
+            except OSError as e:
+                self._backoff = min(self.max_backoff_s,
+                                    max(self.min_backoff_s, self._backoff * 2))
+                # Jitter keeps a fleet from reconnecting in lockstep
+                self._backoff *= random.uniform(0.8, 1.2)
+                logger.warning("Telemetry uplink offline (%s) — retry in %.0fs",
+                               e, self._backoff)
@@ -0,0 +1,169 @@
+"""
+tk_bridge.py — Hand work from any thread to the Tk thread, without polling.
+
+Tk may only be touched from the thread running mainloop(). TkBridge is the
+one sanctioned way in for everything else (sensor readers, network
+handlers, watchdogs, signal handlers):
+
+    bridge.post(func, *args)        # any thread; never blocks
+
+Posted calls go onto a deque (append/popleft are atomic, so producers take
+no lock) and the first post after a drain writes one byte to a pipe whose
+read end is registered with widget.tk.createfilehandler(). Tk wakes the
+moment the byte lands and drains everything queued so far in one batch.
+Where file handlers are unavailable (Windows) the wake-up is a virtual
+event generated with when="tail" instead.
+
+A drain stops after `budget_ms` and finishes the rest from after_idle(),
+so a burst of posts cannot starve input handling and redraws.
+"""
+
+import logging
+import os
+import signal
+import time
+import tkinter as tk
+from collections import deque
+
+logger = logging.getLogger("UltraFiltration.Bridge")
+
+_WAKE_EVENT = "<<TkBridgeWake>>"
+
+
+class TkBridge:
+    """
+    Args:
+        widget: Tk widget (or EventLoop) whose thread runs the posted calls.
+        budget_ms: Longest a single drain may run before yielding to Tk.
+    """
+
+    def __init__(self, widget, budget_ms: float = 8.0):
+        self.widget = widget
+        self.budget_s = budget_ms / 1000
+        self._queue: deque = deque()
+        self._signalled = False         # a wake-up is on its way to the Tk thread
+        self._resume_job = None
+        self._closed = False
+        # Counters (written on the Tk thread only)
+        self.calls = 0
+        self.drains = 0
+        self.max_batch = 0
+        self.yields = 0                 # drains cut short by the budget
+        self.max_latency_s = 0.0        # post() → call start
+
+        self._rfd, self._wfd = os.pipe()
+        os.set_blocking(self._rfd, False)
+        os.set_blocking(self._wfd, False)
+        try:
+            widget.tk.createfilehandler(self._rfd, tk.READABLE, self._on_readable)
+            self.mode = "fd"
+        except (AttributeError, tk.TclError):
+            os.close(self._rfd)
+            os.close(self._wfd)
+            self._rfd = self._wfd = None
+            widget.bind(_WAKE_EVENT, lambda e: self._on_wake())
+            self.mode = "event"
+
+    def post(self, func, *args) -> None:
+        """Run func(*args) on the Tk thread as soon as it is free. Thread-safe."""
+        if self._closed:
+            return
+        self._queue.append((time.perf_counter(), func, args))
+        if not self._signalled:
+            self._signalled = True
+            self._wake()
+
+    def post_on_signal(self, signums, func) -> None:
+        """
+        Run func() on the Tk thread when one of `signums` arrives. Main
+        thread only. Python signal handlers otherwise wait until Tk next
+        calls into Python, which an idle mainloop may not do for a long time.
+        """
+        if self._wfd is not None:
+            # The C-level handler writes to our pipe, which wakes Tk, whose
+            # callback lets the Python-level handler below run
+            signal.set_wakeup_fd(self._wfd, warn_on_full_buffer=False)
+        for signum in signums:
+            signal.signal(signum, lambda *_: self.post(func))
+
+    def close(self) -> None:
+        self._closed = True
+        if self._resume_job:
+            self.widget.after_cancel(self._resume_job)
+            self._resume_job = None
+        if self._rfd is not None:
+            try:
+                self.widget.tk.deletefilehandler(self._rfd)
+            except tk.TclError:
+                pass
+            os.close(self._rfd)
+            os.close(self._wfd)
+            self._rfd = self._wfd = None
+
+    @property
+    def backlog(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode, "calls": self.calls, "drains": self.drains,
+            "max_batch": self.max_batch, "yields": self.yields,
+            "max_latency_ms": self.max_latency_s * 1000, "backlog": len(self._queue),
+        }
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _wake(self) -> None:
+        if self._wfd is not None:
+            try:
+                os.write(self._wfd, b"\0")
+            except BlockingIOError:
+                pass            # pipe full: a wake-up is pending anyway
+            except OSError:
+                pass            # closed during shutdown
+        else:
+            try:
+                self.widget.event_generate(_WAKE_EVENT, when="tail")
+            except tk.TclError:
+                pass
+
+    def _on_readable(self, fd, _mask) -> None:
+        try:
+            while os.read(fd, 512):
+                pass
+        except BlockingIOError:
+            pass
+        self._on_wake()
+
+    def _on_wake(self) -> None:
+        # Cleared before draining: anything posted from here on signals again
+        self._signalled = False
+        self._drain()
+
+    def _drain(self) -> None:
+        self._resume_job = None
+        queue = self._queue
+        start = time.perf_counter()
+        deadline = start + self.budget_s
+        n = 0
+        while queue:
+            posted_at, func, args = queue.popleft()
+            now = time.perf_counter()
+            if now - posted_at > self.max_latency_s:
+                self.max_latency_s = now - posted_at
+            try:
+                func(*args)
+            except Exception:
+                logger.exception("Bridged call %r failed", func)
+            n += 1
+            if queue and time.perf_counter() > deadline:
+                # Let Tk handle input and redraws, then carry on
+                self.yields += 1
+                if self._resume_job is None and not self._closed:
+                    self._resume_job = self.widget.after_idle(self._drain)
+                break
+        if n:
+            self.calls += n
+            self.drains += 1
+            if n > self.max_batch:
+                self.max_batch = n
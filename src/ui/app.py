@@ -6,10 +6,24 @@ manages frame navigation, and wires up the ProcessManager.
 import tkinter as tk
 from tkinter import ttk
 import logging
-
-from src.config import IS_FULLSCREEN, SHOW_CURSOR, SCREEN_WIDTH, SCREEN_HEIGHT, get_gpio
-from src.ui.theme import apply_theme, Colors
-from src.ui.widgets import TopBar, BottomNavBar
+import signal
+import time
+
+from src.config import (
+    IS_FULLSCREEN, SHOW_CURSOR, SCREEN_WIDTH, SCREEN_HEIGHT,
+    STATE_SERVER_HOST, STATE_SERVER_PORT, get_gpio,
+    UNIT_ID, TELEMETRY_DIR, TELEMETRY_FLUSH_S, get_telemetry_transport,
+    ENV_FILE, SCHEDULE_FILE, CONTROL_DAEMON, CONTROL_SOCKET, CONTROL_SERVER,
+    WATCHDOG_ENABLED, STALL_DETECT, STALL_THRESHOLD_MS,
+    PROFILE_DIR, PROFILE_RATE_HZ, PROFILE_SECONDS, TRACING, TRACE_BUFFER,
+    IDLE_TIMEOUT_S, TAP_TARGET_MS, HEALTH_INTERVAL_S, HEALTH_HOT_C, HEALTH_COOL_C, HEALTH_ROLLUP_S,
+)
+from src.config_watcher import ConfigReloader
+from src.tk_bridge import TkBridge
+from src.ui.idle import IdleManager
+from src.ui.taps import TapLatency
+from src.ui.theme import apply_theme, set_reduced_quality, Colors
+from src.ui.widgets import TopBar, BottomNavBar, CustomDialog
 from src.processes.process_manager import ProcessManager
 
 from src.ui.frames.main_frame import MainFrame
@@ -44,16 +58,40 @@ class App:
         self.root.configure(bg=Colors.BG_DARK)
         self.root.resizable(False, False)
 
-        if not SHOW_CURSOR:
-            self.root.config(cursor="none")
-            # Force cursor hiding on all frames
-            self.root.bind("<Motion>", lambda e: self.root.config(cursor="none"))
+        self._apply_cursor(SHOW_CURSOR)
 
         # ── Theme ────────────────────────────────────────────────────
         self.style = apply_theme(self.root)
 
+        # ── Cross-thread hand-off onto the Tk loop ───────────────────
+        self.bridge = TkBridge(self.root)
+
+        if TRACING:
+            from src.diagnostics import tracing
+            tracing.enable(TRACE_BUFFER)
+
+        # ── Stall detector (instrumentation mode) ────────────────────
+        self.stalls = None
+        if STALL_DETECT:
+            from src.diagnostics.stalls import StallDetector
+            self.stalls = StallDetector(self.root, threshold_ms=STALL_THRESHOLD_MS)
+            self.stalls.start()
+
         # ── GPIO ─────────────────────────────────────────────────────
-        self.gpio = get_gpio()
+        # In daemon mode the relays belong to the control daemon and this
+        # process only drives the screen (see src/control)
+        self.control = None
+        if CONTROL_DAEMON:
+            from src.control.client import ControlClient
+            self.control = ControlClient(self.root, CONTROL_SOCKET, self.bridge)
+            self.gpio = self.control.gpio
+        else:
+            self.gpio = get_gpio()
+
+        # ── Screen blanking (display tickers register with it) ───────
+        self.idle = IdleManager(self.root, IDLE_TIMEOUT_S)
+        # Tap → relay → redraw timing, filled in by the frames' ToggleTaps
+        self.tap_latency = TapLatency(TAP_TARGET_MS)
 
         # ── Layout: topbar + content + navbar ────────────────────────
         self.root.rowconfigure(1, weight=1)
@@ -62,6 +100,9 @@ class App:
         # Top bar
         self.topbar = TopBar(self.root)
         self.topbar.grid(row=0, column=0, sticky="ew")
+        self.idle.register(self.topbar)
+        self.profiler = None
+        self.topbar.on_title_hold(self._toggle_profiler)
 
         # Content area (frames stack here)
         self._content = ttk.Frame(self.root, style="TFrame")
@@ -84,7 +125,89 @@ class App:
         self._create_frames()
 
         # ── Process Manager ──────────────────────────────────────────
-        self.process_manager = ProcessManager(self.gpio, self.root)
+        if self.control:
+            self.process_manager = self.control.process_manager
+        else:
+            self.process_manager = ProcessManager(self.gpio, self.root, bridge=self.bridge)
+        self._ui_sub = None     # event subscription of the frame driving a process
+
+        # ── Remote state stream (optional, with the plant) ───────────
+        self.state_server = None
+        if STATE_SERVER_PORT and not self.control:
+            from src.remote.state_server import StateStreamServer
+            self.state_server = StateStreamServer(STATE_SERVER_HOST, STATE_SERVER_PORT)
+            self.state_server.start()
+            self.state_server.attach(self.process_manager)
+
+        # ── Telemetry uplink (optional) ──────────────────────────────
+        self.telemetry = None
+        collector = None
+        transport = None if self.control else get_telemetry_transport()
+        if transport is not None:
+            from src.telemetry.outbox import Outbox
+            from src.telemetry.uplink import TelemetryCollector, TelemetryUplink
+            outbox = Outbox(TELEMETRY_DIR, flush_interval_s=TELEMETRY_FLUSH_S)
+            self.telemetry = TelemetryUplink(
+                outbox, transport, topic=f"uf/{UNIT_ID}/telemetry"
+            )
+            collector = TelemetryCollector(outbox, on_due=self.telemetry.wake)
+            collector.attach(self.process_manager)
+            if self.stalls:
+                self.stalls.on_stall = lambda site, ms: collector.record(
+                    "stall", s=site, ms=round(ms)
+                )
+            self.telemetry.start()
+
+        # ── Controller health: status line, reduced graphics when hot ─
+        self.health = None
+        if HEALTH_INTERVAL_S > 0:
+            from src.diagnostics.health import HealthSampler
+            # Sampled off the Tk thread; results come back through the
+            # bridge, whose drain budget keeps them behind the scheduler
+            self.health = HealthSampler(
+                HEALTH_INTERVAL_S, HEALTH_HOT_C, HEALTH_COOL_C,
+                on_sample=lambda s: self.bridge.post(self._on_health, s),
+                on_pressure=lambda p: self.bridge.post(set_reduced_quality, self.root, p),
+                on_rollup=collector.record_rollups if collector else None,
+                rollup_samples=max(1, round(HEALTH_ROLLUP_S / HEALTH_INTERVAL_S)),
+            )
+            self.health.start()
+
+        # ── Hot reload of timings.json / .env ────────────────────────
+        self.process_manager.events.subscribe(
+            lambda event, data: self._on_timings_changed(set(data["changed"])),
+            "timings_changed", name="ui.timings",
+        )
+        self.reloader = ConfigReloader(
+            self.root, None if self.control else self.process_manager, ENV_FILE,
+            on_env_change=self._on_env_change,
+        )
+        self.reloader.start()
+
+        # ── Cycle calendar (optional) ────────────────────────────────
+        self.scheduler = None
+        if SCHEDULE_FILE.exists() and not self.control:
+            from src.scheduler.cycle_calendar import CycleScheduler
+            self.scheduler = CycleScheduler(
+                self.root, self.process_manager, SCHEDULE_FILE,
+                start_cycle=self.start_auto_cycle,
+            )
+            self.scheduler.start()
+
+        # ── Hardware watchdog (owner of the relays only) ─────────────
+        self.watchdog = None
+        if WATCHDOG_ENABLED and not self.control:
+            from src.safety.watchdog import Watchdog
+            self.watchdog = Watchdog.from_config(
+                self.root, self.gpio, self.bridge,
+                on_recover=self.process_manager.stop_immediately,
+            )
+            self.watchdog.start()
+
+        # ── Control socket (ultra-filt ctl) ──────────────────────────
+        self.control_server = None
+        if CONTROL_SERVER and not self.control:
+            self._start_control_server()
 
         # ── Watermark ────────────────────────────────────────────────
         # Increased font size to 12
@@ -100,9 +223,53 @@ class App:
         self.watermark.place(relx=1.0, rely=1.0, x=-10, y=-10, anchor="se")
 
         # ── Show home ────────────────────────────────────────────────
+        self.idle.start()
         self.show_frame("main")
+        if self.process_manager.auto_cycle:
+            self._show_auto_cycle()     # restarted while the daemon runs a cycle
         logger.info("App initialized successfully")
 
+    def _start_control_server(self):
+        from src.control.commands import PlantCommands
+        from src.control.server import CommandServer
+        commands = PlantCommands(self.process_manager, start_cycle=self.start_auto_cycle)
+        commands.stalls = self.stalls
+        server = CommandServer(self.root, CONTROL_SOCKET, commands.table())
+        try:
+            server.start()
+        except (OSError, RuntimeError) as e:
+            logger.error("Control socket unavailable: %s", e)
+            return
+        commands.attach(server)
+        self.control_server = server
+
+    def _on_health(self, sample: dict):
+        if not self.idle.blanked:
+            self.frames["info"].show_health(sample, self.health.pressure)
+
+    def _toggle_profiler(self):
+        """Hidden gesture: start a profile, or end the one running and save it."""
+        from src.diagnostics.profiler import SamplingProfiler
+        if self.profiler and self.profiler.running:
+            self.profiler.stop()
+            self._save_profile(self.profiler)
+            return
+        self.profiler = SamplingProfiler(PROFILE_RATE_HZ)
+        self.profiler.start(
+            PROFILE_SECONDS,
+            on_done=lambda p: self.bridge.post(self._save_profile, p),
+        )
+        CustomDialog(self.root, "Profiler",
+                     f"Profiling for {PROFILE_SECONDS:g} s.\n"
+                     "Hold the title again to stop early.")
+
+    def _save_profile(self, profiler):
+        path = profiler.save(PROFILE_DIR / time.strftime("profile-%Y%m%d-%H%M%S.speedscope.json"))
+        logger.info("Profile saved to %s", path)
+        stats = profiler.stats()
+        CustomDialog(self.root, "Profiler",
+                     f"{stats['samples']} samples saved to\n{path}")
+
     def _create_frames(self):
         frame_classes = {
             "main":          MainFrame,
@@ -118,6 +285,28 @@ class App:
             frame.grid(row=0, column=0, sticky="nsew")
             self.frames[name] = frame
 
+    def _apply_cursor(self, show: bool):
+        if show:
+            self.root.config(cursor="")
+            self.root.unbind("<Motion>")
+        else:
+            self.root.config(cursor="none")
+            # Force cursor hiding on all frames
+            self.root.bind("<Motion>", lambda e: self.root.config(cursor="none"))
+
+    def _on_timings_changed(self, changed: set):
+        """Refresh only the frames that display the reloaded timings."""
+        for frame in self.frames.values():
+            if hasattr(frame, "on_timings_changed"):
+                frame.on_timings_changed(changed)
+
+    def _on_env_change(self, applied: dict):
+        import src.config as config
+        if "UF_SHOW_CURSOR" in applied:
+            self._apply_cursor(config.SHOW_CURSOR)
+        if "UF_TELEMETRY_FLUSH_S" in applied and self.telemetry:
+            self.telemetry.outbox.flush_interval_s = config.TELEMETRY_FLUSH_S
+
     def show_frame(self, name: str):
         """Raise a frame to the top and call its on_show hook."""
         frame = self.frames[name]
@@ -158,23 +347,83 @@ class App:
             self.show_frame(target)
 
     def start_auto_cycle(self):
-        """Launch the automatic filtration cycle."""
-        auto_frame = self.frames["auto"]
+        """Launch the automatic filtration cycle; its screen shows once it has started."""
+        self._bind_auto_cycle()
+        self.process_manager.start_auto_cycle()
+
+    def _show_auto_cycle(self):
         self.show_frame("auto")
+        self._bind_auto_cycle()
 
-        # Wire auto frame as callback receiver
-        self.process_manager.on_process_start = auto_frame.on_process_start
-        self.process_manager.on_pump_start = auto_frame.on_pump_start
-        self.process_manager.on_process_end = auto_frame.on_process_end
-        self.process_manager.on_valve_change = auto_frame.on_valve_change
+    def _bind_auto_cycle(self):
+        auto_frame = self.frames["auto"]
 
-        self.process_manager.start_auto_cycle()
+        def started(d):
+            # Switch only now, so a refused start leaves the screen as it was
+            if self._current_frame != "auto":
+                self.show_frame("auto")
+            auto_frame.on_process_start(d["name"], d["duration_ms"])
+
+        # Route process events to the auto frame
+        self.bind_process_ui({
+            "process_start": started,
+            "pump_start":    lambda d: auto_frame.on_pump_start(d["name"], d["countdown_ms"]),
+            "process_end":   lambda d: auto_frame.on_process_end(d["name"]),
+            "start_refused": lambda d: self._on_start_refused(d["reason"]),
+        })
+
+    def _on_start_refused(self, reason: str):
+        self._ui_sub.cancel()
+        self._ui_sub = None
+        CustomDialog(self.root, "Not Started", f"The auto cycle did not start:\n{reason}",
+                     dialog_type="warning")
+
+    def bind_process_ui(self, handlers: dict):
+        """
+        Send ProcessManager events to the frame now driving a process, as
+        {event: handler(data)}. Replaces the previous frame's handlers;
+        telemetry, the state server and other subscribers are unaffected.
+        """
+        if self._ui_sub:
+            self._ui_sub.cancel()
+        self._ui_sub = self.process_manager.events.subscribe(
+            lambda event, data: handlers[event](data), list(handlers),
+            priority=10, name="ui",
+        )
 
     def run(self):
         """Start the Tkinter event loop."""
+        # SIGTERM (systemd stop) leaves through the finally below
+        self.bridge.post_on_signal([signal.SIGTERM], self.root.quit)
         try:
             self.root.mainloop()
         except KeyboardInterrupt:
             logger.info("KeyboardInterrupt — shutting down")
         finally:
-            self.gpio.shutdown()
+            self.reloader.stop()
+            if self.control_server:
+                self.control_server.stop()
+            if self.scheduler:
+                self.scheduler.stop()
+            self.process_manager.events.close()
+            if self.state_server:
+                self.state_server.stop()
+            if self.telemetry:
+                self.telemetry.stop()
+            if self.control:
+                self.control.close()    # the daemon keeps the plant running
+            else:
+                self.process_manager.settings.flush()
+                self.gpio.shutdown()
+            if self.watchdog:
+                self.watchdog.stop()
+            if self.stalls:
+                self.stalls.stop()
+                logger.info("Loop stalls:\n%s", self.stalls.report())
+            self.idle.stop()
+            logger.info("Tap latency: %s", self.tap_latency.report())
+            if self.health:
+                self.health.stop()
+            if self.profiler:
+                self.profiler.stop()
+            self.bridge.close()
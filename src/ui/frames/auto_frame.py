@@ -4,11 +4,13 @@ Countdown starts when pump engages, ends when valves close.
 Between processes the bar fills back up.
 """
 
+import time
 import tkinter as tk
 from tkinter import ttk
 
 from src.config import VALVE_LABELS
-from src.ui.theme import Colors, Fonts
+from src.ui.theme import Colors, Fonts, Render
+from src.ui.widgets import ChannelStateView
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -53,7 +55,7 @@ class IndicatorCard(tk.Canvas):
             x1+r,y2, x1,y2, x1,y2-r,
             x1,y1+r, x1,y1, x1+r,y1,
         ]
-        return self.create_polygon(pts, smooth=True, **kw)
+        return self.create_polygon(pts, smooth=Render.SMOOTH, **kw)
 
     def set_state(self, is_on: bool):
         if is_on:
@@ -68,7 +70,11 @@ class IndicatorCard(tk.Canvas):
 #  Rounded Progress Bar (full → empty countdown  /  empty → full refill)
 # ─────────────────────────────────────────────────────────────────────────────
 class RoundedProgressBar(tk.Canvas):
-    """Rounded progress bar with countdown and refill modes."""
+    """
+    Rounded progress bar with countdown and refill modes. Progress is read
+    from the clock on every tick, so suspend() (screen blanked) can stop the
+    ticks outright and resume() redraws the right position at once.
+    """
 
     BAR_H = 26
     RADIUS = 13
@@ -83,8 +89,10 @@ class RoundedProgressBar(tk.Canvas):
         self._y = 5
         self._total = 0
         self._remaining = 0
+        self._started = 0.0
         self._job_id = None
         self._mode = "idle"  # "countdown", "refill", "idle"
+        self._suspended = False
 
         # Track
         self._track = self._round_rect(
@@ -113,7 +121,7 @@ class RoundedProgressBar(tk.Canvas):
             x1+r,y2, x1,y2, x1,y2-r,
             x1,y1+r, x1,y1, x1+r,y1,
         ]
-        return self.create_polygon(pts, smooth=True, **kw)
+        return self.create_polygon(pts, smooth=Render.SMOOTH, **kw)
 
     # ── Countdown: full → empty ──────────────────────────────────────
     def start_countdown(self, total_seconds: int):
@@ -121,12 +129,14 @@ class RoundedProgressBar(tk.Canvas):
         self.cancel()
         self._mode = "countdown"
         self._total = total_seconds
-        self._remaining = total_seconds
-        self._tick_countdown()
+        self._started = time.monotonic()
+        if not self._suspended:
+            self._tick_countdown()
 
     def _tick_countdown(self):
         if self._total <= 0:
             return
+        self._remaining = max(0, self._total - self._elapsed())
 
         fraction = max(0, self._remaining / self._total)
         fill_w = max(self.RADIUS * 2, self._bar_width * fraction)
@@ -147,8 +157,7 @@ class RoundedProgressBar(tk.Canvas):
             self._mode = "idle"
             return
 
-        self._remaining -= 1
-        self._job_id = self.after(1000, self._tick_countdown)
+        self._job_id = self.after(self._ms_to_next_tick(), self._tick_countdown)
 
     def _countdown_color(self, fraction: float) -> str:
         if fraction > 0.5:
@@ -164,13 +173,15 @@ class RoundedProgressBar(tk.Canvas):
         self.cancel()
         self._mode = "refill"
         self._total = duration_seconds
-        self._remaining = 0  # starts empty
+        self._started = time.monotonic()    # starts empty
         self._refill_label = label
-        self._tick_refill()
+        if not self._suspended:
+            self._tick_refill()
 
     def _tick_refill(self):
         if self._total <= 0:
             return
+        self._remaining = min(self._total, self._elapsed())
 
         fraction = min(1.0, self._remaining / self._total)
         fill_w = max(self.RADIUS * 2, self._bar_width * fraction)
@@ -184,10 +195,29 @@ class RoundedProgressBar(tk.Canvas):
             self._mode = "idle"
             return
 
-        self._remaining += 1
-        self._job_id = self.after(1000, self._tick_refill)
+        self._job_id = self.after(self._ms_to_next_tick(), self._tick_refill)
+
+    # ── Screen blanking ──────────────────────────────────────────────
+    def suspend(self):
+        self._suspended = True
+        self.cancel()
+
+    def resume(self):
+        self._suspended = False
+        if self._mode == "countdown":
+            self._tick_countdown()
+        elif self._mode == "refill":
+            self._tick_refill()
 
     # ── Helpers ──────────────────────────────────────────────────────
+    def _elapsed(self) -> int:
+        return int(time.monotonic() - self._started)
+
+    def _ms_to_next_tick(self) -> int:
+        # Render.TICK_S grows under thermal pressure: fewer, coarser steps
+        step = Render.TICK_S
+        return max(1, int((step - (time.monotonic() - self._started) % step) * 1000))
+
     def _redraw_fill(self, fill_w: float, color: str):
         self.delete(self._fill)
         self._fill = self._round_rect(
@@ -247,10 +277,15 @@ class AutoFrame(ttk.Frame):
             card = IndicatorCard(row2, cid)
             card.pack(side="left", padx=5)
             self._cards[cid] = card
+        # Cards follow the relays through the channel view, which the idle
+        # manager suspends while the screen is blanked
+        self._view = ChannelStateView(self, self.app.gpio.state, self._redraw_card)
+        self.app.idle.register(self._view)
 
         # Rounded progress bar
         self._progress = RoundedProgressBar(self, width=580)
         self._progress.pack(pady=(15, 5))
+        self.app.idle.register(self._progress)
 
         # Info label
         self._time_label = ttk.Label(self, text="", style="Muted.TLabel")
@@ -293,7 +328,7 @@ class AutoFrame(ttk.Frame):
         self._progress.reset()
         self._time_label.config(text="Waiting for next process...")
 
-    def on_valve_change(self, channel_id: int, is_on: bool):
+    def _redraw_card(self, channel_id: int, is_on: bool):
         if channel_id in self._cards:
             self._cards[channel_id].set_state(is_on)
 
@@ -336,8 +371,7 @@ class AutoFrame(ttk.Frame):
         self._process_label.config(
             text="Starting cycle...", foreground=Colors.INFO
         )
-        for card in self._cards.values():
-            card.set_state(False)
+        self._view.sync()
         self._progress.reset()
         self._time_label.config(text="")
 
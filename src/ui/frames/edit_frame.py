@@ -181,10 +181,10 @@ class EditFrame(ttk.Frame):
         self._load_current_timings()
         show_info(self.app.root, "Reset", "Time intervals reset to defaults.")
 
-    def _load_current_timings(self):
+    def _load_current_timings(self, procs=None):
         """Populate fields from current process manager timings."""
         timings = self.app.process_manager.timings
-        for proc in self.PROCESSES:
+        for proc in procs or self.PROCESSES:
             ms = timings.get(proc, 0)
             total_s = ms // 1000
             h = total_s // 3600
@@ -202,6 +202,15 @@ class EditFrame(ttk.Frame):
             self._apply()
         self.app.show_frame("select")
 
+    def on_timings_changed(self, changed: set):
+        """Timings reloaded from disk — update those rows, except one being edited."""
+        if self.app._current_frame != "edit":
+            return  # on_show reloads everything anyway
+        editing = self._active_field[0] if self._active_field else None
+        procs = [p for p in self.PROCESSES if p in changed and p != editing]
+        if procs:
+            self._load_current_timings(procs)
+
     def on_show(self):
         self.app.topbar.set_subtitle("Edit Timings")
         self._active_field = None
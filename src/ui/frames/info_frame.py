@@ -13,6 +13,9 @@ import xml.etree.ElementTree as ET
 
 import logging
 
+from src.diagnostics.health import describe_throttled
+from src.ui.theme import Colors, Render
+
 logger = logging.getLogger("UltraFiltration.Info")
 
 def _find_project_root():
@@ -221,9 +224,9 @@ class SvgViewerCanvas(tk.Canvas):
                     coords.extend([sx(nums[i]), sy(nums[i + 1])])
                 if len(coords) >= 4:
                     if fill:
-                        self.create_polygon(coords, fill=fill, outline="", width=0, smooth=True)
+                        self.create_polygon(coords, fill=fill, outline="", width=0, smooth=Render.SMOOTH)
                     if stroke:
-                        self.create_line(coords, fill=stroke, width=max(1, ss(sw)), smooth=True)
+                        self.create_line(coords, fill=stroke, width=max(1, ss(sw)), smooth=Render.SMOOTH)
 
             for child in node:
                 draw(child, tx, ty)
@@ -247,14 +250,28 @@ class SvgViewerCanvas(tk.Canvas):
 
 
 class InfoFrame(ttk.Frame):
-    """Full-screen system diagram with branding in the corner."""
+    """Full-screen system diagram with branding in the corner, and a controller health line."""
 
     def __init__(self, parent, app):
         super().__init__(parent, style="TFrame")
         self.app = app
+        self._health = ttk.Label(self, text="", style="Muted.TLabel")
+        self._health.pack(side="bottom", fill="x", padx=10, pady=(2, 4))
         self._viewer = SvgViewerCanvas(self)
         self._viewer.pack(fill="both", expand=True)
 
+    def show_health(self, sample: dict, pressure: bool):
+        """Latest HealthSampler reading (Tk thread)."""
+        def fmt(value, unit):
+            return "—" if value is None else f"{value:.0f}{unit}"
+        self._health.config(
+            text=(f"SoC {fmt(sample['soc_temp_c'], ' °C')}   ·   CPU {fmt(sample['cpu_pct'], '%')}"
+                  f"   ·   Memory {fmt(sample['mem_pct'], '%')}"
+                  f"   ·   Throttled: {describe_throttled(sample['throttled'])}"
+                  + ("   ·   reduced graphics" if pressure else "")),
+            foreground=Colors.WARNING if pressure else Colors.TEXT_MUTED,
+        )
+
     def on_show(self):
         self.app.topbar.set_subtitle("System Info")
         # Ensure dimensions are updated before rendering
@@ -1,14 +1,16 @@
 """
 manual_frame.py — Direct valve toggle with touch-friendly card controls.
-Each card is the button — tap anywhere on it to toggle.
+Each card is the button — tap anywhere on it to toggle. Taps go through
+ToggleTaps, so a double tap or a backlog of taps toggles the relay once.
 """
 
 import tkinter as tk
 from tkinter import ttk
 
-from src.config import VALVE_LABELS
-from src.ui.theme import Colors, Fonts
-from src.ui.widgets import LEDIndicator
+from src.config import VALVE_LABELS, TAP_DEBOUNCE_MS
+from src.ui.taps import ToggleTaps
+from src.ui.theme import Colors, Fonts, Render
+from src.ui.widgets import ChannelStateView, LEDIndicator
 
 
 class ValveCard(tk.Canvas):
@@ -61,7 +63,7 @@ class ValveCard(tk.Canvas):
         )
 
         # Make clickable
-        self.bind("<Button-1>", lambda e: self._on_toggle(self._cid))
+        self.bind("<Button-1>", lambda e: self._on_toggle(self._cid, e))
         self.config(cursor="hand2")
 
     def _rounded_rect(self, x1, y1, x2, y2, r, **kwargs):
@@ -77,7 +79,7 @@ class ValveCard(tk.Canvas):
             x1, y1 + r,
             x1, y1, x1 + r, y1,
         ]
-        return self.create_polygon(points, smooth=True, **kwargs)
+        return self.create_polygon(points, smooth=Render.SMOOTH, **kwargs)
 
     def set_state(self, is_on: bool):
         self._is_on = is_on
@@ -101,7 +103,10 @@ class ManualFrame(ttk.Frame):
         self.app = app
         self._cards: dict[int, ValveCard] = {}
         self._locked = False
+        self._taps = ToggleTaps(self, self._toggle, TAP_DEBOUNCE_MS, latency=app.tap_latency)
         self._build()
+        self._view = ChannelStateView(self, app.gpio.state, self._redraw)
+        app.idle.register(self._view)
 
     def _build(self):
         # Title
@@ -122,7 +127,7 @@ class ManualFrame(ttk.Frame):
         row1 = ttk.Frame(grid_frame, style="TFrame")
         row1.pack(pady=8)
         for cid in [1, 2, 3, 4]:
-            card = ValveCard(row1, cid, self._toggle)
+            card = ValveCard(row1, cid, self._taps.tap)
             card.pack(side="left", padx=6)
             self._cards[cid] = card
 
@@ -130,7 +135,7 @@ class ManualFrame(ttk.Frame):
         row2 = ttk.Frame(grid_frame, style="TFrame")
         row2.pack(pady=8)
         for cid in [5, 6, 7]:
-            card = ValveCard(row2, cid, self._toggle)
+            card = ValveCard(row2, cid, self._taps.tap)
             card.pack(side="left", padx=6)
             self._cards[cid] = card
 
@@ -142,20 +147,48 @@ class ManualFrame(ttk.Frame):
         self._countdown_label.pack(pady=(5, 5))
         self._countdown_job = None
 
+    def _redraw(self, channel_id: int, is_on: bool):
+        card = self._cards[channel_id]
+        card.set_state(is_on)
+        self.app.tap_latency.drawn(card, channel_id)
+
     def _toggle(self, channel_id: int):
         if self._locked:
+            self.app.tap_latency.cancel(channel_id)
             return
-        is_on = self.app.gpio.toggle(channel_id)
-        self._cards[channel_id].set_state(is_on)
+        gpio = self.app.gpio
+        wanted = not gpio.is_on(channel_id)
+
+        def done(on: bool):
+            # Cards follow the channel state view; only refusals need handling here
+            if on != wanted:
+                self._show_refusal(channel_id, wanted)
+
+        if self.app.control:
+            gpio.toggle(channel_id, on_done=done)     # the daemon answers later
+        else:
+            gpio.toggle(channel_id)
+            done(gpio.is_on(channel_id))
+
+    def _show_refusal(self, channel_id: int, wanted: bool):
+        gpio = self.app.gpio
+        engine = getattr(gpio, "engine", None)
+        reason = engine.describe(gpio.last_reason) if engine else ""
+        if wanted:
+            text = f"{VALVE_LABELS[channel_id]} blocked — {reason}"
+        else:
+            text = f"{VALVE_LABELS[channel_id]} closes once its pump is off"
+        self._countdown_label.config(text=text, foreground=Colors.TRANSITION)
+        self.app.tap_latency.drawn(self._countdown_label, channel_id)
+        self.after(3000, lambda: self._locked or self._countdown_label.config(text=""))
 
     def go_back(self):
         """Safely close all valves with countdown, then navigate back."""
         self._locked = True
+        self._taps.cancel()
         # Turn off pumps first
         self.app.gpio.turn_off(6)
         self.app.gpio.turn_off(7)
-        self._cards[6].set_state(False)
-        self._cards[7].set_state(False)
 
         self._run_countdown(5)
 
@@ -163,7 +196,6 @@ class ManualFrame(ttk.Frame):
         if remaining <= 0:
             for cid in [1, 2, 3, 4, 5]:
                 self.app.gpio.turn_off(cid)
-                self._cards[cid].set_state(False)
             self._countdown_label.config(text="")
             self._locked = False
             self.app.show_frame("main")
@@ -176,6 +208,4 @@ class ManualFrame(ttk.Frame):
 
     def on_show(self):
         self.app.topbar.set_subtitle("Manual Control")
-        # Sync card states with actual GPIO
-        for cid in self._cards:
-            self._cards[cid].set_state(self.app.gpio.is_on(cid))
+        self._view.sync()
@@ -5,8 +5,8 @@ manual_steps_frame.py — Run individual processes with compact rounded cards.
 import tkinter as tk
 from tkinter import ttk
 
-from src.ui.theme import Colors, Fonts
-from src.ui.widgets import LEDIndicator, show_info, show_warning
+from src.ui.theme import Colors, Fonts, Render
+from src.ui.widgets import ChannelStateView, LEDIndicator, show_info, show_warning
 from src.config import VALVE_LABELS
 
 
@@ -60,7 +60,7 @@ class ProcessCard(tk.Canvas):
             x1+r,y2, x1,y2, x1,y2-r,
             x1,y1+r, x1,y1, x1+r,y1,
         ]
-        return self.create_polygon(pts, smooth=True, **kw)
+        return self.create_polygon(pts, smooth=Render.SMOOTH, **kw)
 
     def set_idle(self):
         self._state = "idle"
@@ -132,6 +132,10 @@ class ManualStepsFrame(ttk.Frame):
             led = LEDIndicator(right, label_text=VALVE_LABELS[cid], size=14)
             led.pack(anchor="w", pady=1)
             self._leds[cid] = led
+        # LEDs follow the relays through the channel view, suspended by the
+        # idle manager while the screen is blanked
+        self._view = ChannelStateView(self, self.app.gpio.state, self._redraw_led)
+        self.app.idle.register(self._view)
 
     def _toggle_process(self, proc_id: str):
         if self._locked:
@@ -154,10 +158,23 @@ class ManualStepsFrame(ttk.Frame):
         display = proc_id.replace("_", " ").title()
         self._status.config(text=f"Starting: {display}", foreground=Colors.TRANSITION)
 
-        pm = self.app.process_manager
-        pm.on_valve_change = self._on_valve_change
-        pm.on_process_start = self._on_started
-        pm.start_single_process(proc_id)
+        self.app.bind_process_ui({
+            "process_start": lambda d: self._on_started(d["name"], d["duration_ms"]),
+            "start_refused": lambda d: self._on_start_refused(d["what"], d["reason"]),
+        })
+        self.app.process_manager.start_single_process(proc_id)
+
+    def _on_start_refused(self, name: str, reason: str):
+        # Undo _start_process: nothing started, so nothing will unlock the frame
+        if name != self._current:
+            return
+        self._current = None
+        self._locked = False
+        if name in self._cards:
+            self._cards[name].set_idle()
+        display = name.replace("_", " ").title()
+        self._status.config(text=f"{display} not started — {reason}",
+                            foreground=Colors.TRANSITION)
 
     def _on_started(self, name: str, duration_ms: int = 0):
         display = name.replace("_", " ").title()
@@ -204,7 +221,7 @@ class ManualStepsFrame(ttk.Frame):
         self._current = None
         self._locked = False
 
-    def _on_valve_change(self, channel_id: int, is_on: bool):
+    def _redraw_led(self, channel_id: int, is_on: bool):
         if channel_id in self._leds:
             self._leds[channel_id].set_state(is_on)
 
@@ -0,0 +1,168 @@
+"""
+idle.py — Blank the screen when nobody is looking, and stop drawing.
+
+After `timeout_s` without a touch or key press the IdleManager covers the
+window with a black overlay (and, where `xset` exists, powers the panel
+down through DPMS), then suspends every registered display ticker: the
+top-bar clock, progress-bar animations, channel views. The plant keeps
+running; only drawing stops.
+
+A registered object has suspend() and resume(); resume() must redraw from
+the current state at once, so the first frame after a touch is correct.
+The tap that wakes the screen lands on the overlay and does nothing else.
+
+Inactivity is checked by one after() job that sleeps until the earliest
+moment the timeout could expire; input only stores a timestamp.
+"""
+
+import logging
+import shutil
+import subprocess
+import threading
+import time
+import tkinter as tk
+
+logger = logging.getLogger("UltraFiltration.Idle")
+
+
+class BlankScreen:
+    """Black overlay over the root window, plus DPMS power-down when available."""
+
+    def __init__(self, root, dpms: bool = True):
+        self.root = root
+        self.dpms = dpms and shutil.which("xset") is not None
+        self._overlay = tk.Frame(root, bg="#000000", cursor="none")
+
+    def show(self) -> None:
+        self._overlay.place(x=0, y=0, relwidth=1, relheight=1)
+        self._overlay.lift()
+        if self.dpms:
+            self._xset("off")
+
+    def hide(self) -> None:
+        self._overlay.place_forget()
+        if self.dpms:
+            self._xset("on")
+
+    @staticmethod
+    def _xset(state: str) -> None:
+        # Off the Tk thread: a slow X server must not delay the wake-up frame
+        threading.Thread(
+            target=subprocess.run, args=(["xset", "dpms", "force", state],),
+            kwargs={"timeout": 5, "check": False}, daemon=True,
+        ).start()
+
+
+class IdleManager:
+    """
+    Args:
+        root: Tk root (or any widget with after()).
+        timeout_s: Inactivity before blanking; 0 never blanks.
+        screen: Object with show()/hide() (default: BlankScreen on `root`).
+        clock: Monotonic time source.
+    """
+
+    def __init__(self, root, timeout_s: float, screen=None, clock=time.monotonic):
+        self.root = root
+        self.timeout_s = timeout_s
+        self._screen = screen
+        self.clock = clock
+        self._subscribers: list = []
+        self._last_input = clock()
+        self._job = None
+        self.blanked = False
+        self._blanked_at = 0.0
+        # Counters
+        self.blanks = 0
+        self.blanked_s = 0.0
+
+    def register(self, ticker):
+        """Add a display ticker (suspend()/resume()); returns it."""
+        self._subscribers.append(ticker)
+        if self.blanked:
+            ticker.suspend()
+        return ticker
+
+    def unregister(self, ticker) -> None:
+        if ticker in self._subscribers:
+            self._subscribers.remove(ticker)
+
+    def start(self) -> None:
+        if self.timeout_s <= 0:
+            return
+        if self._screen is None:
+            from src.config import IDLE_DPMS
+            self._screen = BlankScreen(self.root, IDLE_DPMS)
+        for sequence in ("<ButtonPress>", "<Motion>", "<KeyPress>"):
+            self.root.bind_all(sequence, self._on_input, add="+")
+        self._last_input = self.clock()
+        self._arm(self.timeout_s)
+
+    def stop(self) -> None:
+        if self._job:
+            self.root.after_cancel(self._job)
+            self._job = None
+        if self.blanked:
+            self.wake()
+
+    def poke(self) -> None:
+        """Count as user activity (input, or anything that should be seen)."""
+        self._last_input = self.clock()
+        if self.blanked:
+            self.wake()
+
+    def blank(self) -> None:
+        if self.blanked:
+            return
+        self.blanked = True
+        self._blanked_at = self.clock()
+        self.blanks += 1
+        self._screen.show()
+        for ticker in self._subscribers:
+            ticker.suspend()
+        logger.info("Screen blanked after %.0f s idle", self._blanked_at - self._last_input)
+
+    def wake(self) -> None:
+        if not self.blanked:
+            return
+        self.blanked = False
+        self.blanked_s += self.clock() - self._blanked_at
+        self._screen.hide()
+        for ticker in self._subscribers:
+            try:
+                ticker.resume()
+            except Exception:
+                logger.exception("Resuming %r failed", ticker)
+        self._arm(self.timeout_s)
+
+    def stats(self) -> dict:
+        blanked_s = self.blanked_s + (self.clock() - self._blanked_at if self.blanked else 0.0)
+        return {"blanked": self.blanked, "blanks": self.blanks, "blanked_s": round(blanked_s)}
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _on_input(self, _event=None) -> None:
+        self.poke()
+
+    def _arm(self, delay_s: float) -> None:
+        if self._job:
+            self.root.after_cancel(self._job)
+        self._job = self.root.after(max(1, int(delay_s * 1000)), self._check)
+
+    def _check(self) -> None:
+        self._job = None
+        if self.blanked:
+            return
+        left = self.timeout_s - (self.clock() - self._last_input)
+        if left > 0:
+            self._arm(left)
+        elif self._modal_open():
+            self._arm(self.timeout_s)       # never hide a question awaiting an answer
+        else:
+            self.blank()
+
+    def _modal_open(self) -> bool:
+        try:
+            return self.root.grab_current() is not None
+        except (AttributeError, tk.TclError):
+            return False
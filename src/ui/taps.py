@@ -0,0 +1,194 @@
+"""
+taps.py — Toggle taps: one relay action per intended tap, and how long it took.
+
+ToggleTaps sits between a card's <Button-1> and the toggle it performs:
+
+  - Debounce: a tap on a channel less than `debounce_ms` after the last one
+    accepted there is dropped. Input timestamps (the X server's, carried by
+    the event) are compared rather than handling times, so two taps that
+    sat queued behind a busy loop are still told apart correctly.
+  - Coalesce: the toggle runs from after_idle(), which Tk only reaches once
+    every queued input event has been dispatched. Taps on a channel that
+    arrive before then merge into the one pending toggle, so a backlog of
+    taps never reaches the relay as a burst.
+
+TapLatency follows each accepted tap to the screen:
+
+    input event ──queue──▶ handler ──▶ relay write ──▶ card redrawn ──▶ painted
+
+"painted" is an idle callback queued after the redraw, so Tk's own redraw
+(also an idle callback, queued first) has run by then. The queueing delay
+before the handler is estimated from the event timestamp: the smallest
+(handler time − event time) seen so far is taken as zero delay.
+"""
+
+import logging
+import time
+from collections import deque
+
+from src.diagnostics import tracing
+
+logger = logging.getLogger("UltraFiltration.Taps")
+
+_WRAP_MS = 1 << 32          # X timestamps are a 32-bit millisecond counter
+
+
+class TapLatency:
+    """
+    Args:
+        target_ms: Touch-to-photon budget; slower taps are counted and logged.
+        keep: How many recent taps the percentiles are taken over.
+        clock: Monotonic time source, seconds.
+    """
+
+    def __init__(self, target_ms: float = 100.0, keep: int = 256, clock=time.perf_counter):
+        self.target_ms = target_ms
+        self.clock = clock
+        self._open: dict[int, list] = {}         # channel → [id, t_handler, queue_ms, t_write]
+        self._recent: deque = deque(maxlen=keep)  # (queue, write, paint, total) ms
+        self._offset_ms: float | None = None
+        self._ids = 0
+        # Counters
+        self.taps = 0
+        self.over_target = 0
+
+    def begin(self, channel: int, event_time: int = 0) -> None:
+        """An accepted tap on `channel`; `event_time` is the X event's timestamp."""
+        now = self.clock()
+        queue_ms = self._queue_ms(now, event_time)
+        self._ids += 1
+        self._open[channel] = [self._ids, now, queue_ms, None]
+        if tracing.enabled:
+            tracing.begin("ui.tap", "input", channel=channel, queue_ms=round(queue_ms, 1))
+            tracing.flow_start("tap", self._ids, "input")
+            tracing.end()
+
+    def written(self, channel: int) -> None:
+        """The relay for `channel` has been written (or refused)."""
+        tap = self._open.get(channel)
+        if tap is not None and tap[3] is None:
+            tap[3] = self.clock()
+
+    def drawn(self, widget, channel: int) -> None:
+        """`widget` now shows the outcome; the tap completes once it has painted."""
+        tap = self._open.pop(channel, None)
+        if tap is not None and tap[3] is not None:
+            widget.after_idle(self._painted, channel, tap)
+
+    def cancel(self, channel: int) -> None:
+        self._open.pop(channel, None)
+
+    def stats(self) -> dict:
+        totals = sorted(r[3] for r in self._recent)
+
+        def pct(p):
+            return round(totals[min(len(totals) - 1, int(p * len(totals)))], 1) if totals else None
+
+        return {
+            "taps": self.taps, "over_target": self.over_target, "target_ms": self.target_ms,
+            "p50_ms": pct(0.5), "p95_ms": pct(0.95),
+            "max_ms": round(totals[-1], 1) if totals else None,
+        }
+
+    def report(self) -> str:
+        s = self.stats()
+        if not s["taps"]:
+            return "no taps"
+        return (f"{s['taps']} taps  p50 {s['p50_ms']} ms  p95 {s['p95_ms']} ms  "
+                f"max {s['max_ms']} ms  ({s['over_target']} over {s['target_ms']:g} ms)")
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _queue_ms(self, now: float, event_time: int) -> float:
+        if not event_time:
+            return 0.0                      # synthetic event: no input timestamp
+        offset = (now * 1000 - event_time) % _WRAP_MS
+        if self._offset_ms is None or offset < self._offset_ms or \
+                offset - self._offset_ms > 60_000:      # first tap, or the counter wrapped
+            self._offset_ms = offset
+        return offset - self._offset_ms
+
+    def _painted(self, channel: int, tap: list) -> None:
+        tap_id, t_handler, queue_ms, t_write = tap
+        now = self.clock()
+        write_ms = (t_write - t_handler) * 1000
+        paint_ms = (now - t_write) * 1000
+        total_ms = queue_ms + (now - t_handler) * 1000
+        self._recent.append((queue_ms, write_ms, paint_ms, total_ms))
+        self.taps += 1
+        if total_ms > self.target_ms:
+            self.over_target += 1
+            logger.info("Slow tap on channel %d: %.0f ms (queued %.0f, write %.0f, paint %.0f)",
+                        channel, total_ms, queue_ms, write_ms, paint_ms)
+        if tracing.enabled:
+            tracing.begin("ui.painted", "ui", channel=channel, total_ms=round(total_ms, 1))
+            tracing.flow_end("tap", tap_id, "input")
+            tracing.end()
+
+
+class ToggleTaps:
+    """
+    Args:
+        widget: Any Tk widget, used for after_idle().
+        on_toggle: Called as on_toggle(channel) once per accepted tap batch.
+        debounce_ms: Minimum input-time gap between two taps on one channel.
+        latency: Optional TapLatency to report accepted taps to.
+        clock: Monotonic time source for events without a timestamp.
+    """
+
+    def __init__(self, widget, on_toggle, debounce_ms: float = 250,
+                 latency: TapLatency | None = None, clock=time.monotonic):
+        self.widget = widget
+        self.on_toggle = on_toggle
+        self.debounce_ms = debounce_ms
+        self.latency = latency
+        self.clock = clock
+        self._last: dict[int, int] = {}          # channel → input time of last accepted tap
+        self._pending: list[int] = []
+        self._job = None
+        # Counters
+        self.debounced = 0
+        self.coalesced = 0
+
+    def tap(self, channel: int, event=None) -> None:
+        """Bind target: a tap on `channel` (pass the Tk event when there is one)."""
+        event_time = getattr(event, "time", 0) or 0
+        t = event_time or int(self.clock() * 1000)
+        last = self._last.get(channel)
+        if last is not None and (t - last) % _WRAP_MS < self.debounce_ms:
+            self.debounced += 1
+            return
+        self._last[channel] = t
+        if channel in self._pending:
+            self.coalesced += 1
+            return
+        self._pending.append(channel)
+        if self.latency:
+            self.latency.begin(channel, event_time)
+        if self._job is None:
+            self._job = self.widget.after_idle(self._flush)
+
+    def cancel(self) -> None:
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        if self.latency:
+            for channel in self._pending:
+                self.latency.cancel(channel)
+        self._pending.clear()
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _flush(self) -> None:
+        self._job = None
+        pending, self._pending = self._pending, []
+        for channel in pending:
+            if tracing.enabled:
+                tracing.begin("ui.toggle", "input", channel=channel)
+            try:
+                self.on_toggle(channel)
+            finally:
+                if tracing.enabled:
+                    tracing.end()
+            if self.latency:
+                self.latency.written(channel)
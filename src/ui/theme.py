@@ -56,6 +56,34 @@ class Fonts:
     COUNTDOWN   = ("Consolas", 24, "bold")
 
 
+# ── Render Quality ───────────────────────────────────────────────────────────
+class Render:
+    """Drawing knobs, lowered under thermal pressure (see set_reduced_quality)."""
+    SMOOTH      = True      # canvas smooth= (spline curves) on polygons and lines
+    TICK_S      = 1         # progress-bar animation step, seconds
+
+
+def set_reduced_quality(root: tk.Misc, reduced: bool) -> None:
+    """
+    Switch drawing quality for everything drawn from now on, and drop or
+    restore Tk's spline smoothing (the canvas `smooth` option) on the
+    polygons and lines already on screen. Reduced, rounded shapes become
+    straight segments through their points, so Tk stops re-splining them
+    on every redraw; edge antialiasing is not touched. The progress-bar
+    tick also slows from 1 s to 5 s.
+    """
+    Render.SMOOTH = not reduced
+    Render.TICK_S = 5 if reduced else 1
+    widgets = [root]
+    while widgets:
+        w = widgets.pop()
+        widgets.extend(w.winfo_children())
+        if isinstance(w, tk.Canvas):
+            for item in w.find_all():
+                if w.type(item) in ("polygon", "line"):
+                    w.itemconfigure(item, smooth=Render.SMOOTH)
+
+
 # ── Theme Application ────────────────────────────────────────────────────────
 def apply_theme(root: tk.Tk) -> ttk.Style:
     """Apply the dark industrial theme to the entire application."""
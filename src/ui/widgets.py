@@ -5,6 +5,8 @@ widgets.py — Reusable styled widgets for the UltraFiltration UI.
 import tkinter as tk
 from tkinter import ttk
 from time import strftime
+from src.diagnostics import tracing
+from src.hardware.channel_state import channels_in
 from src.ui.theme import Colors, Fonts
 
 
@@ -68,6 +70,67 @@ class LEDIndicator(tk.Canvas):
         self.itemconfig(self._highlight, fill="#ffcc66")
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+#  Channel State View (batched redraws from the shared ChannelState)
+# ─────────────────────────────────────────────────────────────────────────────
+class ChannelStateView:
+    """
+    Keeps a set of per-channel widgets in step with a ChannelState.
+    Changes are collected and drawn once per Tk idle cycle, and only for
+    channels whose drawn state differs from the current mask — a burst like
+    an emergency stop costs one pass instead of one redraw per relay.
+    """
+
+    def __init__(self, widget, state, redraw):
+        """
+        Args:
+            widget: Any Tk widget, used for after_idle().
+            state: The GPIO backend's ChannelState.
+            redraw: Called as redraw(channel_id, is_on) for each changed channel.
+        """
+        self.widget = widget
+        self.state = state
+        self.redraw = redraw
+        self._drawn = 0
+        self._job = None
+        self._suspended = False
+        state.subscribe(self._on_change)
+        self.sync()
+
+    def suspend(self) -> None:
+        """Stop redrawing (screen blanked); changes are caught up on resume()."""
+        self._suspended = True
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    def resume(self) -> None:
+        self._suspended = False
+        self._flush()
+
+    def sync(self) -> None:
+        """Redraw every channel now (e.g. when the frame is shown)."""
+        mask = self.state.mask
+        for cid in channels_in((1 << 7) - 1):
+            self.redraw(cid, bool(mask >> (cid - 1) & 1))
+        self._drawn = mask
+
+    def _on_change(self, _old: int, _new: int, _version: int) -> None:
+        if self._job is None and not self._suspended:
+            self._job = self.widget.after_idle(self._flush)
+
+    def _flush(self) -> None:
+        if tracing.enabled:
+            tracing.begin("ui.channel_view", "ui")
+        self._job = None
+        mask = self.state.mask
+        for cid in channels_in(mask ^ self._drawn):
+            self.redraw(cid, bool(mask >> (cid - 1) & 1))
+        self._drawn = mask
+        if tracing.enabled:
+            tracing.end()
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 #  Top Bar (shared clock + title across all frames)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -102,14 +165,47 @@ class TopBar(ttk.Frame):
         self._clock = ttk.Label(self, style="Clock.TLabel")
         self._clock.pack(side="right", padx=15, pady=8)
 
+        self._job = None
         self._tick()
 
     def set_subtitle(self, text: str) -> None:
         self._subtitle.config(text=text)
 
+    def on_title_hold(self, callback, hold_ms: int = 3000) -> None:
+        """Call `callback` when the title is held down for `hold_ms` (hidden service gesture)."""
+        job = None
+
+        def press(_e):
+            nonlocal job
+            job = self.after(hold_ms, fire)
+
+        def release(_e):
+            nonlocal job
+            if job:
+                self.after_cancel(job)
+                job = None
+
+        def fire():
+            nonlocal job
+            job = None
+            callback()
+
+        self._title_label.bind("<ButtonPress-1>", press)
+        self._title_label.bind("<ButtonRelease-1>", release)
+
+    def suspend(self) -> None:
+        """Stop the clock (screen blanked)."""
+        if self._job:
+            self.after_cancel(self._job)
+            self._job = None
+
+    def resume(self) -> None:
+        if self._job is None:
+            self._tick()
+
     def _tick(self) -> None:
         self._clock.config(text=strftime("%I:%M:%S %p   %d/%m/%Y"))
-        self.after(1000, self._tick)
+        self._job = self.after(1000, self._tick)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
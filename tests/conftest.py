@@ -0,0 +1,67 @@
+"""
+Shared test harness: a ProcessManager on a VirtualScheduler (no Tk, no
+display) with a GPIO double that records every relay transition against
+the virtual clock.
+"""
+
+import os
+
+# Before src.config is imported: quiet logs, no log files under the repo
+os.environ.setdefault("UF_LOG_LEVEL", "WARNING")
+os.environ.setdefault("UF_LOG_DIR", "")
+
+import pytest
+
+from src.hardware.channel_state import channels_in
+from src.hardware.mock_gpio import MockGPIO
+from src.processes.process_manager import ProcessManager
+from src.processes.settings_store import SettingsStore
+from src.sim.virtual_scheduler import VirtualScheduler
+
+
+class RecordingGPIO(MockGPIO):
+    """MockGPIO that keeps a (t_ms, channel_id, is_on) timeline."""
+
+    def __init__(self, clock: VirtualScheduler):
+        super().__init__()
+        self.clock = clock
+        self.timeline: list[tuple[int, int, bool]] = []
+
+    def turn_on(self, channel_id: int) -> None:
+        super().turn_on(channel_id)
+        self.timeline.append((self.clock.now_ms, channel_id, True))
+
+    def turn_off(self, channel_id: int) -> None:
+        super().turn_off(channel_id)
+        self.timeline.append((self.clock.now_ms, channel_id, False))
+
+    def active(self) -> set[int]:
+        return set(channels_in(self.state.mask))
+
+
+class Harness:
+    def __init__(self, tmp_path, timings: dict | None = None, pipelined: bool = False):
+        from src.config import DEFAULT_TIMINGS
+        self.clock = VirtualScheduler()
+        self.gpio = RecordingGPIO(self.clock)
+        store = SettingsStore(tmp_path / "timings.json", DEFAULT_TIMINGS,
+                              ProcessManager.PROCESS_CONFIG, debounce_s=3600)
+        if timings:
+            store.replace({**DEFAULT_TIMINGS, **timings})
+        self.pm = ProcessManager(self.gpio, self.clock, settings=store, pipelined=pipelined)
+        self.events: list[tuple[int, str, dict]] = []
+        self.pm.add_listener(lambda e, d: self.events.append((self.clock.now_ms, e, d)))
+
+    def event_names(self) -> list[str]:
+        """Process-level events in order (per-relay "valve" events left out)."""
+        return [e for _, e, _ in self.events if e != "valve"]
+
+
+@pytest.fixture
+def make_harness(tmp_path):
+    return lambda timings=None, pipelined=False: Harness(tmp_path, timings, pipelined)
+
+
+@pytest.fixture
+def harness(make_harness):
+    return make_harness()
@@ -0,0 +1,63 @@
+"""Relay audit log: indexed range queries, crash tails, and transition-only recording."""
+
+from src.audit.event_log import (
+    INDEX_EVERY, OP_ALL_OFF, OP_OFF, OP_ON, AuditedGPIO, EventLog, _INDEX, _RECORD,
+)
+from src.hardware.mock_gpio import MockGPIO
+
+DAY0 = 1_767_225_600_000       # 2026-01-01 00:00 UTC
+
+
+def _log(tmp_path, n=3 * INDEX_EVERY + 10):
+    log = EventLog(tmp_path, background=False)
+    for i in range(n):
+        log.append(1 + i % 7, i % 2, DAY0 + i * 1000)
+    log.flush()
+    return log
+
+
+def test_index_seek_lands_just_before_the_range(tmp_path):
+    log = _log(tmp_path)
+    _, path = log.segments()[0]
+    idx = path.with_suffix(".idx")
+    assert idx.stat().st_size == 4 * _INDEX.size
+    offset = (2 * INDEX_EVERY + 5) * 1000
+    assert EventLog._seek_index(idx, offset, 10_000) == 2 * INDEX_EVERY
+    assert EventLog._seek_index(idx, 0, 10_000) == 0
+
+    start = DAY0 + offset
+    got = list(log.query(start, start + 3000))
+    assert [ts for ts, _, _ in got] == [start, start + 1000, start + 2000]
+    assert list(log.query(start, start + 10_000, channels=[3]))[0][1] == 3
+
+
+def test_index_entries_past_the_data_are_ignored_and_trimmed(tmp_path):
+    _log(tmp_path)
+    _, path = EventLog(tmp_path, background=False).segments()[0]
+    # Power cut: the data lost its last records (plus half of one)
+    keep = 2 * INDEX_EVERY + 3
+    with open(path, "r+b") as f:
+        f.truncate(16 + keep * _RECORD.size + 2)
+    assert EventLog._seek_index(path.with_suffix(".idx"), 10**9, keep) == 2 * INDEX_EVERY
+
+    log = EventLog(tmp_path, background=False)
+    assert log.count() == keep
+    assert path.with_suffix(".idx").stat().st_size == 3 * _INDEX.size
+    late = DAY0 + (3 * INDEX_EVERY) * 1000
+    assert list(log.query(late, late + 10_000)) == []
+    log.append(2, OP_ON, late)
+    log.flush()
+    assert list(log.query(late, late + 1)) == [(late, 2, OP_ON)]
+
+
+def test_only_real_transitions_are_recorded(tmp_path):
+    log = EventLog(tmp_path, background=False)
+    gpio = AuditedGPIO(MockGPIO(), log)
+    gpio.turn_off(1)                    # already off
+    gpio.turn_on(1)
+    gpio.turn_on(1)                     # already on
+    gpio.turn_off(1)
+    gpio.all_off()
+    log.flush()
+    assert [(ch, op) for _, ch, op in log.query(0, 2**62)] == \
+        [(1, OP_ON), (1, OP_OFF), (0, OP_ALL_OFF)]
@@ -0,0 +1,68 @@
+"""ChannelState diffs and the batched UI view on top of it."""
+
+from src.hardware.channel_state import ChannelState, channels_in
+from src.sim.virtual_scheduler import VirtualScheduler
+from src.ui.widgets import ChannelStateView
+
+
+def test_diffs_and_version():
+    state = ChannelState()
+    seen = []
+    state.subscribe(lambda old, new, v: seen.append((old, new, v)))
+
+    state.set(1, True)
+    state.set(1, True)            # no change, no diff
+    state.set(7, True)
+    state.apply(0)
+    assert seen == [(0, 0b1, 1), (0b1, 0b1000001, 2), (0b1000001, 0, 3)]
+    assert state.version == 3
+    assert channels_in(0b1000101) == [1, 3, 7]
+
+
+def test_view_redraws_changed_channels_once_per_idle_cycle():
+    clock = VirtualScheduler()
+    state = ChannelState()
+    drawn = []
+    view = ChannelStateView(clock, state, lambda cid, on: drawn.append((cid, on)))
+    drawn.clear()
+
+    for cid in (1, 2, 6):
+        state.set(cid, True)
+    state.set(2, False)           # back to where it was drawn: not redrawn
+    assert drawn == []
+    clock.run_all()
+    assert drawn == [(1, True), (6, True)]
+
+    drawn.clear()
+    state.apply(0)
+    clock.run_all()
+    assert drawn == [(1, False), (6, False)]
+    assert view._job is None
+
+
+def test_emergency_stop_reaches_the_ui_as_one_update(make_harness):
+    h = make_harness()
+    updates = []
+    h.pm.events.subscribe(lambda e, d: updates.append((d["old_mask"], d["new_mask"])), "valves")
+    h.pm.start_single_process("back_wash")
+    h.clock.run_until(6_000)
+    updates.clear()
+
+    h.pm.stop_immediately()
+    assert updates == []            # delivered on the next idle cycle
+    h.clock.run_all()
+    assert updates == [(0b1000100, 0)]
+
+
+def test_valve_events_stay_per_transition_while_ui_is_batched(make_harness):
+    h = make_harness()
+    updates = []
+    h.pm.events.subscribe(lambda e, d: updates.append((d["old_mask"], d["new_mask"])), "valves")
+    for cid, on in ((1, True), (6, True), (6, False), (2, True)):
+        (h.gpio.turn_on if on else h.gpio.turn_off)(cid)
+    h.gpio.turn_off(2)
+
+    valves = [(d["channel_id"], d["is_on"]) for _, e, d in h.events if e == "valve"]
+    assert valves == [(1, True), (6, True), (6, False), (2, True), (2, False)]
+    h.clock.run_all()
+    assert updates == [(0, 0b1)]
@@ -0,0 +1,69 @@
+"""Hot reload: the polling FileWatcher fallback and ConfigReloader staging."""
+
+import json
+
+from src.config_watcher import ConfigReloader, FileWatcher
+
+
+def test_polling_fallback_merges_a_burst_into_one_call(tmp_path, harness):
+    clock = harness.clock                       # no Tk file handlers: falls back to polling
+    seen = []
+    watcher = FileWatcher(clock, tmp_path, {"a.json"}, seen.append,
+                          settle_ms=250, poll_ms=1000)
+    watcher.start()
+    assert watcher.mode == "poll"
+
+    (tmp_path / "other.txt").write_text("ignored")
+    clock.advance(1500)
+    assert seen == []
+
+    (tmp_path / "a.json").write_text("1")       # an editor's write ...
+    clock.advance(200)
+    (tmp_path / "a.json").write_text("22")      # ... and rewrite, between two polls
+    clock.advance(1500)
+    assert seen == ["a.json"]
+    clock.advance(5000)
+    assert seen == ["a.json"]
+    watcher.stop()
+    assert clock.pending == 0
+
+
+def _reloader(harness, tmp_path):
+    env_dir = tmp_path / "env"
+    env_dir.mkdir()
+    reloader = ConfigReloader(harness.clock, harness.pm, env_dir / ".env")
+    reloader.start()
+    return reloader
+
+
+def test_edited_timings_are_staged_until_the_process_ends(harness, tmp_path):
+    pm, clock = harness.pm, harness.clock
+    reloader = _reloader(harness, tmp_path)
+    pm.start_single_process("back_wash")
+    clock.advance(1000)
+
+    old = pm.timings["back_wash"]
+    edited = {**pm.timings, "back_wash": old + 60_000}
+    pm.settings.path.write_text(json.dumps(edited))
+    clock.advance(3000)
+    assert pm.staged_timings["back_wash"] == old + 60_000
+    assert pm.timings["back_wash"] == old       # the running step keeps its schedule
+
+    clock.run_until(clock.now_ms + old + 60_000)
+    assert pm.timings["back_wash"] == old + 60_000 and pm.staged_timings is None
+    reloader.stop()
+
+
+def test_broken_or_unchanged_files_are_ignored(harness, tmp_path):
+    pm, clock = harness.pm, harness.clock
+    reloader = _reloader(harness, tmp_path)
+    before = dict(pm.timings)
+
+    pm.settings.path.write_text('{"back_wash": ')
+    clock.advance(3000)
+    pm.settings.path.write_text(json.dumps({"back_wash": "ten"}))
+    clock.advance(3000)
+    pm.settings.path.write_text(json.dumps(before))
+    clock.advance(3000)
+    assert pm.staged_timings is None and pm.timings == before
+    reloader.stop()
@@ -0,0 +1,442 @@
+"""Control daemon: event loop, shared-memory seqlock, and daemon ↔ client end to end."""
+
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+
+import pytest
+
+from src.config import DEFAULT_TIMINGS
+from src.control.client import ControlClient
+from src.control.daemon import ControlDaemon
+from src.control.loop import EventLoop
+from src.control.shared_state import StateBlock
+from src.hardware.mock_gpio import MockGPIO
+from src.processes.process_manager import ProcessManager
+from src.processes.settings_store import SettingsStore
+from src.safety.interlock import InterlockedGPIO
+
+
+def _shm_name() -> str:
+    return f"uf_test_{uuid.uuid4().hex[:12]}"
+
+
+# ── Event loop ───────────────────────────────────────────────────────────────
+
+def test_loop_runs_timers_in_order_and_honours_cancel():
+    loop = EventLoop()
+    seen = []
+    loop.after(30, seen.append, "late")
+    job = loop.after(10, seen.append, "cancelled")
+    loop.after(5, seen.append, "early")
+    loop.after_idle(seen.append, "idle")
+    loop.after_cancel(job)
+    loop.after(40, loop.stop)
+    loop.run()
+    loop.close()
+    assert seen == ["idle", "early", "late"]
+
+
+def test_loop_wakes_for_other_threads_and_file_handlers():
+    loop = EventLoop()
+    r, w = os.pipe()
+    seen = []
+
+    def on_readable(fd, _mask):
+        seen.append(os.read(fd, 16))
+        loop.tk.deletefilehandler(fd)
+        loop.stop()
+
+    loop.tk.createfilehandler(r, 2, on_readable)
+    threading.Timer(0.02, lambda: loop.call_soon_threadsafe(os.write, w, b"x")).start()
+    t0 = time.monotonic()
+    loop.run()
+    loop.close()
+    os.close(r)
+    os.close(w)
+    assert seen == [b"x"]
+    assert time.monotonic() - t0 < 1.0
+
+
+# ── Shared-memory state block ────────────────────────────────────────────────
+
+def test_state_block_round_trip_between_writer_and_reader():
+    name = _shm_name()
+    writer = StateBlock.create(name)
+    reader = StateBlock.attach(name)
+    try:
+        assert reader.read()["phase"] == "idle"
+        writer.write(7, 0b0100011, 0b10, "service", "running", True, True, 1234.5)
+        snap = reader.read()
+        assert snap["version"] == 7
+        assert snap["mask"] == 0b0100011
+        assert snap["deferred"] == 0b10
+        assert snap["proc"] == "service"
+        assert snap["phase"] == "running"
+        assert snap["running"] and snap["auto"]
+        assert snap["deadline"] == 1234.5
+        assert snap["pid"] == os.getpid()
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_reader_rejects_an_update_in_progress_or_torn():
+    name = _shm_name()
+    writer = StateBlock.create(name)
+    reader = StateBlock.attach(name)
+    try:
+        writer.write(1, 1, 0, None, "idle", False, False, None)
+        buf = writer._shm.buf
+        seq = struct.unpack_from("<I", buf, 0)[0]
+        struct.pack_into("<I", buf, 0, seq + 1)            # writer stalled mid-update
+        assert reader.read_raw(spins=10) is None
+        struct.pack_into("<I", buf, 0, seq)
+        buf[12] ^= 0xFF                                      # payload torn under an even seq
+        assert reader.read_raw(spins=10) is None
+        buf[12] ^= 0xFF
+        assert reader.read()["mask"] == 1
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_recreating_a_stale_block_succeeds():
+    name = _shm_name()
+    stale = StateBlock.create(name)
+    stale._shm.close()                 # daemon died without unlinking
+    fresh = StateBlock.create(name)
+    try:
+        assert fresh.read()["version"] == 0
+    finally:
+        fresh.close()
+
+
+def test_a_block_owned_by_a_live_daemon_is_not_replaced(monkeypatch):
+    import subprocess
+    import sys
+
+    from src.control import shared_state
+
+    other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    name = _shm_name()
+    with monkeypatch.context() as m:
+        m.setattr(shared_state.os, "getpid", lambda: other.pid)
+        running = StateBlock.create(name)          # as written by the other daemon
+    try:
+        assert StateBlock.live_owner(name) == other.pid
+        with pytest.raises(RuntimeError, match=str(other.pid)):
+            StateBlock.create(name)
+        viewer = StateBlock.attach(name)
+        assert viewer.read()["pid"] == other.pid
+        viewer.close()
+
+        other.kill()
+        other.wait()
+        assert StateBlock.live_owner(name) is None
+        fresh = StateBlock.create(name)            # its owner is gone: stale
+        fresh.close()
+    finally:
+        other.kill()
+        running._shm.close()
+
+
+# ── Daemon and client ────────────────────────────────────────────────────────
+
+SHORT = {name: 300 for name in ProcessManager.PROCESS_CONFIG}
+
+
+@pytest.fixture
+def plant(tmp_path):
+    """A daemon on its own loop thread, plus a client on a second loop."""
+    loop = EventLoop()
+    gpio = InterlockedGPIO(MockGPIO())
+    store = SettingsStore(tmp_path / "timings.json", DEFAULT_TIMINGS,
+                          ProcessManager.PROCESS_CONFIG, debounce_s=3600)
+    store.replace({**DEFAULT_TIMINGS, **SHORT})
+    pm = ProcessManager(gpio, loop, settings=store)
+    pm.pump_delay_ms = pm.close_delay_ms = 50
+    daemon = ControlDaemon(loop, pm, tmp_path / "control.sock", _shm_name())
+    daemon.start()
+    thread = threading.Thread(target=loop.run, daemon=True)
+    thread.start()
+
+    ui_loop = EventLoop()
+    client = ControlClient(ui_loop, tmp_path / "control.sock")
+    _pump(ui_loop, lambda: client.attached)
+    yield daemon, client, ui_loop
+
+    client.close()
+    loop.call_soon_threadsafe(daemon.shutdown)
+    loop.stop()
+    thread.join(2)
+    ui_loop.close()
+    loop.close()
+
+
+def _pump(ui_loop, until, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not until():
+        assert time.monotonic() < deadline, "timed out"
+        ui_loop.after(20, lambda: None)
+        ui_loop._run_once()
+
+
+def _toggle(ui_loop, gpio, channel_id):
+    done = []
+    gpio.toggle(channel_id, on_done=done.append)
+    assert done == []                               # sent, not waited for
+    _pump(ui_loop, lambda: done)
+    return done[0]
+
+
+def test_client_mirrors_relays_and_reads_state_from_shared_memory(plant):
+    daemon, client, ui_loop = plant
+    assert client.connected
+    assert _toggle(ui_loop, client.gpio, 1) is True
+    assert client.gpio.is_on(1)
+    assert client.gpio.state.mask == daemon.gpio.state.mask == 0b1
+    assert client.process_manager.snapshot()["mask"] == 0b1
+    assert client.daemon_alive
+
+    # Pump without any valve open on its line is refused by the daemon's interlock
+    _toggle(ui_loop, client.gpio, 1)
+    assert _toggle(ui_loop, client.gpio, 7) is False
+    assert client.gpio.engine.describe(client.gpio.last_reason)
+
+
+def test_auto_cycle_events_reach_the_client_bus(plant):
+    daemon, client, ui_loop = plant
+    pm = client.process_manager
+    events = []
+    pm.add_listener(lambda e, d: events.append(e))
+    batches = []
+    pm.events.subscribe(lambda e, d: batches.append(d), "valves")
+
+    pm.start_auto_cycle()
+    _pump(ui_loop, lambda: "pump_start" in events)
+    assert pm.auto_cycle and pm.current_process == "fast_rinse"
+    assert client.gpio.state.mask == daemon.gpio.state.mask
+    assert batches
+
+    stopped = []
+    pm.stop_current_process(callback=lambda: stopped.append(True))
+    _pump(ui_loop, lambda: stopped)
+    assert pm.current_process is None and not pm.is_running
+    assert daemon.gpio.state.mask == 0 == client.gpio.state.mask
+
+
+def test_timings_round_trip_and_bad_values_are_refused(plant):
+    daemon, client, ui_loop = plant
+    pm = client.process_manager
+    pm.update_timings({"service": 1_200})
+    _pump(ui_loop, lambda: pm.timings["service"] == 1_200)
+    assert daemon.pm.timings["service"] == 1_200
+    pm.update_timings({"service": -5})
+    pm.reset_timings()
+    _pump(ui_loop, lambda: pm.timings == DEFAULT_TIMINGS)
+    assert daemon.pm.timings == DEFAULT_TIMINGS
+
+
+def test_timings_reloaded_by_the_daemon_are_fetched_before_listeners_run(plant):
+    daemon, client, ui_loop = plant
+    pm = client.process_manager
+    seen = []
+    pm.events.subscribe(lambda e, d: seen.append(pm.timings["service"]), "timings_changed")
+    edited = {**daemon.pm.timings, "service": 4_000}
+    daemon.pm.widget.call_soon_threadsafe(daemon.pm.stage_timings, edited)
+    _pump(ui_loop, lambda: seen)
+    assert seen == [4_000] and pm.staged_timings is None
+
+
+def test_requests_are_answered_on_the_ui_loop_and_dropped_when_detached(plant):
+    daemon, client, ui_loop = plant
+    ran = []
+    threading.Thread(
+        target=client.process_manager.call_soon_threadsafe, args=(ran.append, 1)
+    ).start()
+    _pump(ui_loop, lambda: ran)
+    client.close()
+    failed = []
+    client.request("status", lambda ok, why: failed.append((ok, why)))
+    assert failed == [(False, "not connected")]
+
+
+def test_ui_detaching_leaves_the_plant_running(plant, tmp_path):
+    daemon, client, ui_loop = plant
+    _toggle(ui_loop, client.gpio, 2)
+    client.close()
+    time.sleep(0.05)
+    assert daemon.gpio.is_on(2)
+    again = ControlClient(ui_loop, tmp_path / "control.sock")
+    try:
+        _pump(ui_loop, lambda: again.attached)
+        assert again.gpio.is_on(2)
+    finally:
+        again.close()
+
+
+class _Conn:
+    closed = False
+
+    def __init__(self):
+        self.replies = []
+
+    def reply(self, req_id, result=None):
+        self.replies.append((req_id, result["phase"]))
+
+
+def test_every_overlapping_stop_is_answered_once_the_valves_close(harness):
+    from src.control.commands import PlantCommands
+    stop = PlantCommands(harness.pm).table()["stop"]
+    first, second, gone = _Conn(), _Conn(), _Conn()
+    harness.pm.start_single_process("back_wash")
+    harness.clock.advance(1000)
+
+    stop(first, 1)
+    harness.clock.advance(100)
+    stop(second, 2)                                 # reschedules the close
+    stop(gone, 3)
+    gone.closed = True
+    assert first.replies == second.replies == []
+    harness.clock.run_all()
+    assert first.replies == [(1, "idle")] and second.replies == [(2, "idle")]
+    assert gone.replies == []
+
+
+def test_an_estop_answers_a_stop_still_closing(harness):
+    from src.control.commands import PlantCommands
+    table = PlantCommands(harness.pm).table()
+    waiting = _Conn()
+    harness.pm.start_single_process("back_wash")
+    harness.clock.advance(1000)
+    table["stop"](waiting, 1)
+    table["estop"](_Conn(), 2)
+    assert waiting.replies == [(1, "idle")]
+
+
+# ── ultra-filt ctl ───────────────────────────────────────────────────────────
+
+def _ctl(tmp_path, *argv):
+    from src.control.ctl import main
+    return main(["--socket", str(tmp_path / "control.sock"), *argv])
+
+
+def test_ctl_drives_the_plant_and_dumps_the_trace(plant, tmp_path, capsys):
+    daemon, client, ui_loop = plant
+    assert _ctl(tmp_path, "toggle", "Valve 2") == 0
+    assert daemon.gpio.is_on(2)
+    assert _ctl(tmp_path, "off", "all") == 0
+    assert daemon.gpio.state.mask == 0
+
+    assert _ctl(tmp_path, "start", "back_wash") == 0
+    assert daemon.pm.current_process == "back_wash"
+    assert _ctl(tmp_path, "start") == 1            # busy: refused, not queued
+    assert _ctl(tmp_path, "stop") == 0             # returns once the valves are shut
+    assert daemon.pm.current_process is None and daemon.gpio.state.mask == 0
+
+    assert _ctl(tmp_path, "timings", "service=2s") == 0
+    assert daemon.pm.timings["service"] == 2_000
+
+    capsys.readouterr()
+    assert _ctl(tmp_path, "--json", "trace", "-n", "100") == 0
+    events = [item["event"] for item in json.loads(capsys.readouterr().out)]
+    assert events[:2] == ["valve", "valve"]
+    assert "process_start" in events and events[-1] == "process_end"
+
+
+def test_ctl_reports_unreachable_and_unknown_input(tmp_path, capsys):
+    assert _ctl(tmp_path, "status") == 2
+    with pytest.raises(SystemExit):
+        _ctl(tmp_path, "toggle", "Valve 9")
+
+
+def test_control_round_trip_is_fast(plant, tmp_path):
+    from src.control.ctl import CtlConnection
+    conn = CtlConnection(tmp_path / "control.sock", 2.0)
+    try:
+        t0 = time.perf_counter()
+        for _ in range(200):
+            conn.call("status")
+        per_call = (time.perf_counter() - t0) / 200
+    finally:
+        conn.close()
+    assert per_call < 0.02
+
+
+def test_ctl_profile_writes_a_speedscope_file(plant, tmp_path):
+    out = tmp_path / "daemon.speedscope.json"
+    assert _ctl(tmp_path, "profile", "--seconds", "0.2", "-o", str(out)) == 0
+    doc = json.loads(out.read_text())
+    assert doc["profiles"] and doc["shared"]["frames"]
+    assert _ctl(tmp_path, "profile", "--seconds", "0") == 1      # refused
+
+
+def test_ctl_spans_captures_a_chrome_trace(plant, tmp_path):
+    from src.diagnostics import tracing
+    daemon, client, ui_loop = plant
+    out = tmp_path / "cycle.trace.json"
+    threading.Timer(0.05, lambda: _ctl(tmp_path, "toggle", "Valve 2")).start()
+    assert _ctl(tmp_path, "spans", "--seconds", "0.3", "-o", str(out)) == 0
+    names = {ev.get("name") for ev in json.loads(out.read_text())["traceEvents"]}
+    assert "gpio.on" in names and "control" in names
+    assert not tracing.enabled
+
+
+def test_ctl_spans_larger_than_a_reply_line_go_through_a_file(plant, tmp_path):
+    from src.diagnostics import tracing
+    out = tmp_path / "busy.trace.json"
+
+    def busy():
+        while not tracing.enabled:
+            time.sleep(0.005)
+        for i in range(15_000):
+            tracing.begin("bulk", "bench", i=i)
+            tracing.end()
+
+    threading.Thread(target=busy, daemon=True).start()
+    assert _ctl(tmp_path, "spans", "--seconds", "0.5", "-o", str(out)) == 0
+    assert out.stat().st_size > 1 << 20          # past MAX_LINE and max_outbox alike
+    names = [ev.get("name") for ev in json.loads(out.read_text())["traceEvents"]]
+    assert names.count("bulk") == 10_000          # a full ring: TRACE_BUFFER events
+
+
+def test_ctl_profile_larger_than_a_reply_line_goes_through_a_file(plant, tmp_path,
+                                                                   monkeypatch, capsys):
+    from src.diagnostics.profiler import SamplingProfiler
+    big = {"shared": {"frames": [{"name": f"f{i:07d}"} for i in range(100_000)]},
+           "profiles": [{"type": "sampled"}]}
+    monkeypatch.setattr(SamplingProfiler, "speedscope", lambda self, name="": big)
+    out = tmp_path / "busy.speedscope.json"
+    assert _ctl(tmp_path, "profile", "--seconds", "0.1", "-o", str(out)) == 0
+    assert out.stat().st_size > 1 << 20
+    assert json.loads(out.read_text()) == big
+
+    folded = "\n".join(f"loop;step{i:07d} 1" for i in range(100_000)) + "\n"
+    monkeypatch.setattr(SamplingProfiler, "collapsed", lambda self: folded)
+    capsys.readouterr()
+    assert _ctl(tmp_path, "profile", "--seconds", "0.1") == 0
+    assert capsys.readouterr().out == folded
+
+
+def test_ctl_reports_a_malformed_reply(tmp_path, capsys):
+    import socket
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(tmp_path / "control.sock"))
+    server.listen(1)
+
+    def answer():
+        conn, _ = server.accept()
+        conn.recv(4096)
+        conn.sendall(b"x" * 70_000)              # no newline within MAX_LINE
+        conn.close()
+
+    threading.Thread(target=answer, daemon=True).start()
+    try:
+        assert _ctl(tmp_path, "status") == 2
+    finally:
+        server.close()
+    assert "Line longer than" in capsys.readouterr().err
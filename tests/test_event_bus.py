@@ -0,0 +1,112 @@
+"""EventBus dispatch, and when ProcessManager notifies its subscribers."""
+
+import threading
+import time
+
+import pytest
+
+from src.processes.event_bus import QUEUED, EventBus
+
+TYPES = {"ping": ("n",), "pong": ()}
+
+
+def test_payloads_are_checked_against_declared_types():
+    bus = EventBus(TYPES)
+    with pytest.raises(ValueError):
+        bus.publish("ping")
+    with pytest.raises(ValueError):
+        bus.publish("ping", n=1, extra=2)
+    with pytest.raises(ValueError):
+        bus.publish("nope")
+    with pytest.raises(ValueError):
+        bus.subscribe(lambda e, d: None, ["nope"])
+
+
+def test_priority_then_subscription_order_and_filters():
+    bus = EventBus(TYPES)
+    seen = []
+    bus.subscribe(lambda e, d: seen.append("a"))
+    bus.subscribe(lambda e, d: seen.append("b"), "ping", priority=5)
+    bus.subscribe(lambda e, d: seen.append("c"))
+    bus.subscribe(lambda e, d: seen.append("d"), "pong", priority=9)
+
+    bus.publish("ping", n=1)
+    assert seen == ["b", "a", "c"]
+    assert bus.wants("pong") and not EventBus(TYPES).wants("pong")
+
+
+def test_failing_subscriber_is_counted_and_others_still_run():
+    bus = EventBus(TYPES)
+    seen = []
+    bad = bus.subscribe(lambda e, d: 1 / 0, name="bad")
+    bus.subscribe(lambda e, d: seen.append(d["n"]))
+    bus.publish("ping", n=3)
+    assert seen == [3]
+    assert bad.stats()["errors"] == 1 and bad.stats()["calls"] == 1
+
+
+def test_hold_defers_dispatch_until_outermost_exit():
+    bus = EventBus(TYPES)
+    seen = []
+    bus.subscribe(lambda e, d: seen.append((e, d.get("n"))))
+    with bus.hold():
+        bus.publish("ping", n=1)
+        with bus.hold():
+            bus.publish("pong")
+        assert seen == []
+    assert seen == [("ping", 1), ("pong", None)]
+
+
+def test_queued_subscriber_does_not_block_the_publisher():
+    bus = EventBus(TYPES)
+    gate = threading.Event()
+    got = []
+    slow = bus.subscribe(lambda e, d: (gate.wait(2), got.append(d["n"])),
+                         mode=QUEUED, name="disk")
+    t0 = time.perf_counter()
+    for n in range(5):
+        bus.publish("ping", n=n)
+    assert time.perf_counter() - t0 < 0.1
+    gate.set()
+    assert bus.drain(2)
+    assert got == [0, 1, 2, 3, 4]
+    assert slow.stats()["calls"] == 5 and slow.stats()["max_wait_us"] > 0
+    bus.close()
+
+
+def test_full_queue_drops_oldest():
+    bus = EventBus(TYPES)
+    gate = threading.Event()
+    got = []
+    sub = bus.subscribe(lambda e, d: (gate.wait(2), got.append(d["n"])),
+                        mode=QUEUED, maxlen=3)
+    bus.publish("ping", n=0)
+    while sub.stats()["backlog"]:        # worker picked up 0 and is blocked on it
+        time.sleep(0.001)
+    for n in range(1, 6):
+        bus.publish("ping", n=n)
+    gate.set()
+    bus.close()
+    assert got == [0, 3, 4, 5]
+    assert sub.dropped == 2
+
+
+def test_subscribers_hear_of_a_step_only_after_its_relays_switched(harness):
+    pm, gpio = harness.pm, harness.gpio
+    seen_on = []
+    pm.events.subscribe(lambda e, d: seen_on.append(gpio.active()), "process_start")
+    pm.start_single_process("service")
+    # Both service valves were already open when process_start was delivered
+    assert seen_on == [{1, 5}]
+
+
+def test_process_boundary_switches_next_valves_before_notifying(make_harness):
+    h = make_harness({name: 10_000 for name in ("fast_rinse", "service")})
+    at_end = []
+    h.pm.events.subscribe(lambda e, d: at_end.append((d["name"], h.gpio.active())),
+                          "process_end")
+    h.pm.start_auto_cycle()
+    h.clock.run_until(20_000)
+    # fast_rinse ends at 20 s; service's valves open in that same step
+    assert at_end == [("fast_rinse", {1, 5})]
+    assert h.event_names()[-2:] == ["process_end", "process_start"]
@@ -0,0 +1,88 @@
+"""Fleet ColumnStore (watermark dedup, crash-consistent flush) and FleetQuery metrics."""
+
+import pytest
+
+from src.fleet.store import ColumnStore
+from src.telemetry.outbox import encode_batch
+
+np = pytest.importorskip("numpy")
+from src.fleet.query import FleetFrame, FleetQuery  # noqa: E402
+
+T0 = 1_767_261_600.0       # 2026-01-01 10:00 UTC
+
+
+def _valve(t, c, on):
+    return {"t": t, "e": "valve", "c": c, "on": on}
+
+
+def _cycle(t, late_s=0.0):
+    """One back-wash run: pump 6 starts on time, the process ends `late_s` late."""
+    return [
+        {"t": t, "e": "process_start", "p": "back_wash", "ms": 60_000},
+        {"t": t + 5, "e": "pump_start", "p": "back_wash", "ms": 60_000},
+        _valve(t + 5, 6, 1),
+        _valve(t + 65 + late_s, 6, 0),
+        {"t": t + 65 + late_s, "e": "process_end", "p": "back_wash"},
+    ]
+
+
+def test_replayed_batches_are_skipped_across_restarts(tmp_path):
+    store = ColumnStore(tmp_path)
+    assert store.ingest("u1", encode_batch(1, [_valve(T0, 1, 1)])) == 1
+    assert store.ingest("u1", encode_batch(2, [_valve(T0 + 1, 1, 0)])) == 1
+    assert store.ingest("u1", encode_batch(2, [_valve(T0 + 1, 1, 0)])) == 0
+    store.flush()
+
+    reopened = ColumnStore(tmp_path)
+    assert reopened.ingest("u1", encode_batch(2, [_valve(T0 + 1, 1, 0)])) == 0
+    assert reopened.ingest("u1", encode_batch(3, [_valve(T0 + 2, 1, 1)])) == 1
+    reopened.flush()
+    assert reopened.batches_skipped == 1
+    assert len(FleetFrame.load(ColumnStore(tmp_path))) == 3
+
+
+def test_crash_between_columns_and_manifest_is_ingested_once(tmp_path):
+    store = ColumnStore(tmp_path)
+    store.ingest("u1", encode_batch(1, [_valve(T0, 6, 1)]))
+    store.flush()
+    # Crash mid-flush of batch 2: some columns appended, manifest not replaced
+    pdir = store.partition_dir("u1", "2026-01-01")
+    for name, width in (("t", 8), ("e", 1), ("c", 1)):
+        with open(pdir / f"{name}.col", "ab") as f:
+            f.write(b"\x00" * width)
+
+    frame = FleetFrame.load(ColumnStore(tmp_path))
+    assert len(frame) == 1 and all(len(col) == 1 for col in frame.cols.values())
+
+    restarted = ColumnStore(tmp_path)
+    assert restarted.ingest("u1", encode_batch(2, [_valve(T0 + 3600, 6, 0)])) == 1
+    restarted.flush()
+    assert (pdir / "t.col").stat().st_size == 2 * 8
+    hours = FleetQuery(FleetFrame.load(restarted)).pump_hours()
+    assert hours["u1"][6] == pytest.approx(1.0)
+
+
+def test_bare_sequence_files_from_older_stores_still_count(tmp_path):
+    (tmp_path / "unit=u1").mkdir()
+    (tmp_path / "unit=u1" / "_seq").write_text("7")
+    store = ColumnStore(tmp_path)
+    assert store.ingest("u1", encode_batch(7, [_valve(T0, 1, 1)])) == 0
+    assert store.ingest("u1", encode_batch(8, [_valve(T0, 1, 1)])) == 1
+
+
+def test_pump_hours_and_late_rate_per_unit(tmp_path):
+    store = ColumnStore(tmp_path)
+    store.ingest("a", encode_batch(1, _cycle(T0) + _cycle(T0 + 600, late_s=2)))
+    store.ingest("b", encode_batch(1, [_valve(T0, 7, 1), _valve(T0 + 1800, 7, 0)]))
+    store.flush()
+    query = FleetQuery(FleetFrame.load(store))
+
+    hours = query.pump_hours()
+    assert hours["a"][6] == pytest.approx((60 + 62) / 3600)
+    assert hours["b"] == {6: 0.0, 7: pytest.approx(0.5)}
+
+    late = query.late_transition_rates()
+    assert late["a"] == {"late": 1, "total": 4, "rate": 0.25}
+    assert late["b"]["total"] == 0
+    summary = query.fleet_summary()
+    assert summary["units"] == 2 and summary["late_rate"] == 0.25
@@ -0,0 +1,65 @@
+"""Controller health sampler against a fake /sys + /proc tree."""
+
+from src.diagnostics.health import HealthSampler, describe_throttled
+from src.telemetry.outbox import Outbox, decode_batch
+from src.telemetry.uplink import TelemetryCollector
+
+
+def _tree(tmp_path, temp_mc=50_000, throttled="0x0", stat=(100, 0, 100, 800, 0)):
+    thermal = tmp_path / "sys/class/thermal/thermal_zone0"
+    thermal.mkdir(parents=True, exist_ok=True)
+    (thermal / "temp").write_text(f"{temp_mc}\n")
+    fw = tmp_path / "sys/devices/platform/soc/soc:firmware"
+    fw.mkdir(parents=True, exist_ok=True)
+    (fw / "get_throttled").write_text(f"{throttled}\n")
+    proc = tmp_path / "proc"
+    proc.mkdir(exist_ok=True)
+    (proc / "stat").write_text("cpu  " + " ".join(map(str, stat)) + " 0 0 0 0 0\ncpu0 1 2 3\n")
+    (proc / "meminfo").write_text("MemTotal:  1000000 kB\nMemFree:  100000 kB\n"
+                                  "MemAvailable:  250000 kB\n")
+
+
+def test_reads_temperature_cpu_memory_and_flags(tmp_path):
+    _tree(tmp_path)
+    sampler = HealthSampler(root=tmp_path)
+    first = sampler.sample()
+    assert first["soc_temp_c"] == 50.0
+    assert first["cpu_pct"] is None                 # needs two readings
+    assert first["mem_pct"] == 75.0
+    assert first["throttled"] == 0
+
+    _tree(tmp_path, stat=(250, 0, 150, 900, 0))      # 200 busy of 300 jiffies
+    assert sampler.sample()["cpu_pct"] == 66.7
+
+
+def test_missing_files_read_as_none(tmp_path):
+    s = HealthSampler(root=tmp_path).sample()
+    assert s["soc_temp_c"] is s["cpu_pct"] is s["mem_pct"] is s["throttled"] is None
+
+
+def test_pressure_has_hysteresis_and_follows_throttling(tmp_path):
+    changes = []
+    sampler = HealthSampler(hot_c=75, cool_c=70, on_pressure=changes.append, root=tmp_path)
+    for temp, throttled in [(60, "0x0"), (76, "0x0"), (72, "0x0"), (69, "0x0"),
+                            (50, "0x4"), (50, "0x40000")]:
+        _tree(tmp_path, temp_mc=temp * 1000, throttled=throttled)
+        sampler.sample()
+    assert changes == [True, False, True, False]
+    assert describe_throttled(0x4) == "throttled"
+    assert describe_throttled(0x50000) == "earlier: under-voltage, throttled"
+    assert describe_throttled(0) == "no"
+
+
+def test_rollups_reach_the_historian(tmp_path):
+    _tree(tmp_path)
+    outbox = Outbox(tmp_path / "outbox", flush_interval_s=3600)
+    collector = TelemetryCollector(outbox, clock=lambda: 1.0)
+    sampler = HealthSampler(on_rollup=collector.record_rollups, rollup_samples=3, root=tmp_path)
+    for _ in range(3):
+        sampler.sample()
+    outbox.flush()
+    (_, payload), = outbox.pending()
+    records = {r["k"]: r for r in decode_batch(payload)[1]}
+    assert records["soc_temp_c"]["n"] == 3 and records["soc_temp_c"]["avg"] == 50.0
+    assert records["mem_pct"]["max"] == 75.0
+    assert "cpu_pct" not in records                 # /proc/stat never moved
@@ -0,0 +1,127 @@
+"""Idle screen: blank after inactivity, suspend display tickers, resume on input."""
+
+from src.control.loop import EventLoop
+from src.ui.idle import IdleManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def show(self):
+        self.calls.append("show")
+
+    def hide(self):
+        self.calls.append("hide")
+
+    def suspend(self):
+        self.calls.append("suspend")
+
+    def resume(self):
+        self.calls.append("resume")
+
+
+def _manager(timeout_s=60):
+    loop = EventLoop()
+    loop.bind_all = lambda *a, **kw: None           # no Tk input on the bare loop
+    clock = FakeClock()
+    screen = Recorder()
+    idle = IdleManager(loop, timeout_s, screen=screen, clock=clock)
+    return loop, clock, screen, idle
+
+
+def _fire(loop, idle):
+    """Run the pending inactivity check now."""
+    job = idle._job
+    loop.after_cancel(job)
+    idle._job = None
+    idle._check()
+
+
+def test_blanks_after_inactivity_and_wakes_on_input():
+    loop, clock, screen, idle = _manager()
+    ticker = idle.register(Recorder())
+    idle.start()
+
+    clock.now = 30
+    idle.poke()                                      # activity pushes the deadline out
+    clock.now = 61
+    _fire(loop, idle)
+    assert not idle.blanked and idle._job is not None
+
+    clock.now = 91
+    _fire(loop, idle)
+    assert idle.blanked
+    assert screen.calls == ["show"] and ticker.calls == ["suspend"]
+
+    clock.now = 100
+    idle._on_input()
+    assert not idle.blanked
+    assert screen.calls == ["show", "hide"] and ticker.calls == ["suspend", "resume"]
+    assert idle.stats() == {"blanked": False, "blanks": 1, "blanked_s": 9}
+    idle.stop()
+    loop.close()
+
+
+def test_tickers_registered_while_blank_start_suspended():
+    loop, clock, screen, idle = _manager()
+    idle.start()
+    clock.now = 61
+    _fire(loop, idle)
+    late = idle.register(Recorder())
+    assert late.calls == ["suspend"]
+    idle.stop()
+    assert late.calls == ["suspend", "resume"]
+    loop.close()
+
+
+def test_a_modal_dialog_keeps_the_screen_on():
+    loop, clock, screen, idle = _manager()
+    loop.grab_current = lambda: object()
+    idle.start()
+    clock.now = 61
+    _fire(loop, idle)
+    assert not idle.blanked and idle._job is not None
+    idle.stop()
+    loop.close()
+
+
+def test_zero_timeout_never_arms():
+    loop, clock, screen, idle = _manager(timeout_s=0)
+    idle.start()
+    assert idle._job is None
+    loop.close()
+
+
+def test_channel_views_skip_redraws_while_blank_and_catch_up_once():
+    from src.hardware.channel_state import ChannelState
+    from src.ui.widgets import ChannelStateView
+
+    loop, clock, screen, idle = _manager()
+    state = ChannelState()
+    drawn = []
+    idle.register(ChannelStateView(loop, state, lambda cid, on: drawn.append((cid, on))))
+    idle.start()
+    drawn.clear()
+
+    clock.now = 61
+    _fire(loop, idle)
+    for cid in (1, 3, 6):                            # a cycle step behind the blank screen
+        state.set(cid, True)
+    state.set(1, False)
+    loop.after(20, loop.stop)
+    loop.run()
+    assert drawn == []
+
+    idle._on_input()
+    assert sorted(drawn) == [(3, True), (6, True)]  # one catch-up pass, net changes only
+    idle.stop()
+    loop.close()
@@ -0,0 +1,67 @@
+"""InterlockEngine tables and the InterlockedGPIO boundary."""
+
+from src.hardware.mock_gpio import MockGPIO
+from src.safety.interlock import (
+    ACCEPTED, DEFERRED, REJECTED, InterlockEngine, InterlockedGPIO,
+)
+from src.safety.model_checker import ModelChecker
+from src.safety.rules import DEFAULT_RULES, mask_of, violations
+
+
+def test_table_matches_rules_for_every_mask():
+    engine = InterlockEngine()
+    for mask in range(128):
+        broken = violations(mask, DEFAULT_RULES)
+        assert engine.table[mask] == (DEFAULT_RULES.index(broken[0]) + 1 if broken else 0)
+
+
+def test_pump_on_against_closed_valves_is_rejected():
+    gpio = InterlockedGPIO(MockGPIO())
+    assert gpio.request(6, True) == REJECTED
+    assert not gpio.is_on(6)
+    assert gpio.engine.reason(gpio.last_reason) == "pump1_open_line"
+
+    gpio.turn_on(2)
+    assert gpio.request(6, True) == ACCEPTED
+    assert gpio.toggle(3) is True
+    assert gpio.request(7, True) == REJECTED          # Pump 1 already running
+    assert gpio.engine.reason(gpio.last_reason) == "pumps_exclusive"
+
+
+def test_valve_off_under_running_pump_is_deferred():
+    backend = MockGPIO()
+    gpio = InterlockedGPIO(backend)
+    gpio.turn_on(1)
+    gpio.turn_on(6)
+
+    assert gpio.request(1, False) == DEFERRED
+    assert backend.is_on(1) and gpio.deferred == mask_of([1])
+
+    gpio.turn_off(6)                                   # pump off releases the valve
+    assert not backend.is_on(1) and gpio.deferred == 0
+
+
+def test_turning_on_again_cancels_a_deferred_off():
+    gpio = InterlockedGPIO(MockGPIO())
+    gpio.turn_on(2)
+    gpio.turn_on(6)
+    gpio.turn_off(2)
+    gpio.turn_on(2)
+    gpio.turn_off(6)
+    assert gpio.is_on(2)
+
+
+def test_process_timelines_pass_the_interlock(make_harness):
+    h = make_harness()
+    h.pm.gpio = InterlockedGPIO(h.gpio)
+    for name in h.pm.PROCESS_CONFIG:
+        before = len(h.gpio.timeline)
+        h.pm.start_single_process(name)
+        h.clock.run_all()
+        ons = [cid for _, cid, on in h.gpio.timeline[before:] if on]
+        assert h.pm.PROCESS_CONFIG[name]["pump"] in ons
+
+
+def test_manual_toggles_are_safe_behind_the_interlock():
+    result = ModelChecker(depth=5, manual=True, wrap_gpio=InterlockedGPIO).run()
+    assert result.ok, "\n".join(map(str, result.counterexamples))
@@ -0,0 +1,53 @@
+"""Log pipeline: repeat suppression, buffered appends, rotation and pruning."""
+
+import gzip
+import json
+import logging
+
+from src.log_pipeline import BufferedRotatingFileHandler, CompactFormatter, RateLimitFilter
+
+
+def _record(msg, created=0.0, level=logging.INFO, name="UltraFiltration.Process"):
+    rec = logging.LogRecord(name, level, __file__, 1, msg, None, None)
+    rec.created = created
+    return rec
+
+
+def test_repeats_beyond_the_burst_are_counted_on_the_next_one_through():
+    rl = RateLimitFilter(window_s=10, burst=3)
+    passed = [rl.filter(_record("relay stuck", created=t)) for t in range(8)]
+    assert passed == [True, True, True, False, False, False, False, False]
+    assert rl.filter(_record("other", created=5))          # a different key is separate
+
+    late = _record("relay stuck", created=10)
+    assert rl.filter(late) and late.suppressed == 5
+    line = json.loads(CompactFormatter().format(late))
+    assert line == {"t": 10.0, "l": "I", "n": "Process", "m": "relay stuck", "r": 5}
+
+
+def _handler(tmp_path, **kw):
+    h = BufferedRotatingFileHandler(tmp_path / "uf.log", flush_interval_s=3600, **kw)
+    h.setFormatter(logging.Formatter("%(message)s"))
+    return h
+
+
+def test_buffers_in_ram_and_flushes_on_error(tmp_path):
+    h = _handler(tmp_path)
+    h.emit(_record("one"))
+    h.emit(_record("two"))
+    assert not (tmp_path / "uf.log").exists()
+    h.emit(_record("boom", level=logging.ERROR))
+    assert (tmp_path / "uf.log").read_text() == "one\ntwo\nboom\n"
+    h.close()
+
+
+def test_rotates_by_size_into_gzip_and_keeps_backup_count(tmp_path):
+    h = _handler(tmp_path, max_bytes=20, backup_count=2, buffer_bytes=1)
+    for i in range(6):
+        h.emit(_record(f"line {i:02d} -------"))           # 17 bytes: one per file
+    h.close()
+    backups = sorted(tmp_path.glob("uf.log.*.gz"))
+    assert len(backups) == 2
+    assert [gzip.decompress(b.read_bytes()) for b in backups] == \
+        [b"line 03 -------\n", b"line 04 -------\n"]
+    assert (tmp_path / "uf.log").read_text() == "line 05 -------\n"
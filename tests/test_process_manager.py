@@ -0,0 +1,252 @@
+"""Relay timelines of ProcessManager under virtual time."""
+
+import pytest
+
+from src.config import OFF_ORDER, PUMP_ENGAGE_DELAY, VALVE_CLOSE_DELAY
+from src.processes.process_manager import ProcessManager
+from src.safety.rules import DEFAULT_RULES, mask_of, violations
+
+PROCESSES = list(ProcessManager.PROCESS_CONFIG)
+SHORT = {name: 20_000 for name in PROCESSES}
+
+
+def expected_timeline(name: str, duration_ms: int, t0: int = 0) -> list:
+    """The relay sequence a process must produce, written out from its config."""
+    cfg = ProcessManager.PROCESS_CONFIG[name]
+    pump_off = t0 + PUMP_ENGAGE_DELAY + duration_ms
+    close = pump_off + VALVE_CLOSE_DELAY
+    out = [(t0, v, True) for v in cfg["valves"]]
+    out.append((t0 + PUMP_ENGAGE_DELAY, cfg["pump"], True))
+    out.append((pump_off, cfg["pump"], False))
+    out += [(close, v, False) for v in cfg["valves"]]
+    if "extra_valve" in cfg:
+        out.append((close, cfg["extra_valve"], True))
+        out.append((close + VALVE_CLOSE_DELAY, cfg["extra_valve"], False))
+    return out
+
+
+def stop_points(name: str) -> list[int]:
+    """Every transition time of the process, plus 1 ms either side of it."""
+    times = {t for t, _, _ in expected_timeline(name, SHORT[name])}
+    return sorted({p for t in times for p in (t - 1, t, t + 1) if p >= 0})
+
+
+# ── Full runs ────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("name", PROCESSES)
+def test_single_process_timeline(harness, name):
+    harness.pm.start_single_process(name)
+    harness.clock.run_all()
+
+    assert harness.gpio.timeline == expected_timeline(name, harness.pm.timings[name])
+    assert harness.event_names() == ["process_start", "pump_start", "process_end",
+                                     "cycle_complete"]
+    assert harness.gpio.active() == set()
+    assert harness.pm.current_process is None
+    assert not harness.pm.is_running
+    assert harness.clock.pending == 0
+
+
+def test_auto_cycle_order_and_timeline(make_harness):
+    h = make_harness(SHORT)
+    h.pm.start_auto_cycle()
+
+    order = ["fast_rinse", "service", "back_wash", "forward_wash",
+             "service", "back_wash", "forward_wash"]
+    expected, t0 = [], 0
+    for name in order:
+        steps = expected_timeline(name, SHORT[name], t0)
+        expected += steps
+        t0 = steps[-1][0]
+    h.clock.run_until(t0)
+
+    starts = [d["name"] for _, e, d in h.events if e == "process_start"]
+    assert starts[:len(order)] == order
+    assert h.gpio.timeline[:len(expected)] == expected
+    assert h.pm.is_running
+
+
+@pytest.mark.parametrize("phase_at_ms", [0, PUMP_ENGAGE_DELAY + 1])
+def test_start_refused_while_busy(make_harness, phase_at_ms):
+    h = make_harness(SHORT)
+    assert h.pm.start_single_process("back_wash") is True
+    h.clock.run_until(phase_at_ms)
+    assert h.pm.start_single_process("fast_rinse") is False
+    assert h.pm.start_auto_cycle() is False
+    refused = [d["what"] for _, e, d in h.events if e == "start_refused"]
+    assert refused == ["fast_rinse", "auto cycle"]
+    h.clock.run_all()
+    assert h.gpio.timeline == expected_timeline("back_wash", SHORT["back_wash"])
+
+
+def test_start_refused_during_graceful_stop(make_harness):
+    h = make_harness(SHORT)
+    h.pm.start_single_process("service")
+    h.clock.run_until(PUMP_ENGAGE_DELAY + 1)
+    h.pm.stop_current_process()
+    h.pm.start_auto_cycle()
+    assert h.pm.phase == "stopping"
+    h.clock.run_all()
+    assert h.gpio.active() == set()
+    assert h.event_names().count("process_start") == 1
+
+
+def test_unknown_process_is_ignored(harness):
+    assert harness.pm.start_single_process("no_such_process") is False
+    assert harness.gpio.timeline == []
+    assert not harness.pm.is_running
+
+
+# ── Graceful stop ────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("name,at_ms", [(n, p) for n in PROCESSES for p in stop_points(n)])
+def test_stop_current_process_at_every_point(make_harness, name, at_ms):
+    h = make_harness(SHORT)
+    full = expected_timeline(name, SHORT[name])
+    finished_at = full[-1][0]
+    calls = []
+
+    h.pm.start_single_process(name)
+    h.clock.run_until(at_ms)
+    before = list(h.gpio.timeline)
+    assert before == [step for step in full if step[0] <= at_ms]
+
+    h.pm.stop_current_process(callback=lambda: calls.append(h.clock.now_ms))
+    h.clock.run_all()
+    after = h.gpio.timeline[len(before):]
+
+    assert h.gpio.active() == set()
+    assert h.pm.current_process is None
+    assert h.clock.pending == 0
+    if at_ms >= finished_at:
+        # Already finished: nothing to stop, callback runs straight away
+        assert after == []
+        assert calls == [at_ms]
+        return
+
+    pump = ProcessManager.PROCESS_CONFIG[name]["pump"]
+    assert after[0] == (at_ms, pump, False)   # pump first ...
+    close = at_ms + VALVE_CLOSE_DELAY         # ... then every channel after the delay
+    assert after[1:] == [(close, cid, False) for cid in OFF_ORDER]
+    assert calls == [close]
+    assert h.event_names().count("process_end") == 1
+    assert "cycle_complete" not in h.event_names()
+
+
+def test_stop_when_idle_calls_back_immediately(harness):
+    calls = []
+    harness.pm.stop_current_process(callback=lambda: calls.append(True))
+    assert calls == [True]
+    assert harness.gpio.timeline == []
+
+
+# ── Emergency stop ───────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("name,at_ms", [(n, p) for n in PROCESSES for p in stop_points(n)])
+def test_stop_immediately_at_every_point(make_harness, name, at_ms):
+    h = make_harness(SHORT)
+    h.pm.start_single_process(name)
+    h.clock.run_until(at_ms)
+    before = len(h.gpio.timeline)
+
+    h.pm.stop_immediately()
+
+    assert h.gpio.timeline[before:] == [(at_ms, cid, False) for cid in OFF_ORDER]
+    assert h.clock.pending == 0
+    assert not h.pm.is_running
+    assert h.pm.snapshot()["phase"] == "idle"
+    h.clock.run_all()
+    assert len(h.gpio.timeline) == before + len(OFF_ORDER)
+
+
+# ── Staged timings ───────────────────────────────────────────────────────────
+
+def test_staged_timings_wait_for_process_boundary(make_harness):
+    h = make_harness(SHORT)
+    h.pm.start_auto_cycle()
+    h.clock.run_until(PUMP_ENGAGE_DELAY + 1)
+
+    h.pm.stage_timings({**SHORT, "fast_rinse": 1_000, "service": 2_000})
+    assert h.pm.timings["fast_rinse"] == SHORT["fast_rinse"]
+
+    first = expected_timeline("fast_rinse", SHORT["fast_rinse"])
+    second = expected_timeline("service", 2_000, first[-1][0])
+    h.clock.run_until(second[-1][0])
+    assert h.gpio.timeline[:len(first) + len(second)] == first + second
+    changed = [d["changed"] for _, e, d in h.events if e == "timings_changed"]
+    assert changed == [["fast_rinse", "service"]]
+
+
+def test_fired_jobs_are_not_retained(make_harness):
+    # Cancel cost must not grow with how long the auto cycle has been running
+    h = make_harness(SHORT)
+    h.pm.start_auto_cycle()
+    h.clock.run_until(500 * 100_000)
+    assert len(h.pm._pending_jobs) == h.clock.pending
+
+
+# ── Pipelined transitions ────────────────────────────────────────────────────
+
+def masks_along(timeline) -> list[int]:
+    """Relay mask after every transition of a timeline."""
+    on, out = set(), []
+    for _, cid, is_on in timeline:
+        (on.add if is_on else on.discard)(cid)
+        out.append(mask_of(on))
+    return out
+
+
+def test_handoffs_follow_channel_overlap(harness):
+    assert harness.pm._handoffs == {
+        "fast_rinse": (1, 5),      # disjoint from valves 2, 3
+        "service": (3,),
+        "back_wash": (1, 4),
+        "forward_wash": (),        # valves 1 and 5 are still being switched
+    }
+
+
+def test_pipelined_cycle_preopens_and_starts_pumps_sooner(make_harness):
+    seq, pipe = make_harness(SHORT), make_harness(SHORT, pipelined=True)
+    for h in (seq, pipe):
+        h.pm.start_auto_cycle()
+        h.clock.run_until(600_000)
+
+    fast_rinse_pump_off = PUMP_ENGAGE_DELAY + SHORT["fast_rinse"]
+    assert (fast_rinse_pump_off, 1, True) in pipe.gpio.timeline
+    assert (fast_rinse_pump_off, 5, True) in pipe.gpio.timeline
+
+    def pump_starts(h):
+        return [t for t, e, d in h.events if e == "pump_start"]
+    # fast_rinse → service, service → back_wash and back_wash → forward_wash
+    # each gain the valve-opening delay; forward_wash → service gains nothing
+    saved = [s - p for s, p in zip(pump_starts(seq), pump_starts(pipe))]
+    step = PUMP_ENGAGE_DELAY
+    assert saved[:6] == [0, step, 2 * step, 3 * step, 3 * step, 4 * step]
+
+    for mask in masks_along(pipe.gpio.timeline):
+        assert violations(mask, DEFAULT_RULES) == []
+
+
+def test_pipelined_single_process_is_unchanged(make_harness):
+    h = make_harness(SHORT, pipelined=True)
+    h.pm.start_single_process("fast_rinse")
+    h.clock.run_all()
+    assert h.gpio.timeline == expected_timeline("fast_rinse", SHORT["fast_rinse"])
+
+
+def test_graceful_stop_closes_preopened_valves(make_harness):
+    h = make_harness(SHORT, pipelined=True)
+    h.pm.start_auto_cycle()
+    h.clock.run_until(PUMP_ENGAGE_DELAY + SHORT["fast_rinse"] + 1)
+    assert h.gpio.active() == {1, 2, 3, 5}
+    h.pm.stop_current_process()
+    h.clock.run_all()
+    assert h.gpio.active() == set()
+    assert h.event_names().count("process_start") == 1
+
+
+def test_cycle_report(harness):
+    report = harness.pm.cycle_report()
+    # Two of the three boundaries in the repeating loop save PUMP_ENGAGE_DELAY
+    assert report["sequential_loop_s"] - report["pipelined_loop_s"] == 2 * PUMP_ENGAGE_DELAY / 1000
+    assert report["gain_min_per_day"] > 0
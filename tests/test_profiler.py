@@ -0,0 +1,78 @@
+"""Sampling profiler: folding, bounded memory and export formats."""
+
+import json
+import threading
+import time
+
+from src.diagnostics.profiler import SamplingProfiler
+
+
+def _busy_worker(stop: threading.Event):
+    while not stop.is_set():
+        _hot_loop()
+
+
+def _hot_loop():
+    total = 0
+    for i in range(2_000):
+        total += i * i
+    return total
+
+
+def _profile(seconds=0.3, **kw) -> SamplingProfiler:
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_worker, args=(stop,), name="busy")
+    worker.start()
+    done = threading.Event()
+    profiler = SamplingProfiler(rate_hz=200, **kw)
+    profiler.start(seconds, on_done=lambda p: done.set())
+    try:
+        assert done.wait(5)
+    finally:
+        stop.set()
+        worker.join()
+    return profiler
+
+
+def test_hot_function_dominates_the_collapsed_stacks():
+    profiler = _profile()
+    stats = profiler.stats()
+    assert stats["samples"] > 20
+    lines = profiler.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy
+    stack, count = busy[0].rsplit(" ", 1)
+    assert "_busy_worker (test_profiler.py:" in stack
+    assert int(count) > 0
+    hot = sum(int(line.rsplit(" ", 1)[1]) for line in busy if "_hot_loop" in line)
+    assert hot > stats["samples"] / 2
+
+
+def test_speedscope_export_is_well_formed(tmp_path):
+    profiler = _profile()
+    path = profiler.save(tmp_path / "run.speedscope.json")
+    doc = json.loads(path.read_text())
+    frames = doc["shared"]["frames"]
+    busy = next(p for p in doc["profiles"] if p["name"] == "busy")
+    assert busy["type"] == "sampled" and len(busy["samples"]) == len(busy["weights"])
+    assert all(0 <= i < len(frames) for sample in busy["samples"] for i in sample)
+    assert any(frames[s[-1]]["name"] == "_hot_loop" for s in busy["samples"])
+    assert profiler.save(tmp_path / "run.folded").read_text() == profiler.collapsed()
+
+
+def test_memory_stays_bounded():
+    profiler = _profile(max_stacks=2, max_depth=3)
+    assert len(profiler.counts) <= 2 + len(profiler._thread_idx)
+    assert profiler.overflow > 0
+    assert all(len(key) <= 1 + 4 for key in profiler.counts)
+    assert "[other]" in profiler.collapsed()
+
+
+def test_stop_ends_an_open_ended_run_without_on_done():
+    called = []
+    profiler = SamplingProfiler(rate_hz=100)
+    profiler.start(on_done=called.append)
+    time.sleep(0.05)
+    profiler.stop()
+    assert not profiler.running and not called
+    assert profiler.stats()["seconds"] > 0
@@ -0,0 +1,55 @@
+"""Interlock rules and the exhaustive model checker."""
+
+from src.config import ALL_CHANNEL_IDS
+from src.hardware.mock_gpio import MockGPIO
+from src.safety.model_checker import ModelChecker
+from src.safety.rules import DEFAULT_RULES, Rule, mask_of, violations
+
+
+def test_rule_forms():
+    needs = Rule.requires("r", 6, any_of=[1, 2])
+    assert needs.violated(mask_of([6]))
+    assert not needs.violated(mask_of([6, 2]))
+    assert not needs.violated(mask_of([1]))
+
+    excl = Rule.exclusive("x", 6, 7)
+    assert excl.violated(mask_of([6, 7, 1]))
+    assert not excl.violated(mask_of([7, 3]))
+
+
+def test_process_configs_satisfy_default_rules():
+    from src.processes.process_manager import ProcessManager
+    for cfg in ProcessManager.PROCESS_CONFIG.values():
+        assert violations(mask_of(cfg["valves"] + [cfg["pump"]]), DEFAULT_RULES) == []
+
+
+def test_process_manager_alone_is_safe_in_every_interleaving():
+    result = ModelChecker(depth=40, manual=False).run()
+    assert result.ok, "\n".join(map(str, result.counterexamples))
+    assert result.closed
+    assert result.interleavings > 1_000_000
+
+
+def test_pipelined_transitions_are_safe_in_every_interleaving():
+    result = ModelChecker(depth=40, manual=False, pipelined=True).run()
+    assert result.ok, "\n".join(map(str, result.counterexamples))
+    assert result.closed
+
+
+def test_unchecked_manual_toggles_are_caught():
+    result = ModelChecker(depth=3, manual=True).run()
+    found = {c.rule: c for c in result.counterexamples}
+    assert set(found) == {"pump1_open_line", "pump2_open_line", "pumps_exclusive"}
+    assert [a for _, a in found["pump1_open_line"].trace] == ["toggle:6"]
+
+
+def test_checker_catches_valves_closed_before_pumps(monkeypatch):
+    def valves_first(self):
+        for cid in ALL_CHANNEL_IDS:
+            self.turn_off(cid)
+
+    monkeypatch.setattr(MockGPIO, "all_off", valves_first)
+    result = ModelChecker(depth=6, manual=False).run()
+    rules = {c.rule for c in result.counterexamples}
+    assert "pump1_open_line" in rules
+    assert any(a == "estop" for c in result.counterexamples for _, a in c.trace)
@@ -0,0 +1,180 @@
+"""Timer wheel against a brute-force reference, and the cycle calendar in virtual time."""
+
+import json
+import random
+from datetime import datetime
+
+import pytest
+
+from src.scheduler.cycle_calendar import CycleScheduler, Entry
+from src.scheduler.timer_wheel import TimerWheel
+from src.processes.process_manager import ProcessManager
+
+MONDAY = datetime(2026, 3, 2).timestamp()     # local midnight
+SHORT = {name: 20_000 for name in ProcessManager.PROCESS_CONFIG}
+
+
+# ── Timer wheel ──────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("seed", range(20))
+def test_wheel_matches_reference(seed):
+    rnd = random.Random(seed)
+    wheel = TimerWheel(now=rnd.randrange(10**8))
+    due, handles, n = {}, {}, 0
+    for _ in range(60):
+        for _ in range(rnd.randrange(8)):
+            span = rnd.choice([5, 100, 5_000, 300_000, 2 * 10**7, 5 * 10**7])
+            n += 1
+            due[n] = wheel.now + rnd.randrange(span)
+            handles[n] = wheel.add(due[n], n)
+        for key in rnd.sample(sorted(due), min(len(due), rnd.randrange(3))):
+            wheel.cancel(handles[key])
+            del due[key]
+        if due:
+            assert wheel.next_expiry() <= min(due.values())
+        target = wheel.now + rnd.choice([1, 60, 4_000, 10**6, 3 * 10**7])
+        expected = sorted((t, k) for k, t in due.items() if t <= target)
+        assert wheel.advance(target) == [k for _, k in expected]
+        for _, k in expected:
+            del due[k]
+        assert len(wheel) == len(due)
+
+
+def test_wheel_past_expiry_fires_on_next_advance():
+    wheel = TimerWheel(now=1_000)
+    wheel.add(10, "late")
+    assert wheel.next_expiry() == 1_000
+    assert wheel.advance(1_000) == ["late"]
+    assert wheel.next_expiry() is None
+
+
+# ── Entries ──────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("raw", [
+    {"kind": "nap", "at": "10:00"},
+    {"kind": "start", "at": "25:00"},
+    {"kind": "start", "at": "10:00", "days": ["funday"]},
+    {"kind": "process", "at": "10:00", "process": "rinse_cycle"},
+    {"kind": "pause", "at": "10:00"},
+    {"kind": "maintenance", "at": "10:00", "until": "11:00", "on": "tomorrow"},
+])
+def test_invalid_entries_are_rejected(raw):
+    with pytest.raises(ValueError):
+        Entry.parse(raw, ProcessManager.PROCESS_CONFIG)
+
+
+def test_weekly_occurrences_and_overnight_windows():
+    wed = Entry.parse({"kind": "start", "at": "06:30", "days": ["wed"]}, {})
+    assert wed.next_start(MONDAY) == MONDAY + 2 * 86_400 + 6.5 * 3600
+    night = Entry.parse({"kind": "pause", "at": "22:00", "until": "02:00"}, {})
+    assert night.length_s == 4 * 3600
+    # 01:00 on Tuesday is inside the window that began Monday 22:00
+    assert night.window_at(MONDAY + 86_400 + 3600) == (MONDAY + 22 * 3600,
+                                                      MONDAY + 26 * 3600)
+
+
+# ── Scheduler ────────────────────────────────────────────────────────────────
+
+class Calendar:
+    def __init__(self, harness, tmp_path, entries):
+        self.h = harness
+        self.path = tmp_path / "schedule.json"
+        self.path.write_text(json.dumps({"entries": entries}))
+        self.sched = self.new()
+
+    def new(self):
+        return CycleScheduler(self.h.clock, self.h.pm, self.path,
+                              clock=lambda: MONDAY + self.h.clock.now_ms / 1000)
+
+    def run_to(self, hh_mm: str, day: int = 0):
+        h, m = map(int, hh_mm.split(":"))
+        return self.h.clock.run_until(((day * 24 + h) * 60 + m) * 60_000)
+
+
+@pytest.fixture
+def calendar(make_harness, tmp_path):
+    return lambda entries: Calendar(make_harness(SHORT), tmp_path, entries)
+
+
+def test_scheduled_start_without_polling(calendar):
+    cal = calendar([{"kind": "start", "at": "22:00"}])
+    cal.sched.start()
+    fired = cal.run_to("21:59")
+    assert cal.h.pm.current_process is None
+    assert fired <= 22 * 3600 // cal.sched.max_sleep_s + 1   # one wakeup per sleep cap
+    cal.run_to("22:00")
+    assert cal.h.pm.auto_cycle
+
+
+def test_pause_window_stops_and_resumes(calendar):
+    cal = calendar([{"kind": "start", "at": "10:00"},
+                    {"kind": "pause", "at": "17:00", "until": "21:00"}])
+    cal.sched.start()
+    cal.run_to("16:59")
+    assert cal.h.pm.auto_cycle
+    cal.run_to("17:01")
+    assert cal.h.pm.current_process is None and cal.sched.blocked
+    assert json.loads(cal.sched.state_path.read_text()) == {"resume": True}
+    cal.run_to("21:00")
+    assert cal.h.pm.auto_cycle and not cal.sched.blocked
+
+
+def test_start_inside_pause_waits_for_its_end(calendar):
+    cal = calendar([{"kind": "start", "at": "18:00"},
+                    {"kind": "pause", "at": "17:00", "until": "21:00"}])
+    cal.sched.start()
+    cal.run_to("20:59")
+    assert cal.h.pm.current_process is None
+    cal.run_to("21:00")
+    assert cal.h.pm.auto_cycle
+
+
+def test_maintenance_skips_starts(calendar):
+    cal = calendar([{"kind": "start", "at": "09:00"},
+                    {"kind": "maintenance", "on": "2026-03-02", "at": "08:00", "until": "12:00"}])
+    cal.sched.start()
+    cal.run_to("12:30")
+    assert cal.h.pm.current_process is None
+    cal.run_to("09:01", day=1)                # Tuesday: no maintenance
+    assert cal.h.pm.auto_cycle
+
+
+def test_fixed_time_back_wash_interrupts_and_resumes_cycle(calendar):
+    cal = calendar([{"kind": "start", "at": "05:00"},
+                    {"kind": "process", "at": "06:00", "process": "back_wash"}])
+    cal.sched.start()
+    cal.run_to("06:00")
+    h = cal.h
+    assert h.pm.phase == "stopping"
+    h.clock.run_until(h.clock.now_ms + 10_000)
+    assert h.pm.current_process == "back_wash" and not h.pm.auto_cycle
+    h.clock.run_until(h.clock.now_ms + 60_000)
+    assert h.pm.auto_cycle
+    six = 6 * 3_600_000
+    starts = [d["name"] for t, e, d in h.events if e == "process_start" and t >= six]
+    assert starts[:2] == ["back_wash", "fast_rinse"]
+
+
+def test_resume_survives_restart(calendar):
+    cal = calendar([{"kind": "start", "at": "10:00"},
+                    {"kind": "pause", "at": "17:00", "until": "21:00"}])
+    cal.sched.start()
+    cal.run_to("18:00")
+    cal.sched.stop()                          # controller goes down inside the pause
+
+    cal.h.clock.run_until(cal.h.clock.now_ms + 4 * 3_600_000)   # back up at 22:00
+    again = cal.new()
+    again.start()
+    assert cal.h.pm.auto_cycle
+    assert json.loads(again.state_path.read_text()) == {"resume": False}
+
+
+def test_clock_jump_replans_instead_of_replaying(calendar):
+    cal = calendar([{"kind": "start", "at": "10:00"}])
+    offset = [0]
+    cal.sched._clock = lambda: MONDAY + cal.h.clock.now_ms / 1000 + offset[0]
+    cal.sched.start()
+    cal.run_to("08:00")
+    offset[0] = 3 * 86_400                    # NTP catches up three days at once
+    cal.run_to("08:20")
+    assert cal.h.pm.current_process is None   # missed 10:00 starts are not replayed
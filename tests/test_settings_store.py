@@ -0,0 +1,57 @@
+"""Timings store: debounced atomic writes, version history, recovery from damage."""
+
+import json
+
+from src.config import DEFAULT_TIMINGS
+from src.processes.process_manager import ProcessManager
+from src.processes.settings_store import SettingsStore, atomic_write
+
+
+def _store(tmp_path, **kw):
+    return SettingsStore(tmp_path / "timings.json", DEFAULT_TIMINGS,
+                         ProcessManager.PROCESS_CONFIG, debounce_s=3600, **kw)
+
+
+def test_updates_are_debounced_then_written_whole_and_versioned(tmp_path):
+    store = _store(tmp_path)
+    key = next(iter(DEFAULT_TIMINGS))
+    store.update({key: 1234})
+    store.update({key: 5678})
+    assert not store.path.exists()                   # still inside the debounce window
+    store.flush()
+
+    on_disk = json.loads(store.path.read_text())
+    assert on_disk[key] == 5678 and on_disk["_version"] == 1
+    assert not list(tmp_path.glob(".*.tmp"))
+    assert [p.name[:7] for p in store.history_dir.glob("v*.json")] == ["v000001"]
+    assert _store(tmp_path).get(key) == 5678
+
+
+def test_history_is_bounded(tmp_path):
+    store = _store(tmp_path, history_limit=3)
+    key = next(iter(DEFAULT_TIMINGS))
+    for ms in range(1000, 1005):
+        store.update({key: ms})
+        store.flush()
+    names = sorted(p.name[:7] for p in store.history_dir.glob("v*.json"))
+    assert names == ["v000003", "v000004", "v000005"]
+
+
+def test_damaged_main_file_falls_back_to_the_newest_good_version(tmp_path):
+    store = _store(tmp_path)
+    key = next(iter(DEFAULT_TIMINGS))
+    for ms in (1111, 2222):
+        store.update({key: ms})
+        store.flush()
+    store.path.write_text('{"' + key + '": 33')      # torn by a bad editor or card
+    newest = max(store.history_dir.glob("v*.json"))
+    atomic_write(newest, '{"' + key + '": "soon"}', sync_dir=False)   # invalid value
+
+    recovered = _store(tmp_path)
+    assert recovered.get(key) == 1111 and recovered.version == 1
+
+
+def test_unknown_keys_are_dropped_and_nothing_valid_means_defaults(tmp_path):
+    (tmp_path / "timings.json").write_text('{"no_such_step": 5}')
+    store = _store(tmp_path)
+    assert store.data == DEFAULT_TIMINGS
@@ -0,0 +1,10 @@
+"""Smoke run of the scheduling benchmarks (small sizes, no timing asserts)."""
+
+from src.sim import bench
+
+
+def test_bench_runs_headless():
+    results = bench.run(cycles=20, jobs=2_000)
+    assert results["cycles"]["callbacks"] > 20 * 4 * 5
+    assert results["cancel_warm"]["pending_after"] == 0
+    assert results["cancel_cold"]["pending_after"] == 0
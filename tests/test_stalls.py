@@ -0,0 +1,69 @@
+"""Loop stall detector: lateness, stack sampling and per-call-site aggregation."""
+
+import sys
+import threading
+import time
+
+from src.control.loop import EventLoop
+from src.diagnostics.stalls import UNSAMPLED, StallDetector, call_site
+
+
+class SlowRenderer:
+    def _render(self):
+        time.sleep(0.25)
+
+
+def _run(loop, detector, jobs, until_ms):
+    detector.start()
+    for at, job in jobs:
+        loop.after(at, job)
+    loop.after(until_ms, loop.stop)
+    loop.run()
+    detector.stop()
+    loop.close()
+
+
+def test_stalls_are_filed_under_the_blocking_call_site():
+    loop = EventLoop()
+    seen = []
+    detector = StallDetector(loop, interval_ms=20, threshold_ms=60, sample_ms=10,
+                             on_stall=lambda site, ms: seen.append((site, ms)))
+    renderer = SlowRenderer()
+    _run(loop, detector, [(50, renderer._render), (400, renderer._render)], 700)
+
+    assert detector.stalls == 2
+    (site, ms), _ = seen
+    assert site == "SlowRenderer._render"
+    assert ms > 150
+    top = detector.top()
+    assert top[0]["site"] == "SlowRenderer._render" and top[0]["count"] == 2
+    assert any("SlowRenderer._render" in frame for frame in top[0]["stack"])
+    assert "SlowRenderer._render" in detector.report()
+    assert detector.metrics()["max_stall_ms"] >= 150
+
+
+def test_a_punctual_loop_records_nothing():
+    loop = EventLoop()
+    detector = StallDetector(loop, interval_ms=20, threshold_ms=60, sample_ms=10)
+    _run(loop, detector, [], 200)
+    assert detector.beats >= 5
+    assert detector.stalls == 0 and detector.samples == 0
+
+
+def test_site_names_the_library_call_our_code_is_blocked_in():
+    class Dialog:
+        def show(self):
+            threading.Event().wait(0.25)
+
+    loop = EventLoop()
+    detector = StallDetector(loop, interval_ms=20, threshold_ms=60, sample_ms=10)
+    _run(loop, detector, [(50, Dialog().show)], 400)
+    site = detector.top()[0]["site"]
+    assert site.endswith("Dialog.show > Condition.wait")
+    assert site != UNSAMPLED
+
+
+def test_call_site_of_a_frame_in_our_own_code_is_its_qualname():
+    site, stack = call_site(sys._getframe())
+    assert site == "test_call_site_of_a_frame_in_our_own_code_is_its_qualname"
+    assert stack[-1].startswith(site + " (test_stalls.py:")
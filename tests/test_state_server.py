@@ -0,0 +1,114 @@
+"""WebSocket state stream: handshake, full state then deltas, ping, plain GET, shutdown."""
+
+import base64
+import hashlib
+import json
+import os
+import socket
+import struct
+
+import pytest
+
+from src.remote.state_server import StateStreamServer
+
+
+@pytest.fixture
+def server():
+    srv = StateStreamServer("127.0.0.1", 0)
+    srv.start()
+    yield srv
+    srv.stop()
+
+
+def _connect(port):
+    sock = socket.create_connection(("127.0.0.1", port), timeout=2)
+    key = base64.b64encode(os.urandom(16))
+    sock.sendall(b"GET / HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\n"
+                 b"Connection: Upgrade\r\nSec-WebSocket-Key: " + key +
+                 b"\r\nSec-WebSocket-Version: 13\r\n\r\n")
+    head = _read_until(sock, b"\r\n\r\n")
+    expected = base64.b64encode(hashlib.sha1(
+        key + b"258EAFA5-E914-47DA-95CA-C5AB0DC11B85").digest())
+    assert head.startswith(b"HTTP/1.1 101") and expected in head
+    return sock
+
+
+def _read_until(sock, marker):
+    data = b""
+    while marker not in data:
+        chunk = sock.recv(1)
+        assert chunk, "connection closed"
+        data += chunk
+    return data
+
+
+def _recv_exact(sock, n):
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        assert chunk, "connection closed"
+        data += chunk
+    return data
+
+
+def _read_frame(sock):
+    b1, b2 = _recv_exact(sock, 2)
+    length = b2 & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", _recv_exact(sock, 2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", _recv_exact(sock, 8))
+    return b1 & 0x0F, _recv_exact(sock, length)
+
+
+def _send_frame(sock, opcode, payload=b""):
+    mask = os.urandom(4)
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    sock.sendall(struct.pack("!BB", 0x80 | opcode, 0x80 | len(payload)) + mask + masked)
+
+
+def test_viewer_gets_full_state_then_only_changes(server):
+    server.publish({"mask": 0, "process": None, "phase": "idle"})
+    sock = _connect(server.port)
+    opcode, payload = _read_frame(sock)
+    first = json.loads(payload)
+    assert opcode == 0x1 and first["phase"] == "idle" and first["seq"] == 1
+
+    server.publish({"mask": 5, "process": None, "phase": "idle"})
+    delta = json.loads(_read_frame(sock)[1])
+    assert delta["mask"] == 5 and delta["seq"] == 2
+    assert "phase" not in delta and "process" not in delta
+    sock.close()
+
+
+def test_ping_is_answered_and_close_is_echoed(server):
+    sock = _connect(server.port)
+    _read_frame(sock)
+    _send_frame(sock, 0x9, b"hi")
+    assert _read_frame(sock) == (0xA, b"hi")
+    _send_frame(sock, 0x8, b"\x03\xe8")
+    assert _read_frame(sock) == (0x8, b"\x03\xe8")
+    sock.close()
+
+
+def test_plain_get_returns_the_state_as_json(server):
+    server.publish({"mask": 3})
+    sock = socket.create_connection(("127.0.0.1", server.port), timeout=2)
+    sock.sendall(b"GET / HTTP/1.1\r\nHost: x\r\n\r\n")
+    data = b""
+    while chunk := sock.recv(4096):
+        data += chunk
+    head, body = data.split(b"\r\n\r\n", 1)
+    assert head.startswith(b"HTTP/1.1 200") and json.loads(body)["mask"] == 3
+
+
+def test_stop_closes_viewers_and_the_listening_socket():
+    srv = StateStreamServer("127.0.0.1", 0)
+    srv.start()
+    sock = _connect(srv.port)
+    _read_frame(sock)
+    srv.stop()
+    assert srv.client_count == 0
+    assert sock.recv(1) == b""                      # viewer connection closed
+    with pytest.raises(OSError):
+        socket.create_connection(("127.0.0.1", srv.port), timeout=1)
@@ -0,0 +1,125 @@
+"""Toggle taps: debounce, coalescing of queued taps, and tap-to-paint latency."""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from src.hardware.mock_gpio import MockGPIO
+from src.sim.virtual_scheduler import VirtualScheduler
+from src.ui.taps import TapLatency, ToggleTaps
+from src.ui.widgets import ChannelStateView
+
+
+class SlowGPIO(MockGPIO):
+    """Each relay write takes `write_ms` of virtual time."""
+
+    def __init__(self, sched, write_ms=30):
+        super().__init__()
+        self.sched = sched
+        self.write_ms = write_ms
+        self.writes = 0
+
+    def turn_on(self, channel_id):
+        self.sched.now_ms += self.write_ms
+        self.writes += 1
+        super().turn_on(channel_id)
+
+    def turn_off(self, channel_id):
+        self.sched.now_ms += self.write_ms
+        self.writes += 1
+        super().turn_off(channel_id)
+
+
+def _rig(debounce_ms=250, target_ms=100):
+    sched = VirtualScheduler()
+    gpio = SlowGPIO(sched)
+    latency = TapLatency(target_ms, clock=lambda: sched.now_ms / 1000)
+    taps = ToggleTaps(sched, gpio.toggle, debounce_ms, latency=latency,
+                      clock=lambda: sched.now_ms / 1000)
+    ChannelStateView(sched, gpio.state, lambda cid, on: latency.drawn(sched, cid))
+    return sched, gpio, latency, taps
+
+
+def _tap(t):
+    return SimpleNamespace(time=t)
+
+
+def test_double_tap_toggles_once():
+    sched, gpio, latency, taps = _rig()
+    taps.tap(1, _tap(10_000))
+    taps.tap(1, _tap(10_120))                    # second half of a double tap
+    sched.run_all()
+    assert gpio.is_on(1) and gpio.writes == 1
+    assert taps.debounced == 1
+
+    taps.tap(1, _tap(10_600))                    # a deliberate second tap
+    sched.run_all()
+    assert not gpio.is_on(1) and gpio.writes == 2
+
+
+def test_taps_queued_behind_a_busy_loop_coalesce_per_channel():
+    sched, gpio, latency, taps = _rig()
+    for t in (10_000, 10_400, 10_800):           # far apart, but all still queued
+        taps.tap(1, _tap(t))
+    taps.tap(2, _tap(10_500))
+    sched.run_all()
+    assert gpio.is_on(1) and gpio.is_on(2) and gpio.writes == 2
+    assert taps.coalesced == 2 and taps.debounced == 0
+
+
+def test_latency_spans_queue_write_and_paint():
+    sched, gpio, latency, taps = _rig(target_ms=50)
+    sched.now_ms = 1_000
+    taps.tap(1, _tap(500_000))                   # handled at once: sets the baseline
+    sched.run_all()
+    assert latency.stats()["max_ms"] == 30       # one relay write
+
+    sched.now_ms = 2_000
+    taps.tap(2, _tap(500_960))                   # sat in the queue for 40 ms
+    sched.run_all()
+    s = latency.stats()
+    assert s["taps"] == 2 and s["max_ms"] == 70
+    assert s["over_target"] == 1
+    assert "2 taps" in latency.report()
+
+
+def test_cancelled_taps_leave_no_open_measurement():
+    sched, gpio, latency, taps = _rig()
+    taps.tap(3, _tap(1_000))
+    taps.cancel()
+    sched.run_all()
+    assert gpio.writes == 0 and not latency._open and latency.stats()["taps"] == 0
+
+
+@pytest.mark.skipif(not os.environ.get("DISPLAY"), reason="needs a display (run under xvfb-run)")
+def test_manual_frame_meets_the_tap_latency_target():
+    """End to end on a real Tk canvas; CI runs it under Xvfb."""
+    import tkinter as tk
+
+    from src.config import TAP_TARGET_MS
+    from src.ui.frames.manual_frame import ManualFrame
+    from src.ui.idle import IdleManager
+    from src.ui.theme import apply_theme
+
+    root = tk.Tk()
+    try:
+        apply_theme(root)
+        app = SimpleNamespace(gpio=MockGPIO(), idle=IdleManager(root, 0),
+                              tap_latency=TapLatency(TAP_TARGET_MS))
+        frame = ManualFrame(root, app)
+        frame.pack()
+        root.update()
+        card = frame._cards[1]
+        for i in range(20):
+            # A double tap each time: only the first half may reach the relay
+            t = 1_000 + i * 1_000
+            card.event_generate("<Button-1>", x=20, y=20, time=t, when="tail")
+            card.event_generate("<Button-1>", x=20, y=20, time=t + 80, when="tail")
+            root.update()
+        s = app.tap_latency.stats()
+        assert frame._taps.debounced == 20
+        assert s["taps"] == 20 and not app.gpio.is_on(1)
+        assert s["p95_ms"] <= TAP_TARGET_MS
+    finally:
+        root.destroy()
@@ -0,0 +1,105 @@
+"""Telemetry outbox (framing, cursor, crash replay) and the QoS1 uplink on MockBroker."""
+
+import threading
+
+import pytest
+
+from src.telemetry.mock_broker import MockBroker
+from src.telemetry.outbox import Outbox, decode_batch
+from src.telemetry.uplink import TelemetryCollector, TelemetryUplink
+
+
+def _fill(outbox, batches, per_batch=3, start=0):
+    for b in range(batches):
+        for i in range(per_batch):
+            outbox.append({"t": 1.0, "e": "valve", "c": start + b, "on": i % 2})
+        outbox.flush()
+
+
+def _records(payloads):
+    return [r for p in payloads for r in decode_batch(p)[1]]
+
+
+def test_batches_are_framed_into_size_capped_segments(tmp_path):
+    outbox = Outbox(tmp_path, segment_bytes=200)
+    _fill(outbox, 6)
+    segments = sorted(p.name for p in tmp_path.glob("seg-*.bin"))
+    assert len(segments) > 1 and segments[0] == "seg-000000000001.bin"
+    batches = [payload for _, payload in outbox.pending()]
+    assert [decode_batch(p)[0] for p in batches] == [1, 2, 3, 4, 5, 6]
+    assert [r["c"] for r in _records(batches)] == [c for c in range(6) for _ in range(3)]
+
+
+def test_commit_survives_a_restart_and_drops_spent_segments(tmp_path):
+    outbox = Outbox(tmp_path, segment_bytes=200)
+    _fill(outbox, 6)
+    positions = [pos for pos, _ in outbox.pending()]
+    assert positions[0][0] != positions[4][0]       # batches 1-4 fill the first segment
+    outbox.commit(positions[4])
+
+    reopened = Outbox(tmp_path, segment_bytes=200)
+    assert [decode_batch(p)[0] for _, p in reopened.pending()] == [6]
+    assert [p.name for p in tmp_path.glob("seg-*.bin")] == [positions[4][0]]
+
+
+def test_torn_tail_is_cut_and_numbering_resumes(tmp_path):
+    outbox = Outbox(tmp_path)
+    _fill(outbox, 2)
+    seg = next(tmp_path.glob("seg-*.bin"))
+    good_size = seg.stat().st_size
+    with open(seg, "ab") as f:                      # crash halfway through a frame
+        f.write(b"\x40\x00\x00\x00\xde\xad\xbe\xefpartial")
+
+    replayed = Outbox(tmp_path)
+    assert seg.stat().st_size == good_size
+    assert [decode_batch(p)[0] for _, p in replayed.pending()] == [1, 2]
+    _fill(replayed, 1, start=9)
+    assert [decode_batch(p)[0] for _, p in replayed.pending()] == [1, 2, 3]
+
+
+def test_append_does_not_wait_for_disk_writes(tmp_path):
+    outbox = Outbox(tmp_path)
+    done = threading.Event()
+    with outbox._io_lock:                           # a flush busy on the SD card
+        threading.Thread(target=lambda: (outbox.append({"e": "x"}), done.set())).start()
+        assert done.wait(1)
+    assert outbox.buffered == 1
+
+
+def test_uplink_delivers_and_commits(tmp_path):
+    outbox = Outbox(tmp_path)
+    broker = MockBroker()
+    collector = TelemetryCollector(outbox, clock=lambda: 5.0)
+    collector.record("cycle_complete")
+    outbox.flush()
+    uplink = TelemetryUplink(outbox, broker, "uf/unit1")
+    assert uplink.drain_once() == 1
+    assert broker.received[0][0] == "uf/unit1"
+    assert _records([broker.received[0][1]]) == [{"t": 5.0, "e": "cycle_complete"}]
+    assert not outbox.has_pending() and uplink.drain_once() == 0
+
+
+def test_qos1_link_drop_mid_replay_resends_only_unacked_batches(tmp_path):
+    outbox = Outbox(tmp_path)
+    _fill(outbox, 5)
+    broker = MockBroker()
+    broker.drop_after = 2
+    uplink = TelemetryUplink(outbox, broker, "uf/unit1")
+    with pytest.raises(OSError):
+        uplink.drain_once()
+    assert len(broker.received) == 2
+
+    broker.online = True
+    assert uplink.drain_once() == 3
+    seqs = [decode_batch(p)[0] for _, p in broker.received]
+    assert seqs == [1, 2, 3, 4, 5]                  # nothing lost, nothing twice
+
+
+def test_dead_link_keeps_everything_queued(tmp_path):
+    outbox = Outbox(tmp_path)
+    _fill(outbox, 2)
+    broker = MockBroker()
+    broker.online = False
+    with pytest.raises(OSError):
+        TelemetryUplink(outbox, broker, "t").drain_once()
+    assert len(list(outbox.pending())) == 2 and broker.connects == 0
@@ -0,0 +1,117 @@
+"""TkBridge: cross-thread hand-off onto a loop, driven here by the daemon's EventLoop."""
+
+import os
+import signal
+import statistics
+import threading
+import time
+
+from src.control.loop import EventLoop
+from src.tk_bridge import TkBridge
+
+
+def _run_until(loop, cond, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "timed out"
+        loop.after(50, lambda: None)
+        loop._run_once()
+
+
+def test_posts_from_another_thread_arrive_within_milliseconds():
+    loop = EventLoop()
+    bridge = TkBridge(loop)
+    latencies = []
+
+    def producer():
+        for _ in range(100):
+            bridge.post(lambda t0: latencies.append(time.perf_counter() - t0),
+                        time.perf_counter())
+            time.sleep(0.002)
+
+    threading.Thread(target=producer).start()
+    _run_until(loop, lambda: len(latencies) == 100)
+    bridge.close()
+    loop.close()
+    assert bridge.mode == "fd"
+    assert statistics.median(latencies) < 0.010
+
+
+def test_burst_is_drained_in_one_batch_and_in_order():
+    loop = EventLoop()
+    bridge = TkBridge(loop)
+    seen = []
+    t = threading.Thread(target=lambda: [bridge.post(seen.append, i) for i in range(1000)])
+    t.start()
+    t.join()
+    _run_until(loop, lambda: len(seen) == 1000)
+    assert seen == list(range(1000))
+    assert bridge.drains == 1 and bridge.max_batch == 1000
+    bridge.close()
+    loop.close()
+
+
+def test_drain_yields_to_the_loop_when_over_budget():
+    loop = EventLoop()
+    bridge = TkBridge(loop, budget_ms=3)
+    seen = []
+    for i in range(20):
+        bridge.post(lambda i=i: (time.sleep(0.001), seen.append(i)))
+    ticks = []
+    loop.after(0, ticks.append, "timer")      # due now: must not wait for all 20
+    _run_until(loop, lambda: len(seen) == 20)
+    assert seen == list(range(20))
+    assert bridge.yields >= 2
+    assert ticks == ["timer"]
+    bridge.close()
+    loop.close()
+
+
+def test_failing_call_does_not_stop_the_drain():
+    loop = EventLoop()
+    bridge = TkBridge(loop)
+    seen = []
+    bridge.post(lambda: 1 / 0)
+    bridge.post(seen.append, "after")
+    _run_until(loop, lambda: seen)
+    bridge.close()
+    loop.close()
+
+
+def test_signal_is_delivered_through_the_bridge():
+    loop = EventLoop()
+    seen = []
+    old = signal.getsignal(signal.SIGUSR1)
+    try:
+        loop.bridge.post_on_signal([signal.SIGUSR1], lambda: seen.append("usr1"))
+        os.kill(os.getpid(), signal.SIGUSR1)
+        _run_until(loop, lambda: seen)
+    finally:
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGUSR1, old)
+        loop.close()
+    assert seen == ["usr1"]
+
+
+def test_process_manager_runs_bridged_calls_inside_an_event_hold(tmp_path):
+    from src.config import DEFAULT_TIMINGS
+    from src.hardware.mock_gpio import MockGPIO
+    from src.processes.process_manager import ProcessManager
+    from src.processes.settings_store import SettingsStore
+
+    loop = EventLoop()
+    store = SettingsStore(tmp_path / "timings.json", DEFAULT_TIMINGS,
+                          ProcessManager.PROCESS_CONFIG, debounce_s=3600)
+    pm = ProcessManager(MockGPIO(), loop, settings=store)
+    assert pm.bridge is loop.bridge
+    order = []
+    pm.add_listener(lambda e, d: order.append(e))
+
+    def switch_from_worker():
+        pm.gpio.turn_on(1)
+        order.append("switched")
+
+    threading.Thread(target=pm.call_soon_threadsafe, args=(switch_from_worker,)).start()
+    _run_until(loop, lambda: "valve" in order)
+    assert order == ["switched", "valve"]       # subscribers heard after the relay work
+    loop.close()
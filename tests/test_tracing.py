@@ -0,0 +1,105 @@
+"""Span tracing: per-thread buffers, Chrome trace export, and the relay → redraw flow."""
+
+import json
+import threading
+
+import pytest
+
+from src.control.loop import EventLoop
+from src.diagnostics import tracing
+from src.hardware.mock_gpio import MockGPIO
+from src.processes.process_manager import ProcessManager
+
+
+@pytest.fixture(autouse=True)
+def _tracing_off_afterwards():
+    yield
+    tracing.disable()
+
+
+def _balanced(events) -> bool:
+    depth = {}
+    for ev in events:
+        if ev["ph"] == "B":
+            depth[ev["tid"]] = depth.get(ev["tid"], 0) + 1
+        elif ev["ph"] == "E":
+            depth[ev["tid"]] -= 1
+            if depth[ev["tid"]] < 0:
+                return False
+    return not any(depth.values())
+
+
+def test_disabled_tracing_records_nothing():
+    tracing.enable()
+    tracing.disable()
+    gpio = MockGPIO()
+    gpio.turn_on(1)
+    gpio.turn_off(1)
+    events = tracing.chrome_trace()["traceEvents"]
+    assert not [ev for ev in events if ev["ph"] != "M"]
+
+
+def test_threads_record_into_their_own_buffers():
+    tracing.enable(capacity=10)
+
+    def work():
+        for i in range(25):
+            tracing.begin("work", i=i)
+            tracing.end()
+
+    t = threading.Thread(target=work, name="worker")
+    t.start()
+    t.join()
+    tracing.instant("main")
+    doc = tracing.chrome_trace()
+    names = {ev["tid"]: ev["args"]["name"] for ev in doc["traceEvents"] if ev["ph"] == "M"}
+    assert "worker" in names.values()
+    worker = [ev for ev in doc["traceEvents"]
+              if names.get(ev["tid"]) == "worker" and ev["ph"] != "M"]
+    assert len(worker) == 10                    # ring buffer kept the newest
+    assert worker[-1]["ph"] == "E" and worker[-2]["args"] == {"i": 24}
+    json.dumps(doc)
+
+
+def test_relay_write_flows_into_the_batched_redraw():
+    loop = EventLoop()
+    pm = ProcessManager(MockGPIO(), loop)
+    pm.pump_delay_ms = pm.close_delay_ms = 20
+    redraws = []
+    pm.events.subscribe(lambda e, d: redraws.append(d), "valves", name="ui")
+    tracing.enable()
+    pm.start_single_process("back_wash")
+    loop.after(60, pm.stop_immediately)
+    loop.after(80, loop.stop)
+    loop.run()
+    loop.close()
+    events = tracing.chrome_trace()["traceEvents"]
+
+    assert redraws
+    names = [ev.get("name") for ev in events if ev["ph"] == "B"]
+    assert "gpio.on" in names and "pm.pump_on" in names
+    assert "pm.flush_valves" in names and "ui" in names
+    starts = {ev["id"] for ev in events if ev["ph"] == "s"}
+    ends = {ev["id"] for ev in events if ev["ph"] == "f"}
+    assert starts and starts <= ends
+    assert _balanced([ev for ev in events if ev["ph"] in "BE"])
+
+
+def test_a_step_that_raises_still_closes_its_span(harness):
+    tracing.enable()
+
+    def boom(*_):
+        raise RuntimeError("relay driver fault")
+
+    harness.pm._schedule(0, boom, "boom")
+    with pytest.raises(RuntimeError):
+        harness.clock.run_all()
+    with pytest.raises(RuntimeError):
+        harness.pm._run_held(boom, ())
+    tracing.begin("after", "test")
+    tracing.end()
+    events = tracing.chrome_trace()["traceEvents"]
+    assert _balanced(events)
+    assert [ev["name"] for ev in events if ev["ph"] == "B"] == \
+        ["pm.boom", "pm.call_soon:test_a_step_that_raises_still_closes_its_span.<locals>.boom",
+         "after"]
@@ -0,0 +1,70 @@
+"""Screens that start a process: a refused start must leave them usable."""
+
+from src.ui import app as app_module
+from src.ui.app import App
+from src.ui.frames.manual_steps_frame import ManualStepsFrame
+
+
+class Recorder:
+    """Stands in for a widget or frame; records the calls made on it."""
+
+    def __init__(self, log, name):
+        self._log, self._name = log, name
+
+    def __getattr__(self, attr):
+        return lambda *a, **kw: self._log.append((self._name, attr, a, kw))
+
+
+def _app(harness, log, current="select"):
+    app = App.__new__(App)                      # the routing only, no Tk window
+    app.process_manager = harness.pm
+    app.frames = {"auto": Recorder(log, "auto")}
+    app._ui_sub = None
+    app._current_frame = current
+    app.root = None
+
+    def show_frame(name):
+        app._current_frame = name
+        log.append(("app", "show_frame", (name,), {}))
+    app.show_frame = show_frame
+    return app
+
+
+def test_a_refused_auto_cycle_keeps_the_current_screen(harness, monkeypatch):
+    dialogs = []
+    monkeypatch.setattr(app_module, "CustomDialog", lambda *a, **kw: dialogs.append(a))
+    log = []
+    app = _app(harness, log)
+    harness.pm.start_single_process("back_wash")
+
+    app.start_auto_cycle()
+    assert app._current_frame == "select" and log == []
+    assert "back_wash is" in dialogs[0][2]
+    assert app._ui_sub is None                  # a later start elsewhere is not routed here
+
+    harness.clock.run_all()
+    app.start_auto_cycle()
+    assert app._current_frame == "auto"
+    assert [call[1] for call in log[:2]] == ["show_frame", "on_process_start"]
+
+
+def test_a_refused_step_unlocks_the_step_frame(harness):
+    log = []
+    app = _app(harness, log, current="manual_steps")
+    frame = ManualStepsFrame.__new__(ManualStepsFrame)
+    frame.app = app
+    frame._current = None
+    frame._locked = False
+    frame._cards = {"fast_rinse": Recorder(log, "card")}
+    frame._status = Recorder(log, "status")
+    harness.pm.start_single_process("back_wash")
+
+    frame._toggle_process("fast_rinse")
+    assert not frame._locked and frame._current is None
+    assert ("card", "set_idle", (), {}) in log
+    assert "not started" in log[-1][3]["text"]
+
+    harness.clock.run_all()
+    frame._toggle_process("fast_rinse")
+    assert frame._current == "fast_rinse" and not frame._locked
+    assert log[-1][0] == "card" and log[-1][1] == "set_running"
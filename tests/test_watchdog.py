@@ -0,0 +1,104 @@
+"""Hardware watchdog: fed while the loop keeps time, starved and escalated when it stalls."""
+
+import time
+
+from src.control.loop import EventLoop
+from src.hardware.mock_gpio import MockGPIO
+from src.safety.interlock import InterlockedGPIO
+from src.safety.watchdog import Watchdog, WatchdogDevice
+
+
+class ForcedGPIO(MockGPIO):
+    def __init__(self):
+        super().__init__()
+        self.forced = []
+
+    def force_off(self):
+        self.forced.append(time.monotonic())
+        super().force_off()
+
+
+def _watchdog(tmp_path, loop, gpio, escalate_s=0.15):
+    fake = tmp_path / "watchdog"
+    fake.touch()
+    device = WatchdogDevice(fake, timeout_s=10)        # ioctl refused: not a device
+    recovered = []
+    dog = Watchdog(loop, device, gpio, loop.bridge, on_recover=lambda: recovered.append(True),
+                   interval_ms=20, tolerance_ms=15, escalate_s=escalate_s)
+    return dog, device, fake, recovered
+
+
+def test_a_punctual_loop_feeds_the_device_and_disarms_on_stop(tmp_path):
+    loop = EventLoop()
+    gpio = ForcedGPIO()
+    dog, device, fake, _ = _watchdog(tmp_path, loop, gpio)
+    dog.start()
+    loop.after(300, loop.stop)
+    loop.run()
+    dog.stop()
+    loop.close()
+    written = fake.read_bytes()
+    assert written.count(b"\0") >= 5
+    assert written.endswith(b"V")
+    assert not gpio.forced and dog.escalations == 0
+
+
+def test_a_stalled_loop_starves_the_device_and_forces_all_off(tmp_path):
+    loop = EventLoop()
+    gpio = ForcedGPIO()
+    relays = InterlockedGPIO(gpio)
+    relays.turn_on(3)
+    relays.turn_on(7)
+    dog, device, fake, recovered = _watchdog(tmp_path, loop, relays)
+    dog.on_recover = lambda: (relays.all_off(), recovered.append(True))
+    seen = {}
+
+    def wedge():
+        time.sleep(0.08)
+        seen["pets_early"] = device.pets
+        time.sleep(0.3)
+        seen["pets_late"] = device.pets
+        seen["forced"] = list(gpio.forced)
+
+    dog.start()
+    loop.after(100, wedge)
+    loop.after(600, loop.stop)
+    loop.run()
+    dog.stop(disarm=False)
+    loop.close()
+
+    assert seen["pets_early"] == seen["pets_late"]      # no feeding while wedged
+    assert len(seen["forced"]) == 1                     # escalated once, from the thread
+    assert recovered and not dog.escalated              # bookkeeping put right on return
+    assert relays.state.mask == 0
+    assert device.pets > seen["pets_late"]              # fed again once punctual
+    assert dog.late_beats >= 1 and dog.max_late_s > 0.3
+    assert not fake.read_bytes().endswith(b"V")
+
+
+def test_without_escalation_a_stall_only_starves_the_device(tmp_path):
+    loop = EventLoop()
+    gpio = ForcedGPIO()
+    dog, device, fake, recovered = _watchdog(tmp_path, loop, gpio, escalate_s=0)
+    seen = {}
+
+    def wedge():
+        pets = device.pets
+        time.sleep(0.3)
+        seen["pets"] = device.pets - pets
+
+    dog.start()
+    loop.after(100, wedge)
+    loop.after(500, loop.stop)
+    loop.run()
+    dog.stop()
+    loop.close()
+
+    assert seen["pets"] <= 1 and dog.missed_pets > 0
+    assert not gpio.forced and not recovered and dog.escalations == 0
+
+
+def test_interlocked_gpio_passes_force_off_through():
+    gpio = ForcedGPIO()
+    InterlockedGPIO(gpio).force_off()
+    assert gpio.forced